@@ -1,8 +1,6 @@
-import aiosqlite
-import gspread
-from datetime import datetime, timedelta
-from config import CREDENTIALS_FILE
-import asyncio
+from db import get_db
+from datetime import datetime
+from sheets_gateway import sheets
 import logging
 
 # Максимальные бонусы за активность согласно ТЗ
@@ -19,59 +17,10 @@ ACTIVITY_TYPES = {
     'comments': 'Комментарии и реакции'
 }
 
-async def init_activity_system():
-    """Инициализация системы активности"""
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Таблица активности пользователей
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS user_activity (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                activity_type TEXT NOT NULL,
-                activity_date TEXT,
-                points REAL DEFAULT 0,
-                auto_detected BOOLEAN DEFAULT TRUE,
-                user_reported BOOLEAN DEFAULT FALSE,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        """)
-        
-        # Таблица учета активности пользователем
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS user_activity_reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                report_date TEXT,
-                orders_plus INTEGER DEFAULT 0,
-                orders_minus INTEGER DEFAULT 0,
-                auctions_plus INTEGER DEFAULT 0,
-                auctions_minus INTEGER DEFAULT 0,
-                contests_plus INTEGER DEFAULT 0,
-                contests_minus INTEGER DEFAULT 0,
-                surveys_plus INTEGER DEFAULT 0,
-                surveys_minus INTEGER DEFAULT 0,
-                content_plus INTEGER DEFAULT 0,
-                content_minus INTEGER DEFAULT 0,
-                comments_plus INTEGER DEFAULT 0,
-                comments_minus INTEGER DEFAULT 0,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        """)
-        
-        # Добавляем поля активности в users
-        try:
-            await db.execute("ALTER TABLE users ADD COLUMN daily_activity_points REAL DEFAULT 0")
-            await db.execute("ALTER TABLE users ADD COLUMN monthly_activity_points REAL DEFAULT 0")
-            await db.execute("ALTER TABLE users ADD COLUMN current_activity TEXT DEFAULT ''")
-        except:
-            pass
-        
-        await db.commit()
-
 async def track_activity(user_id: int, activity_type: str, points: float = 0.01):
     """Отслеживание активности пользователя"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # Проверяем дневной лимит
             today = datetime.now().date().isoformat()
             cursor = await db.execute("""
@@ -108,7 +57,7 @@ async def save_user_activity_report(user_id: int, report_data: dict):
     try:
         today = datetime.now().date().isoformat()
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_activity_reports 
                 (user_id, report_date, orders_plus, orders_minus, auctions_plus, auctions_minus,
@@ -134,7 +83,7 @@ async def save_user_activity_report(user_id: int, report_data: dict):
 async def calculate_activity_score(user_id: int):
     """Расчет общего балла активности"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # Автоматически отслеженная активность
             cursor = await db.execute("""
                 SELECT activity_type, SUM(points) 
@@ -187,7 +136,7 @@ async def calculate_activity_score(user_id: int):
 async def export_activity_data():
     """Выгрузка данных активности в Google Sheets"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT u.user_id, u.username, u.full_name, 
                        u.daily_activity_points, u.monthly_activity_points,
@@ -204,8 +153,7 @@ async def export_activity_data():
         # Создаем таблицу активности (используем существующую или создаем новую)
         ACTIVITY_SHEET_URL = "https://docs.google.com/spreadsheets/d/1ActivityData123456789/edit?usp=sharing"
         
-        gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        sheet = gc.open_by_url(ACTIVITY_SHEET_URL).sheet1
+        sheet = await sheets.worksheet(ACTIVITY_SHEET_URL)
         
         # Заголовки
         headers = [
@@ -221,8 +169,7 @@ async def export_activity_data():
                 user_data[3], user_data[4], user_data[5], user_data[6]
             ])
         
-        sheet.clear()
-        sheet.update('A1', data)
+        await sheets.replace(sheet, data)
         
         logging.info("Activity data exported successfully")
         return True
@@ -231,45 +178,20 @@ async def export_activity_data():
         logging.error(f"Error exporting activity data: {e}")
         return False
 
-async def start_activity_system():
-    """Запуск системы активности"""
-    await init_activity_system()
-    asyncio.create_task(scheduled_activity_sync())
-
 async def scheduled_activity_sync():
-    """Планировщик системы активности"""
-    import pytz
+    """Расчёт и выгрузка активности в 17:00 МСК (задача планировщика, scheduler.py)"""
+    logging.info("Starting scheduled activity sync at 17:00 MSK")
     
-    while True:
-        try:
-            moscow_tz = pytz.timezone('Europe/Moscow')
-            now = datetime.now(moscow_tz)
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            
-            if now >= target_time:
-                target_time += timedelta(days=1)
-            
-            wait_seconds = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            
-            logging.info("Starting scheduled activity sync at 17:00 MSK")
-            
-            # Рассчитываем активность для всех пользователей
-            async with aiosqlite.connect("bot_database.db") as db:
-                cursor = await db.execute("SELECT user_id FROM users WHERE user_id != 0")
-                users = await cursor.fetchall()
-                
-                for (user_id,) in users:
-                    await calculate_activity_score(user_id)
-            
-            # Выгружаем данные
-            await export_activity_data()
-            
-            logging.info("✅ Activity sync completed successfully")
-                
-        except asyncio.CancelledError:
-            raise
-        except Exception as e:
-            logging.error(f"Error in scheduled activity sync: {e}")
+    # Рассчитываем активность для всех пользователей
+    async with get_db() as db:
+        cursor = await db.execute("SELECT user_id FROM users WHERE user_id != 0")
+        users = await cursor.fetchall()
         
-        await asyncio.sleep(3600)
\ No newline at end of file
+        for (user_id,) in users:
+            await calculate_activity_score(user_id)
+    
+    # Выгружаем данные
+    exported = await export_activity_data()
+    
+    logging.info("✅ Activity sync completed")
+    return exported
\ No newline at end of file
@@ -1,11 +1,12 @@
 from aiogram import F, types
 from aiogram.types import CallbackQuery, FSInputFile
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from config import ADMIN_ID, TELETHON_API_ID, TELETHON_API_HASH, TELETHON_PHONE_NUMBER
-from config import REFERRALS_SHEET_URL, COMMON_EXPORT_SHEET_URL, CREDENTIALS_FILE, INVESTORS_SHEET_URL, PARTNERS_SHEET_URL, \
+from config import ADMIN_ID, TELETHON_API_ID, TELETHON_API_HASH, TELETHON_PHONE_NUMBER, TELETHON_SESSION
+from config import REFERRALS_SHEET_URL, COMMON_EXPORT_SHEET_URL, INVESTORS_SHEET_URL, PARTNERS_SHEET_URL, \
     PARSING_USERS_GOOGLE_SHEET_URL, PARSING_USERS_GOOGLE_SHEET_URL
 from dispatcher import dp
 from bot_instance import bot
+from sheets_gateway import sheets
 import aiosqlite
 from utils import check_blocked_user
 from telethon.sync import TelegramClient
@@ -217,15 +218,12 @@ async def admin_parsing_links_handler(message: types.Message, state: FSMContext)
     df = pd.DataFrame(list(all_participants.values()))
     df.drop_duplicates(subset=['ID'], inplace=True)
     try:
-        import gspread
-        gc = gspread.service_account(filename="credentials.json")
-        sh = gc.open_by_url(url)
-        worksheet = sh.sheet1
-        worksheet.clear()
-        worksheet.update([df.columns.values.tolist()] + df.values.tolist())
+        sh = await sheets.spreadsheet(url)
+        worksheet = await sheets.worksheet(url)
+        await sheets.replace(worksheet, [df.columns.values.tolist()] + df.values.tolist())
         for email in ALLOWED_GOOGLE_SHEET_ACCOUNTS:
             try:
-                sh.share(email, perm_type='user', role='writer')
+                await sheets.run(sh.share, email, perm_type='user', role='writer')
             except Exception as e:
                 print(f"Ошибка при раздаче прав {email}: {e}")
         await message.answer(f"Готово! Данные сразу сохранены в Google-таблицу: {url}")
@@ -269,17 +267,14 @@ async def admin_parsing_file_handler(message: types.Message, state: FSMContext):
         await state.clear()
         return
     try:
-        import gspread
-        gc = gspread.service_account(filename="credentials.json")
-        sh = gc.open_by_url(url)
-        worksheet = sh.sheet1
+        sh = await sheets.spreadsheet(url)
+        worksheet = await sheets.worksheet(url)
         df = pd.DataFrame(list(all_participants.values()))
         df.drop_duplicates(subset=['ID'], inplace=True)
-        worksheet.clear()
-        worksheet.update([df.columns.values.tolist()] + df.values.tolist())
+        await sheets.replace(worksheet, [df.columns.values.tolist()] + df.values.tolist())
         for email in ALLOWED_GOOGLE_SHEET_ACCOUNTS:
             try:
-                sh.share(email, perm_type='user', role='writer')
+                await sheets.run(sh.share, email, perm_type='user', role='writer')
             except Exception as e:
                 print(f"Ошибка при раздаче прав {email}: {e}")
         await message.answer(f"Готово! Данные сразу сохранены в Google-таблицу: {url}")
@@ -350,7 +345,7 @@ async def get_comments_participants(client, entity, post_id=None):
         print(f"⚠️ Ошибка при парсинге комментариев: {e}")
     return participants
 
-user_client = TelegramClient('user_session', TELETHON_API_ID, TELETHON_API_HASH)
+user_client = TelegramClient(TELETHON_SESSION, TELETHON_API_ID, TELETHON_API_HASH)
 
 async def process_channel_for_admin(msg, links):
     try:
@@ -522,13 +517,10 @@ async def do_mailing_handler(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     await callback.message.edit_text("Начинаю рассылку по шаблону для первых 10 пользователей с российскими именами из таблицы парсинга...")
     import re
-    import gspread
-    from config import PARSING_USERS_GOOGLE_SHEET_URL, CREDENTIALS_FILE, INVITE_EXPORT_SHEET_URL, MAILING_ADDRESSES_SHEET_URL
+    from config import PARSING_USERS_GOOGLE_SHEET_URL, INVITE_EXPORT_SHEET_URL, MAILING_ADDRESSES_SHEET_URL
     from datetime import datetime
-    gc = gspread.service_account(filename=CREDENTIALS_FILE)
-    sh = gc.open_by_url(PARSING_USERS_GOOGLE_SHEET_URL)
-    worksheet = sh.sheet1
-    users = worksheet.get_all_records()
+    worksheet = await sheets.worksheet(PARSING_USERS_GOOGLE_SHEET_URL)
+    users = await sheets.get_all_records(worksheet)
     russian_names = re.compile(r"^[А-ЯЁ][а-яё]+$")
     filtered_users = []
     for u in users:
@@ -540,21 +532,18 @@ async def do_mailing_handler(callback: CallbackQuery, state: FSMContext):
     count = 0
     errors = 0
     showcase_photo_url = "https://autonet.bug.hr/img/tko-kupi-овай-бугатти-на-поклон-добива--rolls-ройс_NByTb_.jpg"
-    dst_gc = gspread.service_account(filename=CREDENTIALS_FILE)
-    dst_sh = dst_gc.open_by_url(INVITE_EXPORT_SHEET_URL)
-    dst_ws = dst_sh.sheet1
+    dst_ws = await sheets.worksheet(INVITE_EXPORT_SHEET_URL)
     invite_headers = [
         "User ID", "Имя:", "Фото:", "Истории:", "Пол:", "Номер телефона", "Дата парсинга", "ТГ ресурс для парсинга", "Дата рассылки / результат", "Дата подписки в ТГ канал / результат", "Дата инвайта в ТГ бот / результат", "Примечание"
     ]
-    if not dst_ws.get_all_values():
-        dst_ws.append_row(invite_headers)
+    if not await sheets.row_values(dst_ws, 1):
+        await sheets.append_row(dst_ws, invite_headers)
     try:
-        mailing_gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        mailing_sh = mailing_gc.open_by_url(MAILING_ADDRESSES_SHEET_URL)
-        mailing_ws = mailing_sh.sheet1
-        mailing_ws.clear()
+        mailing_ws = await sheets.worksheet(MAILING_ADDRESSES_SHEET_URL)
         if filtered_users:
-            mailing_ws.update([list(filtered_users[0].keys())] + [list(u.values()) for u in filtered_users])
+            await sheets.replace(mailing_ws, [list(filtered_users[0].keys())] + [list(u.values()) for u in filtered_users])
+        else:
+            await sheets.clear(mailing_ws)
     except Exception as e:
         print(f"Ошибка при обновлении листа 10 адресатов: {e}")
     for user in filtered_users:
@@ -592,7 +581,7 @@ async def do_mailing_handler(callback: CallbackQuery, state: FSMContext):
             "",  # Дата инвайта в ТГ бот / результат
             ""   # Примечание
         ]
-        dst_ws.append_row(invite_row)
+        await sheets.append_row(dst_ws, invite_row)
     await callback.message.answer(f"Рассылка завершена. Успешно отправлено: {count}, ошибок: {errors}. Только 10 адресатов с российскими именами.")
 
 @dp.callback_query(F.data == "invite")
@@ -619,24 +608,19 @@ async def invite_200_handler(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_caption(caption="Начинаю инвайт первых 200 пользователей...")
     else:
         await callback.message.edit_text(text="Начинаю инвайт первых 200 пользователей...")
-    import gspread
     from config import PARSING_USERS_GOOGLE_SHEET_URL
-    gc = gspread.service_account(filename=CREDENTIALS_FILE)
-    sh = gc.open_by_url(PARSING_USERS_GOOGLE_SHEET_URL)
-    worksheet = sh.sheet1
-    users = worksheet.get_all_records()
+    worksheet = await sheets.worksheet(PARSING_USERS_GOOGLE_SHEET_URL)
+    users = await sheets.get_all_records(worksheet)
     count = 0
     errors = 0
     showcase_photo_url = "https://autonet.bug.hr/img/tko-kupi-овай-бугатти-на-поклон-добива--rolls-ройс_NByTb_.jpg"
     from config import INVITE_EXPORT_SHEET_URL
-    dst_gc = gspread.service_account(filename=CREDENTIALS_FILE)
-    dst_sh = dst_gc.open_by_url(INVITE_EXPORT_SHEET_URL)
-    dst_ws = dst_sh.sheet1
+    dst_ws = await sheets.worksheet(INVITE_EXPORT_SHEET_URL)
     invite_headers = [
         "User ID", "Имя:", "Фото:", "Истории:", "Пол:", "Номер телефона", "Дата парсинга", "ТГ ресурс для парсинга", "Дата рассылки / результат", "Дата подписки в ТГ канал / результат", "Дата инвайта в ТГ бот / результат", "Примечание"
     ]
-    if not dst_ws.get_all_values():
-        dst_ws.append_row(invite_headers)
+    if not await sheets.row_values(dst_ws, 1):
+        await sheets.append_row(dst_ws, invite_headers)
     for user in users[:200]:
         user_id = user.get("ID")
         full_name = user.get("Имя") or user.get("Full Name") or "друг"
@@ -671,7 +655,7 @@ async def invite_200_handler(callback: CallbackQuery, state: FSMContext):
             "",  # Дата инвайта в ТГ бот / результат
             ""   # Примечание
         ]
-        dst_ws.append_row(invite_row)
+        await sheets.append_row(dst_ws, invite_row)
     await callback.message.answer(f"Инвайт завершён. Успешно отправлено: {count}, ошибок: {errors}.")
 
 @dp.message(StateFilter("waiting_for_invite_confirm"), Command("go"))
@@ -685,34 +669,25 @@ async def invite_cancel(message: types.Message, state: FSMContext):
     await message.answer("Инвайт отменён.")
 
 async def export_column_to_sheet(source_url, dest_url, column_index, header, run_time):
-    import gspread
-    gc = gspread.service_account(filename=CREDENTIALS_FILE)
-    src = gc.open_by_url(source_url).sheet1
-    dst = gc.open_by_url(dest_url).sheet1
-    data = src.get_all_values()
+    src = await sheets.worksheet(source_url)
+    dst = await sheets.worksheet(dest_url)
+    data = await sheets.get_all_values(src)
     if not data or len(data[0]) <= column_index:
         return False
     export_data = [[header]] + [[row[column_index]] for row in data[1:] if row[column_index]]
-    dst.clear()
-    dst.update('A1', export_data)
+    await sheets.replace(dst, export_data)
     return True
 
 async def export_users_by_column_with_flag(source_url, dest_url, column_index):
-    import gspread
-    gc = gspread.service_account(filename=CREDENTIALS_FILE)
-    src = gc.open_by_url(source_url).sheet1
-    dst = gc.open_by_url(dest_url).sheet1
-    data = src.get_all_values()
+    src = await sheets.worksheet(source_url)
+    dst = await sheets.worksheet(dest_url)
+    data = await sheets.get_all_values(src)
     if not data or len(data[0]) <= column_index:
         return False
     headers = data[0]
     export_headers = headers[:9] + [headers[column_index]]
     filtered_rows = [row[:9] + [row[column_index]] for row in data[1:] if len(row) > column_index and row[column_index]]
-    dst.clear()
-    if filtered_rows:
-        dst.update(values=[export_headers] + filtered_rows, range_name='A1')
-    else:
-        dst.update(values=[export_headers], range_name='A1')
+    await sheets.replace(dst, [export_headers] + filtered_rows)
     return True
 
 async def scheduled_exports():
@@ -871,12 +846,10 @@ async def invite_export_handler(callback: CallbackQuery, state: FSMContext):
         await callback.answer("Доступ запрещен.", show_alert=True)
         return
     await callback.message.edit_text("Начинаю экспорт данных для инвайта...")
-    import gspread
-    from config import PARSING_USERS_GOOGLE_SHEET_URL, INVITE_EXPORT_SHEET_URL, CREDENTIALS_FILE
-    gc = gspread.service_account(filename=CREDENTIALS_FILE)
-    src = gc.open_by_url(PARSING_USERS_GOOGLE_SHEET_URL).sheet1
-    dst = gc.open_by_url(INVITE_EXPORT_SHEET_URL).sheet1
-    data = src.get_all_records()
+    from config import PARSING_USERS_GOOGLE_SHEET_URL, INVITE_EXPORT_SHEET_URL
+    src = await sheets.worksheet(PARSING_USERS_GOOGLE_SHEET_URL)
+    dst = await sheets.worksheet(INVITE_EXPORT_SHEET_URL)
+    data = await sheets.get_all_records(src)
     if not data:
         await callback.message.answer("Нет данных для экспорта.")
         return
@@ -898,8 +871,9 @@ async def invite_export_handler(callback: CallbackQuery, state: FSMContext):
             row.get("Дата инвайта в ТГ бот / результат", ""),
             row.get("Примечание", "")
         ])
-    dst.clear()
-    dst.update([headers] + export_rows)
+    await sheets.replace(dst, [headers] + export_rows)
+    from invite_tracking import invalidate_invite_index
+    await invalidate_invite_index()
     await callback.message.answer(f"Экспорт завершён. Данные выгружены в Google-таблицу: {INVITE_EXPORT_SHEET_URL}")
 
 async def scheduled_invite_export():
@@ -912,12 +886,9 @@ async def scheduled_invite_export():
             next_run += timedelta(days=1)
         await asyncio.sleep((next_run - now).total_seconds())
         try:
-            import gspread
-            from config import PARSING_USERS_GOOGLE_SHEET_URL, INVITE_EXPORT_SHEET_URL, CREDENTIALS_FILE
-            gc = gspread.service_account(filename=CREDENTIALS_FILE)
-            src = gc.open_by_url(PARSING_USERS_GOOGLE_SHEET_URL).sheet1
-            dst = gc.open_by_url(INVITE_EXPORT_SHEET_URL).sheet1
-            data = src.get_all_records()
+            from config import PARSING_USERS_GOOGLE_SHEET_URL
+            src = await sheets.worksheet(PARSING_USERS_GOOGLE_SHEET_URL)
+            data = await sheets.get_all_records(src)
             if not data:
                 continue
             headers = [
@@ -939,9 +910,8 @@ async def scheduled_invite_export():
                     row.get("Дата инвайта в ТГ бот / результат", ""),
                     row.get("Примечание", "")
                 ])
-            dst = gc.open_by_url(COMMON_EXPORT_SHEET_URL).sheet1
-            dst.clear()
-            dst.update([headers] + export_rows)
+            dst = await sheets.worksheet(COMMON_EXPORT_SHEET_URL)
+            await sheets.replace(dst, [headers] + export_rows)
         except Exception as e:
             print(f"Ошибка при ежедневной выгрузке для инвайта: {e}")
 
@@ -955,11 +925,9 @@ async def scheduled_common_exports():
             next_9 += timedelta(days=1)
         await asyncio.sleep((next_9 - now).total_seconds())
         try:
-            import gspread
-            from config import PARSING_USERS_GOOGLE_SHEET_URL, INVITE_EXPORT_SHEET_URL, COMMON_EXPORT_SHEET_URL, CREDENTIALS_FILE
-            gc = gspread.service_account(filename=CREDENTIALS_FILE)
-            parsing_data = gc.open_by_url(PARSING_USERS_GOOGLE_SHEET_URL).sheet1.get_all_records()
-            mailing_data = gc.open_by_url(PARSING_USERS_GOOGLE_SHEET_URL).sheet1.get_all_records()
+            from config import PARSING_USERS_GOOGLE_SHEET_URL, COMMON_EXPORT_SHEET_URL
+            parsing_data = await sheets.get_all_records(await sheets.worksheet(PARSING_USERS_GOOGLE_SHEET_URL))
+            mailing_data = parsing_data
             all_data = parsing_data + mailing_data
             headers = [
                 "User ID", "Имя:", "Фото:", "Истории:", "Пол:", "Номер телефона:", "Дата парсинга", "ТГ ресурс для парсинга", "Дата рассылки / результат", "Дата подписки в ТГ канал / результат", "Дата инвайта в ТГ бот / результат", "Примечание"
@@ -980,9 +948,8 @@ async def scheduled_common_exports():
                     row.get("Дата инвайта в ТГ бот / результат", ""),
                     row.get("Примечание", "")
                 ])
-            dst = gc.open_by_url(COMMON_EXPORT_SHEET_URL).sheet1
-            dst.clear()
-            dst.update([headers] + export_rows)
+            dst = await sheets.worksheet(COMMON_EXPORT_SHEET_URL)
+            await sheets.replace(dst, [headers] + export_rows)
         except Exception as e:
             print(f"Ошибка при выгрузке в общую таблицу: {e}")
         now = datetime.now(pytz.timezone('Europe/Moscow'))
@@ -993,82 +960,23 @@ async def scheduled_common_exports():
         print("Выгрузка в основную таблицу подписчиков отключена по требованию заказчика")
 
 async def update_invite_table_with_channel_subs():
-    import gspread
-    from config import INVITE_EXPORT_SHEET_URL, CHANNEL_ID, CREDENTIALS_FILE, TELETHON_API_ID, TELETHON_API_HASH, TELETHON_PHONE_NUMBER
-    from datetime import datetime
-    try:
-        gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        ws = gc.open_by_url(INVITE_EXPORT_SHEET_URL).sheet1
-    except Exception as e:
-        print(f"Error accessing Google Sheets: {e}")
-        return
-    all_rows = ws.get_all_values()
-    if not all_rows or len(all_rows) < 2:
-        return
-    headers = all_rows[0]
-    user_id_idx = headers.index("Telegram ID")
-    sub_col_idx = headers.index("Дата подписки в ТГ канал / результат")
-    # Проверяем наличие нужного столбца, иначе ищем похожий
-    if "Дата подписки в ТГ канал / результат" in headers:
-        sub_col_idx = headers.index("Дата подписки в ТГ канал / результат")
-    else:
-        # Попробуем найти столбец с похожим названием
-        for idx, h in enumerate(headers):
-            if "подписк" in h and "канал" in h:
-                sub_col_idx = idx
-                break
-        else:
-            sub_col_idx = None  
-    from telethon.sync import TelegramClient
-    from telethon.sessions import StringSession
-    from telethon.tl.functions.channels import GetParticipantsRequest
-    from telethon.tl.types import ChannelParticipantsSearch
+    """Отметка в листе инвайта приглашённых, которые подписались на канал"""
+    from config import CHANNEL_ID, TELETHON_API_ID, TELETHON_API_HASH, TELETHON_PHONE_NUMBER
     from telethon import TelegramClient as AsyncTelegramClient
+    from invite_tracking import mark_channel_subscriptions
     async with AsyncTelegramClient('check_subs', TELETHON_API_ID, TELETHON_API_HASH) as client:
         await client.start(phone=TELETHON_PHONE_NUMBER)
         participants = await client.get_participants(CHANNEL_ID)
-        participant_ids = set(str(p.id) for p in participants)
-    for i, row in enumerate(all_rows[1:], start=2):
-        user_id = row[user_id_idx]
-        if user_id and not row[sub_col_idx] and user_id in participant_ids:
-            ws.update_cell(i, sub_col_idx + 1, str(datetime.now().date()) + " / OK")
+    await mark_channel_subscriptions(p.id for p in participants)
 
 async def update_invite_table_with_bot_joins(user_id):
-    import gspread
-    from config import INVITE_EXPORT_SHEET_URL, CREDENTIALS_FILE
-    from datetime import datetime
-    try:
-        gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        ws = gc.open_by_url(INVITE_EXPORT_SHEET_URL).sheet1
-    except Exception as e:
-        print(f"Error accessing Google Sheets for user {user_id}: {e}")
-        return
-    all_rows = ws.get_all_values()
-    if not all_rows or len(all_rows) < 2:
-        return
-    headers = all_rows[0]
-    # Поиск индекса user_id
-    user_id_idx = None
-    for idx, h in enumerate(headers):
-        if h.strip().lower() in ["user id", "telegram id", "id"]:
-            user_id_idx = idx
-            break
-    if user_id_idx is None:
-        # Если не найдено — логируем и выходим
-        print("[ERROR] Не найден столбец User ID/Telegram ID/ID в Google Sheet!")
-        return
-    sub_col_idx = None
-    for idx, h in enumerate(headers):
-        if "подписк" in h.lower() and "канал" in h.lower():
-            sub_col_idx = idx
-            break
-    if sub_col_idx is None:
-        print("[ERROR] Не найден столбец 'Дата подписки в ТГ канал / результат' в Google Sheet!")
-        return
-    for i, row in enumerate(all_rows[1:], start=2):
-        if row[user_id_idx] == str(user_id) and not row[sub_col_idx]:
-            ws.update_cell(i, sub_col_idx + 1, str(datetime.now().date()) + " / OK")
-            break
+    """
+    Отметка в листе инвайта о входе в бота. Вызывается из /start, поэтому
+    лист здесь не читается: отметка ставится в очередь выгрузок и
+    записывается вместе с остальными (invite_tracking.py).
+    """
+    from sheets_outbox import enqueue
+    await enqueue("invite_bot_joins", {"user_id": user_id})
 
 @dp.callback_query(F.data == "mailing_addresses")
 async def mailing_addresses_handler(callback: CallbackQuery):
@@ -1091,10 +999,9 @@ async def mailing_addresses_handler(callback: CallbackQuery):
     await callback.answer()
 
 async def scheduled_common_export():
-    import gspread
     import pytz
     from datetime import datetime, timedelta
-    from config import MAILING_ADDRESSES_SHEET_URL, PARSING_USERS_GOOGLE_SHEET_URL, COMMON_EXPORT_SHEET_URL, CREDENTIALS_FILE
+    from config import MAILING_ADDRESSES_SHEET_URL, PARSING_USERS_GOOGLE_SHEET_URL, COMMON_EXPORT_SHEET_URL
     while True:
         now = datetime.now(pytz.timezone('Europe/Moscow'))
         next_run = now.replace(hour=9, minute=0, second=0, microsecond=0)
@@ -1102,21 +1009,21 @@ async def scheduled_common_export():
             next_run += timedelta(days=1)
         await asyncio.sleep((next_run - now).total_seconds())
         try:
-            gc = gspread.service_account(filename=CREDENTIALS_FILE)
-            mailing_ws = gc.open_by_url(MAILING_ADDRESSES_SHEET_URL).sheet1
-            parsing_ws = gc.open_by_url(PARSING_USERS_GOOGLE_SHEET_URL).sheet1
-            common_ws = gc.open_by_url(COMMON_EXPORT_SHEET_URL).sheet1
-            mailing_data = mailing_ws.get_all_values()
-            parsing_data = parsing_ws.get_all_values()
+            mailing_ws = await sheets.worksheet(MAILING_ADDRESSES_SHEET_URL)
+            parsing_ws = await sheets.worksheet(PARSING_USERS_GOOGLE_SHEET_URL)
+            common_ws = await sheets.worksheet(COMMON_EXPORT_SHEET_URL)
+            mailing_data = await sheets.get_all_values(mailing_ws)
+            parsing_data = await sheets.get_all_values(parsing_ws)
             headers = mailing_data[0] if mailing_data else (parsing_data[0] if parsing_data else [])
             all_rows = []
             if mailing_data:
                 all_rows += mailing_data[1:]
             if parsing_data:
                 all_rows += parsing_data[1:]
-            common_ws.clear()
             if headers:
-                common_ws.update([headers] + all_rows)
+                await sheets.replace(common_ws, [headers] + all_rows)
+            else:
+                await sheets.clear(common_ws)
         except Exception as e:
             print(f"Ошибка при ежедневной выгрузке в общую таблицу: {e}")
 
@@ -3,8 +3,9 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
 from dispatcher import dp
+from taxonomy_cache import invalidate_taxonomy
 from utils import check_blocked_user
 from config import ADMIN_ID
 from datetime import datetime
@@ -59,7 +60,7 @@ async def select_catalog_type(callback: CallbackQuery, state: FSMContext):
     await state.update_data(catalog_type=catalog_type)
 
     # Получаем существующие категории
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, name, parent_id FROM categories 
             WHERE catalog_type = ? 
@@ -152,12 +153,13 @@ async def process_category_name(message: Message, state: FSMContext):
     catalog_type = data.get('catalog_type')
 
     # Сохраняем категорию в БД
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute("""
             INSERT INTO categories (catalog_type, name, created_at) 
             VALUES (?, ?, ?)
         """, (catalog_type, category_name, datetime.now().isoformat()))
         await db.commit()
+    invalidate_taxonomy()
 
     await message.answer(f"✅ Категория '{category_name}' успешно добавлена!")
 
@@ -187,7 +189,7 @@ async def add_subcategory_start(callback: CallbackQuery, state: FSMContext):
     catalog_type = data.get('catalog_type')
 
     # Получаем родительские категории
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, name FROM categories 
             WHERE catalog_type = ? AND parent_id IS NULL
@@ -227,7 +229,7 @@ async def select_parent_category(callback: CallbackQuery, state: FSMContext):
     await state.update_data(parent_id=parent_id)
 
     # Получаем информацию о родительской категории
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT name, catalog_type FROM categories WHERE id = ?
         """, (parent_id,))
@@ -259,7 +261,7 @@ async def edit_category_start(callback: CallbackQuery, state: FSMContext):
     category_id = int(callback.data.split("_")[-1])
 
     # Получаем информацию о категории
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT name, catalog_type FROM categories WHERE id = ?
         """, (category_id,))
@@ -303,7 +305,7 @@ async def delete_category(callback: CallbackQuery):
     category_id = int(callback.data.split("_")[-1])
 
     # Получаем информацию о категории
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT name, catalog_type FROM categories WHERE id = ?
         """, (category_id,))
@@ -315,19 +317,22 @@ async def delete_category(callback: CallbackQuery):
 
     category_name, catalog_type = category
 
-    # Проверяем, есть ли подкатегории
-    cursor = await db.execute("""
-        SELECT COUNT(*) FROM categories WHERE parent_id = ?
-    """, (category_id,))
-    has_children = (await cursor.fetchone())[0] > 0
+    async with get_db(write=True) as db:
+        # Проверяем, есть ли подкатегории
+        cursor = await db.execute("""
+            SELECT COUNT(*) FROM categories WHERE parent_id = ?
+        """, (category_id,))
+        has_children = (await cursor.fetchone())[0] > 0
+
+        if not has_children:
+            # Удаляем категорию
+            await db.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+            await db.commit()
 
     if has_children:
         await callback.answer("❌ Нельзя удалить категорию с подкатегориями", show_alert=True)
         return
-
-    # Удаляем категорию
-    await db.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-    await db.commit()
+    invalidate_taxonomy()
 
     await callback.answer(f"✅ Категория '{category_name}' удалена", show_alert=True)
 
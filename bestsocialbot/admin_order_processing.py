@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-import aiosqlite
+from db import get_db
 from datetime import datetime
 from config import ADMIN_ID
 from dispatcher import dp
@@ -157,29 +157,29 @@ async def process_new_photo(message: Message, state: FSMContext):
     table_name = "order_requests"
     
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             await db.execute(f"UPDATE {table_name} SET images = ? WHERE id = ?", (images_json, request_id))
             await db.commit()
             
-            await message.answer("✅ Фото обновлено!")
-            
-            # Show next steps
-            builder = InlineKeyboardBuilder()
-            builder.add(types.InlineKeyboardButton(
-                text="✏️ Продолжить редактирование", 
-                callback_data=f"edit_req_{item_type}_{request_id}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text="✅ Одобрить и добавить в каталог", 
-                callback_data=f"approve_req_{item_type}_{request_id}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text="🔙 Вернуться к просмотру", 
-                callback_data=f"view_item_{item_type}_{request_id}"
-            ))
-            builder.adjust(1)
-            
-            await message.answer("Что дальше?", reply_markup=builder.as_markup())
+        await message.answer("✅ Фото обновлено!")
+        
+        # Show next steps
+        builder = InlineKeyboardBuilder()
+        builder.add(types.InlineKeyboardButton(
+            text="✏️ Продолжить редактирование", 
+            callback_data=f"edit_req_{item_type}_{request_id}"
+        ))
+        builder.add(types.InlineKeyboardButton(
+            text="✅ Одобрить и добавить в каталог", 
+            callback_data=f"approve_req_{item_type}_{request_id}"
+        ))
+        builder.add(types.InlineKeyboardButton(
+            text="🔙 Вернуться к просмотру", 
+            callback_data=f"view_item_{item_type}_{request_id}"
+        ))
+        builder.adjust(1)
+        
+        await message.answer("Что дальше?", reply_markup=builder.as_markup())
             
     except Exception as e:
         await message.answer(f"❌ Ошибка при сохранении фото: {e}")
@@ -198,20 +198,20 @@ async def process_new_value(message: Message, state: FSMContext):
     table_name = "order_requests" # Using order_requests for all types as per recent migration
     
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
-            # Проверяем, существует ли колонка (simple check)
-            # В реальном проекте лучше использовать безопасный маппинг
-            allowed_fields = [
-                "title", "additional_info", "price", "category", 
-                "item_class", "item_type_detail", "item_kind",
-                "purpose", "condition", "detailed_specs", "specifications", "contact"
-            ]
-            
-            if field not in allowed_fields:
-                await message.answer("❌ Ошибка: недопустимое поле.")
-                await state.clear()
-                return
+        # Проверяем, существует ли колонка (simple check)
+        # В реальном проекте лучше использовать безопасный маппинг
+        allowed_fields = [
+            "title", "additional_info", "price", "category", 
+            "item_class", "item_type_detail", "item_kind",
+            "purpose", "condition", "detailed_specs", "specifications", "contact"
+        ]
+        
+        if field not in allowed_fields:
+            await message.answer("❌ Ошибка: недопустимое поле.")
+            await state.clear()
+            return
 
+        async with get_db(write=True) as db:
             await db.execute(f"UPDATE {table_name} SET {field} = ? WHERE id = ?", (new_value, request_id))
             await db.commit()
             
@@ -221,26 +221,26 @@ async def process_new_value(message: Message, state: FSMContext):
             columns = [description[0] for description in cursor.description]
             updated_data = dict(zip(columns, row))
             
-            # Перегенерируем уведомление (опционально) или просто подтверждаем
-            await message.answer(f"✅ Поле обновлено!\nНовое значение: {new_value}")
-            
-            # Предлагаем продолжить редактирование или закончить
-            builder = InlineKeyboardBuilder()
-            builder.add(types.InlineKeyboardButton(
-                text="✏️ Продолжить редактирование", 
-                callback_data=f"edit_req_{item_type}_{request_id}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text="✅ Одобрить и добавить в каталог", 
-                callback_data=f"approve_req_{item_type}_{request_id}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text="🔙 Вернуться к просмотру", 
-                callback_data=f"view_item_{item_type}_{request_id}"
-            ))
-            builder.adjust(1)
-            
-            await message.answer("Что дальше?", reply_markup=builder.as_markup())
+        # Перегенерируем уведомление (опционально) или просто подтверждаем
+        await message.answer(f"✅ Поле обновлено!\nНовое значение: {new_value}")
+        
+        # Предлагаем продолжить редактирование или закончить
+        builder = InlineKeyboardBuilder()
+        builder.add(types.InlineKeyboardButton(
+            text="✏️ Продолжить редактирование", 
+            callback_data=f"edit_req_{item_type}_{request_id}"
+        ))
+        builder.add(types.InlineKeyboardButton(
+            text="✅ Одобрить и добавить в каталог", 
+            callback_data=f"approve_req_{item_type}_{request_id}"
+        ))
+        builder.add(types.InlineKeyboardButton(
+            text="🔙 Вернуться к просмотру", 
+            callback_data=f"view_item_{item_type}_{request_id}"
+        ))
+        builder.adjust(1)
+        
+        await message.answer("Что дальше?", reply_markup=builder.as_markup())
             
     except Exception as e:
         await message.answer(f"❌ Ошибка при сохранении: {e}")
@@ -286,25 +286,26 @@ async def process_reject_reason(message: Message, state: FSMContext):
     # Обновляем статус в БД
     table_name = "order_requests"
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Проверяем существование записи
         cursor = await db.execute(f"SELECT user_id, title FROM {table_name} WHERE id = ?", (request_id,))
         row = await cursor.fetchone()
         
         if row:
-            user_id, title = row
             await db.execute(f"UPDATE {table_name} SET status = 'rejected' WHERE id = ?", (request_id,))
             await db.commit()
-            
-            # Уведомляем пользователя
-            await send_system_message(
-                user_id,
-                f"❌ Заявка отклонена: {title}",
-                f"Ваша заявка была отклонена администратором.\nПричина: {reason}"
-            )
-            await message.answer("✅ Заявка отклонена, пользователь уведомлен.")
-        else:
-            await message.answer("❌ Заявка не найдена.")
+
+    if row:
+        user_id, title = row
+        # Уведомляем пользователя
+        await send_system_message(
+            user_id,
+            f"❌ Заявка отклонена: {title}",
+            f"Ваша заявка была отклонена администратором.\nПричина: {reason}"
+        )
+        await message.answer("✅ Заявка отклонена, пользователь уведомлен.")
+    else:
+        await message.answer("❌ Заявка не найдена.")
 
     await state.clear()
 
@@ -348,17 +349,20 @@ async def approve_request_start(callback: CallbackQuery, state: FSMContext):
 async def approve_cart_order(message: Message, request_id: int):
     """Одобрение заказа из корзины (смена статуса на confirmed/completed) + создание заказов"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             # Получаем данные
             cursor = await db.execute("SELECT user_id, title, additional_info FROM order_requests WHERE id = ?", (request_id,))
             row = await cursor.fetchone()
-            
-            if not row:
-                await message.answer("❌ Заказ не найден")
-                return
 
-            user_id, title, additional_info = row
-            
+        if not row:
+            await message.answer("❌ Заказ не найден")
+            return
+
+        user_id, title, additional_info = row
+        # Продавцов уведомляем после записи заказов
+        seller_notices = []
+
+        async with get_db(write=True) as db:
             # Парсим товары из описания (поскольку cart_order удаляет оригинальные записи)
             # Формат: "   🆔 ID заявки: 123"
             created_orders_count = 0
@@ -384,13 +388,8 @@ async def approve_cart_order(message: Message, request_id: int):
                         
                         created_orders_count += 1
                         
-                        # Опционально: можно уведомить продавца здесь
                         if seller_id and seller_id != user_id:
-                             await send_system_message(
-                                seller_id,
-                                "📦 Новый заказ!",
-                                f"Пользователь оформил заказ на ваш товар (ID {item_id}).\nПроверьте раздел 'Мои заказы' или свяжитесь с покупателем."
-                            )
+                            seller_notices.append((seller_id, item_id))
 
                     except Exception as e:
                         print(f"Ошибка при создании заказа для item_id {item_id_str}: {e}")
@@ -398,26 +397,33 @@ async def approve_cart_order(message: Message, request_id: int):
             # Обновляем статус самой заявки-корзины
             await db.execute("UPDATE order_requests SET status = 'completed' WHERE id = ?", (request_id,))
             await db.commit()
-            
-            # Уведомляем пользователя
+
+        for seller_id, item_id in seller_notices:
             await send_system_message(
-                user_id,
-                f"✅ Заказ выполнен: {title}",
-                f"Ваш заказ #{request_id} был успешно обработан и закрыт администратором.\n"
-                f"Создано отдельных заказов: {created_orders_count}\n"
-                f"Спасибо за покупку!"
+                seller_id,
+                "📦 Новый заказ!",
+                f"Пользователь оформил заказ на ваш товар (ID {item_id}).\nПроверьте раздел 'Мои заказы' или свяжитесь с покупателем."
             )
+
+        # Уведомляем пользователя
+        await send_system_message(
+            user_id,
+            f"✅ Заказ выполнен: {title}",
+            f"Ваш заказ #{request_id} был успешно обработан и закрыт администратором.\n"
+            f"Создано отдельных заказов: {created_orders_count}\n"
+            f"Спасибо за покупку!"
+        )
             
-            # Кнопка назад к списку заявок
-            builder = InlineKeyboardBuilder()
-            builder.add(types.InlineKeyboardButton(text="◀️ Назад в админку", callback_data="back_to_admin"))
-            builder.adjust(1)
-
-            await message.answer(
-                f"✅ Заказ #{request_id} ('{title}') успешно закрыт/выполнен.\n"
-                f"Создано заказов в БД: {created_orders_count}",
-                reply_markup=builder.as_markup()
-            )
+        # Кнопка назад к списку заявок
+        builder = InlineKeyboardBuilder()
+        builder.add(types.InlineKeyboardButton(text="◀️ Назад в админку", callback_data="back_to_admin"))
+        builder.adjust(1)
+
+        await message.answer(
+            f"✅ Заказ #{request_id} ('{title}') успешно закрыт/выполнен.\n"
+            f"Создано заказов в БД: {created_orders_count}",
+            reply_markup=builder.as_markup()
+        )
             
     except Exception as e:
         await message.answer(f"❌ Ошибка при одобрении заказа: {e}")
@@ -458,7 +464,7 @@ async def approve_and_add_to_catalog(request_id, item_type, supplier_id):
         source_table = "order_requests"
         target_table = "auto_services" if item_type == "service" else "auto_products"
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # 1. Получаем данные заявки
             cursor = await db.execute(f"SELECT * FROM {source_table} WHERE id = ?", (request_id,))
             row = await cursor.fetchone()
@@ -537,28 +543,33 @@ async def approve_and_add_to_catalog(request_id, item_type, supplier_id):
             
             await db.commit()
             
-            # Export to Google Sheet (Заявки)
+            # Export to Google Sheet (Заявки) через очередь выгрузок
             try:
-                from automarket_sheets import export_request_to_sheet
-                await export_request_to_sheet(request_id, item_type, catalog_id)
+                from sheets_outbox import enqueue
+                await enqueue("approved_requests", {
+                    "request_id": request_id,
+                    "item_type": item_type,
+                    "catalog_id": catalog_id,
+                    "approved_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                })
             except Exception as e:
-                print(f"Ошибка при вызове экспорта заявки: {e}")
+                print(f"Ошибка при постановке экспорта заявки в очередь: {e}")
                 
             # 4. Обновляем статус заявки
             await db.execute(f"UPDATE {source_table} SET status = 'approved' WHERE id = ?", (request_id,))
             await db.commit()
             
-            # 5. Уведомляем пользователя
-            user_id = request_data.get('user_id')
-            await send_system_message(
-                user_id,
-                f"✅ Заявка одобрена: {request_data.get('title')}",
-                f"Ваша карточка была добавлена в каталог магазина!\n\n"
-                f"👤 **Поставщик:** [Открыть профиль](tg://user?id={supplier_id}) (ID: {supplier_id})\n"
-                f"Используйте эту ссылку для прямой связи."
-            )
-            
-            return True
+        # 5. Уведомляем пользователя
+        user_id = request_data.get('user_id')
+        await send_system_message(
+            user_id,
+            f"✅ Заявка одобрена: {request_data.get('title')}",
+            f"Ваша карточка была добавлена в каталог магазина!\n\n"
+            f"👤 **Поставщик:** [Открыть профиль](tg://user?id={supplier_id}) (ID: {supplier_id})\n"
+            f"Используйте эту ссылку для прямой связи."
+        )
+        
+        return True
             
     except Exception as e:
         print(f"Ошибка в approve_and_add_to_catalog: {e}")
@@ -2,7 +2,7 @@ from aiogram import types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
 from datetime import datetime
 from dispatcher import dp
 from config import ADMIN_ID
@@ -47,7 +47,7 @@ async def partners_passive_list(callback: types.CallbackQuery):
         await callback.answer("Доступ запрещен", show_alert=True)
         return
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT DISTINCT u.user_id, u.username, u.full_name, u.business, 
                    u.products_services, u.account_status
@@ -94,7 +94,7 @@ async def partners_list(callback: types.CallbackQuery):
         await callback.answer("Доступ запрещен", show_alert=True)
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT DISTINCT u.user_id, u.username, u.full_name, u.business, 
                    u.products_services, u.account_status, COUNT(ap.id) as products_count
@@ -145,7 +145,7 @@ async def investors_list(callback: types.CallbackQuery):
         await callback.answer("Доступ запрещен", show_alert=True)
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT u.user_id, u.username, u.full_name, u.business, 
                    ub.bonus_total, ub.current_balance, u.account_status
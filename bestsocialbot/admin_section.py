@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
 from dispatcher import dp
 from utils import check_blocked_user
 from config import ADMIN_ID
@@ -91,7 +91,7 @@ async def show_catalog_section(callback: CallbackQuery, state: FSMContext):
 
     section_name = section_names.get(section, section)
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Проверяем, существует ли таблица
         cursor = await db.execute(f"""
             SELECT name FROM sqlite_master 
@@ -118,30 +118,30 @@ async def show_catalog_section(callback: CallbackQuery, state: FSMContext):
         """)
         items = await cursor.fetchall()
 
-        builder = InlineKeyboardBuilder()
-        for item_id, item_name in items:
-            builder.add(types.InlineKeyboardButton(
-                text=f"✏️ {item_name}",
-                callback_data=f"edit:{section}:{item_id}:{item_name}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text=f"❌ {item_name}",
-                callback_data=f"delete:{section}:{item_id}"
-            ))
-
-        builder.add(types.InlineKeyboardButton(text="➕ Добавить", callback_data=f"add:{section}"))
-        builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="manage_categories"))
-
-        # Оптимальное расположение: кнопки редактирования и удаления по 2 в строке
-        if items:
-            # По 2 кнопки (редактировать/удалить) для каждой записи, затем добавить и назад
-            builder.adjust(2, 2, 2, 2, 1, 1)
-        else:
-            builder.adjust(1, 1)  # Только добавить и назад
-
-        await callback.message.edit_text(
-            text=f"📁 **Управление: {section_name}**\n\n"
-                 f"Текущие записи (✏️ - редактировать, ❌ - удалить):",
-            reply_markup=builder.as_markup()
-        )
-        await callback.answer()
\ No newline at end of file
+    builder = InlineKeyboardBuilder()
+    for item_id, item_name in items:
+        builder.add(types.InlineKeyboardButton(
+            text=f"✏️ {item_name}",
+            callback_data=f"edit:{section}:{item_id}:{item_name}"
+        ))
+        builder.add(types.InlineKeyboardButton(
+            text=f"❌ {item_name}",
+            callback_data=f"delete:{section}:{item_id}"
+        ))
+
+    builder.add(types.InlineKeyboardButton(text="➕ Добавить", callback_data=f"add:{section}"))
+    builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="manage_categories"))
+
+    # Оптимальное расположение: кнопки редактирования и удаления по 2 в строке
+    if items:
+        # По 2 кнопки (редактировать/удалить) для каждой записи, затем добавить и назад
+        builder.adjust(2, 2, 2, 2, 1, 1)
+    else:
+        builder.adjust(1, 1)  # Только добавить и назад
+
+    await callback.message.edit_text(
+        text=f"📁 **Управление: {section_name}**\n\n"
+             f"Текущие записи (✏️ - редактировать, ❌ - удалить):",
+        reply_markup=builder.as_markup()
+    )
+    await callback.answer()
\ No newline at end of file
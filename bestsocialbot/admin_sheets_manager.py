@@ -3,15 +3,12 @@
 Позволяет администраторам управлять всеми данными бота через Google таблицы
 """
 
-import gspread
-import aiosqlite
+from db import get_db
+from sheets_gateway import sheets
+from sheets_export import stream_to_sheet
+from taxonomy_cache import invalidate_taxonomy
 import asyncio
-import logging
 from datetime import datetime
-from config import CREDENTIALS_FILE
-
-def get_google_sheets_client():
-    return gspread.service_account(filename=CREDENTIALS_FILE)
 
 async def sync_categories_from_sheet():
     """Синхронизация категорий из Google Sheets"""
@@ -20,11 +17,10 @@ async def sync_categories_from_sheet():
         if not AUTO_CATEGORIES_SHEET_URL:
             return False
             
-        gc = get_google_sheets_client()
-        sheet = gc.open_by_url(AUTO_CATEGORIES_SHEET_URL).sheet1
-        data = sheet.get_all_records()
+        sheet = await sheets.worksheet(AUTO_CATEGORIES_SHEET_URL)
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 category_id = row.get('ID категории')
                 if not category_id:
@@ -41,6 +37,7 @@ async def sync_categories_from_sheet():
                     category_id
                 ))
             await db.commit()
+        invalidate_taxonomy()
         
         print("Категории синхронизированы из Google Sheets")
         return True
@@ -52,35 +49,27 @@ async def sync_categories_to_sheet():
     """Экспорт категорий в Google Sheets"""
     try:
         from config import AUTO_CATEGORIES_SHEET_URL
-        gc = get_google_sheets_client()
-        
         if not AUTO_CATEGORIES_SHEET_URL:
             print("⚠️ AUTO_CATEGORIES_SHEET_URL не указан в config.py")
             return False
-        sheet = gc.open_by_url(AUTO_CATEGORIES_SHEET_URL).sheet1
+        sheet = await sheets.worksheet(AUTO_CATEGORIES_SHEET_URL)
         
         headers = ["ID категории", "Название категории", "Описание", "Активна", "Дата создания"]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("SELECT id, name, description, is_active, created_at FROM auto_categories ORDER BY id")
-            categories = await cursor.fetchall()
-        
-        data = [headers]
-        for category in categories:
-            row = [
+        def make_row(category):
+            return [
                 category[0],  # ID
                 category[1] or "",  # Название
                 category[2] or "",  # Описание
                 "Да" if category[3] else "Нет",  # Активна
                 category[4][:10] if category[4] else ""  # Дата
             ]
-            data.append(row)
         
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT id, name, description, is_active, created_at FROM auto_categories ORDER BY id
+        """, make_row=make_row)
         
-        print(f"Экспортировано {len(categories)} категорий в Google Sheets")
+        print(f"Экспортировано {count} категорий в Google Sheets")
         return True
     except Exception as e:
         print(f"Ошибка экспорта категорий: {e}")
@@ -93,11 +82,10 @@ async def sync_user_bonuses_from_sheet():
         if not USER_BONUSES_SHEET_URL:
             return False
             
-        gc = get_google_sheets_client()
-        sheet = gc.open_by_url(USER_BONUSES_SHEET_URL).sheet1
-        data = sheet.get_all_records()
+        sheet = await sheets.worksheet(USER_BONUSES_SHEET_URL)
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 user_id = row.get('Telegram ID')
                 if not user_id:
@@ -125,28 +113,15 @@ async def sync_user_bonuses_to_sheet():
     """Экспорт бонусов пользователей в Google Sheets"""
     try:
         from config import USER_BONUSES_SHEET_URL
-        gc = get_google_sheets_client()
-        
         if not USER_BONUSES_SHEET_URL:
             print("⚠️ USER_BONUSES_SHEET_URL не указан в config.py")
             return False
-        sheet = gc.open_by_url(USER_BONUSES_SHEET_URL).sheet1
+        sheet = await sheets.worksheet(USER_BONUSES_SHEET_URL)
         
         headers = ["Telegram ID", "Username", "ФИО", "ИТОГО бонусов", "ТЕКУЩИЙ БАЛАНС", "Последнее обновление"]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT u.user_id, u.username, u.full_name, 
-                       COALESCE(ub.bonus_total, 0), COALESCE(ub.current_balance, 0), ub.last_updated
-                FROM users u
-                LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
-                ORDER BY u.user_id
-            """)
-            bonuses = await cursor.fetchall()
-        
-        data = [headers]
-        for bonus in bonuses:
-            row = [
+        def make_row(bonus):
+            return [
                 bonus[0],  # User ID
                 bonus[1] or "",  # Username
                 bonus[2] or "",  # ФИО
@@ -154,13 +129,16 @@ async def sync_user_bonuses_to_sheet():
                 bonus[4] or 0,  # Баланс
                 bonus[5][:19] if bonus[5] else ""  # Дата
             ]
-            data.append(row)
         
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT u.user_id, u.username, u.full_name, 
+                   COALESCE(ub.bonus_total, 0), COALESCE(ub.current_balance, 0), ub.last_updated
+            FROM users u
+            LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
+            ORDER BY u.user_id
+        """, make_row=make_row)
         
-        print(f"Экспортировано {len(bonuses)} записей бонусов в Google Sheets")
+        print(f"Экспортировано {count} записей бонусов в Google Sheets")
         return True
     except Exception as e:
         print(f"Ошибка экспорта бонусов: {e}")
@@ -173,11 +151,10 @@ async def sync_reviews_from_sheet():
         if not REVIEWS_SHEET_URL:
             return False
             
-        gc = get_google_sheets_client()
-        sheet = gc.open_by_url(REVIEWS_SHEET_URL).sheet1
-        data = sheet.get_all_records()
+        sheet = await sheets.worksheet(REVIEWS_SHEET_URL)
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 review_id = row.get('ID отзыва')
                 if not review_id:
@@ -205,29 +182,16 @@ async def sync_reviews_to_sheet():
     """Экспорт отзывов в Google Sheets"""
     try:
         from config import REVIEWS_SHEET_URL
-        gc = get_google_sheets_client()
-        
         if not REVIEWS_SHEET_URL:
             print("⚠️ REVIEWS_SHEET_URL не указан в config.py")
             return False
-        sheet = gc.open_by_url(REVIEWS_SHEET_URL).sheet1
+        sheet = await sheets.worksheet(REVIEWS_SHEET_URL)
         
         headers = ["ID отзыва", "Telegram ID", "Username", "Тип заказа", "ID товара/услуги", 
                   "Рейтинг", "Комментарий", "Одобрен", "Дата создания"]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT r.id, r.user_id, u.username, r.order_type, r.item_id,
-                       r.rating, r.comment, r.is_approved, r.created_at
-                FROM reviews r
-                LEFT JOIN users u ON r.user_id = u.user_id
-                ORDER BY r.created_at DESC
-            """)
-            reviews = await cursor.fetchall()
-        
-        data = [headers]
-        for review in reviews:
-            row = [
+        def make_row(review):
+            return [
                 review[0],  # ID
                 review[1],  # User ID
                 review[2] or "",  # Username
@@ -238,13 +202,16 @@ async def sync_reviews_to_sheet():
                 "Да" if review[7] else "Нет",  # Одобрен
                 review[8][:19] if review[8] else ""  # Дата
             ]
-            data.append(row)
         
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT r.id, r.user_id, u.username, r.order_type, r.item_id,
+                   r.rating, r.comment, r.is_approved, r.created_at
+            FROM reviews r
+            LEFT JOIN users u ON r.user_id = u.user_id
+            ORDER BY r.created_at DESC
+        """, make_row=make_row)
         
-        print(f"Экспортировано {len(reviews)} отзывов в Google Sheets")
+        print(f"Экспортировано {count} отзывов в Google Sheets")
         return True
     except Exception as e:
         print(f"Ошибка экспорта отзывов: {e}")
@@ -310,29 +277,5 @@ async def instant_export_review(review_id: int):
         print(f"❌ Ошибка выгрузки отзыва: {e}")
 
 async def scheduled_admin_tables_sync():
-    """Периодическая загрузка административных данных в 17:00 МСК"""
-    from datetime import datetime
-    while True:
-        try:
-            # Ждем до 17:00 МСК
-            now = datetime.now()
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            
-            if now > target_time:
-                target_time = target_time.replace(day=target_time.day + 1)
-            
-            wait_seconds = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            
-            # Загрузка административных данных в 17:00
-            await load_admin_data_from_sheets()
-            
-        except Exception as e:
-            logging.error(f"Ошибка в scheduled_admin_tables_sync: {e}")
-            await asyncio.sleep(3600)  # При ошибке ждем час
-
-# Функция для добавления в main.py
-async def start_admin_sheets_sync():
-    """Запуск синхронизации административных таблиц"""
-    asyncio.create_task(scheduled_admin_tables_sync())
-    print("Запущена синхронизация административных таблиц")
\ No newline at end of file
+    """Загрузка административных данных в 17:00 МСК (задача планировщика, scheduler.py)"""
+    return await load_admin_data_from_sheets()
\ No newline at end of file
@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-import aiosqlite
+from db import get_db
 import json
 from datetime import datetime
 from dispatcher import dp
@@ -35,7 +35,7 @@ async def products_catalog(callback: CallbackQuery):
     if await check_blocked_user(callback):
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT ap.id, ap.title, ap.price, u.username
             FROM auto_products ap
@@ -82,7 +82,7 @@ async def services_catalog(callback: CallbackQuery):
     if await check_blocked_user(callback):
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT as_.id, as_.title, as_.price, u.username
             FROM auto_services as_
@@ -135,7 +135,7 @@ async def view_item_DISABLED(callback: CallbackQuery):
     item_type = parts[1]  # 'tech' или 'service'
     item_id = int(parts[2])
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         if item_type == 'tech':
             cursor = await db.execute("""
                 SELECT ap.*, u.username, u.phone, ac.name as category_name
@@ -219,7 +219,7 @@ async def add_to_cart(callback: CallbackQuery):
     item_id = int(parts[3])
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Проверяем, нет ли уже в корзине
         cursor = await db.execute(
             "SELECT id FROM cart WHERE user_id = ? AND item_type = ? AND item_id = ?",
@@ -227,17 +227,17 @@ async def add_to_cart(callback: CallbackQuery):
         )
         existing = await cursor.fetchone()
         
-        if existing:
-            await callback.answer("Товар уже в корзине!", show_alert=True)
-            return
-        
-        # Добавляем в корзину
-        await db.execute(
-            "INSERT INTO cart (user_id, item_type, item_id, added_at) VALUES (?, ?, ?, ?)",
-            (user_id, item_type, item_id, datetime.now().isoformat())
-        )
-        await db.commit()
-    
+        if not existing:
+            # Добавляем в корзину
+            await db.execute(
+                "INSERT INTO cart (user_id, item_type, item_id, added_at) VALUES (?, ?, ?, ?)",
+                (user_id, item_type, item_id, datetime.now().isoformat())
+            )
+            await db.commit()
+
+    if existing:
+        await callback.answer("Товар уже в корзине!", show_alert=True)
+        return
     await callback.answer("✅ Добавлено в корзину!")
 
 # Корзина
@@ -265,7 +265,7 @@ async def view_cart(callback: CallbackQuery):
 
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT c.id, c.item_type, c.item_id, c.added_at,
                    CASE 
@@ -369,7 +369,7 @@ async def remove_from_cart(callback: CallbackQuery):
     if len(parts) > 3:
         source = parts[3]
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute("DELETE FROM cart WHERE id = ?", (cart_id,))
         await db.commit()
     
@@ -403,7 +403,7 @@ async def clear_cart(callback: CallbackQuery):
     elif "_account" in callback.data:
         source = "account"
         
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute("DELETE FROM cart WHERE user_id = ?", (user_id,))
         await db.commit()
     
@@ -423,7 +423,7 @@ async def checkout(callback: CallbackQuery):
     
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Получаем товары из корзины
         cursor = await db.execute("""
             SELECT c.item_type, c.item_id,
@@ -439,10 +439,6 @@ async def checkout(callback: CallbackQuery):
         
         cart_items = await cursor.fetchall()
         
-        if not cart_items:
-            await callback.answer("Корзина пуста!", show_alert=True)
-            return
-        
         # Создаем заказы
         order_count = 0
         for item_type, item_id, seller_id in cart_items:
@@ -452,9 +448,14 @@ async def checkout(callback: CallbackQuery):
             """, (user_id, item_type, item_id, seller_id, datetime.now().isoformat()))
             order_count += 1
         
-        # Очищаем корзину
-        await db.execute("DELETE FROM cart WHERE user_id = ?", (user_id,))
-        await db.commit()
+        if cart_items:
+            # Очищаем корзину
+            await db.execute("DELETE FROM cart WHERE user_id = ?", (user_id,))
+            await db.commit()
+
+    if not cart_items:
+        await callback.answer("Корзина пуста!", show_alert=True)
+        return
     
     builder = InlineKeyboardBuilder()
     builder.add(types.InlineKeyboardButton(text="📋 Мои заказы", callback_data="my_orders"))
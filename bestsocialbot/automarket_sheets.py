@@ -1,28 +1,22 @@
 import gspread
-import aiosqlite
+from db import get_db
 from datetime import datetime
-from config import CREDENTIALS_FILE, AUTO_PRODUCTS_SHEET_URL, AUTO_SERVICES_SHEET_URL, AUTO_ORDERS_SHEET_URL
+from config import AUTO_PRODUCTS_SHEET_URL, AUTO_SERVICES_SHEET_URL, AUTO_ORDERS_SHEET_URL
+from sheets_gateway import sheets
+from sheets_export import stream_to_sheet
 import asyncio
-
-def get_google_sheets_client():
-    return gspread.service_account(filename=CREDENTIALS_FILE)
+import json
 
 async def sync_products_to_sheet():
     """Синхронизация товаров автотехники с Google Sheets"""
     try:
-        gc = get_google_sheets_client()
-        
         # Создаем или открываем таблицу товаров
         if not AUTO_PRODUCTS_SHEET_URL:
             print("Ошибка: AUTO_PRODUCTS_SHEET_URL не указан в config.py")
             return False
             
         try:
-            spreadsheet = gc.open_by_url(AUTO_PRODUCTS_SHEET_URL)
-            try:
-                sheet = spreadsheet.worksheet('Товары')
-            except Exception:
-                sheet = spreadsheet.add_worksheet(title='Товары', rows=1000, cols=20)
+            sheet = await sheets.worksheet(AUTO_PRODUCTS_SHEET_URL, 'Товары', create_rows=1000, create_cols=20)
         except Exception as e:
             print(f"Ошибка открытия таблицы товаров: {e}")
             return False
@@ -34,24 +28,8 @@ async def sync_products_to_sheet():
             "Статус", "Количество фото", "Контакты продавца"
         ]
         
-        # Получаем данные из БД
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT ap.id, ap.created_at, ap.user_id, u.username, c.name, 
-                       ap.title, ap.description, ap.price, ap.specifications, 
-                       ap.status, ap.images, u.phone
-                FROM auto_products ap
-                LEFT JOIN users u ON ap.user_id = u.user_id
-                LEFT JOIN categories c ON ap.category_id = c.id
-                ORDER BY ap.created_at DESC
-            """)
-            products = await cursor.fetchall()
-            print(f"DEBUG: Найдено {len(products)} товаров в базе")
-        
-        # Подготавливаем данные для записи
-        data = [headers]
-        for product in products:
-            import json
+        # Строка листа по строке БД
+        def make_row(product):
             images_count = 0
             try:
                 images = json.loads(product[10] or "[]")
@@ -59,7 +37,7 @@ async def sync_products_to_sheet():
             except Exception:
                 pass
             
-            row = [
+            return [
                 product[0],  # ID
                 product[1][:10] if product[1] else "",  # Дата
                 product[2],  # User ID
@@ -73,19 +51,23 @@ async def sync_products_to_sheet():
                 images_count,  # Количество фото
                 product[11] or ""  # Телефон
             ]
-            data.append(row)
         
-        # Очищаем и записываем данные
+        # Читаем БД и записываем лист порциями
         try:
-            sheet.clear()
-            if data:
-                sheet.update('A1', data)
-                print(f"DEBUG: Записано {len(data)-1} строк в Google Sheets")
+            count = await stream_to_sheet(sheet, headers, """
+                SELECT ap.id, ap.created_at, ap.user_id, u.username, c.name, 
+                       ap.title, ap.description, ap.price, ap.specifications, 
+                       ap.status, ap.images, u.phone
+                FROM auto_products ap
+                LEFT JOIN users u ON ap.user_id = u.user_id
+                LEFT JOIN categories c ON ap.category_id = c.id
+                ORDER BY ap.created_at DESC
+            """, make_row=make_row)
         except Exception as e:
             print(f"Ошибка записи в таблицу: {e}")
             return False
         
-        print(f"Синхронизировано {len(products)} товаров в Google Sheets")
+        print(f"Синхронизировано {count} товаров в Google Sheets")
         return True
         
     except Exception as e:
@@ -95,18 +77,12 @@ async def sync_products_to_sheet():
 async def sync_services_to_sheet():
     """Синхронизация автоуслуг с Google Sheets"""
     try:
-        gc = get_google_sheets_client()
-        
         if not AUTO_SERVICES_SHEET_URL:
             print("Ошибка: AUTO_SERVICES_SHEET_URL не указан в config.py")
             return False
             
         try:
-            spreadsheet = gc.open_by_url(AUTO_SERVICES_SHEET_URL)
-            try:
-                sheet = spreadsheet.worksheet('Услуги')
-            except Exception:
-                sheet = spreadsheet.add_worksheet(title='Услуги', rows=1000, cols=20)
+            sheet = await sheets.worksheet(AUTO_SERVICES_SHEET_URL, 'Услуги', create_rows=1000, create_cols=20)
         except Exception as e:
             print(f"Ошибка открытия таблицы услуг: {e}")
             return False
@@ -117,22 +93,7 @@ async def sync_services_to_sheet():
             "Контактная информация", "Статус", "Количество фото"
         ]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT as_.id, as_.created_at, as_.user_id, u.username, c.name,
-                       as_.title, as_.description, as_.price, as_.location,
-                       as_.contact_info, as_.status, as_.images
-                FROM auto_services as_
-                LEFT JOIN users u ON as_.user_id = u.user_id
-                LEFT JOIN categories c ON as_.category_id = c.id
-                ORDER BY as_.created_at DESC
-            """)
-            services = await cursor.fetchall()
-            print(f"DEBUG: Найдено {len(services)} услуг в базе")
-        
-        data = [headers]
-        for service in services:
-            import json
+        def make_row(service):
             images_count = 0
             try:
                 images = json.loads(service[11] or "[]")
@@ -140,7 +101,7 @@ async def sync_services_to_sheet():
             except Exception:
                 pass
             
-            row = [
+            return [
                 service[0],  # ID
                 service[1][:10] if service[1] else "",  # Дата
                 service[2],  # User ID
@@ -154,13 +115,18 @@ async def sync_services_to_sheet():
                 service[10] or "",  # Статус
                 images_count  # Количество фото
             ]
-            data.append(row)
-        
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
         
-        print(f"Синхронизировано {len(services)} услуг в Google Sheets")
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT as_.id, as_.created_at, as_.user_id, u.username, c.name,
+                   as_.title, as_.description, as_.price, as_.location,
+                   as_.contact_info, as_.status, as_.images
+            FROM auto_services as_
+            LEFT JOIN users u ON as_.user_id = u.user_id
+            LEFT JOIN categories c ON as_.category_id = c.id
+            ORDER BY as_.created_at DESC
+        """, make_row=make_row)
+        
+        print(f"Синхронизировано {count} услуг в Google Sheets")
         return True
         
     except Exception as e:
@@ -170,18 +136,12 @@ async def sync_services_to_sheet():
 async def sync_orders_to_sheet():
     """Синхронизация заказов с Google Sheets"""
     try:
-        gc = get_google_sheets_client()
-        
         if not AUTO_ORDERS_SHEET_URL:
             print("Ошибка: AUTO_ORDERS_SHEET_URL не указан в config.py")
             return False
             
         try:
-            spreadsheet = gc.open_by_url(AUTO_ORDERS_SHEET_URL)
-            try:
-                sheet = spreadsheet.worksheet('Заказы')
-            except Exception:
-                sheet = spreadsheet.add_worksheet(title='Заказы', rows=1000, cols=20)
+            sheet = await sheets.worksheet(AUTO_ORDERS_SHEET_URL, 'Заказы', create_rows=1000, create_cols=20)
         except Exception as e:
             print(f"Ошибка открытия таблицы заказов: {e}")
             return False
@@ -192,33 +152,8 @@ async def sync_orders_to_sheet():
             "Username продавца", "Статус заказа", "Цена", "Примечания"
         ]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT o.id, o.order_date, o.order_type, o.item_id, 
-                       CASE 
-                           WHEN o.order_type = 'tech' THEN ap.title
-                           ELSE as_.title
-                       END as title,
-                       o.user_id, u1.username as buyer_username,
-                       o.seller_id, u2.username as seller_username,
-                       o.status,
-                       CASE 
-                           WHEN o.order_type = 'tech' THEN ap.price
-                           ELSE as_.price
-                       END as price,
-                       o.notes
-                FROM orders o
-                LEFT JOIN auto_products ap ON o.order_type = 'tech' AND o.item_id = ap.id
-                LEFT JOIN auto_services as_ ON o.order_type = 'service' AND o.item_id = as_.id
-                LEFT JOIN users u1 ON o.user_id = u1.user_id
-                LEFT JOIN users u2 ON o.seller_id = u2.user_id
-                ORDER BY o.order_date DESC
-            """)
-            orders = await cursor.fetchall()
-        
-        data = [headers]
-        for order in orders:
-            row = [
+        def make_row(order):
+            return [
                 order[0],  # ID заказа
                 order[1][:10] if order[1] else "",  # Дата
                 "Автотехника" if order[2] == 'tech' else "Автоуслуги",  # Тип
@@ -232,13 +167,30 @@ async def sync_orders_to_sheet():
                 order[10] or "",  # Цена
                 order[11] or ""  # Примечания
             ]
-            data.append(row)
-        
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
         
-        print(f"Синхронизировано {len(orders)} заказов в Google Sheets")
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT o.id, o.order_date, o.order_type, o.item_id, 
+                   CASE 
+                       WHEN o.order_type = 'tech' THEN ap.title
+                       ELSE as_.title
+                   END as title,
+                   o.user_id, u1.username as buyer_username,
+                   o.seller_id, u2.username as seller_username,
+                   o.status,
+                   CASE 
+                       WHEN o.order_type = 'tech' THEN ap.price
+                       ELSE as_.price
+                   END as price,
+                   o.notes
+            FROM orders o
+            LEFT JOIN auto_products ap ON o.order_type = 'tech' AND o.item_id = ap.id
+            LEFT JOIN auto_services as_ ON o.order_type = 'service' AND o.item_id = as_.id
+            LEFT JOIN users u1 ON o.user_id = u1.user_id
+            LEFT JOIN users u2 ON o.seller_id = u2.user_id
+            ORDER BY o.order_date DESC
+        """, make_row=make_row)
+        
+        print(f"Синхронизировано {count} заказов в Google Sheets")
         return True
         
     except Exception as e:
@@ -265,18 +217,16 @@ async def export_all_automarket_data():
 async def sync_products_from_sheet():
     """Синхронизация товаров из Google Sheets в БД"""
     try:
-        gc = get_google_sheets_client()
         if not AUTO_PRODUCTS_SHEET_URL:
             return False
             
-        spreadsheet = gc.open_by_url(AUTO_PRODUCTS_SHEET_URL)
         try:
-            sheet = spreadsheet.worksheet('Товары')
-        except:
+            sheet = await sheets.worksheet(AUTO_PRODUCTS_SHEET_URL, 'Товары')
+        except gspread.WorksheetNotFound:
             return False
-        data = sheet.get_all_records()
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 product_id = row.get('ID товара')
                 if not product_id:
@@ -304,18 +254,16 @@ async def sync_products_from_sheet():
 async def sync_services_from_sheet():
     """Синхронизация услуг из Google Sheets в БД"""
     try:
-        gc = get_google_sheets_client()
         if not AUTO_SERVICES_SHEET_URL:
             return False
             
-        spreadsheet = gc.open_by_url(AUTO_SERVICES_SHEET_URL)
         try:
-            sheet = spreadsheet.worksheet('Услуги')
-        except:
+            sheet = await sheets.worksheet(AUTO_SERVICES_SHEET_URL, 'Услуги')
+        except gspread.WorksheetNotFound:
             return False
-        data = sheet.get_all_records()
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 service_id = row.get('ID услуги')
                 if not service_id:
@@ -343,18 +291,18 @@ async def sync_services_from_sheet():
 async def sync_orders_from_sheet():
     """Синхронизация статусов заказов из Google Sheets в БД"""
     try:
-        gc = get_google_sheets_client()
         if not AUTO_ORDERS_SHEET_URL:
             return False
             
-        spreadsheet = gc.open_by_url(AUTO_ORDERS_SHEET_URL)
         try:
-            sheet = spreadsheet.worksheet('Заказы')
-        except:
+            sheet = await sheets.worksheet(AUTO_ORDERS_SHEET_URL, 'Заказы')
+        except gspread.WorksheetNotFound:
             return False
-        data = sheet.get_all_records()
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        # Уведомления отправляются после записи статусов
+        notices = []
+        async with get_db(write=True) as db:
             for row in data:
                 order_id = row.get('ID заказа')
                 new_status = row.get('Статус заказа')
@@ -372,9 +320,12 @@ async def sync_orders_from_sheet():
                     cursor = await db.execute("SELECT user_id, seller_id FROM orders WHERE id = ?", (order_id,))
                     order_data = await cursor.fetchone()
                     if order_data:
-                        await notify_order_status_change(order_data[0], order_data[1], order_id, new_status)
+                        notices.append((order_data[0], order_data[1], order_id, new_status))
             
             await db.commit()
+
+        for user_id, seller_id, order_id, new_status in notices:
+            await notify_order_status_change(user_id, seller_id, order_id, new_status)
         
         print(f"Синхронизированы статусы заказов из Google Sheets")
         return True
@@ -405,29 +356,12 @@ async def sync_all_from_sheets():
     print(f"Синхронизация из Google Sheets: {success_count}/3 таблиц обновлено")
     return success_count >= 2
 
-# Функция для периодической синхронизации (вызывается из main.py)
+# Ежедневная задача планировщика (scheduler.py)
 async def scheduled_automarket_sync():
-    """Периодическая загрузка товаров/услуг из Google Sheets в 17:00 МСК"""
-    from datetime import datetime
-    while True:
-        try:
-            # Ждем до 17:00 МСК
-            now = datetime.now()
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            
-            if now > target_time:
-                target_time = target_time.replace(day=target_time.day + 1)
-            
-            wait_seconds = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            
-            # Загрузка товаров и услуг в 17:00
-            await sync_products_from_sheet()
-            await sync_services_from_sheet()
-            
-        except Exception as e:
-            print(f"Ошибка в scheduled_automarket_sync: {e}")
-            await asyncio.sleep(3600)
+    """Загрузка товаров/услуг из Google Sheets в 17:00 МСК"""
+    products = await sync_products_from_sheet()
+    services = await sync_services_from_sheet()
+    return products is not False and services is not False
 
 # Мгновенная выгрузка при создании/изменении товаров/услуг
 async def instant_export_product(product_id: int):
@@ -451,10 +385,16 @@ async def instant_export_service(service_id: int):
 
 async def export_request_to_sheet(request_id: int, item_type: str, catalog_id: int):
     """Экспорт одобренной заявки в Google Sheets (Заявки)"""
+    return await export_requests_to_sheet([
+        {"request_id": request_id, "item_type": item_type, "catalog_id": catalog_id}
+    ])
+
+async def export_requests_to_sheet(items: list):
+    """
+    Экспорт одобренных заявок в Google Sheets (Заявки) одним запросом.
+    items: [{"request_id", "item_type", "catalog_id", "approved_at"}, ...]
+    """
     try:
-        from config import SHEET_ORDERS
-        gc = get_google_sheets_client()
-        
         # URL должен быть определен в config/google_sheets, но здесь используем общий URL
         # Предполагаем, что SHEET_ORDERS - это имя листа в главной таблице опросов?
         # Или отдельная таблица?
@@ -466,11 +406,7 @@ async def export_request_to_sheet(request_id: int, item_type: str, catalog_id: i
             return False
 
         try:
-            spreadsheet = gc.open_by_url(AUTO_ORDERS_SHEET_URL)
-            try:
-                sheet = spreadsheet.worksheet('Заявки')
-            except Exception:
-                sheet = spreadsheet.add_worksheet(title='Заявки', rows=1000, cols=20)
+            sheet = await sheets.worksheet(AUTO_ORDERS_SHEET_URL, 'Заявки', create_rows=1000, create_cols=20)
         except Exception as e:
             print(f"Ошибка открытия таблицы Заявок: {e}")
             return False
@@ -481,41 +417,46 @@ async def export_request_to_sheet(request_id: int, item_type: str, catalog_id: i
             "Telegram ID поставщика", "ID в каталоге", "Статус"
         ]
         
-        # Получаем данные заявки
-        table_name = "service_orders" if item_type == "service" else "order_requests"
-        
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute(f"SELECT * FROM {table_name} WHERE id = ?", (request_id,))
-            row = await cursor.fetchone()
-            columns = [description[0] for description in cursor.description]
-            data = dict(zip(columns, row))
-            
-        if not data:
-            return False
+        rows = []
+        async with get_db() as db:
+            for item in items:
+                # Получаем данные заявки
+                item_type = item["item_type"]
+                table_name = "service_orders" if item_type == "service" else "order_requests"
+                cursor = await db.execute(f"SELECT * FROM {table_name} WHERE id = ?", (item["request_id"],))
+                row = await cursor.fetchone()
+                if not row:
+                    print(f"⚠️ Заявка #{item['request_id']} не найдена, пропускаем экспорт")
+                    continue
+                columns = [description[0] for description in cursor.description]
+                data = dict(zip(columns, row))
+
+                # Подготавливаем строку
+                rows.append([
+                    data.get('id'),
+                    item.get("approved_at") or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    item_type,
+                    data.get('title'),
+                    data.get('additional_info') or data.get('description', ''),
+                    data.get('price'),
+                    data.get('category'),
+                    data.get('item_class'),
+                    data.get('item_type_detail'),
+                    data.get('item_kind'),
+                    data.get('user_id'), # ID поставщика (автора заявки)
+                    item["catalog_id"],
+                    "Одобрено"
+                ])
+
+        if not rows:
+            return True
 
-        # Подготавливаем строку
-        row_values = [
-            data.get('id'),
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            item_type,
-            data.get('title'),
-            data.get('additional_info') or data.get('description', ''),
-            data.get('price'),
-            data.get('category'),
-            data.get('item_class'),
-            data.get('item_type_detail'),
-            data.get('item_kind'),
-            data.get('user_id'), # ID поставщика (автора заявки)
-            catalog_id,
-            "Одобрено"
-        ]
-        
         # Если таблица пустая, добавляем заголовки
-        if not sheet.get_all_values():
-            sheet.append_row(headers)
-            
-        sheet.append_row(row_values)
-        print(f"✅ Заявка #{request_id} экспортирована в таблицу 'Заявки'")
+        if not await sheets.row_values(sheet, 1):
+            rows.insert(0, headers)
+
+        await sheets.append_rows(sheet, rows)
+        print(f"✅ Экспортировано заявок в таблицу 'Заявки': {len(items)}")
         return True
         
     except Exception as e:
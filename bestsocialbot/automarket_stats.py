@@ -1,7 +1,7 @@
 from aiogram import F, types
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
 from dispatcher import dp
 from config import ADMIN_ID
 from utils import check_blocked_user
@@ -16,7 +16,7 @@ async def automarket_stats(callback: CallbackQuery):
         await callback.answer("Доступ запрещен.", show_alert=True)
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         # Статистика по товарам
         cursor = await db.execute("SELECT COUNT(*) FROM auto_products WHERE status = 'active'")
         active_products = (await cursor.fetchone())[0]
@@ -0,0 +1,104 @@
+"""
+Сравнение скорости фильтра нецензурной лексики: прежняя реализация IsBadWord
+(около 80 регулярных выражений, собираемых заново на каждое сообщение) и
+предкомпилированный шаблон из filters.py.
+
+Заодно проверяет, что обе реализации дают одинаковый результат на корпусе.
+
+    python bench_bad_words.py [количество_повторов]
+"""
+
+import random
+import re
+import sys
+import time
+
+from filters import BAD_WORDS, BAD_WORD_VARIANTS, contains_bad_words
+
+# Типичные сообщения: ответы на опрос, описания заявок, поисковые запросы
+CORPUS = [
+    "90-05-15",
+    "Иванов Иван Иванович",
+    "г. Москва, ул. Ленина, д. 10, кв. 5",
+    "ivanov.ivan@example.com",
+    "+7 (999) 123-45-67",
+    "Работаю инженером-конструктором в строительной компании",
+    "Не хватает денег на ипотеку и лечение родителей",
+    "Мало общения с соседями, в районе нет детских площадок",
+    "Свалка мусора рядом с домом, грязный воздух от завода",
+    "Да, готов участвовать в проектах сообщества",
+    "Нет",
+    "Продаю автомобиль Toyota Camry 2018 года, пробег 85000 км, один владелец, "
+    "полная комплектация, зимняя резина в подарок. Торг уместен.",
+    "Ремонт квартир под ключ: штукатурка, плитка, электрика, сантехника. Гарантия 2 года.",
+    "запчасти для мотоцикла",
+    "Ищу партнера для открытия кофейни в центре города, есть помещение и оборудование",
+    "Сдам двухкомнатную квартиру на длительный срок, без животных",
+    "Какая цена доставки до Казани?",
+    "Спасибо, всё понравилось, буду заказывать ещё!",
+    "Нужен грузовик на выходные для переезда",
+    "Ну ты и сука",
+    "это полный п и з д е ц",
+    "xyйня какая-то",
+    "бл@ть опять не работает",
+]
+
+
+def legacy_is_bad(text: str) -> bool:
+    """Прежняя реализация IsBadWord.__call__"""
+    text = text.lower()
+
+    for word in BAD_WORDS:
+        if word in text:
+            return True
+
+    for bad_word in BAD_WORDS:
+        pattern = ''
+        for char in bad_word:
+            if char in BAD_WORD_VARIANTS:
+                variants = BAD_WORD_VARIANTS[char]
+                pattern += f'[{"".join(variants)}]'
+            else:
+                pattern += char
+
+        if re.search(pattern, text):
+            return True
+
+    for bad_word in BAD_WORDS:
+        spaced_pattern = r'\s*'.join([re.escape(c) for c in bad_word])
+        if re.search(spaced_pattern, text):
+            return True
+
+    return False
+
+
+def bench(func, messages) -> float:
+    start = time.perf_counter()
+    for text in messages:
+        func(text)
+    return time.perf_counter() - start
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    messages = CORPUS * repeats
+    random.Random(0).shuffle(messages)
+
+    mismatches = [text for text in CORPUS if legacy_is_bad(text) != contains_bad_words(text)]
+    if mismatches:
+        print("❌ Результаты реализаций расходятся:")
+        for text in mismatches:
+            print(f"    {text!r}")
+        return 1
+
+    old = bench(legacy_is_bad, messages)
+    new = bench(contains_bad_words, messages)
+    print(f"Сообщений: {len(messages)}")
+    print(f"Прежний фильтр:       {old:.3f} c ({len(messages) / old:,.0f} сообщ./с)")
+    print(f"Предкомпилированный:  {new:.3f} c ({len(messages) / new:,.0f} сообщ./с)")
+    print(f"Ускорение: x{old / new:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
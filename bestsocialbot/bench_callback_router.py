@@ -0,0 +1,116 @@
+"""
+Сравнение стоимости выбора обработчика callback_query: полный перебор
+обработчиков в порядке регистрации (как в aiogram) и индекс по callback_data
+из callback_router.py.
+
+Импортирует main (регистрируются все обработчики бота), строит по одному
+callback на каждое известное значение F.data == ... и префикс
+F.data.startswith(...), проверяет, что оба способа выбирают один и тот же
+обработчик, и измеряет время выбора и число проверок фильтров на callback.
+Обработчики не вызываются. База — временная, со всеми миграциями.
+
+    python bench_callback_router.py [количество_повторов]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import db as db_module
+
+
+def make_callback(data: str):
+    from aiogram import types
+    return types.CallbackQuery(
+        id="1", chat_instance="1", data=data,
+        from_user=types.User(id=1, is_bot=False, first_name="Bench"),
+    )
+
+
+def sample_data(observer) -> list:
+    """Все точные значения и префиксы (с «1» в конце) из индекса"""
+    from callback_router import _HANDLERS
+    observer.candidates(None)
+    samples = list(observer._exact)
+    stack = [("", observer._trie)]
+    while stack:
+        prefix, node = stack.pop()
+        if _HANDLERS in node:
+            samples.append(prefix + "1")
+        stack.extend((prefix + char, child) for char, child in node.items() if char is not _HANDLERS)
+    return sorted(samples)
+
+
+async def first_match(handlers, event):
+    """(обработчик, число проверок) — первый обработчик, все фильтры которого прошли"""
+    checks = 0
+    for handler in handlers:
+        checks += 1
+        result, _ = await handler.check(event, raw_state=None, handler=handler)
+        if result:
+            return handler, checks
+    return None, checks
+
+
+async def bench(select, events) -> tuple:
+    checks = 0
+    start = time.perf_counter()
+    for event in events:
+        checks += (await first_match(select(event), event))[1]
+    return time.perf_counter() - start, checks / len(events)
+
+
+async def run(repeats: int) -> int:
+    from main import dp
+    from db import init_db, close_db
+
+    observer = dp.callback_query
+    await init_db()
+    try:
+        events = [make_callback(data) for data in sample_data(observer)]
+
+        mismatches = []
+        for event in events:
+            linear, _ = await first_match(observer.handlers, event)
+            indexed, _ = await first_match(observer.candidates(event.data), event)
+            if linear is not indexed:
+                mismatches.append(event.data)
+        if mismatches:
+            print("❌ Перебор и индекс выбирают разные обработчики:")
+            for data in mismatches:
+                print(f"    {data!r}")
+            return 1
+
+        stream = events * repeats
+        random.Random(0).shuffle(stream)
+        old, old_checks = await bench(lambda event: observer.handlers, stream)
+        new, new_checks = await bench(lambda event: observer.candidates(event.data), stream)
+    finally:
+        await close_db()
+
+    print(f"Обработчиков callback_query: {len(observer.handlers)}, разных callback: {len(events)}")
+    print(f"Callback: {len(stream)}")
+    print(f"Перебор:  {old:.3f} c ({old / len(stream) * 1e6:.1f} мкс/callback, {old_checks:.1f} проверок)")
+    print(f"Индекс:   {new:.3f} c ({new / len(stream) * 1e6:.1f} мкс/callback, {new_checks:.1f} проверок)")
+    print(f"Ускорение: x{old / new:.1f}")
+    return 0
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_module.DB_FILE = path
+    try:
+        return asyncio.run(run(repeats))
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,8 @@
 from aiogram import Bot
 from aiogram.types import BotCommand
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.fsm.strategy import FSMStrategy
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram import Dispatcher
 from config import BOT_TOKEN
+from tenants import shared_bot_session
 
-bot = Bot(token=BOT_TOKEN)
-storage = MemoryStorage()
-dp = Dispatcher(storage=storage, fsm_strategy=FSMStrategy.CHAT)
+bot = Bot(token=BOT_TOKEN, session=shared_bot_session())
@@ -0,0 +1,140 @@
+"""
+Индекс обработчиков callback_query по callback_data.
+
+aiogram проверяет обработчики события по очереди, в порядке регистрации, до
+первого подошедшего: нажатие кнопки, обработчик которой зарегистрирован
+последним, проходит через сотни фильтров F.data == ... / F.data.startswith(...).
+
+IndexedCallbackObserver при регистрации разбирает фильтры обработчика и
+раскладывает его по индексу:
+  - F.data == "x" и F.data.in_({...}) — словарь точных значений;
+  - F.data.startswith("x") — префиксное дерево (trie) по символам;
+  - остальные (lambda, только состояние FSM, IsBlockedUser() и т.п.) —
+    список «без индекса», они проверяются для любого callback.
+На событие выбираются только кандидаты — обработчики, чей фильтр по data
+может подойти, плюс обработчики без индекса — и проверяются обычным образом
+(со всеми фильтрами) в исходном порядке регистрации. Поэтому выбирается тот
+же обработчик, что и при полном переборе.
+
+Регистрация не меняется: @dp.callback_query(F.data == "...").
+"""
+
+import operator
+from heapq import merge
+
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from magic_filter.operations import CallOperation, ComparatorOperation, FunctionOperation, GetAttributeOperation
+from magic_filter.util import in_op
+
+_HANDLERS = object()  # ключ списка обработчиков в узле префиксного дерева
+
+
+def _data_keys(magic):
+    """
+    ("exact", значения) / ("prefix", префиксы) для фильтров F.data == / in_ / startswith;
+    None — фильтр не разбирается
+    """
+    ops = getattr(magic, "_operations", ())
+    if not ops or not isinstance(ops[0], GetAttributeOperation) or ops[0].name != "data":
+        return None
+    rest = ops[1:]
+    if len(rest) == 1 and isinstance(rest[0], ComparatorOperation) and rest[0].comparator is operator.eq:
+        if isinstance(rest[0].right, str):
+            return "exact", (rest[0].right,)
+    if len(rest) == 1 and isinstance(rest[0], FunctionOperation) and rest[0].function is in_op:
+        values = rest[0].args[0] if len(rest[0].args) == 1 else None
+        if values is not None and not isinstance(values, str) and all(isinstance(v, str) for v in values):
+            return "exact", tuple(values)
+    if (len(rest) == 2 and isinstance(rest[0], GetAttributeOperation) and rest[0].name == "startswith"
+            and isinstance(rest[1], CallOperation) and len(rest[1].args) == 1 and not rest[1].kwargs):
+        prefixes = rest[1].args[0]
+        prefixes = (prefixes,) if isinstance(prefixes, str) else prefixes
+        if isinstance(prefixes, tuple) and all(isinstance(p, str) for p in prefixes):
+            return "prefix", prefixes
+    return None
+
+
+class IndexedCallbackObserver(TelegramEventObserver):
+    """Наблюдатель callback_query с индексом обработчиков по callback_data"""
+
+    def __init__(self, router, event_name: str = "callback_query") -> None:
+        super().__init__(router=router, event_name=event_name)
+        self._indexed = 0       # сколько обработчиков из self.handlers уже разложено
+        self._exact = {}        # callback_data -> [номера обработчиков]
+        self._trie = {}         # символ -> узел; узел[_HANDLERS] — номера обработчиков с этим префиксом
+        self._unindexed = []    # номера обработчиков, которые проверяются всегда
+
+    def _index_handler(self, position: int, handler):
+        for filter_object in handler.filters or ():
+            keys = _data_keys(filter_object.magic) if filter_object.magic is not None else None
+            if keys is None:
+                continue
+            kind, values = keys
+            for value in dict.fromkeys(values):
+                if kind == "exact":
+                    self._exact.setdefault(value, []).append(position)
+                else:
+                    node = self._trie
+                    for char in value:
+                        node = node.setdefault(char, {})
+                    node.setdefault(_HANDLERS, []).append(position)
+            return
+        self._unindexed.append(position)
+
+    def _sync_index(self):
+        # Обработчики добавляются только в конец self.handlers (register)
+        while self._indexed < len(self.handlers):
+            self._index_handler(self._indexed, self.handlers[self._indexed])
+            self._indexed += 1
+
+    def candidates(self, data) -> list:
+        """Обработчики, которые могут подойти для callback_data, в порядке регистрации"""
+        self._sync_index()
+        groups = [self._unindexed]
+        if isinstance(data, str):
+            exact = self._exact.get(data)
+            if exact:
+                groups.append(exact)
+            node = self._trie
+            if _HANDLERS in node:
+                groups.append(node[_HANDLERS])
+            for char in data:
+                node = node.get(char)
+                if node is None:
+                    break
+                if _HANDLERS in node:
+                    groups.append(node[_HANDLERS])
+        positions = groups[0] if len(groups) == 1 else list(dict.fromkeys(merge(*groups)))
+        return [self.handlers[position] for position in positions]
+
+    async def trigger(self, event, **kwargs):
+        """Как TelegramEventObserver.trigger, но только по кандидатам из индекса"""
+        for handler in self.candidates(getattr(event, "data", None)):
+            kwargs["handler"] = handler
+            result, data = await handler.check(event, **kwargs)
+            if result:
+                kwargs.update(data)
+                try:
+                    wrapped_inner = self.outer_middleware.wrap_middlewares(
+                        self._resolve_middlewares(),
+                        handler.call,
+                    )
+                    return await wrapped_inner(event, kwargs)
+                except SkipHandler:
+                    continue
+
+        return UNHANDLED
+
+
+def install_callback_index(router):
+    """Замена наблюдателя callback_query роутера на индексированный (до регистрации обработчиков)"""
+    old = router.callback_query
+    observer = IndexedCallbackObserver(router=router)
+    observer.handlers = old.handlers
+    observer.middleware = old.middleware
+    observer.outer_middleware = old.outer_middleware
+    observer._handler = old._handler
+    router.callback_query = observer
+    router.observers["callback_query"] = observer
+    return observer
@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-import aiosqlite
+from db import get_db
 from datetime import datetime
 from dispatcher import dp
 from utils import check_blocked_user
@@ -32,19 +32,20 @@ async def add_to_cart_from_shop(callback: CallbackQuery):
         user_id = callback.from_user.id
         
         # Определяем тип для базы данных
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             # 1. Проверяем существование товара и получаем цену
             cursor = await db.execute("""
                 SELECT title, price FROM order_requests WHERE id = ?
             """, (item_id,))
             item = await cursor.fetchone()
-            
-            if not item:
-                await callback.answer("❌ Товар не найден или удален", show_alert=True)
-                return
-            
-            title, price = item
-            
+
+        if not item:
+            await callback.answer("❌ Товар не найден или удален", show_alert=True)
+            return
+
+        title, price = item
+
+        async with get_db(write=True) as db:
             # 2. Проверяем, нет ли уже в корзине
             cursor = await db.execute("""
                 SELECT quantity FROM cart_order 
@@ -78,20 +79,20 @@ async def add_to_cart_from_shop(callback: CallbackQuery):
             
             await db.commit()
 
-            # 3. Обновляем клавиатуру для визуального подтверждения
-            try:
-                current_markup = callback.message.reply_markup
-                if current_markup:
-                    for row in current_markup.inline_keyboard:
-                        for btn in row:
-                            if btn.callback_data == callback.data:
-                                btn.text = f"✅ В корзине ({new_qty})"
-                    
-                    await callback.message.edit_reply_markup(reply_markup=current_markup)
-            except Exception as e:
-                print(f"Не удалось обновить кнопку: {e}")
-
-            await callback.answer(f"✅ Добавлено (всего {new_qty})", show_alert=False)
+        # 3. Обновляем клавиатуру для визуального подтверждения
+        try:
+            current_markup = callback.message.reply_markup
+            if current_markup:
+                for row in current_markup.inline_keyboard:
+                    for btn in row:
+                        if btn.callback_data == callback.data:
+                            btn.text = f"✅ В корзине ({new_qty})"
+                
+                await callback.message.edit_reply_markup(reply_markup=current_markup)
+        except Exception as e:
+            print(f"Не удалось обновить кнопку: {e}")
+
+        await callback.answer(f"✅ Добавлено (всего {new_qty})", show_alert=False)
             
     except Exception as e:
         print(f"Ошибка добавления в корзину: {e}")
@@ -101,7 +102,7 @@ async def add_to_cart_from_shop(callback: CallbackQuery):
 
 async def auto_fill_cart_from_orders(user_id: int):
     """Автоматическое заполнение корзины из заявок пользователя"""
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Проверяем, не заполнена ли уже корзина
         cursor = await db.execute("""
             SELECT COUNT(*) FROM cart_order WHERE user_id = ?
@@ -158,15 +159,15 @@ async def auto_fill_cart_from_orders(user_id: int):
 
 async def get_cart_items_paginated(user_id: int, page: int = 1, items_per_page: int = 3):
     """Получить заявки из корзины с пагинацией"""
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Общее количество заявок
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM cart_order WHERE user_id = ?
-        """, (user_id,))
-        total_items = (await cursor.fetchone())[0]
-
-        if total_items == 0:
+    async with get_db() as db:
+        # Количество заявок и общая сумма поддерживаются триггерами в cart_totals
+        cursor = await db.execute(
+            "SELECT items_count, total FROM cart_totals WHERE user_id = ?", (user_id,)
+        )
+        row = await cursor.fetchone()
+        if row is None:
             return [], 0, 0, 0
+        total_items, total_sum = row
 
         # Общее количество страниц
         total_pages = (total_items + items_per_page - 1) // items_per_page
@@ -194,14 +195,6 @@ async def get_cart_items_paginated(user_id: int, page: int = 1, items_per_page:
 
         items = await cursor.fetchall()
 
-        # Получаем общую сумму
-        cursor = await db.execute("""
-            SELECT SUM(c.quantity * CAST(c.price AS REAL))
-            FROM cart_order c
-            WHERE c.user_id = ?
-        """, (user_id,))
-        total_sum = (await cursor.fetchone())[0] or 0
-
         return items, total_items, total_pages, total_sum
 
 
@@ -212,18 +205,8 @@ async def cart_order_main_menu(callback: CallbackQuery, state: FSMContext, page:
 
     user_id = callback.from_user.id
 
-    # Загружаем заявки из Google Sheets
-    try:
-        from google_sheets import sync_requests_from_sheets_to_db
-        loaded = await sync_requests_from_sheets_to_db()
-
-        if loaded:
-            # Обновляем корзину после загрузки
-            # await auto_fill_cart_from_orders(user_id)  # DISABLED: Prevents clearing cart after order
-            pass
-    except Exception as e:
-        print(f"Ошибка загрузки заявок: {e}")
-
+    # Заявки из Google Sheets загружает фоновый google_sheets.scheduled_requests_import,
+    # корзина читает только базу
     # Получаем заявки с пагинацией
     items, total_items, total_pages, total_sum = await get_cart_items_paginated(user_id, page)
 
@@ -449,7 +432,7 @@ async def cart_edit_item(callback: CallbackQuery, state: FSMContext):
         user_id = callback.from_user.id
 
         # Получаем информацию о заявке
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT c.quantity, c.price, c.selected_options,
                        o.title, o.category, o.operation, o.item_type, 
@@ -534,7 +517,11 @@ async def cart_change_quantity(callback: CallbackQuery):
         page = int(parts[4])
         user_id = callback.from_user.id
 
-        async with aiosqlite.connect("bot_database.db") as db:
+        if action not in ("inc", "dec"):
+            await callback.answer("❌ Неизвестное действие", show_alert=True)
+            return
+
+        async with get_db(write=True) as db:
             # Получаем текущее количество
             cursor = await db.execute("""
                 SELECT quantity FROM cart_order 
@@ -542,28 +529,26 @@ async def cart_change_quantity(callback: CallbackQuery):
             """, (user_id, item_id))
             result = await cursor.fetchone()
 
-            if not result:
-                await callback.answer("❌ Заявка не найдена", show_alert=True)
-                return
+            if result:
+                current_qty = result[0]
 
-            current_qty = result[0]
+                # Изменяем количество
+                if action == "inc":
+                    new_qty = current_qty + 1
+                else:
+                    new_qty = max(1, current_qty - 1)  # Минимум 1
 
-            # Изменяем количество
-            if action == "inc":
-                new_qty = current_qty + 1
-            elif action == "dec":
-                new_qty = max(1, current_qty - 1)  # Минимум 1
-            else:
-                await callback.answer("❌ Неизвестное действие", show_alert=True)
-                return
+                # Обновляем количество
+                await db.execute("""
+                    UPDATE cart_order SET quantity = ? 
+                    WHERE user_id = ? AND item_id = ? AND item_type IN ('order_request', 'товар', 'product', 'offer')
+                """, (new_qty, user_id, item_id))
 
-            # Обновляем количество
-            await db.execute("""
-                UPDATE cart_order SET quantity = ? 
-                WHERE user_id = ? AND item_id = ? AND item_type IN ('order_request', 'товар', 'product', 'offer')
-            """, (new_qty, user_id, item_id))
+                await db.commit()
 
-            await db.commit()
+        if not result:
+            await callback.answer("❌ Заявка не найдена", show_alert=True)
+            return
 
         # Обновляем интерфейс редактирования
         await cart_edit_item(callback, state=None)
@@ -609,7 +594,7 @@ async def cart_remove_item(callback: CallbackQuery):
         page = int(parts[3])
         user_id = callback.from_user.id
 
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             await db.execute("""
                 DELETE FROM cart_order 
                 WHERE user_id = ? AND item_id = ? AND item_type IN ('order_request', 'товар', 'product', 'offer')
@@ -648,7 +633,7 @@ async def cart_order_checkout(callback: CallbackQuery):
         return
 
     # Проверяем, есть ли товары в корзине
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT COUNT(*) FROM cart_order WHERE user_id = ?
         """, (user_id,))
@@ -680,7 +665,7 @@ async def cart_order_confirm(callback: CallbackQuery):
     user_id = callback.from_user.id
 
     # Получаем товары из корзины
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         cursor = await db.execute("""
             SELECT c.item_id, c.quantity, c.selected_options, c.price,
                    o.title, o.operation, o.item_type, o.category,
@@ -691,83 +676,84 @@ async def cart_order_confirm(callback: CallbackQuery):
         """, (user_id,))
         items = await cursor.fetchall()
 
-        if not items:
-            await callback.answer("❌ Корзина пуста", show_alert=True)
-            return
-
-        # Формируем описание заказа
-        order_description = "Заказ из корзины заявок:\n\n"
-        total_price = 0
-
-        for item in items:
-            item_id, quantity, options, price, title, operation, item_type_detail, category, condition, purpose, specifications = item
+        if items:
+            # Формируем описание заказа
+            order_description = "Заказ из корзины заявок:\n\n"
+            total_price = 0
+
+            for item in items:
+                item_id, quantity, options, price, title, operation, item_type_detail, category, condition, purpose, specifications = item
+
+                # Расчет стоимости
+                try:
+                    item_price = float(price) if price else 0
+                    item_total = item_price * quantity
+                    total_price += item_total
+                except ValueError:
+                    item_price = 0
+                    item_total = 0
+
+                order_description += f"📦 **{title or f'Заявка #{item_id}'}**\n"
+                order_description += f"   🆔 ID заявки: {item_id}\n"
+                order_description += f"   📦 Количество: {quantity}\n"
+                if options:
+                    order_description += f"   ⚙️ Опции: {options}\n"
+                if item_price > 0:
+                    order_description += f"   💰 Цена за ед.: {item_price} руб.\n"
+                    order_description += f"   💵 Сумма: {item_total} руб.\n"
+                if category:
+                    order_description += f"   🏷 Категория: {category}\n"
+                if item_type_detail:
+                    order_description += f"   📋 Тип: {item_type_detail}\n"
+                if condition:
+                    order_description += f"   🔧 Состояние: {condition}\n"
+                if purpose:
+                    order_description += f"   🎯 Назначение: {purpose}\n"
+                if operation:
+                    operation_text = "Покупка" if operation == "buy" else "Продажа" if operation == "sell" else operation
+                    order_description += f"   🎯 Операция: {operation_text}\n"
+                order_description += "\n"
+
+            if total_price > 0:
+                order_description += f"💰 **Общая сумма заказа:** {total_price:.2f} руб.\n\n"
+
+            order_description += f"👤 **Пользователь:** ID {user_id}\n"
+            order_description += f"📅 **Дата оформления:** {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+
+            # Создаем заявку на заказ из корзины
+            await db.execute("""
+                INSERT INTO order_requests (
+                    user_id, operation, item_type, title, additional_info, 
+                    specifications, price, contact, status, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                user_id,
+                "buy",
+                "cart_order",
+                "Заказ из корзины заявок",
+                order_description,
+                str(len(items)),  # Сохраняем количество в specifications
+                str(total_price) if total_price > 0 else "",
+                f"ID пользователя: {user_id}",
+                "new",
+                datetime.now().isoformat()
+            ))
 
-            # Расчет стоимости
-            try:
-                item_price = float(price) if price else 0
-                item_total = item_price * quantity
-                total_price += item_total
-            except ValueError:
-                item_price = 0
-                item_total = 0
+            # Очищаем корзину после оформления
+            print(f"[DEBUG] Очистка корзины для пользователя {user_id}...")
+            cursor = await db.execute("DELETE FROM cart_order WHERE user_id = ?", (user_id,))
+            print(f"[DEBUG] Удалено строк из корзины: {cursor.rowcount}")
+            await db.commit()
+            print(f"[DEBUG] Транзакция подтверждена (commit)")
 
-            order_description += f"📦 **{title or f'Заявка #{item_id}'}**\n"
-            order_description += f"   🆔 ID заявки: {item_id}\n"
-            order_description += f"   📦 Количество: {quantity}\n"
-            if options:
-                order_description += f"   ⚙️ Опции: {options}\n"
-            if item_price > 0:
-                order_description += f"   💰 Цена за ед.: {item_price} руб.\n"
-                order_description += f"   💵 Сумма: {item_total} руб.\n"
-            if category:
-                order_description += f"   🏷 Категория: {category}\n"
-            if item_type_detail:
-                order_description += f"   📋 Тип: {item_type_detail}\n"
-            if condition:
-                order_description += f"   🔧 Состояние: {condition}\n"
-            if purpose:
-                order_description += f"   🎯 Назначение: {purpose}\n"
-            if operation:
-                operation_text = "Покупка" if operation == "buy" else "Продажа" if operation == "sell" else operation
-                order_description += f"   🎯 Операция: {operation_text}\n"
-            order_description += "\n"
-
-        if total_price > 0:
-            order_description += f"💰 **Общая сумма заказа:** {total_price:.2f} руб.\n\n"
-
-        order_description += f"👤 **Пользователь:** ID {user_id}\n"
-        order_description += f"📅 **Дата оформления:** {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-
-        # Создаем заявку на заказ из корзины
-        await db.execute("""
-            INSERT INTO order_requests (
-                user_id, operation, item_type, title, additional_info, 
-                specifications, price, contact, status, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_id,
-            "buy",
-            "cart_order",
-            "Заказ из корзины заявок",
-            order_description,
-            str(len(items)),  # Сохраняем количество в specifications
-            str(total_price) if total_price > 0 else "",
-            f"ID пользователя: {user_id}",
-            "new",
-            datetime.now().isoformat()
-        ))
-
-        # Очищаем корзину после оформления
-        print(f"[DEBUG] Очистка корзины для пользователя {user_id}...")
-        cursor = await db.execute("DELETE FROM cart_order WHERE user_id = ?", (user_id,))
-        print(f"[DEBUG] Удалено строк из корзины: {cursor.rowcount}")
-        await db.commit()
-        print(f"[DEBUG] Транзакция подтверждена (commit)")
+    if not items:
+        await callback.answer("❌ Корзина пуста", show_alert=True)
+        return
 
-    # Синхронизация с Google Sheets
+    # Синхронизация с Google Sheets в фоне, ответ пользователю её не ждёт
     try:
-        from google_sheets import sync_order_requests_to_sheets
-        await sync_order_requests_to_sheets()
+        from sheets_outbox import enqueue
+        await enqueue("order_requests")
     except Exception as e:
         print(f"Ошибка синхронизации заявок: {e}")
         import traceback
@@ -825,7 +811,7 @@ async def cart_order_clear_confirm(callback: CallbackQuery):
     """Подтверждение очистки корзины"""
     user_id = callback.from_user.id
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute("DELETE FROM cart_order WHERE user_id = ?", (user_id,))
         await db.commit()
 
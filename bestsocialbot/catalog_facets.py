@@ -0,0 +1,92 @@
+"""
+Значения категорий, классов, типов и видов для меню каталога.
+
+Таблица catalog_facets (миграция 8) хранит для каждого значения число
+видимых в каталоге позиций; триггеры на catalog_items обновляют счётчики при
+добавлении позиции и смене её статуса. Меню строится одним чтением по
+первичному ключу, а прочитанный список держится в памяти
+CATALOG_FACETS_CACHE_TTL секунд.
+
+В callback_data кнопок передаётся не название (оно может не уместиться в
+64 байта), а короткий числовой ID из словаря facet_values (миграция 9).
+Словарь только пополняется, поэтому соответствие ID <-> значение держится в
+памяти целиком и по нажатию кнопки значение находится без запроса к базе.
+"""
+
+from config import CATALOG_FACETS_CACHE_TTL
+from db import get_db
+from user_cache import TTLCache
+
+# Столбцы catalog_items, по которым строятся меню; они же — виды значений facet_values
+FACETS = ("category", "item_class", "item_type_detail", "item_kind")
+
+_facets_cache = TTLCache(64, CATALOG_FACETS_CACHE_TTL)
+
+# Словарь facet_values в памяти в обе стороны
+_value_ids = {}  # (вид, значение) -> ID
+_values = {}     # ID -> (вид, значение)
+
+
+def _remember(value_id: int, kind: str, value: str):
+    _value_ids[(kind, value)] = value_id
+    _values[value_id] = (kind, value)
+
+
+async def facet_value_ids(kind: str, values: list) -> dict:
+    """{значение: ID} для кнопок; новые значения добавляются в словарь facet_values"""
+    if kind not in FACETS:
+        raise ValueError(f"Неизвестный вид значения: {kind}")
+    missing = list(dict.fromkeys(value for value in values if (kind, value) not in _value_ids))
+    if missing:
+        async with get_db(write=True) as db:
+            await db.executemany(
+                "INSERT OR IGNORE INTO facet_values (kind, value) VALUES (?, ?)",
+                [(kind, value) for value in missing]
+            )
+            await db.commit()
+            cursor = await db.execute(
+                f"SELECT id, value FROM facet_values WHERE kind = ? AND value IN ({','.join('?' * len(missing))})",
+                (kind, *missing)
+            )
+            for value_id, value in await cursor.fetchall():
+                _remember(value_id, kind, value)
+    return {value: _value_ids[(kind, value)] for value in values}
+
+
+async def get_facet_value(kind: str, value_id):
+    """Значение по ID из callback_data или None (чужой вид, неизвестный или испорченный ID)"""
+    try:
+        value_id = int(value_id)
+    except (TypeError, ValueError):
+        return None
+    if value_id not in _values:
+        async with get_db() as db:
+            cursor = await db.execute("SELECT kind, value FROM facet_values WHERE id = ?", (value_id,))
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        _remember(value_id, *row)
+    value_kind, value = _values[value_id]
+    return value if value_kind == kind else None
+
+
+async def get_facet_values(item_type: str, facet: str) -> list:
+    """[(ID значения, значение, число позиций)] для меню item_type по столбцу facet, по алфавиту"""
+    if facet not in FACETS:
+        raise ValueError(f"Неизвестный столбец меню: {facet}")
+    values = _facets_cache.get((item_type, facet))
+    if values is None:
+        async with get_db() as db:
+            cursor = await db.execute(
+                "SELECT value, active_count FROM catalog_facets WHERE item_type = ? AND facet = ? ORDER BY value",
+                (item_type, facet)
+            )
+            rows = await cursor.fetchall()
+        ids = await facet_value_ids(facet, [value for value, _ in rows])
+        values = [(ids[value], value, count) for value, count in rows]
+        _facets_cache.set((item_type, facet), values)
+    return values
+
+
+def facet_button_text(value: str, count: int) -> str:
+    return f"{value} ({count})"
@@ -0,0 +1,69 @@
+"""
+Единая модель чтения каталога (таблица catalog_items).
+
+Товары и услуги лежат в трёх таблицах разной структуры: auto_products,
+auto_services и order_requests. Триггеры (миграция 7) поддерживают в
+catalog_items по одной строке на каждую видимую в каталоге позицию с
+одинаковым набором столбцов, так что поиск, выборка по ID и просмотр по
+категории/классу — один запрос к одной таблице.
+
+key = id * 3 + код источника; тот же ключ — rowid полнотекстового индекса
+catalog_search (search_index.py).
+"""
+
+from db import get_db
+
+# Источник -> код в ключе строки (key = id * 3 + код)
+SOURCE_CODES = {"auto_products": 0, "auto_services": 1, "order_requests": 2}
+
+# Статусы заявок order_requests, которые показываются в каталоге
+ORDER_REQUEST_ACTIVE_STATUSES = ("active", "approved", "processing")
+
+# Строка результата для списков и поиска: (id, title, price, category, operation, description)
+ITEM_COLUMNS = "item_id, title, price, category, operation, description"
+
+
+async def get_items_by_ids(item_type: str, ids: list, with_key: bool = False) -> list:
+    """
+    Позиции каталога item_type по списку ID одним запросом, в порядке ids.
+    Если ID есть и в автокаталоге, и среди заявок, берётся позиция автокаталога.
+    with_key — добавить в конец строки ключ catalog_items.key.
+    """
+    ids = list(dict.fromkeys(int(item_id) for item_id in ids))
+    if not ids:
+        return []
+
+    async with get_db() as db:
+        cursor = await db.execute(f"""
+            SELECT {ITEM_COLUMNS}{", key" if with_key else ""} FROM catalog_items
+            WHERE item_type = ? AND item_id IN ({",".join("?" * len(ids))})
+            ORDER BY key % {len(SOURCE_CODES)}
+        """, (item_type, *ids))
+        found = {}
+        for row in await cursor.fetchall():
+            found.setdefault(row[0], row)
+    return [found[item_id] for item_id in ids if item_id in found]
+
+
+async def list_item_ids(item_type: str, category: str = None, item_class: str = None,
+                        item_type_detail: str = None, item_kind: str = None) -> list:
+    """
+    ID позиций каталога item_type по категории, классу, типу и/или виду:
+    сначала автокаталог, затем заявки, новые выше. Строки страницы читаются
+    потом по ID (get_items_by_ids)
+    """
+    where = ["item_type = ?"]
+    params = [item_type]
+    for column, value in (("category", category), ("item_class", item_class),
+                          ("item_type_detail", item_type_detail), ("item_kind", item_kind)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+
+    async with get_db() as db:
+        cursor = await db.execute(f"""
+            SELECT item_id FROM catalog_items
+            WHERE {" AND ".join(where)}
+            ORDER BY source = 'order_requests', created_at DESC
+        """, params)
+        return list(dict.fromkeys(row[0] for row in await cursor.fetchall()))
@@ -3,8 +3,9 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-import aiosqlite
+from db import get_db
 from dispatcher import dp
+from taxonomy_cache import invalidate_taxonomy
 from config import ADMIN_ID
 
 class CategoryStates(StatesGroup):
@@ -18,7 +19,7 @@ async def manage_product_categories(callback: CallbackQuery):
         await callback.answer("Доступ запрещен", show_alert=True)
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, name FROM categories 
             WHERE parent_id = 1
@@ -48,7 +49,7 @@ async def manage_service_categories(callback: CallbackQuery):
         await callback.answer("Доступ запрещен", show_alert=True)
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, name FROM categories 
             WHERE parent_id = 2
@@ -79,7 +80,7 @@ async def manage_offer_categories(callback: CallbackQuery):
         await callback.answer("Доступ запрещен", show_alert=True)
         return
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, name FROM categories 
             WHERE catalog_type = 'offer'
@@ -152,12 +153,13 @@ async def process_add_category(message: Message, state: FSMContext):
     
     category_name = message.text.strip()
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO categories (name, parent_id, catalog_type) VALUES (?, ?, ?)",
             (category_name, parent_id, catalog_type)
         )
         await db.commit()
+    invalidate_taxonomy()
     
     await state.clear()
     
@@ -185,7 +187,7 @@ async def edit_category(callback: CallbackQuery):
     cat_type = parts[2]  # tech или service
     cat_id = int(parts[3])
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT name FROM categories WHERE id = ?", (cat_id,))
         category = await cursor.fetchone()
     
@@ -239,9 +241,10 @@ async def process_rename_category(message: Message, state: FSMContext):
     cat_type = data.get('category_type')
     new_name = message.text.strip()
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute("UPDATE categories SET name = ? WHERE id = ?", (new_name, cat_id))
         await db.commit()
+    invalidate_taxonomy()
     
     await state.clear()
     
@@ -270,7 +273,7 @@ async def delete_category(callback: CallbackQuery):
     cat_id = int(parts[3])
     
     # Проверяем, есть ли товары/услуги в этой категории
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         if cat_type == 'tech':
             cursor = await db.execute("SELECT COUNT(*) FROM auto_products WHERE category_id = ?", (cat_id,))
         elif cat_type == 'offer':
@@ -287,15 +290,17 @@ async def delete_category(callback: CallbackQuery):
         
         count = (await cursor.fetchone())[0]
         
-        if count > 0:
-            await callback.answer(
-                f"❌ Невозможно удалить категорию: в ней {count} товаров/услуг",
-                show_alert=True
-            )
-            return
-        
-        await db.execute("DELETE FROM categories WHERE id = ?", (cat_id,))
-        await db.commit()
+        if count == 0:
+            await db.execute("DELETE FROM categories WHERE id = ?", (cat_id,))
+            await db.commit()
+
+    if count > 0:
+        await callback.answer(
+            f"❌ Невозможно удалить категорию: в ней {count} товаров/услуг",
+            show_alert=True
+        )
+        return
+    invalidate_taxonomy()
     
     await callback.answer("✅ Категория удалена")
     
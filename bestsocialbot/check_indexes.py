@@ -0,0 +1,112 @@
+"""
+Проверка планов горячих запросов (EXPLAIN QUERY PLAN).
+
+Создаёт пустую базу со всеми миграциями и завершается с кодом 1, если какой-либо
+горячий запрос читает таблицу полным сканированием (SCAN) вместо индекса.
+
+    python check_indexes.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import db as db_module
+
+# (название, SQL, параметры, алиасы, которым разрешён SCAN)
+HOT_QUERIES = [
+    ("Список каталога", """
+        SELECT id, title, price FROM order_requests
+        WHERE item_type = ? AND status IN ('active', 'approved')
+        ORDER BY created_at DESC
+    """, ("product",), ()),
+    ("Категория каталога", """
+        SELECT id, title FROM order_requests
+        WHERE item_type = ? AND category = ? AND status IN ('active', 'approved')
+        ORDER BY created_at DESC
+    """, ("product", "Категория"), ()),
+    ("Активные заявки пользователя", """
+        SELECT 1 FROM order_requests
+        WHERE user_id = ? AND status NOT IN ('approved', 'rejected', 'completed') LIMIT 1
+    """, (1,), ()),
+    ("Активные заказы пользователя", """
+        SELECT 1 FROM orders
+        WHERE user_id = ? AND status NOT IN ('completed', 'cancelled', 'rejected') LIMIT 1
+    """, (1,), ()),
+    ("Страница корзины", """
+        SELECT c.item_id, c.quantity, o.title
+        FROM cart_order c
+        LEFT JOIN order_requests o ON c.item_id = o.id
+        WHERE c.user_id = ?
+    """, (1,), ()),
+    ("Товар в корзине", """
+        SELECT id FROM cart_order WHERE user_id = ? AND item_type = 'order_request' AND item_id = ?
+    """, (1, 1), ()),
+    ("Выгрузка опроса в основную таблицу", """
+        SELECT u.user_id, sr.q1, sr.q16, ub.bonus_total
+        FROM users u
+        LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
+        LEFT JOIN survey_responses sr ON u.user_id = sr.user_id
+        WHERE u.user_id != 0
+        GROUP BY u.user_id
+    """, (), ("u",)),
+    ("Активность за день", """
+        SELECT SUM(points) FROM user_activity WHERE user_id = ? AND activity_date = ?
+    """, (1, "2024-01-01"), ()),
+    ("Рефералы пользователя", """
+        SELECT r.referred_id FROM referrals r WHERE r.referrer_id = ? ORDER BY r.created_at DESC
+    """, (1,), ()),
+    ("Проверка реферала", "SELECT 1 FROM referrals WHERE referred_id = ?", (1,), ()),
+    ("Входящие сообщения", """
+        SELECT id FROM messages WHERE recipient_id = ? ORDER BY sent_at DESC
+    """, (1,), ()),
+    ("Непрочитанные сообщения", """
+        SELECT COUNT(*) FROM messages WHERE recipient_id = ? AND is_read = 0
+    """, (1,), ()),
+    ("Отзывы о товаре", """
+        SELECT AVG(rating), COUNT(*) FROM reviews WHERE item_type = ? AND item_id = ?
+    """, ("product", 1), ()),
+    ("История поиска", """
+        SELECT search_query FROM search_history WHERE user_id = ? ORDER BY created_at DESC
+    """, (1,), ()),
+]
+
+
+async def check_query_plans() -> list:
+    """Возвращает список найденных полных сканирований"""
+    problems = []
+    async with db_module.get_db() as db:
+        for name, sql, params, allowed_scans in HOT_QUERIES:
+            cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = [row[3] for row in await cursor.fetchall()]
+            print(f"\n{name}:")
+            for detail in plan:
+                print(f"    {detail}")
+                if detail.startswith("SCAN "):
+                    scanned = detail.split()[1]
+                    if scanned not in allowed_scans:
+                        problems.append(f"{name}: {detail}")
+    return problems
+
+
+async def run():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_module.DB_FILE = os.path.join(tmp, "check_indexes.db")
+        await db_module.init_db()
+        try:
+            problems = await check_query_plans()
+        finally:
+            await db_module.close_db()
+
+    if problems:
+        print("\n❌ Запросы без индекса:")
+        for problem in problems:
+            print(f"    {problem}")
+        return 1
+    print("\n✅ Все горячие запросы используют индексы")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
@@ -0,0 +1,63 @@
+"""
+Проверка разбора чисел из текста цены и рейтинга (migrations._number_from_text).
+
+Вычисляет SQL-выражение для каждого примера и завершается с кодом 1, если
+результат отличается от ожидаемого.
+
+    python check_number_parser.py
+"""
+
+import sqlite3
+import sys
+
+from migrations import _number_from_text
+
+# (текст, ожидаемое число или None)
+CASES = [
+    ("1500", 1500),
+    ("1 500 руб.", 1500),
+    ("1 500 ₽", 1500),
+    ("1,500", 1500),
+    ("1,500руб", 1500),
+    ("12,345", 12345),
+    ("1,500,000", 1500000),
+    ("1,500.50", 1500.5),
+    ("$1,500", 1500),
+    ("2000,50", 2000.5),
+    ("от 2000,50", 2000.5),
+    ("1,5", 1.5),
+    ("1,50", 1.5),
+    ("1,5000", 1.5),
+    ("0,999", 0.999),
+    ("4.5/5", 4.5),
+    ("~300", 300),
+    ("", None),
+    ("договорная", None),
+    (None, None),
+]
+
+
+def run():
+    db = sqlite3.connect(":memory:")
+    sql = f"SELECT {_number_from_text('?')}"
+    failures = []
+    for text, expected in CASES:
+        params = (text,) * sql.count("?")
+        value = db.execute(sql, params).fetchone()[0]
+        ok = value == expected
+        print(f"{'✅' if ok else '❌'} {text!r} -> {value!r}")
+        if not ok:
+            failures.append(f"{text!r}: ожидалось {expected!r}, получено {value!r}")
+    db.close()
+
+    if failures:
+        print("\n❌ Неверный разбор:")
+        for failure in failures:
+            print(f"    {failure}")
+        return 1
+    print("\n✅ Все примеры разобраны верно")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -9,10 +9,58 @@ CHANNEL_URL = os.getenv("CHANNEL_URL", "https://t.me/avto_avia_club")
 ADMIN_ID = int(os.getenv("ADMIN_ID", "0"))
 SHOWCASE_INTERVAL = int(os.getenv("SHOWCASE_INTERVAL", "21600"))
 CREDENTIALS_FILE = os.getenv("CREDENTIALS_FILE", "credentials.json")
+# Файл базы SQLite (у каждого бота процесса свой, см. tenants.py)
+DB_FILE = os.getenv("DB_FILE", "bot_database.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "3"))
+ACCOUNT_STATUS_CACHE_SIZE = int(os.getenv("ACCOUNT_STATUS_CACHE_SIZE", "10000"))
+ACCOUNT_STATUS_CACHE_TTL = int(os.getenv("ACCOUNT_STATUS_CACHE_TTL", "300"))
+# Кэш результатов поиска для листания страниц: число сессий и время жизни, сек
+SEARCH_SESSION_CACHE_SIZE = int(os.getenv("SEARCH_SESSION_CACHE_SIZE", "2000"))
+SEARCH_SESSION_TTL = int(os.getenv("SEARCH_SESSION_TTL", "900"))
+# Время жизни кэша значений категорий/классов/типов/видов для меню каталога, сек
+CATALOG_FACETS_CACHE_TTL = int(os.getenv("CATALOG_FACETS_CACHE_TTL", "60"))
+# Постраничные списки каталога: число открытых списков и время свежести страниц, сек
+LISTING_CACHE_SIZE = int(os.getenv("LISTING_CACHE_SIZE", "1000"))
+LISTING_CACHE_TTL = int(os.getenv("LISTING_CACHE_TTL", "60"))
+# Как часто кэш справочников категорий сверяет свою версию с taxonomy_version в базе, сек
+TAXONOMY_VERSION_CHECK_INTERVAL = float(os.getenv("TAXONOMY_VERSION_CHECK_INTERVAL", "5"))
+# Потоки для запросов к Google Sheets (gspread синхронный)
+SHEETS_MAX_WORKERS = int(os.getenv("SHEETS_MAX_WORKERS", "4"))
+# Повторы запросов к Google Sheets при 429/5xx и сетевых ошибках: число повторов и начальная задержка, сек
+SHEETS_RETRIES = int(os.getenv("SHEETS_RETRIES", "5"))
+SHEETS_RETRY_DELAY = float(os.getenv("SHEETS_RETRY_DELAY", "2"))
+# Потоковая выгрузка листов: строк в одном запросе записи
+SHEETS_CHUNK_ROWS = int(os.getenv("SHEETS_CHUNK_ROWS", "500"))
+# Очередь выгрузок в Google Sheets: интервал воркера и максимальная задержка повтора, сек
+SHEETS_OUTBOX_INTERVAL = int(os.getenv("SHEETS_OUTBOX_INTERVAL", "10"))
+SHEETS_OUTBOX_MAX_BACKOFF = int(os.getenv("SHEETS_OUTBOX_MAX_BACKOFF", "3600"))
+# Сколько событий одного вида задачи воркер очереди выгрузок забирает за итерацию
+SHEETS_OUTBOX_BATCH = int(os.getenv("SHEETS_OUTBOX_BATCH", "1000"))
+# Период проверки листа заявок на изменения, сек
+REQUESTS_SHEET_POLL_INTERVAL = int(os.getenv("REQUESTS_SHEET_POLL_INTERVAL", "300"))
+# Планировщик: сколько задач с Google Sheets выполняются одновременно, случайная
+# задержка запуска (сек), выполнять ли пропущенные за время остановки запуски
+SCHEDULER_SHEETS_CONCURRENCY = int(os.getenv("SCHEDULER_SHEETS_CONCURRENCY", "1"))
+SCHEDULER_JITTER = int(os.getenv("SCHEDULER_JITTER", "120"))
+SCHEDULER_CATCH_UP = os.getenv("SCHEDULER_CATCH_UP", "1") == "1"
+
+# Хранилище FSM: memory, sqlite или redis
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Webhook вместо polling (если задан WEBHOOK_URL)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+# Фоновые задачи (планировщики, синхронизации) — только в одном воркере
+RUN_BACKGROUND_TASKS = os.getenv("RUN_BACKGROUND_TASKS", "1") == "1"
 
 TELETHON_API_ID = int(os.getenv("TELETHON_API_ID", "0"))
 TELETHON_API_HASH = os.getenv("TELETHON_API_HASH", "")
 TELETHON_PHONE_NUMBER = os.getenv("TELETHON_PHONE_NUMBER", "")
+TELETHON_SESSION = os.getenv("TELETHON_SESSION", "user_session")
 
 MAIN_SURVEY_SHEET_URL = os.getenv("WOND_SURVEY_SHEET_URL", "")
 BESTHOME_SURVEY_SHEET_URL = os.getenv("BESTHOME_SURVEY_SHEET_URL", "")
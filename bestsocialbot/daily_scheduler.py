@@ -1,45 +1,9 @@
+from db import get_db
 """
-Ежедневный планировщик для синхронизации в 17:00 МСК согласно ТЗ
+Ежедневная синхронизация в 17:00 МСК согласно ТЗ (задача daily_sync в scheduler.py)
 """
 
-import asyncio
 import logging
-from datetime import datetime, time
-import pytz
-
-async def start_daily_scheduler():
-    """Запуск ежедневного планировщика синхронизации в 17:00 МСК"""
-    moscow_tz = pytz.timezone('Europe/Moscow')
-    
-    while True:
-        try:
-            # Получаем текущее время в МСК
-            now = datetime.now(moscow_tz)
-            
-            # Устанавливаем целевое время 17:00 МСК
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            
-            # Если уже прошло 17:00, планируем на следующий день
-            if now >= target_time:
-                target_time = target_time.replace(day=target_time.day + 1)
-            
-            # Вычисляем время ожидания
-            wait_seconds = (target_time - now).total_seconds()
-            
-            logging.info(f"Следующая синхронизация запланирована на {target_time.strftime('%d.%m.%Y %H:%M')} МСК")
-            
-            # Ждем до 17:00
-            await asyncio.sleep(wait_seconds)
-            
-            # Выполняем ежедневную синхронизацию
-            await daily_sync_task()
-            
-        except asyncio.CancelledError:
-            raise
-        except Exception as e:
-            logging.error(f"Ошибка в планировщике: {e}")
-            # При ошибке ждем час и пробуем снова
-            await asyncio.sleep(3600)
 
 async def daily_sync_task():
     """Ежедневная задача синхронизации в 17:00 МСК"""
@@ -79,6 +43,7 @@ async def daily_sync_task():
         
     except Exception as e:
         logging.error(f"❌ Ошибка ежедневной синхронизации: {e}")
+        raise
 
 async def sync_plans_and_reports():
     """Синхронизация планов и отчетов согласно ТЗ №2 п.1"""
@@ -100,13 +65,12 @@ async def sync_plans_and_reports():
 async def export_business_proposals():
     """Выгрузка бизнес-предложений из графы 16"""
     try:
-        import aiosqlite
         from config import MAIN_SURVEY_SHEET_URL
         import gspread
-        from config import CREDENTIALS_FILE
+        from sheets_gateway import sheets
         
         # Получаем предложения из БД
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT user_id, username, full_name, business_proposal, created_at
                 FROM users 
@@ -118,17 +82,13 @@ async def export_business_proposals():
         if not proposals:
             return
         
-        # Создаем таблицу планов и отчетов
-        gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        
-        # Создаем новую таблицу или используем существующую
+        # Открываем таблицу планов и отчетов или создаем её, если её ещё нет
+        gc = await sheets.client()
         try:
-            sheet = gc.create("Планы и отчеты АвтоАвиа")
-            worksheet = sheet.sheet1
-        except:
-            # Если таблица уже существует, открываем её
-            sheet = gc.open("Планы и отчеты АвтоАвиа")
-            worksheet = sheet.sheet1
+            sheet = await sheets.run(gc.open, "Планы и отчеты АвтоАвиа")
+        except gspread.SpreadsheetNotFound:
+            sheet = await sheets.run(gc.create, "Планы и отчеты АвтоАвиа")
+        worksheet = await sheets.run(sheet.get_worksheet, 0)
         
         # Заголовки
         headers = [
@@ -155,8 +115,7 @@ async def export_business_proposals():
             data.append(row)
         
         # Записываем данные
-        worksheet.clear()
-        worksheet.update('A1', data)
+        await sheets.replace(worksheet, data)
         
         logging.info(f"Выгружено {len(proposals)} бизнес-предложений")
         
@@ -166,10 +125,9 @@ async def export_business_proposals():
 async def notify_proposal_initiators():
     """Отправка сообщений инициаторам предложений"""
     try:
-        import aiosqlite
         from bot_instance import bot
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT user_id, business_proposal
                 FROM users 
@@ -202,7 +160,7 @@ async def notify_proposal_initiators():
                 await bot.send_message(user_id, message)
                 
                 # Обновляем дату уведомления
-                async with aiosqlite.connect("bot_database.db") as db:
+                async with get_db(write=True) as db:
                     await db.execute(
                         "UPDATE users SET last_proposal_notification = datetime('now') WHERE user_id = ?",
                         (user_id,)
@@ -252,9 +210,7 @@ async def update_referral_system():
 async def calculate_referral_bonuses():
     """Расчет и начисление реферальных бонусов"""
     try:
-        import aiosqlite
-        
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # Получаем активных рефералов за месяц
             cursor = await db.execute("""
                 SELECT referrer_id, COUNT(*) as active_referrals
@@ -1,131 +1,125 @@
+"""
+Статистика пользователей для основного листа Google Sheets: покупки и
+продажи (завершённые заказы), товары и услуги пользователя, ID в магазине,
+дата партнерства.
 
-import aiosqlite
+Каждый показатель пересчитывается одним запросом UPDATE на все строки users,
+у которых есть заказы (товары, услуги); значения считаются коррелированными
+подзапросами по индексам orders(user_id), orders(seller_id),
+auto_products(user_id), auto_services(user_id). Такой план не зависит от
+статистики sqlite_stat1 (она собирается при миграции на пустой базе и может
+быть сильно устаревшей). Если известны пользователи, у которых могли
+поменяться данные («грязные», например, только что прошедшие опрос),
+пересчитываются только они: их ID кладутся во временную таблицу
+temp.dirty_users.
+"""
+
+from db import get_db
 import logging
 
-async def aggregate_user_statistics():
+# Стоимость заказа: в orders нет цены, берётся текущая цена товара/услуги
+_ORDER_PRICE = """
+    CASE
+        WHEN o.order_type = 'tech' THEN CAST(ap.price AS REAL)
+        WHEN o.order_type = 'service' THEN CAST(as_.price AS REAL)
+        ELSE 0
+    END
+"""
+
+_ORDER_JOINS = """
+    FROM orders o
+    LEFT JOIN auto_products ap ON o.item_id = ap.id AND o.order_type = 'tech'
+    LEFT JOIN auto_services as_ ON o.item_id = as_.id AND o.order_type = 'service'
+"""
+
+_DIRTY = "IN (SELECT user_id FROM temp.dirty_users)"
+
+
+def _orders_update(role_column: str, count_column: str, total_column: str, text_column: str, dirty: bool) -> str:
+    """Покупки (role_column = user_id) или продажи (seller_id): число, сумма и текст «N (на S)»"""
+    return f"""
+        UPDATE users
+        SET ({count_column}, {total_column}, {text_column}) = (
+            SELECT count, total, count || ' (на ' || total || ')'
+            FROM (
+                SELECT COUNT(*) AS count, COALESCE(NULLIF(SUM({_ORDER_PRICE}), 0), 0) AS total
+                {_ORDER_JOINS}
+                WHERE o.{role_column} = users.user_id AND o.status = 'completed'
+            )
+        )
+        WHERE EXISTS (SELECT 1 FROM orders o WHERE o.{role_column} = users.user_id AND o.status = 'completed')
+        {f"AND user_id {_DIRTY}" if dirty else ""}
+    """
+
+
+def _items_update(dirty: bool) -> str:
+    """Строка «Товары: N, Услуги: M» по товарам и услугам пользователя"""
+    return f"""
+        UPDATE users
+        SET products_services = (
+            SELECT CASE
+                WHEN products > 0 AND services > 0 THEN 'Товары: ' || products || ', Услуги: ' || services
+                WHEN products > 0 THEN 'Товары: ' || products
+                ELSE 'Услуги: ' || services
+            END
+            FROM (
+                SELECT (SELECT COUNT(*) FROM auto_products WHERE user_id = users.user_id) AS products,
+                       (SELECT COUNT(*) FROM auto_services WHERE user_id = users.user_id) AS services
+            )
+        )
+        WHERE (EXISTS (SELECT 1 FROM auto_products WHERE user_id = users.user_id)
+               OR EXISTS (SELECT 1 FROM auto_services WHERE user_id = users.user_id))
+        {f"AND user_id {_DIRTY}" if dirty else ""}
+    """
+
+
+async def aggregate_user_statistics(user_ids=None):
     """
     Агрегирует статистику пользователей (заказы, товары, услуги, рефералы)
     и обновляет таблицу users для последующей выгрузки в Google Sheets.
+    user_ids — пересчитать только этих пользователей; None — всех.
     """
+    dirty = user_ids is not None
+    if dirty:
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return True
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
-            print("Начинаем агрегацию статистики пользователей...")
-
-            # 1. Агрегация рефералов (если referral_system.py не обновил)
-            # Примечание: referral_system.py обновляет total_referrals инкрементально,
-            # но для надежности можно пересчитать.
-            # Пока оставим как есть в referral_system, но убедимся, что поля синхронизированы.
-            
-            # 2. Агрегация покупок (Orders where user_id is buyer)
-            # Примечание: в таблице orders нет поля price, берем из товаров/услуг
-            # Однако цена могла измениться, но для примерной статистики пойдет текущая цена
-            # Или лучше использовать order_requests? Но там сложнее связь.
-            cursor = await db.execute("""
-                SELECT o.user_id, COUNT(*), SUM(
-                    CASE 
-                        WHEN o.order_type = 'tech' THEN CAST(ap.price AS REAL)
-                        WHEN o.order_type = 'service' THEN CAST(as_.price AS REAL)
-                        ELSE 0
-                    END
-                )
-                FROM orders o
-                LEFT JOIN auto_products ap ON o.item_id = ap.id AND o.order_type = 'tech'
-                LEFT JOIN auto_services as_ ON o.item_id = as_.id AND o.order_type = 'service'
-                WHERE o.status = 'completed'
-                GROUP BY o.user_id
-            """)
-            purchases = await cursor.fetchall()
-
-            for user_id, count, total_sum in purchases:
-                # Обновляем числовые поля
-                await db.execute("""
-                    UPDATE users 
-                    SET purchases_count = ?, total_purchases = ?
-                    WHERE user_id = ?
-                """, (count, total_sum or 0, user_id))
-                
-                # Обновляем текстовое поле для Google Sheets (как в ТЗ)
-                purchases_text = f"{count} (на {total_sum or 0})"
-                await db.execute("""
-                    UPDATE users SET purchases = ? WHERE user_id = ?
-                """, (purchases_text, user_id))
-
-            # 3. Агрегация продаж (Orders where seller_id is seller)
-            cursor = await db.execute("""
-                SELECT o.seller_id, COUNT(*), SUM(
-                    CASE 
-                        WHEN o.order_type = 'tech' THEN CAST(ap.price AS REAL)
-                        WHEN o.order_type = 'service' THEN CAST(as_.price AS REAL)
-                        ELSE 0
-                    END
-                )
-                FROM orders o
-                LEFT JOIN auto_products ap ON o.item_id = ap.id AND o.order_type = 'tech'
-                LEFT JOIN auto_services as_ ON o.item_id = as_.id AND o.order_type = 'service'
-                WHERE o.status = 'completed'
-                GROUP BY o.seller_id
-            """)
-            sales = await cursor.fetchall()
-
-            for seller_id, count, total_sum in sales:
-                await db.execute("""
-                    UPDATE users 
-                    SET sales_count = ?, total_sales = ?
-                    WHERE user_id = ?
-                """, (count, total_sum or 0, seller_id))
-                
-                sales_text = f"{count} (на {total_sum or 0})"
-                await db.execute("""
-                    UPDATE users SET sales = ? WHERE user_id = ?
-                """, (sales_text, seller_id))
-
-            # 4. Агрегация товаров и услуг
-            # Считаем товары
-            cursor = await db.execute("""
-                SELECT user_id, COUNT(*) FROM auto_products GROUP BY user_id
-            """)
-            products_counts = {row[0]: row[1] for row in await cursor.fetchall()}
+        async with get_db(write=True) as db:
+            print(f"Начинаем агрегацию статистики пользователей"
+                  f"{f' ({len(user_ids)})' if dirty else ''}...")
+            if dirty:
+                await db.execute("CREATE TEMP TABLE IF NOT EXISTS dirty_users (user_id INTEGER PRIMARY KEY)")
+                await db.execute("DELETE FROM temp.dirty_users")
+                await db.executemany("INSERT INTO temp.dirty_users (user_id) VALUES (?)",
+                                     [(user_id,) for user_id in user_ids])
 
-            # Считаем услуги
-            cursor = await db.execute("""
-                SELECT user_id, COUNT(*) FROM auto_services GROUP BY user_id
-            """)
-            services_counts = {row[0]: row[1] for row in await cursor.fetchall()}
-
-            # Объединяем и обновляем
-            all_users_with_items = set(products_counts.keys()) | set(services_counts.keys())
-            
-            for user_id in all_users_with_items:
-                p_count = products_counts.get(user_id, 0)
-                s_count = services_counts.get(user_id, 0)
-                
-                # Формируем строку статистики
-                stats_text = []
-                if p_count > 0:
-                    stats_text.append(f"Товары: {p_count}")
-                if s_count > 0:
-                    stats_text.append(f"Услуги: {s_count}")
-                
-                final_text = ", ".join(stats_text)
-                
-                await db.execute("""
-                    UPDATE users SET products_services = ? WHERE user_id = ?
-                """, (final_text, user_id))
+            # 1. Рефералы обновляет referral_system.py (total_referrals инкрементально)
+
+            # 2. Покупки (заказы, где пользователь — покупатель) и 3. продажи (продавец)
+            await db.execute(_orders_update("user_id", "purchases_count", "total_purchases", "purchases", dirty))
+            await db.execute(_orders_update("seller_id", "sales_count", "total_sales", "sales", dirty))
+
+            # 4. Товары и услуги
+            await db.execute(_items_update(dirty))
 
             # 5. Обновление даты партнерства и shop_id
+            only_dirty = f" AND user_id {_DIRTY}" if dirty else ""
             # Если shop_id пустой, устанавливаем его равным user_id
-            await db.execute("""
-                UPDATE users SET shop_id = user_id WHERE shop_id IS NULL OR shop_id = ''
+            await db.execute(f"""
+                UPDATE users SET shop_id = user_id WHERE (shop_id IS NULL OR shop_id = ''){only_dirty}
             """)
 
             # Если пользователь партнер, но дата партнерства не стоит, ставим дату регистрации или текущую
-            await db.execute("""
-                UPDATE users 
-                SET partnership_date = created_at 
-                WHERE (active_partner = 'Да' OR account_status = 'ПАРТНЕР') 
-                AND (partnership_date IS NULL OR partnership_date = '')
+            await db.execute(f"""
+                UPDATE users
+                SET partnership_date = created_at
+                WHERE (active_partner = 'Да' OR account_status = 'ПАРТНЕР')
+                AND (partnership_date IS NULL OR partnership_date = ''){only_dirty}
             """)
 
+            if dirty:
+                await db.execute("DROP TABLE temp.dirty_users")
             await db.commit()
             print("Агрегация статистики успешно завершена.")
             return True
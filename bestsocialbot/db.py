@@ -1,15 +1,197 @@
 import aiosqlite
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
+from aiosqlite.context import contextmanager
+from config import DB_POOL_SIZE, DB_FILE
+
+DB_BUSY_TIMEOUT_MS = 20000
+
+# PRAGMA применяются один раз при открытии соединения пула
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-4000",
+)
+
+
+class PooledConnection:
+    """Соединение, выданное из пула.
+
+    Повторяет интерфейс aiosqlite.Connection, но запоминает открытые курсоры,
+    чтобы при возврате в пул закрыть их: незакрытый SELECT держит в WAL старый
+    снимок базы, и следующий владелец соединения увидел бы устаревшие данные.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_cursors", [])
+
+    @contextmanager
+    async def execute(self, sql, parameters=None):
+        cursor = await self._conn.execute(sql, parameters)
+        self._cursors.append(cursor)
+        return cursor
+
+    @contextmanager
+    async def executemany(self, sql, parameters):
+        cursor = await self._conn.executemany(sql, parameters)
+        self._cursors.append(cursor)
+        return cursor
+
+    @contextmanager
+    async def executescript(self, sql_script):
+        cursor = await self._conn.executescript(sql_script)
+        self._cursors.append(cursor)
+        return cursor
+
+    @contextmanager
+    async def cursor(self):
+        cursor = await self._conn.cursor()
+        self._cursors.append(cursor)
+        return cursor
+
+    async def close(self):
+        # Соединение принадлежит пулу и закрывается только в close_db()
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    async def _release(self):
+        cursors = self._cursors
+        object.__setattr__(self, "_cursors", [])
+        for cursor in cursors:
+            try:
+                await cursor.close()
+            except Exception:
+                pass
+        # Как и при закрытии обычного соединения: незафиксированное откатывается
+        if self._conn.in_transaction:
+            await self._conn.rollback()
+        self._conn.row_factory = None
+
+
+class DatabasePool:
+    """Пул долгоживущих соединений к SQLite.
+
+    Читатели берутся из пула WAL-соединений (при нехватке открывается
+    временное соединение сверх лимита, поэтому вложенные обращения не
+    блокируют друг друга). Все записи идут через единственное соединение
+    писателя под asyncio.Lock; повторный вход из той же задачи получает то же
+    соединение.
+    """
+
+    def __init__(self, path: str = DB_FILE, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._writer = None
+        self._writer_lock = asyncio.Lock()
+        self._writer_owner = None
+        self._writer_depth = 0
+        self._closed = False
+
+    async def _open(self) -> PooledConnection:
+        conn = await aiosqlite.connect(self.path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        for pragma in CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        return PooledConnection(conn)
+
+    @asynccontextmanager
+    async def reader(self):
+        conn = self._idle.pop() if self._idle else await self._open()
+        try:
+            yield conn
+        finally:
+            try:
+                await conn._release()
+            except Exception:
+                await conn._conn.close()
+            else:
+                if self._closed or len(self._idle) >= self.size:
+                    await conn._conn.close()
+                else:
+                    self._idle.append(conn)
+
+    @asynccontextmanager
+    async def writer(self):
+        task = asyncio.current_task()
+        if self._writer_owner is task and task is not None:
+            self._writer_depth += 1
+            try:
+                yield self._writer
+            finally:
+                self._writer_depth -= 1
+            return
+
+        async with self._writer_lock:
+            if self._writer is None:
+                self._writer = await self._open()
+            self._writer_owner = task
+            self._writer_depth = 1
+            try:
+                yield self._writer
+            finally:
+                self._writer_owner = None
+                self._writer_depth = 0
+                try:
+                    await self._writer._release()
+                except Exception:
+                    await self._writer._conn.close()
+                    self._writer = None
+
+    async def close(self):
+        self._closed = True
+        while self._idle:
+            conn = self._idle.pop()
+            await conn._conn.close()
+        async with self._writer_lock:
+            if self._writer is not None:
+                await self._writer._conn.close()
+                self._writer = None
+
+
+_pool = None
+
+
+def get_pool() -> DatabasePool:
+    global _pool
+    if _pool is None or _pool._closed:
+        _pool = DatabasePool(DB_FILE)
+    return _pool
+
+
+def get_db(write: bool = False):
+    """Соединение с базой бота из общего пула.
+
+    async with get_db() as db:            # чтение
+    async with get_db(write=True) as db:  # запись (единственный писатель)
+
+    Пока блок записи открыт, все остальные записи ждут, поэтому внутри него
+    не вызывают Telegram API и другие сетевые запросы: сначала commit и выход
+    из блока, потом ответ пользователю.
+    """
+    pool = get_pool()
+    return pool.writer() if write else pool.reader()
+
+
+async def close_db():
+    """Закрытие всех соединений пула при остановке бота"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
 
-DB_FILE = "bot_database.db"
 
 async def init_db():
-    async with aiosqlite.connect(DB_FILE) as db:
-            await db.execute("PRAGMA journal_mode=WAL")
-            await db.execute("PRAGMA synchronous=NORMAL")
-            await db.commit()
-            
+    async with get_db(write=True) as db:
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     user_id INTEGER PRIMARY KEY,
@@ -455,12 +637,6 @@ async def init_db():
                     FOREIGN KEY(parent_id) REFERENCES categories(id)
                 )
             """)
-            
-            # Миграция: добавляем столбец catalog_type в categories, если его нет
-            # try:
-            #     await db.execute("ALTER TABLE categories ADD COLUMN catalog_type TEXT DEFAULT 'product'")
-            # except Exception:
-            #     pass
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS cart_order (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -475,25 +651,6 @@ async def init_db():
                     FOREIGN KEY (user_id) REFERENCES users (user_id)
                 )
             """)
-            
-            # Миграция: добавляем столбец source_table в cart_order, если его нет
-            # try:
-            #     await db.execute("ALTER TABLE cart_order ADD COLUMN source_table TEXT")
-            # except Exception:
-            #     pass
-
-            # Обновленная таблица order_requests с новыми полями (Миграция)
-            # new_request_columns = [
-            #     "deadline TEXT", "tags TEXT", "catalog_id TEXT", "service_date TEXT",
-            #     "works TEXT", "materials TEXT", "main_photo TEXT", "additional_photos TEXT",
-            #     "pricing TEXT", "guarantees TEXT", "conditions TEXT"
-            # ]
-            
-            # for col in new_request_columns:
-            #     try:
-            #         await db.execute(f"ALTER TABLE order_requests ADD COLUMN {col}")
-            #     except Exception:
-            #         pass
 
             # Таблица для разделов магазина
             await db.execute("""
@@ -509,15 +666,74 @@ async def init_db():
                 )
             """)
 
-            # Миграция: добавляем sub_category в shop_sections
-            # try:
-            #     await db.execute("ALTER TABLE shop_sections ADD COLUMN sub_category TEXT")
-            # except Exception:
-            #     pass
+            # Реферальная система
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS referrals (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    referrer_id INTEGER NOT NULL,
+                    referred_id INTEGER NOT NULL,
+                    created_at TEXT,
+                    bonus_paid BOOLEAN DEFAULT FALSE,
+                    FOREIGN KEY (referrer_id) REFERENCES users (user_id),
+                    FOREIGN KEY (referred_id) REFERENCES users (user_id)
+                )
+            """)
+
+            # Активность пользователей
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS user_activity (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    activity_type TEXT NOT NULL,
+                    activity_date TEXT,
+                    points REAL DEFAULT 0,
+                    auto_detected BOOLEAN DEFAULT TRUE,
+                    user_reported BOOLEAN DEFAULT FALSE,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                )
+            """)
+
+            # Учет активности пользователем
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS user_activity_reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    report_date TEXT,
+                    orders_plus INTEGER DEFAULT 0,
+                    orders_minus INTEGER DEFAULT 0,
+                    auctions_plus INTEGER DEFAULT 0,
+                    auctions_minus INTEGER DEFAULT 0,
+                    contests_plus INTEGER DEFAULT 0,
+                    contests_minus INTEGER DEFAULT 0,
+                    surveys_plus INTEGER DEFAULT 0,
+                    surveys_minus INTEGER DEFAULT 0,
+                    content_plus INTEGER DEFAULT 0,
+                    content_minus INTEGER DEFAULT 0,
+                    comments_plus INTEGER DEFAULT 0,
+                    comments_minus INTEGER DEFAULT 0,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                )
+            """)
 
+            # История поиска
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS search_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    search_query TEXT NOT NULL,
+                    search_type TEXT NOT NULL,
+                    catalog_type TEXT,
+                    created_at TEXT NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                )
+            """)
 
             await db.commit()
 
+            # Новые столбцы и индексы добавляются только через миграции
+            from migrations import run_migrations
+            await run_migrations()
+
 async def check_channel_subscription(bot, user_id: int, channel_id: int) -> bool:
     try:
         member = await bot.get_chat_member(chat_id=channel_id, user_id=user_id)
@@ -526,7 +742,5 @@ async def check_channel_subscription(bot, user_id: int, channel_id: int) -> bool
         return False
 
 async def check_account_status(user_id: int) -> bool:
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT account_status FROM users WHERE user_id = ?", (user_id,))
-        status = await cursor.fetchone()
-        return status and status[0] == "Р" 
+    from user_cache import get_account_status
+    return await get_account_status(user_id) == "Р" 
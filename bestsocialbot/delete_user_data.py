@@ -16,6 +16,7 @@ def delete_user_data(user_id):
         tables = [
             "users",
             "survey_answers",
+            "survey_responses",
             "user_bonuses",
             "auto_products",
             "auto_services",
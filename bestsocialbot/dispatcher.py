@@ -1,9 +1,16 @@
 from aiogram import Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.strategy import FSMStrategy
+from callback_router import install_callback_index
+from fsm_storage import create_storage, create_events_isolation
 
-storage = MemoryStorage()
-dp = Dispatcher(storage=storage, fsm_strategy=FSMStrategy.CHAT)
+storage = create_storage()
+dp = Dispatcher(
+    storage=storage,
+    fsm_strategy=FSMStrategy.CHAT,
+    events_isolation=create_events_isolation(storage)
+)
+# Обработчики callback_query выбираются по индексу callback_data, а не перебором
+install_callback_index(dp)
 
 # Регистрация роутеров
 def register_routers():
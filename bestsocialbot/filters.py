@@ -1,7 +1,8 @@
 import re
+from typing import NamedTuple, Optional
 from aiogram import types
 from aiogram.filters import BaseFilter
-import aiosqlite
+from user_cache import is_user_blocked
 
 BAD_WORDS = [
     'хуй', 'пизда', 'ебал', 'ебан', 'бля', 'блядь', 'сука', 'гондон', 'мудак',
@@ -42,33 +43,58 @@ BAD_WORD_VARIANTS = {
     'я': ['я']
 }
 
+class BadWordMatch(NamedTuple):
+    word: str
+    start: int
+    end: int
+    text: str
+
+
+def _variant_pattern(word: str) -> str:
+    """Слово, в котором каждая буква может быть заменена похожим символом"""
+    pattern = ''
+    for char in word:
+        if char in BAD_WORD_VARIANTS:
+            pattern += '[' + ''.join(re.escape(v) for v in BAD_WORD_VARIANTS[char]) + ']'
+        else:
+            pattern += re.escape(char)
+    return pattern
+
+
+def _spaced_pattern(word: str) -> str:
+    """Слово с произвольными пробелами между буквами"""
+    return r'\s*'.join(re.escape(c) for c in word)
+
+
+# Для каждого слова: варианты написания букв ИЛИ пробелы между буквами.
+# Все шаблоны компилируются один раз в одно регулярное выражение.
+_WORD_PATTERNS = [
+    (word, re.compile(f'{_variant_pattern(word)}|{_spaced_pattern(word)}'))
+    for word in BAD_WORDS
+]
+_BAD_WORDS_RE = re.compile('|'.join(f'(?:{pattern.pattern})' for _, pattern in _WORD_PATTERNS))
+
+
+def scan_bad_words(text: str) -> Optional[BadWordMatch]:
+    """Первое вхождение нецензурного слова в тексте или None"""
+    if not text:
+        return None
+    text = text.lower()
+    match = _BAD_WORDS_RE.search(text)
+    if not match:
+        return None
+    found = match.group()
+    word = next((word for word, pattern in _WORD_PATTERNS if pattern.fullmatch(found)), found)
+    return BadWordMatch(word, match.start(), match.end(), found)
+
+
+def contains_bad_words(text: str) -> bool:
+    return bool(text) and _BAD_WORDS_RE.search(text.lower()) is not None
+
+
 class IsBadWord(BaseFilter):
     async def __call__(self, message: types.Message) -> bool:
-        text = message.text or message.caption or ""
-        text = text.lower()
-        
-        for word in BAD_WORDS:
-            if word in text:
-                return True
-        
-        for bad_word in BAD_WORDS:
-            pattern = ''
-            for char in bad_word:
-                if char in BAD_WORD_VARIANTS:
-                    variants = BAD_WORD_VARIANTS[char]
-                    pattern += f'[{"".join(variants)}]'
-                else:
-                    pattern += char
-            
-            if re.search(pattern, text):
-                return True
-        
-        for bad_word in BAD_WORDS:
-            spaced_pattern = r'\s*'.join([re.escape(c) for c in bad_word])
-            if re.search(spaced_pattern, text):
-                return True
-        
-        return False
+        return contains_bad_words(message.text or message.caption or "")
 
 class IsBlockedUser(BaseFilter):
     async def __call__(self, obj) -> bool:
@@ -80,10 +106,7 @@ class IsBlockedUser(BaseFilter):
         else:
             return False
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("SELECT account_status FROM users WHERE user_id = ?", (user_id,))
-            row = await cursor.fetchone()
-            return row and row[0] == 'О'
+        return await is_user_blocked(user_id)
         
         
 def is_valid_email(email: str) -> bool:
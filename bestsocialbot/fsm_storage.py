@@ -0,0 +1,89 @@
+"""
+Хранилище состояний FSM (анкеты, опрос, корзина).
+
+Выбирается переменной окружения FSM_STORAGE:
+    memory  — в памяти процесса (состояния теряются при перезапуске);
+    sqlite  — в таблице fsm_storage базы бота (переживает перезапуск,
+              один процесс или несколько процессов на одном хосте);
+    redis   — в Redis по REDIS_URL (несколько воркеров на один токен).
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import FSM_STORAGE, REDIS_URL
+from db import get_db
+
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM в SQLite (таблица fsm_storage, создаётся миграцией)"""
+
+    def __init__(self):
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        async with get_db(write=True) as db:
+            await db.execute("""
+                INSERT INTO fsm_storage (key, state, updated_at) VALUES (?, ?, datetime('now'))
+                ON CONFLICT(key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+            """, (self.key_builder.build(key), value))
+            await db.execute("DELETE FROM fsm_storage WHERE key = ? AND state IS NULL AND data IS NULL",
+                             (self.key_builder.build(key),))
+            await db.commit()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        async with get_db() as db:
+            cursor = await db.execute("SELECT state FROM fsm_storage WHERE key = ?", (self.key_builder.build(key),))
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        value = json.dumps(data, ensure_ascii=False) if data else None
+        async with get_db(write=True) as db:
+            await db.execute("""
+                INSERT INTO fsm_storage (key, data, updated_at) VALUES (?, ?, datetime('now'))
+                ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+            """, (self.key_builder.build(key), value))
+            await db.execute("DELETE FROM fsm_storage WHERE key = ? AND state IS NULL AND data IS NULL",
+                             (self.key_builder.build(key),))
+            await db.commit()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        async with get_db() as db:
+            cursor = await db.execute("SELECT data FROM fsm_storage WHERE key = ?", (self.key_builder.build(key),))
+            row = await cursor.fetchone()
+        if not row or not row[0]:
+            return {}
+        return json.loads(row[0])
+
+    async def close(self) -> None:
+        pass
+
+
+def create_storage() -> BaseStorage:
+    """Хранилище FSM согласно настройке FSM_STORAGE"""
+    if FSM_STORAGE == "redis":
+        from aiogram.fsm.storage.redis import RedisStorage
+        logging.info("FSM: Redis (%s)", REDIS_URL)
+        return RedisStorage.from_url(
+            REDIS_URL,
+            key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        )
+    if FSM_STORAGE == "sqlite":
+        logging.info("FSM: SQLite")
+        return SQLiteStorage()
+    if FSM_STORAGE != "memory":
+        logging.warning("Неизвестное значение FSM_STORAGE=%s, используется память", FSM_STORAGE)
+    return MemoryStorage()
+
+
+def create_events_isolation(storage: BaseStorage):
+    """Блокировка обработки событий одного чата между воркерами (только Redis)"""
+    create_isolation = getattr(storage, "create_isolation", None)
+    return create_isolation() if create_isolation else None
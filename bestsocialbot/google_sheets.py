@@ -1,8 +1,14 @@
 import gspread
+from gspread.utils import rowcol_to_a1
 from datetime import datetime
+import hashlib
+import json
 import logging
-import aiosqlite
-from config import CREDENTIALS_FILE, MAIN_SURVEY_SHEET_URL
+from db import get_db
+from sheets_gateway import sheets
+from sheets_export import stream_to_sheet
+from user_cache import invalidate_user
+from config import MAIN_SURVEY_SHEET_URL, REQUESTS_SHEET_POLL_INTERVAL
 import asyncio
 from collections import defaultdict
 
@@ -17,20 +23,19 @@ SHEET_PRODUCTS = "Товары"
 SHEET_SERVICES = "Услуги"
 SHEET_ORDERS = "Заказы"  # Лист для заказов
 
-
-def get_google_sheets_client():
-    return gspread.service_account(filename=CREDENTIALS_FILE)
+ORDERS_SHEET_HEADERS = [
+    "ID заказа", "Дата заказа", "Тип заказа", "ID товара/услуги", "Название",
+    "Telegram ID покупателя", "Username покупателя", "Telegram ID продавца", "Username продавца",
+    "Статус заказа", "Цена", "Примечания"
+]
 
 
 def get_main_survey_sheet_url():
     return MAIN_SURVEY_SHEET_URL
 
 
-def init_unified_sheet():
+async def init_unified_sheet():
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
-
         sheets_config = [
             (SHEET_MAIN, 33,
              ["ДД/ММ/ГГ проведения опроса", "Телеграм ID", "Телеграм @username", "ФИО подписчика", "ДД/ММ/ГГ рождения",
@@ -74,11 +79,8 @@ def init_unified_sheet():
         ]
 
         for sheet_name, cols, headers in sheets_config:
-            try:
-                sheet = spreadsheet.worksheet(sheet_name)
-            except:
-                sheet = spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=cols)
-            sheet.update(f'A1:{chr(64 + cols)}1', [headers])
+            sheet = await sheets.worksheet(UNIFIED_SHEET_URL, sheet_name, create_rows=1000, create_cols=cols)
+            await sheets.update(sheet, f'A1:{chr(64 + cols)}1', [headers])
 
         return True
     except Exception as e:
@@ -86,241 +88,152 @@ def init_unified_sheet():
         return False
 
 
+# Поле таблицы users -> столбец листа SHEET_MAIN (сравнение и импорт в sync_with_google_sheets)
+SHEET_USER_FIELDS = {
+    'username': 'Username',
+    'full_name': 'ФИО',
+    'birth_date': 'Дата рождения',
+    'location': 'Место жительства',
+    'email': 'Email',
+    'phone': 'Телефон',
+    'employment': 'Занятость',
+    'financial_problem': 'Финансовая проблема',
+    'social_problem': 'Социальная проблема',
+    'ecological_problem': 'Экологическая проблема',
+    'passive_subscriber': 'Пассивный подписчик',
+    'active_partner': 'Активный партнер',
+    'investor_trader': 'Инвестор/трейдер',
+    'business_proposal': 'Бизнес-предложение',
+    'bonus_total': 'Сумма бонусов',
+    'current_balance': 'Текущий баланс',
+}
+SHEET_USER_FLOAT_FIELDS = ('bonus_total', 'current_balance')
+
+# Столбцы users, которые перезаписываются данными листа
+_IMPORT_USER_COLUMNS = list(SHEET_USER_FIELDS) + ['updated_at', 'account_status', 'first_name', 'last_name']
+
+
+def _user_field_changes(db_user, row: dict) -> dict:
+    """Различия между строкой users (столбцы SHEET_USER_FIELDS по порядку) и строкой листа"""
+    field_changes = {}
+    for index, (field, column) in enumerate(SHEET_USER_FIELDS.items()):
+        if field in SHEET_USER_FLOAT_FIELDS:
+            val_db = float(db_user[index] or 0)
+            val_sheet = _safe_float(row.get(column, 0))
+            is_diff = abs(val_db - val_sheet) > 0.01
+        else:
+            val_db = str(db_user[index] or '').strip()
+            val_sheet = str(row.get(column, '')).strip()
+            is_diff = val_db != val_sheet
+        if is_diff:
+            field_changes[field] = {'old': val_db, 'new': val_sheet}
+    return field_changes
+
+
 async def sync_with_google_sheets():
+    """
+    Импорт пользователей из листа SHEET_MAIN в users и user_bonuses.
+
+    Строки листа загружаются во временную таблицу одним executemany, затем
+    users и user_bonuses обновляются несколькими set-based запросами в одной
+    транзакции. Возвращает изменения {user_id: {поле: {'old', 'new'}}} для
+    уже существующих пользователей.
+    """
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
-        sheet = spreadsheet.worksheet(SHEET_MAIN)
-        gsheet_data = sheet.get_all_records()
+        sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_MAIN)
+        gsheet_data = await sheets.get_all_records(sheet)
         logging.info(f"Fetched {len(gsheet_data)} rows from Google Sheets")
 
-        # Повторные попытки при блокировке БД
-        for attempt in range(3):
+        # Дедупликация данных из Google Sheets
+        unique_rows = {}
+        for row in gsheet_data:
+            user_id_raw = row.get('Telegram ID') or row.get('User ID')
+            if not user_id_raw or str(user_id_raw).strip() == '':
+                continue
             try:
-                async with aiosqlite.connect("bot_database.db", timeout=30) as db:
-                    break
-            except Exception as e:
-                if "database is locked" in str(e) and attempt < 2:
-                    await asyncio.sleep(2)
-                    continue
-                raise
+                user_id = int(str(user_id_raw).strip())
+                unique_rows[user_id] = row
+            except ValueError:
+                continue
+
+        async with get_db(write=True) as db:
+            # Один снимок текущих данных вместо SELECT на каждого пользователя
+            cursor = await db.execute(f"SELECT user_id, {', '.join(SHEET_USER_FIELDS)} FROM users")
+            db_users = {user[0]: user[1:] for user in await cursor.fetchall()}
 
-        async with aiosqlite.connect("bot_database.db", timeout=30) as db:
-            cursor = await db.execute("SELECT user_id, has_completed_survey FROM users WHERE user_id != 0")
-            db_users = await cursor.fetchall()
-            db_user_ids = {user[0] for user in db_users}
-            db_user_survey_status = {user[0]: user[1] for user in db_users}
             changes = defaultdict(dict)
-            # Дедупликация данных из Google Sheets
-            unique_rows = {}
-            for row in gsheet_data:
-                user_id_raw = row.get('Telegram ID') or row.get('User ID')
-                if not user_id_raw or str(user_id_raw).strip() == '':
-                    continue
-                try:
-                    user_id = int(str(user_id_raw).strip())
-                    unique_rows[user_id] = row
-                except ValueError:
-                    continue
-            
+            updated_at = datetime.now().isoformat()
+            import_rows = []
             for user_id, row in unique_rows.items():
-                cursor = await db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-                db_user = await cursor.fetchone()
-                
+                db_user = db_users.get(user_id)
                 if db_user:
-                    db_fields = {
-                        'username': str(db_user[1] or '').strip(),
-                        'full_name': str(db_user[7] or '').strip(),
-                        'birth_date': str(db_user[8] or '').strip(),
-                        'location': str(db_user[9] or '').strip(),
-                        'email': str(db_user[10] or '').strip(),
-                        'phone': str(db_user[11] or '').strip(),
-                        'employment': str(db_user[12] or '').strip(),
-                        'financial_problem': str(db_user[13] or '').strip(),
-                        'social_problem': str(db_user[14] or '').strip(),
-                        'ecological_problem': str(db_user[15] or '').strip(),
-                        'passive_subscriber': str(db_user[16] or '').strip(),
-                        'active_partner': str(db_user[17] or '').strip(),
-                        'investor_trader': str(db_user[18] or '').strip(),
-                        'business_proposal': str(db_user[19] or '').strip(),
-                        'bonus_total': float(db_user[20] or 0),
-                        'current_balance': float(db_user[22] or 0)
-                    }
-                    
-                    gsheet_fields = {
-                        'username': str(row.get('Username', '')).strip(),
-                        'full_name': str(row.get('ФИО', '')).strip(),
-                        'birth_date': str(row.get('Дата рождения', '')).strip(),
-                        'location': str(row.get('Место жительства', '')).strip(),
-                        'email': str(row.get('Email', '')).strip(),
-                        'phone': str(row.get('Телефон', '')).strip(),
-                        'employment': str(row.get('Занятость', '')).strip(),
-                        'financial_problem': str(row.get('Финансовая проблема', '')).strip(),
-                        'social_problem': str(row.get('Социальная проблема', '')).strip(),
-                        'ecological_problem': str(row.get('Экологическая проблема', '')).strip(),
-                        'passive_subscriber': str(row.get('Пассивный подписчик', '')).strip(),
-                        'active_partner': str(row.get('Активный партнер', '')).strip(),
-                        'investor_trader': str(row.get('Инвестор/трейдер', '')).strip(),
-                        'business_proposal': str(row.get('Бизнес-предложение', '')).strip(),
-                        'bonus_total': _safe_float(row.get('Сумма бонусов', 0)),
-                        'current_balance': _safe_float(row.get('Текущий баланс', 0))
-                    }
-
-                    for field in gsheet_fields:
-                        val_db = db_fields[field]
-                        val_sheet = gsheet_fields[field]
-                        
-                        # Сравнение с учетом типов
-                        is_diff = False
-                        if isinstance(val_db, float) or isinstance(val_sheet, float):
-                             try:
-                                 if abs(float(val_db) - float(val_sheet)) > 0.01:
-                                     is_diff = True
-                             except:
-                                 if str(val_db) != str(val_sheet):
-                                     is_diff = True
-                        else:
-                            if str(val_db) != str(val_sheet):
-                                is_diff = True
-                                
-                        if is_diff:
-                            changes[user_id][field] = {
-                                'old': val_db,
-                                'new': val_sheet
-                            }
+                    field_changes = _user_field_changes(db_user, row)
+                    if field_changes:
+                        changes[user_id] = field_changes
                 try:
-                    has_completed_survey = db_user_survey_status.get(user_id, 0)
-                    user_data = {
-                        "user_id": user_id,
-                        "username": row.get('Username', ''),
-                        "full_name": row.get('ФИО', ''),
-                        "birth_date": row.get('Дата рождения', ''),
-                        "location": row.get('Место жительства', ''),
-                        "email": row.get('Email', ''),
-                        "phone": row.get('Телефон', ''),
-                        "employment": row.get('Занятость', ''),
-                        "financial_problem": row.get('Финансовая проблема', ''),
-                        "social_problem": row.get('Социальная проблема', ''),
-                        "ecological_problem": row.get('Экологическая проблема', ''),
-                        "passive_subscriber": row.get('Пассивный подписчик', ''),
-                        "active_partner": row.get('Активный партнер', ''),
-                        "investor_trader": row.get('Инвестор/трейдер', ''),
-                        "business_proposal": row.get('Бизнес-предложение', ''),
-                        "bonus_total": float(row.get('Сумма бонусов') or 0),
-                        "current_balance": float(row.get('Текущий баланс') or 0),
-                        "updated_at": datetime.now().isoformat(),
-                        "has_completed_survey": has_completed_survey,
-                        "account_status": row.get("Статус аккаунта", "Р")
-                    }
-                    full_name = user_data.get("full_name", "").split()
-                    if len(full_name) > 0:
-                        user_data["first_name"] = full_name[0]
-                    if len(full_name) > 1:
-                        user_data["last_name"] = " ".join(full_name[1:])
-                    columns = ", ".join(user_data.keys())
-                    placeholders = ", ".join([f":{key}" for key in user_data.keys()])
-                    await db.execute(f"INSERT OR REPLACE INTO users ({columns}) VALUES ({placeholders})", user_data)
-                    cursor = await db.execute("SELECT id FROM user_bonuses WHERE user_id = ?", (user_id,))
-                    bonus_record = await cursor.fetchone()
-                    if bonus_record:
-                        await db.execute(
-                            """
-                            UPDATE user_bonuses 
-                            SET bonus_total = ?, current_balance = ?, updated_at = ?
-                            WHERE user_id = ?
-                            """,
-                            (user_data["bonus_total"], user_data["current_balance"], user_data["updated_at"], user_id))
-                    else:
-                        await db.execute(
-                            """
-                            INSERT INTO user_bonuses 
-                            (user_id, bonus_total, current_balance, updated_at)
-                            VALUES (?, ?, ?, ?)
-                            """,
-                            (user_id, user_data["bonus_total"], user_data["current_balance"], user_data["updated_at"]))
-                    print(f"[SYNC] Добавлен/обновлён user_id: {user_id}, username: {user_data.get('username', '')}")
+                    values = [
+                        float(row.get(column) or 0) if field in SHEET_USER_FLOAT_FIELDS else row.get(column, '')
+                        for field, column in SHEET_USER_FIELDS.items()
+                    ]
+                    full_name = str(row.get('ФИО', '')).split()
+                    import_rows.append((
+                        user_id, *values, updated_at, row.get("Статус аккаунта", "Р"),
+                        full_name[0] if full_name else None,
+                        " ".join(full_name[1:]) if len(full_name) > 1 else None,
+                    ))
                 except Exception as e:
                     logging.error(f"Error processing row {row}: {e}")
-                    continue
-            await db.commit()
+
+            columns = ", ".join(_IMPORT_USER_COLUMNS)
+            await db.execute("DROP TABLE IF EXISTS temp.sheet_users_import")
+            await db.execute(f"CREATE TEMP TABLE sheet_users_import (user_id INTEGER PRIMARY KEY, {columns})")
+            await db.executemany(
+                f"INSERT INTO temp.sheet_users_import (user_id, {columns}) "
+                f"VALUES ({', '.join('?' * (len(_IMPORT_USER_COLUMNS) + 1))})",
+                import_rows
+            )
+            # has_completed_survey и прочие столбцы существующих пользователей не затираются
+            await db.execute(f"""
+                INSERT INTO users (user_id, {columns}, has_completed_survey)
+                SELECT user_id, {columns}, 0 FROM temp.sheet_users_import WHERE true
+                ON CONFLICT(user_id) DO UPDATE SET
+                {', '.join(f"{column} = excluded.{column}" for column in _IMPORT_USER_COLUMNS)}
+            """)
+            await db.execute("""
+                UPDATE user_bonuses SET
+                    bonus_total = s.bonus_total,
+                    current_balance = s.current_balance,
+                    updated_at = s.updated_at
+                FROM temp.sheet_users_import AS s
+                WHERE user_bonuses.user_id = s.user_id
+            """)
+            await db.execute("""
+                INSERT INTO user_bonuses (user_id, bonus_total, current_balance, updated_at)
+                SELECT user_id, bonus_total, current_balance, updated_at FROM temp.sheet_users_import
+                WHERE user_id NOT IN (SELECT user_id FROM user_bonuses WHERE user_id IS NOT NULL)
+            """)
             await db.commit()
-            # Фильтруем изменения, исключая служебного пользователя с ID=0
-            filtered_changes = {uid: chg for uid, chg in changes.items() if uid != 0}
-            return filtered_changes
+            await db.execute("DROP TABLE temp.sheet_users_import")
+        invalidate_user()
+        print(f"[SYNC] Импорт из Google Sheets: строк {len(import_rows)}, "
+              f"новых пользователей {sum(1 for uid in unique_rows if uid not in db_users)}, "
+              f"с изменениями {len(changes)}")
+        # Фильтруем изменения, исключая служебного пользователя с ID=0
+        filtered_changes = {uid: chg for uid, chg in changes.items() if uid != 0}
+        return filtered_changes
     except Exception as e:
         logging.error(f"Error syncing with Google Sheets: {e}")
         return None
 
 
-async def sync_db_to_google_sheets():
+async def sync_db_to_google_sheets(user_ids=None):
+    """Выгрузка основного листа; user_ids — у кого могла измениться статистика (None — у всех)"""
     try:
         # Сначала агрегируем статистику
         from data_aggregator import aggregate_user_statistics
-        await aggregate_user_statistics()
+        await aggregate_user_statistics(user_ids)
 
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
-        sheet = spreadsheet.worksheet(SHEET_MAIN)
-
-        # Получаем данные из базы данных
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT DISTINCT
-                    sa1.answer_text as survey_date,
-                    u.user_id,
-                    sa3.answer_text as username,
-                    sa4.answer_text as full_name,
-                    sa5.answer_text as birth_date,
-                    sa6.answer_text as location,
-                    sa7.answer_text as email,
-                    sa8.answer_text as phone,
-                    sa9.answer_text as employment,
-                    sa10.answer_text as financial_problem,
-                    sa11.answer_text as social_problem,
-                    sa12.answer_text as ecological_problem,
-                    sa13.answer_text as passive_subscriber,
-                    sa14.answer_text as active_partner,
-                    sa15.answer_text as investor_trader,
-                    sa16.answer_text as business_proposal,
-                    ub.bonus_total,
-                    ub.bonus_adjustment,
-                    ub.current_balance,
-                    u.problem_cost,
-                    u.notes,
-                    u.partnership_date,
-                    COALESCE(u.total_referrals, u.referral_count, 0) as referral_count,
-                    COALESCE(u.referral_earnings, u.referral_payment, 0) as referral_payment,
-                    u.subscription_date,
-                    u.subscription_payment_date,
-                    u.purchases,
-                    u.sales,
-                    u.requisites,
-                    u.shop_id,
-                    u.business,
-                    u.products_services,
-                    u.account_status
-                FROM users u
-                LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
-                LEFT JOIN survey_answers sa1 ON u.user_id = sa1.user_id AND sa1.question_id = 1
-                LEFT JOIN survey_answers sa3 ON u.user_id = sa3.user_id AND sa3.question_id = 3
-                LEFT JOIN survey_answers sa4 ON u.user_id = sa4.user_id AND sa4.question_id = 4
-                LEFT JOIN survey_answers sa5 ON u.user_id = sa5.user_id AND sa5.question_id = 5
-                LEFT JOIN survey_answers sa6 ON u.user_id = sa6.user_id AND sa6.question_id = 6
-                LEFT JOIN survey_answers sa7 ON u.user_id = sa7.user_id AND sa7.question_id = 7
-                LEFT JOIN survey_answers sa8 ON u.user_id = sa8.user_id AND sa8.question_id = 8
-                LEFT JOIN survey_answers sa9 ON u.user_id = sa9.user_id AND sa9.question_id = 9
-                LEFT JOIN survey_answers sa10 ON u.user_id = sa10.user_id AND sa10.question_id = 10
-                LEFT JOIN survey_answers sa11 ON u.user_id = sa11.user_id AND sa11.question_id = 11
-                LEFT JOIN survey_answers sa12 ON u.user_id = sa12.user_id AND sa12.question_id = 12
-                LEFT JOIN survey_answers sa13 ON u.user_id = sa13.user_id AND sa13.question_id = 13
-                LEFT JOIN survey_answers sa14 ON u.user_id = sa14.user_id AND sa14.question_id = 14
-                LEFT JOIN survey_answers sa15 ON u.user_id = sa15.user_id AND sa15.question_id = 15
-                LEFT JOIN survey_answers sa16 ON u.user_id = sa16.user_id AND sa16.question_id = 16
-                WHERE u.user_id != 0
-                GROUP BY u.user_id
-                ORDER BY MAX(ub.updated_at) DESC
-            """)
-            users = await cursor.fetchall()
+        sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_MAIN)
 
         headers = [
             "Дата опроса", "Telegram ID", "Username", "ФИО", "Дата рождения",
@@ -334,12 +247,49 @@ async def sync_db_to_google_sheets():
             "Реквизиты", "ID в магазине", "Бизнес", "Товары/услуги", "Статус аккаунта"
         ]
 
-        data = [headers]
-        for user in users:
-            data.append(list(user))
-
-        sheet.clear()
-        sheet.update('A1', data)
+        # Ответы опроса — одна строка survey_responses на пользователя
+        await stream_to_sheet(sheet, headers, """
+            SELECT
+                sr.q1 as survey_date,
+                u.user_id,
+                sr.q3 as username,
+                sr.q4 as full_name,
+                sr.q5 as birth_date,
+                sr.q6 as location,
+                sr.q7 as email,
+                sr.q8 as phone,
+                sr.q9 as employment,
+                sr.q10 as financial_problem,
+                sr.q11 as social_problem,
+                sr.q12 as ecological_problem,
+                sr.q13 as passive_subscriber,
+                sr.q14 as active_partner,
+                sr.q15 as investor_trader,
+                sr.q16 as business_proposal,
+                ub.bonus_total,
+                ub.bonus_adjustment,
+                ub.current_balance,
+                u.problem_cost,
+                u.notes,
+                u.partnership_date,
+                COALESCE(u.total_referrals, u.referral_count, 0) as referral_count,
+                COALESCE(u.referral_earnings, u.referral_payment, 0) as referral_payment,
+                u.subscription_date,
+                u.subscription_payment_date,
+                u.purchases,
+                u.sales,
+                u.requisites,
+                u.shop_id,
+                u.business,
+                u.products_services,
+                u.account_status
+            FROM users u
+            LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
+            LEFT JOIN survey_responses sr ON u.user_id = sr.user_id
+            WHERE u.user_id != 0
+            GROUP BY u.user_id
+            ORDER BY MAX(ub.updated_at) DESC
+        """)
 
         return True
     except Exception as e:
@@ -352,8 +302,7 @@ import gspread
 from datetime import datetime
 import logging
 from typing import Dict, Any, Optional
-import aiosqlite
-from config import BESTHOME_SURVEY_SHEET_URL, CREDENTIALS_FILE
+from config import BESTHOME_SURVEY_SHEET_URL
 
 
 async def sync_from_sheets_to_db() -> Dict[str, Any]:
@@ -365,15 +314,11 @@ async def sync_from_sheets_to_db() -> Dict[str, Any]:
         dict: Результат синхронизации
     """
     try:
-        # Авторизация в Google Sheets
-        client = gspread.service_account(filename=CREDENTIALS_FILE)
-
         # Открываем таблицу besthome
-        spreadsheet = client.open_by_url(BESTHOME_SURVEY_SHEET_URL)
-        worksheet = spreadsheet.worksheet("Основная таблица")
+        worksheet = await sheets.worksheet(BESTHOME_SURVEY_SHEET_URL, "Основная таблица")
 
         # Получаем все данные из таблицы
-        all_data = worksheet.get_all_records()
+        all_data = await sheets.get_all_records(worksheet)
 
         if not all_data:
             return {
@@ -383,7 +328,7 @@ async def sync_from_sheets_to_db() -> Dict[str, Any]:
             }
 
         # Подключаемся к базе данных
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             synced_count = 0
 
             for row in all_data:
@@ -498,6 +443,7 @@ async def sync_from_sheets_to_db() -> Dict[str, Any]:
                     continue
 
             await db.commit()
+            invalidate_user()
 
             return {
                 "success": True,
@@ -526,68 +472,7 @@ def _safe_float(value) -> float:
 
 async def sync_db_to_main_survey_sheet():
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
-        sheet = spreadsheet.worksheet(SHEET_MAIN)
-
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT DISTINCT
-                    sa1.answer_text,
-                    CAST(u.user_id AS TEXT),
-                    sa3.answer_text,
-                    sa4.answer_text,
-                    sa5.answer_text,
-                    sa6.answer_text,
-                    sa7.answer_text,
-                    sa8.answer_text,
-                    sa9.answer_text,
-                    sa10.answer_text,
-                    sa11.answer_text,
-                    sa12.answer_text,
-                    sa13.answer_text,
-                    sa14.answer_text,
-                    sa15.answer_text,
-                    sa16.answer_text,
-                    ub.bonus_total,
-                    ub.bonus_adjustment,
-                    ub.current_balance,
-                    u.problem_cost,
-                    u.notes,
-                    u.partnership_date,
-                    u.referral_count,
-                    u.referral_payment,
-                    u.subscription_date,
-                    u.subscription_payment_date,
-                    u.purchases,
-                    u.sales,
-                    u.requisites,
-                    u.shop_id,
-                    u.business,
-                    u.products_services,
-                    u.account_status
-                FROM users u
-                LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
-                LEFT JOIN survey_answers sa1 ON u.user_id = sa1.user_id AND sa1.question_id = 1
-                LEFT JOIN survey_answers sa3 ON u.user_id = sa3.user_id AND sa3.question_id = 3
-                LEFT JOIN survey_answers sa4 ON u.user_id = sa4.user_id AND sa4.question_id = 4
-                LEFT JOIN survey_answers sa5 ON u.user_id = sa5.user_id AND sa5.question_id = 5
-                LEFT JOIN survey_answers sa6 ON u.user_id = sa6.user_id AND sa6.question_id = 6
-                LEFT JOIN survey_answers sa7 ON u.user_id = sa7.user_id AND sa7.question_id = 7
-                LEFT JOIN survey_answers sa8 ON u.user_id = sa8.user_id AND sa8.question_id = 8
-                LEFT JOIN survey_answers sa9 ON u.user_id = sa9.user_id AND sa9.question_id = 9
-                LEFT JOIN survey_answers sa10 ON u.user_id = sa10.user_id AND sa10.question_id = 10
-                LEFT JOIN survey_answers sa11 ON u.user_id = sa11.user_id AND sa11.question_id = 11
-                LEFT JOIN survey_answers sa12 ON u.user_id = sa12.user_id AND sa12.question_id = 12
-                LEFT JOIN survey_answers sa13 ON u.user_id = sa13.user_id AND sa13.question_id = 13
-                LEFT JOIN survey_answers sa14 ON u.user_id = sa14.user_id AND sa14.question_id = 14
-                LEFT JOIN survey_answers sa15 ON u.user_id = sa15.user_id AND sa15.question_id = 15
-                LEFT JOIN survey_answers sa16 ON u.user_id = sa16.user_id AND sa16.question_id = 16
-                WHERE u.user_id != 0
-                GROUP BY u.user_id
-                ORDER BY MAX(ub.updated_at) DESC
-            """)
-            users = await cursor.fetchall()
+        sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_MAIN)
 
         headers = [
             "Дата опроса", "Telegram ID", "Username", "ФИО", "Дата рождения",
@@ -601,12 +486,49 @@ async def sync_db_to_main_survey_sheet():
             "Реквизиты", "ID в магазине", "Бизнес", "Товары/услуги", "Статус аккаунта"
         ]
 
-        data = [headers]
-        for user in users:
-            data.append(list(user))
-
-        sheet.clear()
-        sheet.update('A1', data)
+        # Ответы опроса — одна строка survey_responses на пользователя
+        await stream_to_sheet(sheet, headers, """
+            SELECT
+                sr.q1,
+                CAST(u.user_id AS TEXT),
+                sr.q3,
+                sr.q4,
+                sr.q5,
+                sr.q6,
+                sr.q7,
+                sr.q8,
+                sr.q9,
+                sr.q10,
+                sr.q11,
+                sr.q12,
+                sr.q13,
+                sr.q14,
+                sr.q15,
+                sr.q16,
+                ub.bonus_total,
+                ub.bonus_adjustment,
+                ub.current_balance,
+                u.problem_cost,
+                u.notes,
+                u.partnership_date,
+                u.referral_count,
+                u.referral_payment,
+                u.subscription_date,
+                u.subscription_payment_date,
+                u.purchases,
+                u.sales,
+                u.requisites,
+                u.shop_id,
+                u.business,
+                u.products_services,
+                u.account_status
+            FROM users u
+            LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
+            LEFT JOIN survey_responses sr ON u.user_id = sr.user_id
+            WHERE u.user_id != 0
+            GROUP BY u.user_id
+            ORDER BY MAX(ub.updated_at) DESC
+        """)
 
         return True
     except Exception as e:
@@ -616,12 +538,12 @@ async def sync_db_to_main_survey_sheet():
 
 async def sync_sheets_to_db():
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
+        products_sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_PRODUCTS)
+        products_data = await sheets.get_all_records(products_sheet)
+        services_sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_SERVICES)
+        services_data = await sheets.get_all_records(services_sheet)
 
-        async with aiosqlite.connect("bot_database.db") as db:
-            products_sheet = spreadsheet.worksheet(SHEET_PRODUCTS)
-            products_data = products_sheet.get_all_records()
+        async with get_db(write=True) as db:
 
             for row in products_data:
                 if row.get('ID заказчика'):
@@ -642,9 +564,6 @@ async def sync_sheets_to_db():
                         row.get('Наименование товара')
                     ))
 
-            services_sheet = spreadsheet.worksheet(SHEET_SERVICES)
-            services_data = services_sheet.get_all_records()
-
             for row in services_data:
                 if row.get('ID заказчика'):
                     await db.execute("""
@@ -670,39 +589,139 @@ async def sync_sheets_to_db():
         return False
 
 
-async def sync_order_requests_to_sheets():
-    """Синхронизация заявок с Google Sheets с учетом разных типов заявок"""
-    try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
+def _row_hash(row) -> str:
+    return hashlib.sha1(json.dumps(list(row), ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
 
+
+def _consecutive_groups(numbered: list) -> list:
+    """[(номер_строки, ключ), ...] по возрастанию -> группы подряд идущих строк"""
+    groups = []
+    for number, key in numbered:
+        if groups and groups[-1][-1][0] == number - 1:
+            groups[-1].append((number, key))
+        else:
+            groups.append([(number, key)])
+    return groups
+
+
+async def _export_rows_full(sheet_key: str, worksheet, headers: list, keyed: dict, hashes: dict) -> dict:
+    """Перезапись листа целиком и новая карта строк в sheet_export_rows"""
+    await sheets.replace(worksheet, [headers] + list(keyed.values()))
+    async with get_db(write=True) as db:
+        await db.execute("DELETE FROM sheet_export_rows WHERE sheet_key = ?", (sheet_key,))
+        await db.executemany(
+            "INSERT INTO sheet_export_rows (sheet_key, row_key, row_number, row_hash) VALUES (?, ?, ?, ?)",
+            [(sheet_key, key, number, hashes[key]) for number, key in enumerate(keyed, start=2)]
+        )
+        await db.commit()
+    return {"appended": len(keyed), "updated": 0, "full": True}
+
+
+async def _row_map_matches(worksheet, state: dict) -> bool:
+    """
+    Столбец ключей листа совпадает с сохранёнными номерами строк: лист не
+    сортировали, строки в нём не вставляли и не удаляли.
+    """
+    (column,) = await sheets.run_with_retry(worksheet.batch_get, ["A2:A"])
+    sheet_keys = [str(cells[0]).strip() if cells else "" for cells in column]
+    last_row = max(number for number, _ in state.values())
+    if len(sheet_keys) + 1 != last_row:
+        return False
+    return all(sheet_keys[number - 2] == key for key, (number, _) in state.items())
+
+
+async def export_rows_incremental(sheet_key: str, worksheet, headers: list, rows: list, full: bool = False) -> dict:
+    """
+    Инкрементальная выгрузка строк в лист.
+
+    Ключ строки — значение первого столбца. Для каждого ключа в таблице
+    sheet_export_rows хранится номер строки листа и хэш содержимого, поэтому
+    в лист уходят только новые и изменённые строки, одним batch_update.
+    Перед записью столбец ключей листа сверяется с сохранёнными номерами строк.
+    Полная перезапись листа выполняется при первой выгрузке, при full=True,
+    если какие-то строки исчезли из базы и если лист меняли вручную
+    (сортировка, вставка или удаление строк).
+
+    Returns:
+        dict: {"appended": ..., "updated": ..., "full": ...}
+    """
+    keyed = {str(row[0]): list(row) for row in rows}
+    hashes = {key: _row_hash(row) for key, row in keyed.items()}
+
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT row_key, row_number, row_hash FROM sheet_export_rows WHERE sheet_key = ?", (sheet_key,)
+        )
+        state = {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+
+    if full or not state or set(state) - set(keyed):
+        return await _export_rows_full(sheet_key, worksheet, headers, keyed, hashes)
+
+    next_row = max(number for number, _ in state.values()) + 1
+    writes = []
+    appended = updated = 0
+    for key in keyed:
+        if key in state:
+            number, old_hash = state[key]
+            if old_hash == hashes[key]:
+                continue
+            updated += 1
+        else:
+            number = next_row
+            next_row += 1
+            appended += 1
+        writes.append((number, key))
+
+    if not writes:
+        return {"appended": 0, "updated": 0, "full": False}
+
+    if not await _row_map_matches(worksheet, state):
+        logging.warning(f"Лист {worksheet.title}: строки не совпадают с сохранёнными, лист перезаписывается целиком")
+        return await _export_rows_full(sheet_key, worksheet, headers, keyed, hashes)
+
+    writes.sort()
+    if next_row - 1 > worksheet.row_count:
+        await sheets.add_rows(worksheet, next_row - 1 - worksheet.row_count)
+    await sheets.batch_update(worksheet, [
+        {
+            "range": f"A{group[0][0]}:{rowcol_to_a1(group[-1][0], len(headers))}",
+            "values": [keyed[key] for _, key in group],
+        }
+        for group in _consecutive_groups(writes)
+    ])
+
+    async with get_db(write=True) as db:
+        await db.executemany("""
+            INSERT INTO sheet_export_rows (sheet_key, row_key, row_number, row_hash) VALUES (?, ?, ?, ?)
+            ON CONFLICT(sheet_key, row_key) DO UPDATE SET
+                row_number = excluded.row_number, row_hash = excluded.row_hash
+        """, [(sheet_key, key, number, hashes[key]) for number, key in writes])
+        await db.commit()
+    return {"appended": appended, "updated": updated, "full": False}
+
+
+_orders_export_lock = asyncio.Lock()
+
+
+async def sync_order_requests_to_sheets(full: bool = False):
+    """
+    Синхронизация заявок с Google Sheets с учетом разных типов заявок.
+    Выгружаются только новые и изменённые строки; full=True перезаписывает лист целиком.
+    """
+    # Один экспорт за раз: снимок базы и номера строк в sheet_export_rows должны совпадать с листом
+    async with _orders_export_lock:
+        return await _sync_order_requests_to_sheets(full)
+
+
+async def _sync_order_requests_to_sheets(full: bool):
+    try:
         # Создаем или получаем лист для заявок
-        try:
-            orders_sheet = spreadsheet.worksheet("Заказы")
-            print(f"✅ Лист 'Заказы' найден")
-
-            # Получаем заголовки и проверяем их
-            orders_sheet.update('A1', [[
-                "ID заказа", "Дата заказа", "Тип заказа", "ID товара/услуги", "Название",
-                "Telegram ID покупателя", "Username покупателя", "Telegram ID продавца", "Username продавца",
-                "Статус заказа", "Цена", "Примечания"
-            ]])
-            print("✅ Заголовки таблицы обновлены")
-        except Exception as e:
-            orders_sheet = spreadsheet.add_worksheet(title="Заказы", rows=1000, cols=12)
-            headers = [
-                "ID заказа", "Дата заказа", "Тип заказа", "ID товара/услуги", "Название",
-                "Telegram ID покупателя", "Username покупателя", "Telegram ID продавца", "Username продавца",
-                "Статус заказа", "Цена", "Примечания"
-            ]
-            orders_sheet.update('A1', [headers])
-            print(f"✅ Создан новый лист 'Заказы' с заголовками")
-            existing_headers = headers
+        orders_sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_ORDERS, create_rows=1000, create_cols=12)
 
         # Получаем все данные из базы данных для товаров и предложений
         all_requests = []
 
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             # 1. Получаем заявки на товары и предложения
             cursor = await db.execute("""
                 SELECT 
@@ -768,38 +787,14 @@ async def sync_order_requests_to_sheets():
         print(f"   • Товары и предложения: {len(product_requests)}")
         print(f"   • Услуги: {len(service_requests)}")
 
-        # Получаем текущие данные из Google Sheets
-        # Переписываем таблицу полностью для гарантии соответствия схеме (12 колонок)
-        
-        if all_requests:
-            # Преобразуем данные в правильный формат для записи
-            all_data_formatted = [list(req) for req in all_requests]
-            
-            # Очищаем таблицу, но оставляем заголовки (первая строка)
-            orders_sheet.clear()
-            
-            # Восстанавливаем заголовки
-            headers = [
-                "ID заказа", "Дата заказа", "Тип заказа", "ID товара/услуги", "Название",
-                "Telegram ID покупателя", "Username покупателя", "Telegram ID продавца", "Username продавца",
-                "Статус заказа", "Цена", "Примечания"
-            ]
-            orders_sheet.update('A1', [headers])
-            
-            # Записываем все данные начиная со 2-й строки
-            orders_sheet.update('A2', all_data_formatted)
-            
+        result = await export_rows_incremental(
+            SHEET_ORDERS, orders_sheet, ORDERS_SHEET_HEADERS, all_requests, full=full
+        )
+
+        if result["full"]:
             print(f"✅ Таблица полностью обновлена с {len(all_requests)} записями")
         else:
-            # Если данных нет, просто чистим всё кроме заголовков (или восстанавливаем их)
-            orders_sheet.clear()
-            headers = [
-                "ID заказа", "Дата заказа", "Тип заказа", "ID товара/услуги", "Название",
-                "Telegram ID покупателя", "Username покупателя", "Telegram ID продавца", "Username продавца",
-                "Статус заказа", "Цена", "Примечания"
-            ]
-            orders_sheet.update('A1', [headers])
-            print("ℹ️ В базе данных нет записей, таблица очищена")
+            print(f"✅ Заказы: добавлено {result['appended']}, обновлено {result['updated']}")
 
         return True
 
@@ -815,7 +810,7 @@ async def sync_order_requests_to_sheets():
 async def auto_fill_cart_from_orders(user_id: int):
     """Автоматическое заполнение корзины из активных заявок пользователя"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # Проверяем, не заполнена ли уже корзина
             cursor = await db.execute("""
                 SELECT COUNT(*) FROM cart_order WHERE user_id = ?
@@ -903,7 +898,7 @@ async def auto_fill_cart_from_orders(user_id: int):
 async def auto_add_to_cart_from_requests():
     """Автоматическое добавление новых активных заявок в корзину для всех пользователей"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # Получаем новые активные заявки всех пользователей
             all_new_requests = []
 
@@ -983,29 +978,34 @@ async def auto_add_to_cart_from_requests():
         return 0
 
 
-async def sync_requests_from_sheets_to_db():
-    """Загрузка заявок из Google Sheets в БД"""
+async def sync_requests_from_sheets_to_db(requests_data: list = None, applied_keys: set = None):
+    """
+    Загрузка заявок из Google Sheets в БД.
+    requests_data — уже прочитанные строки листа (например, только изменённые);
+    без аргумента читается весь лист.
+    applied_keys — если передан, после успешной записи в БД в него добавляются
+    «ID заявки» строк, которые действительно загружены (пропущенные из-за
+    ошибок строки в него не попадают).
+    """
 
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
-
-        # Пробуем найти лист с заявками
-        try:
-            orders_sheet = spreadsheet.worksheet(SHEET_ORDERS)
-        except:
-            print(f"ℹ️ Лист '{SHEET_ORDERS}' не найден в Google Sheets")
-            return False
+        if requests_data is None:
+            # Пробуем найти лист с заявками
+            try:
+                orders_sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_ORDERS)
+            except gspread.WorksheetNotFound:
+                print(f"ℹ️ Лист '{SHEET_ORDERS}' не найден в Google Sheets")
+                return False
 
-        # Получаем данные из листа
-        requests_data = orders_sheet.get_all_records()
+            # Получаем данные из листа
+            requests_data = await sheets.get_all_records(orders_sheet)
         print(f"📊 Найдено {len(requests_data)} записей в Google Sheets")
 
         if not requests_data:
             print("ℹ️ В Google Sheets нет данных для импорта")
             return False
 
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             added_count = 0
             updated_count = 0
             skipped_count = 0
@@ -1017,11 +1017,15 @@ async def sync_requests_from_sheets_to_db():
             cursor = await db.execute("SELECT id FROM service_orders")
             existing_service_ids = {row[0] for row in await cursor.fetchall()}
 
+            cursor = await db.execute("SELECT user_id FROM users")
+            existing_user_ids = {row[0] for row in await cursor.fetchall()}
+
             # Объединяем все ID для проверки уникальности
             all_existing_ids = existing_order_ids.union(existing_service_ids)
             print(
                 f"📊 В базе данных найдено {len(all_existing_ids)} записей (товары: {len(existing_order_ids)}, услуги: {len(existing_service_ids)})")
 
+            applied = []
             for row_idx, row in enumerate(requests_data, 1):
 
                 try:
@@ -1058,6 +1062,7 @@ async def sync_requests_from_sheets_to_db():
                     item_type_raw = str(row.get('Тип заявки', '')).lower()
                     if 'корзин' in item_type_raw or 'cart_order' in item_type_raw:
                         # Пропускаем заказы из корзины (они только для отчетности)
+                        applied.append(request_id_str)
                         continue
 
                     # Проверяем обязательные поля
@@ -1075,13 +1080,7 @@ async def sync_requests_from_sheets_to_db():
                         continue
 
                     # Проверяем существование пользователя
-                    cursor = await db.execute(
-                        "SELECT user_id FROM users WHERE user_id = ?",
-                        (user_id,)
-                    )
-                    user_exists = await cursor.fetchone()
-
-                    if not user_exists:
+                    if user_id not in existing_user_ids:
                         print(f"⚠️ Строка {row_idx}: пользователь {user_id} не найден, пропускаем заявку")
                         skipped_count += 1
                         continue
@@ -1396,8 +1395,12 @@ async def sync_requests_from_sheets_to_db():
                     traceback.print_exc()
                     skipped_count += 1
                     continue
+                else:
+                    applied.append(request_id_str)
 
             await db.commit()
+            if applied_keys is not None:
+                applied_keys.update(applied)
 
             print(f"\n📊 Импорт завершен:")
             print(f"   ✅ Добавлено: {added_count}")
@@ -1413,31 +1416,108 @@ async def sync_requests_from_sheets_to_db():
         traceback.print_exc()
         return False
 
+REQUESTS_IMPORT_KEY = f"import:{SHEET_ORDERS}"
+_requests_sheet_modified_time = None
+
+
+async def import_changed_requests_from_sheets() -> int:
+    """
+    Импорт только изменённых строк листа заявок.
+
+    Сначала сравнивается modifiedTime таблицы из Drive API (один лёгкий запрос):
+    если таблица не менялась с прошлой проверки, лист не скачивается. Иначе
+    строки сравниваются по хэшу с манифестом в sheet_export_rows, и в БД
+    загружаются только новые и изменённые.
+
+    Returns:
+        int: количество загруженных изменённых строк
+    """
+    global _requests_sheet_modified_time
+    spreadsheet = await sheets.spreadsheet(UNIFIED_SHEET_URL)
+    try:
+        modified_time = await sheets.run(spreadsheet.get_lastUpdateTime)
+    except Exception as e:
+        # Drive API недоступен — сравниваем только хэши строк
+        logging.warning(f"Не удалось получить modifiedTime таблицы: {e}")
+        modified_time = None
+    if modified_time is not None and modified_time == _requests_sheet_modified_time:
+        return 0
+
+    try:
+        orders_sheet = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_ORDERS)
+    except gspread.WorksheetNotFound:
+        _requests_sheet_modified_time = modified_time
+        return 0
+    records = await sheets.get_all_records(orders_sheet)
+
+    row_hashes = {}
+    for row in records:
+        key = str(row.get('ID заявки', '')).strip()
+        if key:
+            row_hashes[key] = (_row_hash(row.items()), row)
+
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT row_key, row_hash FROM sheet_export_rows WHERE sheet_key = ?", (REQUESTS_IMPORT_KEY,)
+        )
+        manifest = {row[0]: row[1] for row in await cursor.fetchall()}
+
+    changed = {key: value for key, value in row_hashes.items() if manifest.get(key) != value[0]}
+    applied = set()
+    if changed:
+        await sync_requests_from_sheets_to_db([row for _, row in changed.values()], applied)
+        # В манифест попадают только загруженные строки: пропущенные (неизвестный
+        # пользователь, неверный ID, ошибка записи) импортируются при следующей проверке
+        async with get_db(write=True) as db:
+            await db.executemany("""
+                INSERT INTO sheet_export_rows (sheet_key, row_key, row_number, row_hash) VALUES (?, ?, 0, ?)
+                ON CONFLICT(sheet_key, row_key) DO UPDATE SET row_hash = excluded.row_hash
+            """, [(REQUESTS_IMPORT_KEY, key, changed[key][0]) for key in applied if key in changed])
+            await db.commit()
+
+    if applied >= changed.keys():
+        # Пока есть незагруженные строки, лист проверяется каждый раз, даже если не менялся
+        _requests_sheet_modified_time = modified_time
+    return len(applied)
+
+
+async def scheduled_requests_import():
+    """Периодическая проверка листа заявок на изменения (корзина читает только SQLite)"""
+    while True:
+        try:
+            changed = await import_changed_requests_from_sheets()
+            if changed:
+                print(f"[SYNC] Импортировано изменённых строк листа заявок: {changed}")
+        except Exception as e:
+            print(f"[SYNC] Ошибка проверки листа заявок: {e}")
+        await asyncio.sleep(REQUESTS_SHEET_POLL_INTERVAL)
+
+
+async def _replace_keeping_header(sheet_name: str, rows: list):
+    """Перезапись листа единой таблицы с сохранением строки заголовков"""
+    sheet = await sheets.worksheet(UNIFIED_SHEET_URL, sheet_name)
+    header = await sheets.row_values(sheet, 1)
+    await sheets.replace(sheet, [header] + rows)
+
+
 async def sync_all_sheets(bidirectional=False):
     try:
         if bidirectional:
             await sync_sheets_to_db()
         await sync_db_to_google_sheets()
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_url(UNIFIED_SHEET_URL)
 
-        async with aiosqlite.connect("bot_database.db") as db:
-            partners_sheet = spreadsheet.worksheet(SHEET_PARTNERS)
+        async with get_db() as db:
             cursor = await db.execute(
                 "SELECT specialization, partner_name, 'Активен', contact_info, status, '' FROM auto_tech_partners UNION ALL SELECT services, partner_name, 'Активен', contact_info, status, '' FROM auto_service_partners")
             partners = await cursor.fetchall()
             if partners:
-                partners_sheet.clear()
-                partners_sheet.update('A1', [list(partners_sheet.row_values(1))] + [list(p) for p in partners])
+                await _replace_keeping_header(SHEET_PARTNERS, [list(p) for p in partners])
 
-            investors_sheet = spreadsheet.worksheet(SHEET_INVESTORS)
             cursor = await db.execute("SELECT investor_name, contact_info, 'Активен', status, '' FROM investors")
             investors = await cursor.fetchall()
             if investors:
-                investors_sheet.clear()
-                investors_sheet.update('A1', [list(investors_sheet.row_values(1))] + [list(i) for i in investors])
+                await _replace_keeping_header(SHEET_INVESTORS, [list(i) for i in investors])
 
-            referrals_sheet = spreadsheet.worksheet(SHEET_REFERRALS)
             cursor = await db.execute("""
                 SELECT u.user_id, u.username, u.phone, u.full_name, 
                        u.financial_problem || ', ' || u.social_problem, u.business_proposal,
@@ -1450,10 +1530,8 @@ async def sync_all_sheets(bidirectional=False):
             """)
             referrals = await cursor.fetchall()
             if referrals:
-                referrals_sheet.clear()
-                referrals_sheet.update('A1', [list(referrals_sheet.row_values(1))] + [list(r) for r in referrals])
+                await _replace_keeping_header(SHEET_REFERRALS, [list(r) for r in referrals])
 
-            products_sheet = spreadsheet.worksheet(SHEET_PRODUCTS)
             cursor = await db.execute("""
                 SELECT 
                     o.order_date || ' - ' || o.status,
@@ -1477,10 +1555,8 @@ async def sync_all_sheets(bidirectional=False):
             """)
             products = await cursor.fetchall()
             if products:
-                products_sheet.clear()
-                products_sheet.update('A1', [list(products_sheet.row_values(1))] + [list(p) for p in products])
+                await _replace_keeping_header(SHEET_PRODUCTS, [list(p) for p in products])
 
-            services_sheet = spreadsheet.worksheet(SHEET_SERVICES)
             cursor = await db.execute("""
                 SELECT 
                     o.order_date || ' - ' || o.status,
@@ -1504,8 +1580,7 @@ async def sync_all_sheets(bidirectional=False):
             """)
             services = await cursor.fetchall()
             if services:
-                services_sheet.clear()
-                services_sheet.update('A1', [list(services_sheet.row_values(1))] + [list(s) for s in services])
+                await _replace_keeping_header(SHEET_SERVICES, [list(s) for s in services])
 
         return True
     except Exception as e:
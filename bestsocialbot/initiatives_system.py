@@ -1,7 +1,6 @@
-import aiosqlite
-import gspread
-from datetime import datetime, timedelta
-from config import CREDENTIALS_FILE, PLANS_REPORTS_SHEET_URL
+from db import get_db
+from config import PLANS_REPORTS_SHEET_URL
+from sheets_gateway import sheets
 import asyncio
 import logging
 from bot_instance import bot
@@ -16,7 +15,7 @@ PROPOSAL_STATUSES = [
 async def export_initiatives_to_sheets():
     """Выгрузка инициатив в таблицу планов и отчетов"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT user_id, username, full_name, business_proposal, 
                        created_at, phone, email
@@ -29,8 +28,7 @@ async def export_initiatives_to_sheets():
         if not initiatives:
             return True
         
-        gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        sheet = gc.open_by_url(PLANS_REPORTS_SHEET_URL).sheet1
+        sheet = await sheets.worksheet(PLANS_REPORTS_SHEET_URL)
         
         # Заголовки
         headers = [
@@ -48,8 +46,7 @@ async def export_initiatives_to_sheets():
                 initiative[6] or "", "Новое предложение", "", ""
             ])
         
-        sheet.clear()
-        sheet.update('A1', data)
+        await sheets.replace(sheet, data)
         
         logging.info("Initiatives exported to Google Sheets successfully")
         return True
@@ -61,7 +58,7 @@ async def export_initiatives_to_sheets():
 async def notify_initiators():
     """Уведомление инициаторов для уточнения деталей"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT user_id, username, full_name, business_proposal
                 FROM users 
@@ -111,10 +108,9 @@ async def notify_initiators():
 async def sync_proposal_statuses():
     """Синхронизация статусов предложений из Google Sheets"""
     try:
-        gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        sheet = gc.open_by_url(PLANS_REPORTS_SHEET_URL).sheet1
+        sheet = await sheets.worksheet(PLANS_REPORTS_SHEET_URL)
         
-        data = sheet.get_all_values()
+        data = await sheets.get_all_values(sheet)
         if len(data) < 2:
             return True
         
@@ -125,7 +121,9 @@ async def sync_proposal_statuses():
         if status_col == -1 or user_id_col == -1:
             return False
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        # Уведомления отправляются после записи статусов
+        changed = []
+        async with get_db(write=True) as db:
             for row in data[1:]:
                 if len(row) > max(status_col, user_id_col):
                     user_id = row[user_id_col]
@@ -143,21 +141,23 @@ async def sync_proposal_statuses():
                                 "UPDATE users SET proposal_status = ? WHERE user_id = ?",
                                 (status, int(user_id))
                             )
-                            
-                            # Уведомляем пользователя об изменении статуса
-                            try:
-                                message = f"""
+                            changed.append((int(user_id), status))
+            
+            await db.commit()
+
+        for user_id, status in changed:
+            # Уведомляем пользователя об изменении статуса
+            try:
+                message = f"""
 📋 **Обновление статуса вашей инициативы**
 
 Статус изменен на: **{status}**
 
 Следите за обновлениями в личном кабинете.
-                                """
-                                await bot.send_message(int(user_id), message)
-                            except Exception:
-                                pass
-            
-            await db.commit()
+                """
+                await bot.send_message(user_id, message)
+            except Exception:
+                pass
         
         return True
         
@@ -166,35 +166,17 @@ async def sync_proposal_statuses():
         return False
 
 async def scheduled_initiatives_sync():
-    """Планировщик синхронизации инициатив в 17:00 МСК"""
-    import pytz
+    """Синхронизация инициатив в 17:00 МСК (задача планировщика, scheduler.py)"""
+    logging.info("Starting scheduled initiatives sync at 17:00 MSK")
     
-    while True:
-        try:
-            moscow_tz = pytz.timezone('Europe/Moscow')
-            now = datetime.now(moscow_tz)
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            
-            if now >= target_time:
-                target_time += timedelta(days=1)
-            
-            wait_seconds = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            
-            logging.info("Starting scheduled initiatives sync at 17:00 MSK")
-            
-            # Выгружаем инициативы
-            await export_initiatives_to_sheets()
-            
-            # Уведомляем инициаторов
-            await notify_initiators()
-            
-            # Синхронизируем статусы
-            await sync_proposal_statuses()
-            
-            logging.info("✅ Initiatives sync completed successfully")
-                
-        except Exception as e:
-            logging.error(f"Error in scheduled initiatives sync: {e}")
-        
-        await asyncio.sleep(3600)  # Проверяем каждый час
\ No newline at end of file
+    # Выгружаем инициативы
+    exported = await export_initiatives_to_sheets()
+    
+    # Уведомляем инициаторов
+    await notify_initiators()
+    
+    # Синхронизируем статусы
+    synced = await sync_proposal_statuses()
+    
+    logging.info("✅ Initiatives sync completed")
+    return exported is not False and synced is not False
\ No newline at end of file
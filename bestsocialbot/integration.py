@@ -1,9 +1,9 @@
 # integration.py
-import gspread
 from datetime import datetime
 import logging
 from typing import Dict, Any
-from config import BESTHOME_SURVEY_SHEET_URL, WOND_SURVEY_SHEET_URL, AUTO_SURVEY_SHEET_URL, CREDENTIALS_FILE
+from config import BESTHOME_SURVEY_SHEET_URL, WOND_SURVEY_SHEET_URL, AUTO_SURVEY_SHEET_URL
+from sheets_gateway import sheets
 
 
 class GoogleSheetsIntegrator:
@@ -11,7 +11,6 @@ class GoogleSheetsIntegrator:
 
     def __init__(self, source_bot: str = "wond"):
         self.source_bot = source_bot
-        self.client = gspread.service_account(filename=CREDENTIALS_FILE)
 
     async def integrate_to_besthome_sheets_only(self, user_id: int) -> Dict[str, Any]:
         """
@@ -134,11 +133,10 @@ class GoogleSheetsIntegrator:
                 return {}
 
             # Открываем исходную таблицу
-            spreadsheet = self.client.open_by_url(source_url)
-            worksheet = spreadsheet.worksheet("Основная таблица")
+            worksheet = await sheets.worksheet(source_url, "Основная таблица")
 
             # Получаем все данные
-            all_data = worksheet.get_all_records()
+            all_data = await sheets.get_all_records(worksheet)
 
             # Ищем пользователя по Telegram ID
             for row in all_data:
@@ -196,11 +194,10 @@ class GoogleSheetsIntegrator:
                 return False
 
             # Открываем целевую таблицу
-            spreadsheet = self.client.open_by_url(sheet_url)
-            worksheet = spreadsheet.worksheet("Основная таблица")
+            worksheet = await sheets.worksheet(sheet_url, "Основная таблица")
 
             # Получаем существующие данные
-            existing_data = worksheet.get_all_records()
+            existing_data = await sheets.get_all_records(worksheet)
 
             # Форматируем строку для добавления (базовые поля)
             new_row = [
@@ -273,12 +270,11 @@ class GoogleSheetsIntegrator:
 
             # Обновляем или добавляем данные
             if user_exists and user_row_index:
-                # Обновляем существующую запись
-                for col_idx, value in enumerate(new_row, start=1):
-                    worksheet.update_cell(user_row_index, col_idx, value)
+                # Обновляем существующую запись одним запросом
+                await sheets.update(worksheet, f"A{user_row_index}", [new_row])
             else:
                 # Добавляем новую строку
-                worksheet.append_row(new_row)
+                await sheets.append_row(worksheet, new_row)
 
             return True
 
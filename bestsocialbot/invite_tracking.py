@@ -0,0 +1,219 @@
+"""
+Отметки в листе инвайта (INVITE_EXPORT_SHEET_URL): «Дата подписки в ТГ
+канал / результат» у приглашённых, которые подписались на канал или зашли
+в бота.
+
+Строку приглашённого ищут не по скачанному листу, а по его копии в SQLite:
+invite_sheet_rows — номер строки листа, Telegram ID в ней и заполнена ли
+отметка, invite_sheet_state — заголовки листа и время полного чтения. Из
+листа читаются только два нужных столбца и только строки после последней
+строки индекса; тем же запросом проверяется, что в последней строке индекса
+стоит прежний ID. Перед записью отметок ID в целевых строках сверяются с
+индексом. Если строки листа сдвинулись (сортировка, вставка, удаление),
+индекс строится заново. Целиком (те же два столбца) лист перечитывается
+также при смене заголовков, после перезаписи листа ботом
+(invalidate_invite_index) и раз в INVITE_INDEX_REBUILD_INTERVAL секунд.
+Все отметки записываются одним batch_update.
+
+/start не обращается к Google Sheets: вход в бота ставится в очередь
+выгрузок (sheets_outbox, задача invite_bot_joins), и отметки всех, кто
+зашёл за интервал воркера, записываются одним запросом.
+"""
+
+import json
+import time
+from datetime import datetime
+
+from gspread.utils import rowcol_to_a1
+
+from config import INVITE_EXPORT_SHEET_URL
+from db import get_db
+from sheets_gateway import sheets
+
+# Через сколько секунд индекс строк перечитывается целиком
+INVITE_INDEX_REBUILD_INTERVAL = 24 * 3600
+
+# Заголовки столбца Telegram ID (без учёта регистра)
+_ID_HEADERS = ("user id", "telegram id", "id")
+
+
+def _find_columns(header: list):
+    """(столбец Telegram ID, столбец отметки о подписке), нумерация с 1; None, если их нет"""
+    id_col = mark_col = None
+    for number, title in enumerate(header, 1):
+        title = title.strip().lower()
+        if id_col is None and title in _ID_HEADERS:
+            id_col = number
+        if mark_col is None and "подписк" in title and "канал" in title:
+            mark_col = number
+    if id_col is None or mark_col is None:
+        return None
+    return id_col, mark_col
+
+
+def _letter(col: int) -> str:
+    return rowcol_to_a1(1, col)[:-1]
+
+
+def _cell(values: list, offset: int) -> str:
+    """Значение offset-й строки диапазона из одного столбца (batch_get пропускает пустые хвосты)"""
+    if offset < len(values) and values[offset]:
+        return str(values[offset][0]).strip()
+    return ""
+
+
+async def _read_rows(worksheet, id_col: int, mark_col: int, first_row: int, anchor_row: int = None):
+    """
+    Строки листа начиная с first_row: [(строка, ID, отметка 0/1)] и ID в
+    строке anchor_row (читается тем же запросом).
+    """
+    id_letter, mark_letter = _letter(id_col), _letter(mark_col)
+    ranges = [f"{id_letter}{first_row}:{id_letter}", f"{mark_letter}{first_row}:{mark_letter}"]
+    if anchor_row is not None:
+        ranges.append(f"{id_letter}{anchor_row}")
+    values = await sheets.run_with_retry(worksheet.batch_get, ranges)
+    ids, marks = values[0], values[1]
+    rows = []
+    for offset in range(len(ids)):
+        user_id = _cell(ids, offset)
+        if user_id:
+            rows.append((first_row + offset, user_id, 1 if _cell(marks, offset) else 0))
+    anchor_id = _cell(values[2], 0) if anchor_row is not None else None
+    return rows, anchor_id
+
+
+async def _rebuild_index(worksheet, columns, header_json: str):
+    rows, _ = await _read_rows(worksheet, *columns, 2)
+    async with get_db(write=True) as db:
+        await db.execute("DELETE FROM invite_sheet_rows")
+        await db.execute(
+            "INSERT OR REPLACE INTO invite_sheet_state (id, header, built_at) VALUES (1, ?, ?)",
+            (header_json, time.time())
+        )
+        await db.executemany(
+            "INSERT INTO invite_sheet_rows (row_number, user_id, subscribed) VALUES (?, ?, ?)", rows
+        )
+        await db.commit()
+
+
+async def refresh_invite_index(worksheet, rebuild: bool = False):
+    """
+    Дочитать в индекс новые строки листа (или перечитать лист целиком).
+    Возвращает (столбец Telegram ID, столбец отметки) или None.
+    """
+    header = await sheets.run_with_retry(worksheet.row_values, 1)
+    columns = _find_columns(header)
+    if columns is None:
+        print("[INVITE] В листе инвайта нет столбцов Telegram ID и «Дата подписки в ТГ канал / результат»")
+        return None
+    header_json = json.dumps(header, ensure_ascii=False)
+
+    async with get_db() as db:
+        cursor = await db.execute("SELECT header, built_at FROM invite_sheet_state WHERE id = 1")
+        state = await cursor.fetchone()
+        cursor = await db.execute(
+            "SELECT row_number, user_id FROM invite_sheet_rows ORDER BY row_number DESC LIMIT 1"
+        )
+        anchor = await cursor.fetchone()
+    if (rebuild or state is None or state[0] != header_json
+            or time.time() - state[1] > INVITE_INDEX_REBUILD_INTERVAL):
+        await _rebuild_index(worksheet, columns, header_json)
+        return columns
+
+    first_row = anchor[0] + 1 if anchor else 2
+    rows, anchor_id = await _read_rows(worksheet, *columns, first_row, anchor[0] if anchor else None)
+    if anchor and anchor_id != anchor[1]:
+        print("[INVITE] Строки листа инвайта сдвинулись, индекс строится заново")
+        await _rebuild_index(worksheet, columns, header_json)
+        return columns
+    if rows:
+        async with get_db(write=True) as db:
+            await db.executemany(
+                "INSERT OR REPLACE INTO invite_sheet_rows (row_number, user_id, subscribed) VALUES (?, ?, ?)", rows
+            )
+            await db.commit()
+    return columns
+
+
+async def invalidate_invite_index():
+    """Лист инвайта перезаписан: при следующей отметке он перечитывается целиком"""
+    async with get_db(write=True) as db:
+        await db.execute("DELETE FROM invite_sheet_state")
+        await db.commit()
+
+
+async def _verified_targets(worksheet, columns, user_ids: list, first_only: bool):
+    """
+    Строки без отметки для user_ids: [(строка, отметка уже стоит в листе)].
+    ID в этих строках листа сверяются с индексом; None, если не совпали.
+    """
+    async with get_db() as db:
+        if first_only:
+            cursor = await db.execute("""
+                SELECT MIN(row_number), user_id FROM invite_sheet_rows
+                WHERE subscribed = 0 AND user_id IN (SELECT value FROM json_each(?))
+                GROUP BY user_id ORDER BY 1
+            """, (json.dumps(user_ids),))
+        else:
+            cursor = await db.execute("""
+                SELECT row_number, user_id FROM invite_sheet_rows
+                WHERE subscribed = 0 AND user_id IN (SELECT value FROM json_each(?))
+                ORDER BY row_number
+            """, (json.dumps(user_ids),))
+        targets = await cursor.fetchall()
+    if not targets:
+        return []
+
+    first, last = targets[0][0], targets[-1][0]
+    id_letter, mark_letter = _letter(columns[0]), _letter(columns[1])
+    ids, marks = await sheets.run_with_retry(
+        worksheet.batch_get, [f"{id_letter}{first}:{id_letter}{last}", f"{mark_letter}{first}:{mark_letter}{last}"]
+    )
+    if any(_cell(ids, row - first) != user_id for row, user_id in targets):
+        return None
+    return [(row, bool(_cell(marks, row - first))) for row, _ in targets]
+
+
+async def mark_channel_subscriptions(user_ids, first_only: bool = False) -> int:
+    """
+    Отметка «дата / OK» в столбце подписки у приглашённых user_ids, у которых
+    её ещё нет: во всех строках с их ID или, при first_only, только в первой.
+    Возвращает число отмеченных строк.
+    """
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    if not user_ids or not INVITE_EXPORT_SHEET_URL:
+        return 0
+    worksheet = await sheets.worksheet(INVITE_EXPORT_SHEET_URL)
+    columns = await refresh_invite_index(worksheet)
+    if columns is None:
+        return 0
+
+    targets = await _verified_targets(worksheet, columns, user_ids, first_only)
+    if targets is None:
+        print("[INVITE] Строки листа инвайта сдвинулись, индекс строится заново")
+        columns = await refresh_invite_index(worksheet, rebuild=True)
+        if columns is None:
+            return 0
+        targets = await _verified_targets(worksheet, columns, user_ids, first_only)
+        if targets is None:
+            # Лист правят прямо сейчас: отметки повторятся в следующий раз
+            raise RuntimeError("строки листа инвайта не совпадают с индексом")
+    if not targets:
+        return 0
+
+    # Отметки, поставленные в листе вручную, не перезаписываются
+    mark = str(datetime.now().date()) + " / OK"
+    writes = [row for row, marked in targets if not marked]
+    if writes:
+        await sheets.run_with_retry(worksheet.batch_update, [
+            {"range": rowcol_to_a1(row, columns[1]), "values": [[mark]]} for row in writes
+        ])
+    async with get_db(write=True) as db:
+        await db.execute(
+            "UPDATE invite_sheet_rows SET subscribed = 1 WHERE row_number IN (SELECT value FROM json_each(?))",
+            (json.dumps([row for row, _ in targets]),)
+        )
+        await db.commit()
+    if writes:
+        print(f"[INVITE] Отмечено в листе инвайта: {len(writes)}")
+    return len(writes)
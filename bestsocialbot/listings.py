@@ -0,0 +1,179 @@
+"""
+Постраничные списки позиций каталога: товары, услуги и предложения в
+категории магазина, новинки, позиции каталога по характеристикам.
+
+Вид списка (ListingKind) задаёт таблицу, условие, отрисовку одной позиции
+и оформление списка (ListingView: заголовок, текст пустого списка, кнопки
+под списком) по параметрам условия; открытый список (Listing) — параметры
+условия, курсоры страниц, прочитанные строки и число позиций. Страницы
+читаются keyset-запросом (Paginator.fetch_keyset_page) по LIMIT строк.
+
+Открытые списки держатся в памяти под ключом — хэшем вида и параметров,
+общим для всех пользователей; кнопки «⬅️ Назад / n/m / Вперед ➡️» передают
+только этот ключ и номер страницы. В общем списке хранятся только строки
+и keyset-курсоры, текст и клавиатура собираются заново на каждый запрос.
+Прочитанные страницы и число позиций считаются свежими LISTING_CACHE_TTL
+секунд, потом перечитываются; курсоры начала страниц при этом остаются
+(keyset-курсор не сдвигается от новых позиций).
+"""
+
+import hashlib
+import json
+import time
+
+from aiogram import F, types
+from aiogram.types import CallbackQuery
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from config import LISTING_CACHE_SIZE, LISTING_CACHE_TTL
+from db import get_db
+from dispatcher import dp
+from pagination import Paginator
+from user_cache import TTLCache
+from utils import check_blocked_user
+
+# Префикс callback_data кнопок страниц: lst:<ключ>_<страница>
+LISTING_CALLBACK_PREFIX = "lst:"
+
+# Сколько открытый список доступен для листания, сек
+LISTING_LIFETIME = 24 * 3600
+
+
+class ListingView:
+    """Оформление списка: заголовок, текст пустого списка, кнопки под списком"""
+
+    def __init__(self, title: str, empty_text: str = "", buttons: list = None, empty_buttons: list = None):
+        self.title = title
+        self.empty_text = empty_text
+        self.buttons = buttons or []              # кнопки под списком: [(текст, callback_data)]
+        self.empty_buttons = empty_buttons or []  # кнопки перед ними, если список пуст
+
+
+class ListingKind:
+    """Вид списка: откуда читать строки, как показывать одну позицию и весь список"""
+
+    def __init__(self, table: str, columns: str, where: str, render_item, view, per_page: int = 10,
+                 row_width: int = 1, summary: str = "", key_columns=("created_at", "id")):
+        self.table = table
+        self.columns = columns
+        self.where = where                # условие с параметрами Listing.params
+        self.render_item = render_item    # (строка, номер) -> (текст, [кнопки])
+        self.view = view                  # параметры Listing.params -> ListingView
+        self.paginator = Paginator(items_per_page=per_page)
+        self.row_width = row_width        # кнопок позиций в строке клавиатуры
+        self.summary = summary            # строка после заголовка, {total} — число позиций
+        self.key_columns = key_columns
+
+
+class Listing:
+    """Открытый список одного вида с конкретными параметрами (общий для всех пользователей)"""
+
+    def __init__(self, kind: str, params: tuple):
+        self.kind = kind
+        self.params = params
+        self.cursors = [None]                     # keyset-курсоры начала страниц 1, 2, ...
+        self.pages = {}                           # страница -> прочитанные строки
+        self.total = 0
+        self.fresh_until = 0                      # до какого момента (monotonic) pages и total свежие
+
+
+LISTING_KINDS = {}
+
+listings = TTLCache(LISTING_CACHE_SIZE, LISTING_LIFETIME)
+
+
+def register_listing(name: str, kind: ListingKind):
+    LISTING_KINDS[name] = kind
+
+
+def fixed_view(view: ListingView):
+    """Оформление, одинаковое для любых параметров списка"""
+    return lambda params: view
+
+
+def listing_token(kind: str, params: tuple) -> str:
+    raw = json.dumps([kind, params], ensure_ascii=False, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()[:10]
+
+
+async def open_listing(kind: str, params: tuple):
+    """Первая страница списка: (текст, клавиатура). Открытый список берётся из кэша"""
+    token = listing_token(kind, params)
+    listing = listings.get(token)
+    if listing is None:
+        listing = Listing(kind, params)
+        listings.set(token, listing)
+    return await render_listing_page(token, listing, 1)
+
+
+async def render_listing_page(token: str, listing: Listing, page: int):
+    """Страница page открытого списка: (текст, клавиатура)"""
+    kind = LISTING_KINDS[listing.kind]
+    paginator = kind.paginator
+    page = max(1, min(page, len(listing.cursors)))
+    async with get_db() as db:
+        if listing.fresh_until < time.monotonic():
+            cursor = await db.execute(f"SELECT COUNT(*) FROM {kind.table} WHERE ({kind.where})", listing.params)
+            listing.total = (await cursor.fetchone())[0]
+            listing.pages.clear()
+            listing.fresh_until = time.monotonic() + LISTING_CACHE_TTL
+        rows = listing.pages.get(page)
+        if rows is None:
+            rows, next_after = await paginator.fetch_keyset_page(
+                db, kind.columns, kind.table, kind.where, listing.params,
+                after=listing.cursors[page - 1], key_columns=kind.key_columns
+            )
+            if next_after is not None and len(listing.cursors) == page:
+                listing.cursors.append(next_after)
+            listing.pages[page] = rows
+    total_pages, page = paginator.calculate_pages(listing.total, page)
+
+    view = kind.view(listing.params)
+    text = view.title
+    builder = InlineKeyboardBuilder()
+    if rows:
+        text += kind.summary.format(total=listing.total)
+        for number, row in enumerate(rows, paginator.get_offset(page) + 1):
+            item_text, item_buttons = kind.render_item(row, number)
+            text += item_text
+            builder.add(*item_buttons)
+        builder.adjust(kind.row_width)
+    else:
+        text += view.empty_text
+
+    navigation = paginator.create_navigation_buttons(page, total_pages, f"{LISTING_CALLBACK_PREFIX}{token}")
+    if navigation:
+        builder.row(*navigation)
+    for button_text, callback_data in (view.empty_buttons if not rows else []) + view.buttons:
+        builder.row(types.InlineKeyboardButton(text=button_text, callback_data=callback_data))
+    return text, builder.as_markup()
+
+
+def parse_listing_callback(data: str):
+    """lst:<ключ>_<страница> -> (ключ, страница); для кнопки «n/m» страница None"""
+    token, _, page = data[len(LISTING_CALLBACK_PREFIX):].rpartition("_")
+    return token, int(page) if page.isdigit() else None
+
+
+@dp.callback_query(F.data.startswith(LISTING_CALLBACK_PREFIX))
+async def listing_page(callback: CallbackQuery):
+    """Листание открытого списка"""
+    if await check_blocked_user(callback):
+        return
+    token, page = parse_listing_callback(callback.data)
+    if page is None:
+        await callback.answer()
+        return
+
+    listing = listings.get(token)
+    if listing is None:
+        await callback.answer("⌛ Список устарел, откройте раздел заново", show_alert=True)
+        return
+
+    text, markup = await render_listing_page(token, listing, page)
+    if callback.message.content_type == types.ContentType.PHOTO:
+        await callback.message.delete()
+        await callback.message.answer(text, reply_markup=markup)
+    else:
+        await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
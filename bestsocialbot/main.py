@@ -1,28 +1,26 @@
 import asyncio
 import logging
 from config import BOT_TOKEN, SHOWCASE_INTERVAL, CHANNEL_ID, ADMIN_ID, MAIN_SURVEY_SHEET_URL
+from config import RUN_BACKGROUND_TASKS, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT
 from db import init_db
 from dispatcher import dp
 from aiogram import types, F
 from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
+from user_cache import is_user_blocked, invalidate_user
 from bot_instance import bot
+from tenants import is_multi_tenant
 from captcha import send_captcha, process_captcha_selection, CaptchaStates
 from google_sheets import sync_db_to_google_sheets, sync_db_to_main_survey_sheet, sync_with_google_sheets, sync_requests_from_sheets_to_db #, sync_from_sheets_to_db
 
 async def check_blocked_user(callback):
     """Проверка заблокированных пользователей"""
     try:
-        user_id = callback.from_user.id
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("SELECT account_status FROM users WHERE user_id = ?", (user_id,))
-            row = await cursor.fetchone()
-            
-            if row and row[0] == 'О':
-                await callback.answer("Ваш аккаунт заблокирован администратором.", show_alert=True)
-                return True
+        if await is_user_blocked(callback.from_user.id):
+            await callback.answer("Ваш аккаунт заблокирован администратором.", show_alert=True)
+            return True
         return False
     except Exception as e:
         print(f"Ошибка при проверке блокировки пользователя: {e}")
@@ -30,15 +28,13 @@ async def check_blocked_user(callback):
 
 async def get_showcase_keyboard(user_id: int):
     from config import ADMIN_ID
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT account_status FROM users WHERE user_id = ?", (user_id,))
-        row = await cursor.fetchone()
-        if row and row[0] == 'О':
-            builder = InlineKeyboardBuilder()
-            builder.add(types.InlineKeyboardButton(text="📝 Опрос", callback_data="blocked"))
-            builder.add(types.InlineKeyboardButton(text="🏪 Магазин", callback_data="blocked"))
-            builder.adjust(2)
-            return builder.as_markup()
+    if await is_user_blocked(user_id):
+        builder = InlineKeyboardBuilder()
+        builder.add(types.InlineKeyboardButton(text="📝 Опрос", callback_data="blocked"))
+        builder.add(types.InlineKeyboardButton(text="🏪 Магазин", callback_data="blocked"))
+        builder.adjust(2)
+        return builder.as_markup()
+    async with get_db() as db:
         cursor = await db.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
         user_exists = await cursor.fetchone()
         cursor = await db.execute("SELECT has_completed_survey FROM users WHERE user_id = ?", (user_id,))
@@ -108,7 +104,7 @@ async def cmd_start(message: types.Message, state: FSMContext, command: CommandO
             except ValueError:
                 pass
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
         user_exists = await cursor.fetchone()
         print(f"DEBUG: user_exists query result: {user_exists}")
@@ -141,12 +137,9 @@ from add_items import *
 from orders import *
 from automarket_stats import *
 from plans_reports import *
-from daily_scheduler import start_daily_scheduler
 
-# Новые системы согласно ТЗ №2
-from referral_system import start_referral_system
-from activity_system import start_activity_system
-from initiatives_system import scheduled_initiatives_sync
+# Новые системы согласно ТЗ №2 (задачи инициатив и активности — в scheduler.py)
+from referral_system import *
 from user_interface import *
 try:
     from table_links import *
@@ -244,7 +237,7 @@ import asyncio
 from aiogram import Bot
 from datetime import datetime
 async def send_user_notification(bot: Bot, user_id: int, changes: dict):
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT 
                 username, full_name, birth_date, location, email, phone, employment,
@@ -283,17 +276,12 @@ async def send_user_notification(bot: Bot, user_id: int, changes: dict):
     except Exception as e:
         logging.error(f"Failed to send notification to user {user_id}: {e}")
 async def periodic_sync():
-    while True:
-        try:
-            await asyncio.sleep(5)  # Задержка перед синхронизацией
-            changes = await sync_with_google_sheets()
-            if changes:
-                for user_id, user_changes in changes.items():
-                    if user_changes:
-                        await send_user_notification(bot, user_id, user_changes)
-        except Exception as e:
-            logging.error(f"Error in periodic sync: {e}")
-        await asyncio.sleep(21600)
+    """Загрузка изменений профилей из Google Sheets с уведомлением пользователей (задача планировщика)"""
+    changes = await sync_with_google_sheets()
+    if changes:
+        for user_id, user_changes in changes.items():
+            if user_changes:
+                await send_user_notification(bot, user_id, user_changes)
 async def periodic_update_invite_table():
     from admin import update_invite_table_with_channel_subs
     while True:
@@ -302,32 +290,14 @@ async def periodic_update_invite_table():
         except Exception as e:
             logging.error(f"Error in periodic_update_invite_table: {e}")
         await asyncio.sleep(3600)
-async def main():
-    from db import init_db
-    await init_db()
-
-    # Инициализация реферальной системы
-    from referral_system import init_referral_system
-    await init_referral_system()
-
-    from search_system import init_search_history_table
-    await init_search_history_table()
-
-    # Инициализация новых систем согласно ТЗ №2
-    await start_referral_system()
-    await start_activity_system()
-    
-    # Инициализация админских таблиц
-    await init_admin_tables()
-    
-    # Заполнение таблиц из Excel примеров
-    await fill_tables_from_excel()
-    
+async def start_background_tasks() -> list:
+    """Планировщики и синхронизации с Google Sheets (запускаются в одном воркере)"""
     # Список фоновых задач для корректного завершения
     background_tasks = []
 
-    # Запуск ежедневной синхронизации в 17:00 МСК
-    background_tasks.append(asyncio.create_task(start_daily_scheduler()))
+    # Очередь выгрузок в Google Sheets из обработчиков пользователей
+    from sheets_outbox import run_outbox_worker
+    background_tasks.append(asyncio.create_task(run_outbox_worker()))
     
 
     
@@ -351,7 +321,7 @@ async def main():
         print(f"[ERROR] Ошибка загрузки из Google Sheets: {e}")
     
     # Полное управление через Google Sheets
-    from admin_sheets_manager import start_admin_sheets_sync, export_admin_data_to_sheets
+    from admin_sheets_manager import export_admin_data_to_sheets
     from automarket_sheets import export_all_automarket_data
     from partner_sheets import export_all_partner_data
     
@@ -359,7 +329,7 @@ async def main():
     print("[EXPORT] Выгрузка данных из базы в Google Sheets...")
     
     # Проверяем данные в базе
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM auto_products")
         products_count = (await cursor.fetchone())[0]
         cursor = await db.execute("SELECT COUNT(*) FROM auto_services")
@@ -378,69 +348,141 @@ async def main():
         print(f"[ERROR] Ошибка выгрузки: {e}")
         print("[INFO] Проверьте URL таблиц в config.py и доступ к Google Sheets")
     
-    await start_admin_sheets_sync()
+    # Ежедневные синхронизации в 17:00 МСК (ТЗ №2: рефералы, активность, инициативы;
+    # автомагазин, партнерские программы, административные таблицы) и загрузка
+    # профилей раз в 6 часов — единый планировщик с журналом запусков job_runs
+    from scheduler import Job, register_job, run_scheduler
+    register_job(Job("profile_sync", "45 */6 * * *", periodic_sync, "Изменения профилей из Google Sheets"))
+    background_tasks.append(asyncio.create_task(run_scheduler()))
     
     # Запуск периодических задач
     background_tasks.append(asyncio.create_task(periodic_showcase()))
-    background_tasks.append(asyncio.create_task(periodic_sync()))
-    
-    # Синхронизация автомагазина
-    from automarket_sheets import scheduled_automarket_sync
-    background_tasks.append(asyncio.create_task(scheduled_automarket_sync()))
-    
-    # Синхронизация партнерских программ
-    from partner_sheets import scheduled_partner_sync
-    background_tasks.append(asyncio.create_task(scheduled_partner_sync()))
+
+    # Импорт изменённых заявок из листа "Заказы" (раньше выполнялся при каждом открытии корзины)
+    from google_sheets import scheduled_requests_import
+    background_tasks.append(asyncio.create_task(scheduled_requests_import()))
     
     # Синхронизация статусов заказов (функционал в orders.py)
     
     # ✅ СТАТИСТИКА СОГЛАСНО ТЗ №2 П.4-5
     from statistics_system import scheduled_statistics_export
     background_tasks.append(asyncio.create_task(scheduled_statistics_export()))
-    
-    # ✅ СИСТЕМА ИНИЦИАТИВ СОГЛАСНО ТЗ №2 П.1
-    background_tasks.append(asyncio.create_task(scheduled_initiatives_sync()))
-    
+
+    return background_tasks
+
+
+async def run_polling():
+    """Получение обновлений через long polling"""
     # Запуск polling с retry логикой
     max_retries = 5
     retry_delay = 5
     
+    for attempt in range(max_retries):
+        try:
+            print(f"Попытка подключения к Telegram API ({attempt + 1}/{max_retries})...")
+            # Несколько ботов в процессе (tenants.py): сигналы обрабатывает
+            # запускатель, HTTP-сессия общая и закрывается им же
+            await dp.start_polling(bot, handle_signals=not is_multi_tenant(), close_bot_session=not is_multi_tenant())
+            break
+        except Exception as e:
+            logging.error(f"Ошибка подключения к Telegram (попытка {attempt + 1}): {e}")
+            if attempt < max_retries - 1:
+                print(f"Повторная попытка через {retry_delay} секунд...")
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2  # Экспоненциальная задержка
+            else:
+                print("Не удалось подключиться к Telegram API. Проверьте интернет-соединение.")
+                raise
+
+
+async def run_webhook():
+    """Получение обновлений через webhook.
+
+    Несколько воркеров с общим FSM_STORAGE=redis могут обслуживать один токен
+    за балансировщиком; фоновые задачи включаются только в одном из них
+    (RUN_BACKGROUND_TASKS=1).
+    """
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET or None
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    await bot.set_webhook(
+        f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET or None,
+        allowed_updates=dp.resolve_used_update_types()
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=WEBAPP_HOST, port=WEBAPP_PORT)
+    await site.start()
+    print(f"Webhook запущен: {WEBHOOK_URL}{WEBHOOK_PATH} ({WEBAPP_HOST}:{WEBAPP_PORT})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def main():
+    from db import init_db
+    await init_db()
+
+    # Инициализация админских таблиц
+    await init_admin_tables()
+    
+    # Заполнение таблиц из Excel примеров
+    await fill_tables_from_excel()
+    
+    # Справочники категорий и клавиатуры меню в память
+    from taxonomy_cache import load_taxonomy
+    await load_taxonomy()
+    
+    # Список фоновых задач для корректного завершения
+    background_tasks = []
+    if RUN_BACKGROUND_TASKS:
+        background_tasks = await start_background_tasks()
+    else:
+        print("[WORKER] Фоновые задачи отключены (RUN_BACKGROUND_TASKS=0)")
+    
     try:
-        for attempt in range(max_retries):
-            try:
-                print(f"Попытка подключения к Telegram API ({attempt + 1}/{max_retries})...")
-                await dp.start_polling(bot)
-                break
-            except Exception as e:
-                logging.error(f"Ошибка подключения к Telegram (попытка {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    print(f"Повторная попытка через {retry_delay} секунд...")
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= 2  # Экспоненциальная задержка
-                else:
-                    print("Не удалось подключиться к Telegram API. Проверьте интернет-соединение.")
-                    raise
+        if WEBHOOK_URL:
+            await run_webhook()
+        else:
+            await run_polling()
     finally:
         print("Остановка бота... Завершение фоновых задач.")
         for task in background_tasks:
             task.cancel()
         await asyncio.gather(*background_tasks, return_exceptions=True)
         print("Фоновые задачи завершены.")
+        await dp.storage.close()
+        from db import close_db
+        await close_db()
+        if not is_multi_tenant():
+            from sheets_gateway import sheets
+            sheets.close()
 
 
 
 
 async def send_showcase(chat_id: int):
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         cursor = await db.execute("SELECT message_id FROM showcase_messages WHERE chat_id = ?", (chat_id,))
         rows = await cursor.fetchall()
-        for row in rows:
-            try:
-                await bot.delete_message(chat_id=chat_id, message_id=row[0])
-            except Exception:
-                pass
         await db.execute("DELETE FROM showcase_messages WHERE chat_id = ?", (chat_id,))
         await db.commit()
+    for row in rows:
+        try:
+            await bot.delete_message(chat_id=chat_id, message_id=row[0])
+        except Exception:
+            pass
     
 
     
@@ -461,17 +503,17 @@ async def send_showcase(chat_id: int):
         reply_markup=builder.as_markup()
     )
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute("INSERT INTO showcase_messages VALUES (?, ?)", (message.message_id, chat_id))
         await db.commit()
-@dp.callback_query(lambda c: c.data == "disabled")
+@dp.callback_query(F.data == "disabled")
 async def disabled_button(callback: types.CallbackQuery):
     await callback.answer("Для доступа к этой функции необходимо пройти опрос.", show_alert=True)
-@dp.callback_query(lambda c: c.data == "blocked")
+@dp.callback_query(F.data == "blocked")
 async def blocked_button(callback: types.CallbackQuery):
     await callback.answer("Ваш аккаунт заблокирован администратором.", show_alert=True)
 
-@dp.callback_query(lambda c: c.data == "empty")
+@dp.callback_query(F.data == "empty")
 async def empty_button(callback: types.CallbackQuery):
     await callback.answer("В данной категории пока нет предложений.", show_alert=True)
 @dp.callback_query(F.data == "survey")
@@ -480,7 +522,7 @@ async def survey_button_handler(callback: types.CallbackQuery):
 
 
 
-@dp.callback_query(lambda c: c.data == "admin_panel")
+@dp.callback_query(F.data == "admin_panel")
 async def admin_panel_handler(callback: types.CallbackQuery):
     # Проверяем права администратора
     if callback.from_user.id != ADMIN_ID:
@@ -502,7 +544,7 @@ async def admin_panel_handler(callback: types.CallbackQuery):
     )
     await callback.answer()
 
-@dp.callback_query(lambda c: c.data == "back_to_main")
+@dp.callback_query(F.data == "back_to_main")
 async def back_to_main_handler(callback: types.CallbackQuery):
     try:
         user_id = callback.from_user.id
@@ -516,7 +558,7 @@ async def back_to_main_handler(callback: types.CallbackQuery):
         print(f"Ошибка в back_to_main_handler: {e}")
         await callback.answer("Произошла ошибка", show_alert=True)
 
-@dp.callback_query(lambda c: c.data == "admin_tables")
+@dp.callback_query(F.data == "admin_tables")
 async def admin_tables_handler(callback: types.CallbackQuery):
     if callback.from_user.id != ADMIN_ID:
         await callback.answer("❌ Доступ запрещен", show_alert=True)
@@ -573,8 +615,8 @@ async def captcha_callback(callback: CallbackQuery, state: FSMContext):
                 first_name = callback.from_user.first_name or ""
                 last_name = callback.from_user.last_name or ""
                 try:
-                    import aiosqlite
-                    async with aiosqlite.connect("bot_database.db") as db:
+                    from db import get_db
+                    async with get_db(write=True) as db:
                         cursor = await db.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
                         exists = await cursor.fetchone()
                         if not exists:
@@ -583,6 +625,7 @@ async def captcha_callback(callback: CallbackQuery, state: FSMContext):
                                 (user_id, username, first_name, last_name, "Р")
                             )
                             await db.commit()
+                            invalidate_user(user_id)
                     # Обрабатываем реферала если есть
                     referrer_id = data.get("referrer_id")
                     if referrer_id:
@@ -630,10 +673,9 @@ async def captcha_callback(callback: CallbackQuery, state: FSMContext):
                                 from bot_instance import bot as global_bot
                                 await global_bot.send_message(user_id, "✅ Капча пройдена! Добро пожаловать!", reply_markup=keyboard)
 
-                    print("SYNC CALL")
                     try:
-                        from google_sheets import sync_db_to_google_sheets
-                        await sync_db_to_google_sheets()
+                        from sheets_outbox import enqueue
+                        await enqueue("main_survey", {"user_id": user_id})
                     except Exception as sync_e:
                         print(f"⚠️ Warning: Background sync failed: {sync_e}")
                         # Don't fail the user interaction because of background sync
@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-import aiosqlite
+from db import get_db
 from datetime import datetime
 from dispatcher import dp
 from utils import check_blocked_user
@@ -25,7 +25,7 @@ async def messages_menu(callback: CallbackQuery):
     user_id = callback.from_user.id
 
     # Получаем количество непрочитанных сообщений
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute(
             "SELECT COUNT(*) FROM messages WHERE recipient_id = ? AND is_read = 0",
             (user_id,)
@@ -135,7 +135,7 @@ async def compose_text(message: Message, state: FSMContext):
     sender_id = message.from_user.id
 
     # Сохраняем сообщение в БД
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute("""
             INSERT INTO messages (sender_id, recipient_id, subject, message_text, sent_at, is_read)
             VALUES (?, ?, ?, ?, ?, 0)
@@ -172,7 +172,7 @@ async def compose_text(message: Message, state: FSMContext):
 async def send_system_message(recipient_id: int, subject: str, message_text: str):
     """Отправить системное сообщение пользователю"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             await db.execute("""
                 INSERT INTO messages (sender_id, recipient_id, subject, message_text, sent_at, is_read)
                 VALUES (NULL, ?, ?, ?, ?, 0)
@@ -198,7 +198,7 @@ async def notify_admin_new_order_request(user_id: int, request_id: int, request_
         user_info = f"@{user_id}"
 
         # Получаем информацию о пользователе из БД
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute(
                 "SELECT username, full_name FROM users WHERE user_id = ?",
                 (user_id,)
@@ -258,7 +258,7 @@ async def notify_admin_new_order_request(user_id: int, request_id: int, request_
 
         # Используем уже существующий функционал отправки сообщений
         # Сохраняем сообщение в БД
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             await db.execute("""
                 INSERT INTO messages (sender_id, recipient_id, subject, message_text, sent_at, is_read)
                 VALUES (?, ?, ?, ?, ?, 0)
@@ -348,7 +348,7 @@ async def notify_admin_new_category(category_type: str, value: str, user_id: int
 
         # Сохраняем уведомление в БД для админа
         try:
-            async with aiosqlite.connect("bot_database.db") as db:
+            async with get_db(write=True) as db:
                 await db.execute("""
                     INSERT INTO messages (sender_id, recipient_id, subject, message_text, sent_at, is_read)
                     VALUES (?, ?, ?, ?, ?, 0)
@@ -405,7 +405,7 @@ async def send_order_request_to_admin(user_id: int, request_id: int, state_data:
     """Отправить полную заявку админу для одобрения"""
     try:
         # Получаем информацию о пользователе
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute(
                 "SELECT username, full_name FROM users WHERE user_id = ?",
                 (user_id,)
@@ -520,7 +520,7 @@ async def send_order_request_to_admin(user_id: int, request_id: int, state_data:
         message_text += "**💬 Для связи:** Отправьте сообщение пользователю"
 
         # Сохраняем полную заявку как сообщение админу
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             await db.execute("""
                 INSERT INTO messages (sender_id, recipient_id, subject, message_text, sent_at, is_read)
                 VALUES (?, ?, ?, ?, ?, 0)
@@ -581,7 +581,7 @@ async def messages_inbox(callback: CallbackQuery):
 
     user_id = callback.from_user.id
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT m.id, m.sender_id, m.subject, m.message_text, m.sent_at, m.is_read, u.username
             FROM messages m
@@ -633,7 +633,7 @@ async def messages_sent(callback: CallbackQuery):
 
     user_id = callback.from_user.id
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT m.id, m.recipient_id, m.subject, m.message_text, m.sent_at, u.username
             FROM messages m
@@ -685,7 +685,7 @@ async def read_message(callback: CallbackQuery):
     message_id = int(callback.data.split("_")[2])
     user_id = callback.from_user.id
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         cursor = await db.execute("""
             SELECT m.sender_id, m.subject, m.message_text, m.sent_at, u.username
             FROM messages m
@@ -0,0 +1,777 @@
+"""
+Версионированные миграции схемы базы данных.
+
+Каждая миграция применяется один раз; номер применённой версии записывается
+в таблицу schema_version. Новые столбцы и индексы добавляются только здесь,
+а не через try/except ALTER TABLE в модулях.
+"""
+
+from datetime import datetime
+from db import get_db
+from catalog_items import SOURCE_CODES
+
+
+async def column_exists(db, table: str, column: str) -> bool:
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in await cursor.fetchall())
+
+
+async def add_column(db, table: str, column: str, definition: str):
+    """ALTER TABLE ADD COLUMN, если столбца ещё нет (старые базы)"""
+    if not await column_exists(db, table, column):
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+async def _m001_missing_columns(db):
+    """Столбцы, которые раньше добавлялись через try/except ALTER TABLE"""
+    columns = [
+        # activity_system
+        ("users", "daily_activity_points", "REAL DEFAULT 0"),
+        ("users", "monthly_activity_points", "REAL DEFAULT 0"),
+        ("users", "current_activity", "TEXT DEFAULT ''"),
+        # referral_system
+        ("users", "referral_link", "TEXT"),
+        ("users", "referral_earnings", "REAL DEFAULT 0"),
+        ("users", "total_referrals", "INTEGER DEFAULT 0"),
+        # db.init_db
+        ("categories", "created_at", "TEXT"),
+        ("categories", "catalog_type", "TEXT DEFAULT 'product'"),
+        ("cart_order", "source_table", "TEXT"),
+        ("shop_sections", "sub_category", "TEXT"),
+        ("order_requests", "deadline", "TEXT"),
+        ("order_requests", "tags", "TEXT"),
+        ("order_requests", "catalog_id", "TEXT"),
+        ("order_requests", "service_date", "TEXT"),
+        ("order_requests", "works", "TEXT"),
+        ("order_requests", "materials", "TEXT"),
+        ("order_requests", "main_photo", "TEXT"),
+        ("order_requests", "additional_photos", "TEXT"),
+        ("order_requests", "pricing", "TEXT"),
+        ("order_requests", "guarantees", "TEXT"),
+        ("order_requests", "conditions", "TEXT"),
+    ]
+    for table, column, definition in columns:
+        await add_column(db, table, column, definition)
+
+
+async def _m002_hot_indexes(db):
+    """Индексы для каталога, корзины, опроса и пользовательских списков"""
+    indexes = [
+        # Списки каталога: WHERE item_type = ? AND status IN (...) ORDER BY created_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_order_requests_type_status_created ON order_requests(item_type, status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_order_requests_type_category ON order_requests(item_type, category, status)",
+        "CREATE INDEX IF NOT EXISTS idx_order_requests_user_status ON order_requests(user_id, status)",
+        # Корзина: WHERE user_id = ? [AND item_type = ? AND item_id = ?]
+        "CREATE INDEX IF NOT EXISTS idx_cart_order_user_item ON cart_order(user_id, item_type, item_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_user_status ON orders(user_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_seller ON orders(seller_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_item ON orders(order_type, item_id)",
+        # Покрывающий индекс для JOIN ответов опроса в sync_db_to_google_sheets
+        "CREATE INDEX IF NOT EXISTS idx_survey_answers_user_question ON survey_answers(user_id, question_id, answer_text)",
+        "CREATE INDEX IF NOT EXISTS idx_user_bonuses_user ON user_bonuses(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_user_activity_user_date ON user_activity(user_id, activity_date)",
+        "CREATE INDEX IF NOT EXISTS idx_user_activity_reports_user_date ON user_activity_reports(user_id, report_date)",
+        "CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals(referrer_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_referrals_referred ON referrals(referred_id)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_recipient ON messages(recipient_id, sent_at)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_recipient_unread ON messages(recipient_id, is_read)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id, sent_at)",
+        "CREATE INDEX IF NOT EXISTS idx_reviews_item ON reviews(item_type, item_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_reviews_user ON reviews(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_search_history_user ON search_history(user_id, created_at)",
+    ]
+    for sql in indexes:
+        await db.execute(sql)
+    await db.execute("ANALYZE")
+
+
+async def _m003_fsm_storage(db):
+    """Таблица для хранилища состояний FSM (fsm_storage.SQLiteStorage)"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT,
+            updated_at TEXT
+        )
+    """)
+
+
+async def _m004_sheet_export_rows(db):
+    """Состояние инкрементальной выгрузки в Google Sheets: строка листа и хэш содержимого по ключу"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS sheet_export_rows (
+            sheet_key TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            row_number INTEGER NOT NULL,
+            row_hash TEXT NOT NULL,
+            PRIMARY KEY (sheet_key, row_key)
+        )
+    """)
+
+
+async def _m005_sheets_outbox(db):
+    """Очередь выгрузок в Google Sheets (sheets_outbox.py)"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS sheets_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            payload TEXT,
+            created_at TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_sheets_outbox_next_attempt ON sheets_outbox(next_attempt_at)")
+
+
+def _fold_yo(expr: str) -> str:
+    """ё -> е: токенизатор unicode61 не считает их одной буквой"""
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+# Источник catalog_search -> выражения для строки индекса (row — NEW или сама таблица)
+_CATALOG_SEARCH_SOURCES = {
+    "auto_products": {
+        "item_type": "'product'",
+        "title": "{row}.title",
+        "description": "{row}.description",
+        "category": "(SELECT name FROM auto_categories WHERE id = {row}.category_id)",
+        "operation": "{row}.operation_type",
+        "details": "{row}.specifications",
+        "active": "{row}.status = 'active'",
+        "columns": "title, description, status, category_id, operation_type, specifications",
+    },
+    "auto_services": {
+        "item_type": "'service'",
+        "title": "{row}.title",
+        "description": "{row}.description",
+        "category": "(SELECT name FROM auto_categories WHERE id = {row}.category_id)",
+        "operation": "{row}.operation_type",
+        "details": "{row}.location",
+        "active": "{row}.status = 'active'",
+        "columns": "title, description, status, category_id, operation_type, location",
+    },
+    "order_requests": {
+        "item_type": "{row}.item_type",
+        "title": "{row}.title",
+        "description": "NULL",
+        "category": "{row}.category",
+        "operation": "{row}.operation",
+        "details": "NULL",
+        "active": "{row}.status IN ('active', 'approved', 'processing')",
+        "columns": "title, status, item_type, category, operation",
+    },
+}
+
+
+def _catalog_search_select(source: str, row: str) -> str:
+    spec = {key: value.format(row=row) for key, value in _CATALOG_SEARCH_SOURCES[source].items()}
+    return (
+        f"SELECT {row}.id * {len(SOURCE_CODES)} + {SOURCE_CODES[source]}, "
+        + ", ".join(_fold_yo(spec[column]) for column in ("title", "description", "category", "operation", "details"))
+        + f", {spec['item_type']}"
+    )
+
+
+async def _m006_catalog_search(db):
+    """Полнотекстовый индекс каталога catalog_search (FTS5) и триггеры его обновления"""
+    await db.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS catalog_search USING fts5(
+            title, description, category, operation, details,
+            item_type UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4'
+        )
+    """)
+    insert = "INSERT INTO catalog_search (rowid, title, description, category, operation, details, item_type)"
+    for source, spec in _CATALOG_SEARCH_SOURCES.items():
+        rowid = f"id * {len(SOURCE_CODES)} + {SOURCE_CODES[source]}"
+        new_row = f"{_catalog_search_select(source, 'NEW')} WHERE {spec['active'].format(row='NEW')}"
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_catalog_search_insert AFTER INSERT ON {source} BEGIN
+                {insert} {new_row};
+            END
+        """)
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_catalog_search_update AFTER UPDATE OF {spec['columns']} ON {source} BEGIN
+                DELETE FROM catalog_search WHERE rowid = OLD.{rowid};
+                {insert} {new_row};
+            END
+        """)
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_catalog_search_delete AFTER DELETE ON {source} BEGIN
+                DELETE FROM catalog_search WHERE rowid = OLD.{rowid};
+            END
+        """)
+        await db.execute(
+            f"{insert} {_catalog_search_select(source, source)} FROM {source} "
+            f"WHERE {spec['active'].format(row=source)}"
+        )
+
+    # Переименование категории автокаталога
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS auto_categories_catalog_search_update AFTER UPDATE OF name ON auto_categories BEGIN
+            UPDATE catalog_search SET category = {_fold_yo('NEW.name')}
+            WHERE rowid IN (
+                SELECT id * {len(SOURCE_CODES)} + {SOURCE_CODES['auto_products']} FROM auto_products WHERE category_id = NEW.id
+                UNION ALL
+                SELECT id * {len(SOURCE_CODES)} + {SOURCE_CODES['auto_services']} FROM auto_services WHERE category_id = NEW.id
+            );
+        END
+    """)
+
+
+# Источник -> выражения для строки catalog_items (row — NEW или сама таблица)
+_CATALOG_ITEMS_SOURCES = {
+    "auto_products": {
+        "item_type": "'product'",
+        "user_id": "{row}.user_id",
+        "title": "{row}.title",
+        "description": "{row}.description",
+        "price": "{row}.price",
+        "category": "(SELECT name FROM auto_categories WHERE id = {row}.category_id)",
+        "item_class": "(SELECT name FROM product_classes WHERE id = {row}.class_id)",
+        "operation": "{row}.operation_type",
+        "details": "{row}.specifications",
+        "status": "{row}.status",
+        "created_at": "{row}.created_at",
+        "active": "{row}.status = 'active'",
+        "columns": "user_id, title, description, price, category_id, class_id, operation_type, specifications, "
+                   "status, created_at",
+    },
+    "auto_services": {
+        "item_type": "'service'",
+        "user_id": "{row}.user_id",
+        "title": "{row}.title",
+        "description": "{row}.description",
+        "price": "{row}.price",
+        "category": "(SELECT name FROM auto_categories WHERE id = {row}.category_id)",
+        "item_class": "(SELECT name FROM service_classes WHERE id = {row}.class_id)",
+        "operation": "{row}.operation_type",
+        "details": "{row}.location",
+        "status": "{row}.status",
+        "created_at": "{row}.created_at",
+        "active": "{row}.status = 'active'",
+        "columns": "user_id, title, description, price, category_id, class_id, operation_type, location, "
+                   "status, created_at",
+    },
+    "order_requests": {
+        "item_type": "{row}.item_type",
+        "user_id": "{row}.user_id",
+        "title": "{row}.title",
+        "description": "NULL",
+        "price": "{row}.price",
+        "category": "{row}.category",
+        "item_class": "{row}.item_class",
+        "operation": "{row}.operation",
+        "details": "NULL",
+        "status": "{row}.status",
+        "created_at": "{row}.created_at",
+        "active": "{row}.status IN ('active', 'approved', 'processing')",
+        "columns": "user_id, item_type, title, price, category, item_class, operation, status, created_at",
+    },
+}
+_CATALOG_ITEM_FIELDS = ("item_type", "user_id", "title", "description", "price", "category", "item_class",
+                        "operation", "details", "status", "created_at")
+_CATALOG_SEARCH_FIELDS = ("title", "description", "category", "operation", "details")
+
+
+async def _create_catalog_items_source_triggers(db, sources: dict, fields: tuple):
+    """Триггеры источник -> catalog_items и заполнение catalog_items из источников"""
+    items_insert = f"INSERT INTO catalog_items (key, source, item_id, {', '.join(fields)})"
+
+    def items_select(source: str, row: str) -> str:
+        spec = {key: value.format(row=row) for key, value in sources[source].items()}
+        return (
+            f"SELECT {row}.id * {len(SOURCE_CODES)} + {SOURCE_CODES[source]}, '{source}', {row}.id, "
+            + ", ".join(spec[field] for field in fields)
+        )
+
+    for source, spec in sources.items():
+        key = f"id * {len(SOURCE_CODES)} + {SOURCE_CODES[source]}"
+        new_row = f"{items_select(source, 'NEW')} WHERE {spec['active'].format(row='NEW')}"
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_catalog_items_insert AFTER INSERT ON {source} BEGIN
+                {items_insert} {new_row};
+            END
+        """)
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_catalog_items_update AFTER UPDATE OF {spec['columns']} ON {source} BEGIN
+                DELETE FROM catalog_items WHERE key = OLD.{key};
+                {items_insert} {new_row};
+            END
+        """)
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_catalog_items_delete AFTER DELETE ON {source} BEGIN
+                DELETE FROM catalog_items WHERE key = OLD.{key};
+            END
+        """)
+        await db.execute(f"DELETE FROM catalog_items WHERE source = '{source}'")
+        await db.execute(
+            f"{items_insert} {items_select(source, source)} FROM {source} WHERE {spec['active'].format(row=source)}"
+        )
+
+
+async def _m007_catalog_items(db):
+    """Единая модель чтения каталога catalog_items; catalog_search строится из неё"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_items (
+            key INTEGER PRIMARY KEY,
+            source TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            item_type TEXT NOT NULL,
+            user_id INTEGER,
+            title TEXT,
+            description TEXT,
+            price,
+            category TEXT,
+            item_class TEXT,
+            operation TEXT,
+            details TEXT,
+            status TEXT,
+            created_at TEXT
+        )
+    """)
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_catalog_items_type_id ON catalog_items(item_type, item_id)",
+        "CREATE INDEX IF NOT EXISTS idx_catalog_items_type_category ON catalog_items(item_type, category, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_catalog_items_type_class ON catalog_items(item_type, item_class, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_catalog_items_type_created ON catalog_items(item_type, created_at)",
+    ):
+        await db.execute(sql)
+
+    # Индекс catalog_search теперь обновляется из catalog_items, а не из исходных таблиц
+    for source in _CATALOG_SEARCH_SOURCES:
+        for event in ("insert", "update", "delete"):
+            await db.execute(f"DROP TRIGGER IF EXISTS {source}_catalog_search_{event}")
+    await db.execute("DROP TRIGGER IF EXISTS auto_categories_catalog_search_update")
+    await db.execute("DELETE FROM catalog_search")
+
+    search_insert = (
+        f"INSERT INTO catalog_search (rowid, {', '.join(_CATALOG_SEARCH_FIELDS)}, item_type) "
+        f"VALUES (NEW.key, {', '.join(_fold_yo(f'NEW.{field}') for field in _CATALOG_SEARCH_FIELDS)}, NEW.item_type)"
+    )
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS catalog_items_search_insert AFTER INSERT ON catalog_items BEGIN
+            {search_insert};
+        END
+    """)
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS catalog_items_search_update AFTER UPDATE ON catalog_items BEGIN
+            DELETE FROM catalog_search WHERE rowid = OLD.key;
+            {search_insert};
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS catalog_items_search_delete AFTER DELETE ON catalog_items BEGIN
+            DELETE FROM catalog_search WHERE rowid = OLD.key;
+        END
+    """)
+
+    await _create_catalog_items_source_triggers(db, _CATALOG_ITEMS_SOURCES, _CATALOG_ITEM_FIELDS)
+
+    # Переименование категорий и классов автокаталога
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS auto_categories_catalog_items_update AFTER UPDATE OF name ON auto_categories BEGIN
+            UPDATE catalog_items SET category = NEW.name
+            WHERE key IN (
+                SELECT id * {len(SOURCE_CODES)} + {SOURCE_CODES['auto_products']} FROM auto_products WHERE category_id = NEW.id
+                UNION ALL
+                SELECT id * {len(SOURCE_CODES)} + {SOURCE_CODES['auto_services']} FROM auto_services WHERE category_id = NEW.id
+            );
+        END
+    """)
+    for classes, source in (("product_classes", "auto_products"), ("service_classes", "auto_services")):
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {classes}_catalog_items_update AFTER UPDATE OF name ON {classes} BEGIN
+                UPDATE catalog_items SET item_class = NEW.name
+                WHERE key IN (
+                    SELECT id * {len(SOURCE_CODES)} + {SOURCE_CODES[source]} FROM {source} WHERE class_id = NEW.id
+                );
+            END
+        """)
+
+
+
+# Столбцы catalog_items, по которым строятся меню выбора (catalog_facets)
+_CATALOG_FACETS = ("category", "item_class", "item_type_detail", "item_kind")
+# Тип и вид указываются только в заявках order_requests
+_CATALOG_ITEMS_SOURCES_V8 = {
+    source: {
+        **spec,
+        "item_type_detail": "{row}.item_type_detail" if source == "order_requests" else "NULL",
+        "item_kind": "{row}.item_kind" if source == "order_requests" else "NULL",
+        "columns": spec["columns"] + (", item_type_detail, item_kind" if source == "order_requests" else ""),
+    }
+    for source, spec in _CATALOG_ITEMS_SOURCES.items()
+}
+_CATALOG_ITEM_FIELDS_V8 = _CATALOG_ITEM_FIELDS + ("item_type_detail", "item_kind")
+
+
+def _facet_value_condition(expr: str) -> str:
+    return f"{expr} IS NOT NULL AND {expr} NOT IN ('', 'None')"
+
+
+async def _m008_catalog_facets(db):
+    """Счётчики значений категорий/классов/типов/видов для меню (catalog_facets)"""
+    await add_column(db, "catalog_items", "item_type_detail", "TEXT")
+    await add_column(db, "catalog_items", "item_kind", "TEXT")
+    for facet in ("item_type_detail", "item_kind"):
+        await db.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_catalog_items_type_{facet} ON catalog_items(item_type, {facet}, created_at)"
+        )
+    for source in _CATALOG_ITEMS_SOURCES_V8:
+        for event in ("insert", "update", "delete"):
+            await db.execute(f"DROP TRIGGER IF EXISTS {source}_catalog_items_{event}")
+    await _create_catalog_items_source_triggers(db, _CATALOG_ITEMS_SOURCES_V8, _CATALOG_ITEM_FIELDS_V8)
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_facets (
+            item_type TEXT NOT NULL,
+            facet TEXT NOT NULL,
+            value TEXT NOT NULL,
+            active_count INTEGER NOT NULL,
+            PRIMARY KEY (item_type, facet, value)
+        ) WITHOUT ROWID
+    """)
+    await db.execute("DELETE FROM catalog_facets")
+    for facet in _CATALOG_FACETS:
+        await db.execute(f"""
+            INSERT INTO catalog_facets (item_type, facet, value, active_count)
+            SELECT item_type, '{facet}', {facet}, COUNT(*) FROM catalog_items
+            WHERE {_facet_value_condition(facet)}
+            GROUP BY item_type, {facet}
+        """)
+
+    def increment(row: str) -> str:
+        return "\n".join(f"""
+                INSERT INTO catalog_facets (item_type, facet, value, active_count)
+                SELECT {row}.item_type, '{facet}', {row}.{facet}, 1 WHERE {_facet_value_condition(f"{row}.{facet}")}
+                ON CONFLICT (item_type, facet, value) DO UPDATE SET active_count = active_count + 1;"""
+            for facet in _CATALOG_FACETS)
+
+    def decrement(row: str) -> str:
+        return "\n".join(f"""
+                UPDATE catalog_facets SET active_count = active_count - 1
+                WHERE item_type = {row}.item_type AND facet = '{facet}' AND value = {row}.{facet};"""
+            for facet in _CATALOG_FACETS) + f"""
+                DELETE FROM catalog_facets WHERE item_type = {row}.item_type AND active_count <= 0;"""
+
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS catalog_items_facets_insert AFTER INSERT ON catalog_items BEGIN
+            {increment("NEW")}
+        END
+    """)
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS catalog_items_facets_update
+        AFTER UPDATE OF item_type, {", ".join(_CATALOG_FACETS)} ON catalog_items BEGIN
+            {decrement("OLD")}
+            {increment("NEW")}
+        END
+    """)
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS catalog_items_facets_delete AFTER DELETE ON catalog_items BEGIN
+            {decrement("OLD")}
+        END
+    """)
+
+
+
+async def _m009_facet_values(db):
+    """Словарь значений категорий/классов/типов/видов: короткие ID для callback_data"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS facet_values (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            UNIQUE (kind, value)
+        )
+    """)
+
+
+
+# Символы, которые отбрасываются перед числом: буквы, валюты, «от», «~» и т.п.
+_NUMBER_PREFIX_CHARS = (
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ"
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ$€₽~≈<>=+:;.*#№"
+)
+
+
+def _number_from_text(expr: str) -> str:
+    """
+    SQL-выражение: число из введённого пользователем текста («1 500 руб.» -> 1500,
+    «1,500» -> 1500, «от 2000,50» -> 2000.5, «4.5/5» -> 4.5); NULL, если числа нет.
+    Запятая — разделитель тысяч, если перед ней 1–3 цифры (не с нуля), а после
+    ровно три цифры («1,500», «12,345.50», «1,500,000»), иначе — десятичная запятая.
+    Примеры проверяет check_number_parser.py.
+    """
+    text = (
+        f"LTRIM(REPLACE(REPLACE(REPLACE({expr}, ' ', ''), char(160), ''), char(8239), ''), "
+        f"'{_NUMBER_PREFIX_CHARS},')"
+    )
+    comma = f"instr({text}, ',')"
+    thousands = (
+        f"{comma} BETWEEN 2 AND 4 AND {text} NOT GLOB '0*' AND substr({text}, 1, {comma} - 1) NOT GLOB '*[^0-9]*' "
+        f"AND substr({text}, {comma} + 1, 3) GLOB '[0-9][0-9][0-9]' "
+        f"AND substr({text}, {comma} + 4, 1) NOT GLOB '[0-9]'"
+    )
+    cleaned = f"(CASE WHEN {thousands} THEN REPLACE({text}, ',', '') ELSE REPLACE({text}, ',', '.') END)"
+    return f"(CASE WHEN {text} GLOB '[0-9]*' THEN CAST({cleaned} AS REAL) END)"
+
+
+def _cart_line_total(row: str) -> str:
+    return f"COALESCE({row}.quantity * {_number_from_text(f'{row}.price')}, 0)"
+
+
+async def _m010_numeric_price(db):
+    """Числовые цена и рейтинг заявок (price_num, rating_num) и суммы корзин (cart_totals)"""
+    await add_column(db, "order_requests", "price_num", "REAL")
+    await add_column(db, "order_requests", "rating_num", "REAL")
+    normalize = (
+        f"UPDATE order_requests SET price_num = {_number_from_text('price')}, "
+        f"rating_num = {_number_from_text('rating')}"
+    )
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS order_requests_numbers_insert AFTER INSERT ON order_requests BEGIN
+            {normalize} WHERE id = NEW.id;
+        END
+    """)
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS order_requests_numbers_update AFTER UPDATE OF price, rating ON order_requests BEGIN
+            {normalize} WHERE id = NEW.id;
+        END
+    """)
+    await db.execute(normalize)
+    for sql in (
+        # Фильтры расширенного поиска: WHERE item_type = ? AND price_num BETWEEN ... / rating_num >= ?
+        "CREATE INDEX IF NOT EXISTS idx_order_requests_type_price ON order_requests(item_type, price_num)",
+        "CREATE INDEX IF NOT EXISTS idx_order_requests_type_rating ON order_requests(item_type, rating_num)",
+        # Фильтр по цене автокаталога: WHERE status = 'active' AND price BETWEEN ? AND ?
+        "CREATE INDEX IF NOT EXISTS idx_auto_products_status_price ON auto_products(status, price)",
+        "CREATE INDEX IF NOT EXISTS idx_auto_services_status_price ON auto_services(status, price)",
+    ):
+        await db.execute(sql)
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS cart_totals (
+            user_id INTEGER PRIMARY KEY,
+            items_count INTEGER NOT NULL,
+            total REAL NOT NULL
+        )
+    """)
+    await db.execute("DELETE FROM cart_totals")
+    await db.execute(f"""
+        INSERT INTO cart_totals (user_id, items_count, total)
+        SELECT user_id, COUNT(*), ROUND(SUM({_cart_line_total('cart_order')}), 2) FROM cart_order GROUP BY user_id
+    """)
+    add_line = f"""
+            INSERT INTO cart_totals (user_id, items_count, total) VALUES (NEW.user_id, 1, ROUND({_cart_line_total('NEW')}, 2))
+            ON CONFLICT (user_id) DO UPDATE SET items_count = items_count + 1, total = ROUND(total + excluded.total, 2);"""
+    remove_line = f"""
+            UPDATE cart_totals SET items_count = items_count - 1, total = ROUND(total - {_cart_line_total('OLD')}, 2)
+            WHERE user_id = OLD.user_id;
+            DELETE FROM cart_totals WHERE user_id = OLD.user_id AND items_count <= 0;"""
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS cart_order_totals_insert AFTER INSERT ON cart_order BEGIN{add_line}
+        END
+    """)
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS cart_order_totals_update AFTER UPDATE OF user_id, quantity, price ON cart_order
+        BEGIN{remove_line}{add_line}
+        END
+    """)
+    await db.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS cart_order_totals_delete AFTER DELETE ON cart_order BEGIN{remove_line}
+        END
+    """)
+
+
+
+async def _m011_listing_indexes(db):
+    """Индексы постраничных списков (listings.py): keyset по (created_at, id) без сортировки"""
+    # Столбцы пути по каталогу есть в CREATE TABLE, но не в самых старых базах
+    for table in ("auto_products", "auto_services"):
+        for column in ("purpose_id", "type_id", "class_id", "view_id"):
+            await add_column(db, table, column, "INTEGER")
+    for sql in (
+        # Категория магазина: WHERE item_type = ? AND category = ? AND status IN (...) ORDER BY created_at DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_order_requests_type_category_created ON order_requests(item_type, category, created_at)",
+        # Новинки: WHERE item_type = ? AND status IN (...) ORDER BY created_at DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_order_requests_type_created ON order_requests(item_type, created_at)",
+        # Каталог по характеристикам: WHERE status = 'active' AND purpose_id = ? AND type_id = ? AND class_id = ? AND view_id = ?
+        "CREATE INDEX IF NOT EXISTS idx_auto_products_path ON auto_products(purpose_id, type_id, class_id, view_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_auto_services_path ON auto_services(purpose_id, type_id, class_id, view_id, status)",
+    ):
+        await db.execute(sql)
+
+
+async def _m012_job_runs(db):
+    """Журнал запусков задач планировщика (scheduler.py)"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS job_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            scheduled_at TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            finished_at TEXT,
+            duration REAL,
+            status TEXT NOT NULL DEFAULT 'running',
+            error TEXT
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job_scheduled ON job_runs(job, scheduled_at)")
+
+
+async def _m013_owner_indexes(db):
+    """Товары и услуги пользователя: пересчёт статистики только изменившихся пользователей (data_aggregator.py)"""
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_auto_products_user ON auto_products(user_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_auto_services_user ON auto_services(user_id)")
+
+
+async def _m014_survey_responses(db):
+    """
+    Ответы опроса одной строкой на пользователя (q1 ... q16 — ответы на
+    вопросы 1 ... 16): выгрузка основного листа читает её вместо 15 JOIN
+    survey_answers. Строку пишет survey.process_q16; при переносе из
+    survey_answers берётся последний ответ на каждый вопрос.
+    """
+    questions = range(1, 17)
+    await db.execute(f"""
+        CREATE TABLE IF NOT EXISTS survey_responses (
+            user_id INTEGER PRIMARY KEY,
+            {", ".join(f"q{q} TEXT" for q in questions)},
+            answered_at TEXT
+        )
+    """)
+    await db.execute(f"""
+        INSERT OR REPLACE INTO survey_responses (user_id, {", ".join(f"q{q}" for q in questions)}, answered_at)
+        SELECT user_id, {", ".join(f"MAX(CASE WHEN question_id = {q} THEN answer_text END)" for q in questions)},
+               MAX(answered_at)
+        FROM survey_answers
+        WHERE answer_id IN (SELECT MAX(answer_id) FROM survey_answers GROUP BY user_id, question_id)
+        GROUP BY user_id
+    """)
+
+
+async def _m015_sheet_export_progress(db):
+    """Прогресс потоковой выгрузки листов (sheets_export.py): хэши записанных порций строк"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS sheet_export_progress (
+            export_key TEXT PRIMARY KEY,
+            chunk_rows INTEGER NOT NULL,
+            chunk_hashes TEXT NOT NULL,
+            updated_at TEXT
+        )
+    """)
+
+
+async def _m016_invite_sheet_index(db):
+    """
+    Копия листа инвайта для invite_tracking.py: Telegram ID и отметка о подписке
+    по номеру строки листа (один ID может стоять в нескольких строках)
+    """
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS invite_sheet_rows (
+            row_number INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            subscribed INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_invite_sheet_rows_user ON invite_sheet_rows(user_id)")
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS invite_sheet_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            header TEXT NOT NULL,
+            built_at REAL NOT NULL
+        )
+    """)
+
+
+# Справочники категорий, которые держит в памяти taxonomy_cache.py
+_TAXONOMY_TABLES = (
+    "product_purposes", "product_types", "product_classes", "product_views", "product_other_chars",
+    "service_purposes", "service_types", "service_classes", "service_views", "service_other_chars",
+    "categories", "offer_classes", "offer_types", "offer_views",
+)
+
+
+async def _m017_taxonomy_version(db):
+    """
+    Версия справочников категорий (taxonomy_cache.py): триггеры увеличивают её
+    в той же транзакции, что и любое изменение справочника, поэтому кэш в
+    каждом воркере видит изменения, сделанные в других воркерах
+    """
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS taxonomy_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    await db.execute("INSERT OR IGNORE INTO taxonomy_version (id, version) VALUES (1, 0)")
+    for table in _TAXONOMY_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_taxonomy_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE taxonomy_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+
+# (версия, описание, функция). Новые миграции добавляются только в конец списка.
+MIGRATIONS = [
+    (1, "Недостающие столбцы старых баз", _m001_missing_columns),
+    (2, "Индексы горячих таблиц", _m002_hot_indexes),
+    (3, "Хранилище состояний FSM", _m003_fsm_storage),
+    (4, "Состояние инкрементальной выгрузки в Google Sheets", _m004_sheet_export_rows),
+    (5, "Очередь выгрузок в Google Sheets", _m005_sheets_outbox),
+    (6, "Полнотекстовый индекс каталога (FTS5)", _m006_catalog_search),
+    (7, "Единая модель чтения каталога catalog_items", _m007_catalog_items),
+    (8, "Счётчики значений для меню каталога (catalog_facets)", _m008_catalog_facets),
+    (9, "Словарь ID значений для кнопок меню (facet_values)", _m009_facet_values),
+    (10, "Числовые цена и рейтинг заявок, суммы корзин", _m010_numeric_price),
+    (11, "Индексы постраничных списков каталога", _m011_listing_indexes),
+    (12, "Журнал запусков задач планировщика", _m012_job_runs),
+    (13, "Индексы товаров и услуг по владельцу", _m013_owner_indexes),
+    (14, "Ответы опроса одной строкой на пользователя", _m014_survey_responses),
+    (15, "Прогресс потоковой выгрузки листов", _m015_sheet_export_progress),
+    (16, "Индекс строк листа инвайта", _m016_invite_sheet_index),
+    (17, "Версия справочников категорий", _m017_taxonomy_version),
+]
+
+
+async def get_schema_version(db) -> int:
+    cursor = await db.execute("SELECT MAX(version) FROM schema_version")
+    row = await cursor.fetchone()
+    return row[0] or 0
+
+
+async def run_migrations():
+    """Применение всех ещё не применённых миграций по порядку"""
+    async with get_db(write=True) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TEXT
+            )
+        """)
+        await db.commit()
+
+        current = await get_schema_version(db)
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                await migrate(db)
+                await db.execute(
+                    "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                    (version, description, datetime.now().isoformat())
+                )
+                await db.commit()
+                print(f"[MIGRATION] Применена миграция {version}: {description}")
+            except Exception as e:
+                await db.rollback()
+                print(f"[MIGRATION] Ошибка миграции {version}: {e}")
+                raise
@@ -3,12 +3,13 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-import aiosqlite
+from catalog_facets import get_facet_value
+from db import get_db
 from datetime import datetime
 from dispatcher import dp
 from utils import check_blocked_user
 from messages_system import notify_admin_new_category, send_order_request_to_admin
-from config import HOUSING_CATEGORIES
+from taxonomy_cache import card_form_keyboard, invalidate_taxonomy
 
 
 class ProductCardStates(StatesGroup):
@@ -156,7 +157,7 @@ async def check_daily_limit(user_id: int) -> bool:
     if user_id == ADMIN_ID:
         return True
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         today = datetime.now().date()
         cursor = await db.execute("""
             SELECT COUNT(*) FROM order_requests 
@@ -256,46 +257,10 @@ async def product_select_buy(callback: CallbackQuery, state: FSMContext):
 async def show_product_category_selection(message: Message, state: FSMContext):
     """Показать выбор категории товара"""
     await state.set_state(ProductCardStates.waiting_category)
-    builder = InlineKeyboardBuilder()
-
-    # Получаем категории из базы данных
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM product_purposes ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            category_name = i[0]
-            if category_name in HOUSING_CATEGORIES:
-                continue
-            builder.add(types.InlineKeyboardButton(
-                text=category_name,
-                callback_data=f"prod_cat_select:{category_name}"
-            ))
-
-    # Кнопка "Добавить"
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="prod_cat_add"
-    ))
-
-    # Кнопка "Пропустить"
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="prod_cat_skip"
-    ))
-
-    # Кнопка "Назад"
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_prod_op"
-    ))
-
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **1. Категория товара**\n\n"
         "Выберите категорию из списка или добавьте новую:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("prod_cat")
     )
 
 
@@ -303,7 +268,10 @@ async def show_product_category_selection(message: Message, state: FSMContext):
 async def select_product_category(callback: CallbackQuery, state: FSMContext):
     """Выбор категории товара"""
     try:
-        category = callback.data.split(":", 1)[1]
+        category = await get_facet_value("category", callback.data.split(":", 1)[1])
+        if category is None:
+            await callback.answer("❌ Категория не найдена", show_alert=True)
+            return
         print(f"✅ Выбрана категория товара: {category}")
         await state.update_data(category=category)
         await show_product_class_selection(callback.message, state)
@@ -351,16 +319,18 @@ async def process_product_category_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM product_purposes WHERE name = ?", (category,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO product_purposes (name) VALUES (?)", (category,))
                     await db.commit()
-                    await message.answer(f"✅ Категория '{category}' автоматически добавлена (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Категория '{category}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Категория '{category}' автоматически добавлена (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Категория '{category}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
             # Fallback убран по просьбе: админу не нужно отправлять самому себе уведомление при ошибке
@@ -425,37 +395,10 @@ async def back_to_product_category_list(callback: CallbackQuery, state: FSMConte
 async def show_product_class_selection(message: Message, state: FSMContext):
     """Показать выбор класса товара"""
     await state.set_state(ProductCardStates.waiting_class)
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM product_classes ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            class_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=class_name,
-                callback_data=f"prod_cls_select:{class_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="prod_cls_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="prod_cls_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_prod_cat"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **2. Класс товара**\n\n"
         "Выберите класс из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("prod_cls")
     )
 
 
@@ -463,7 +406,10 @@ async def show_product_class_selection(message: Message, state: FSMContext):
 async def select_product_class(callback: CallbackQuery, state: FSMContext):
     """Выбор класса товара"""
     try:
-        item_class = callback.data.split(":", 1)[1]
+        item_class = await get_facet_value("item_class", callback.data.split(":", 1)[1])
+        if item_class is None:
+            await callback.answer("❌ Класс не найден", show_alert=True)
+            return
         print(f"✅ Выбран класс товара: {item_class}")
         await state.update_data(item_class=item_class)
         await show_product_type_selection(callback.message, state)
@@ -515,16 +461,18 @@ async def process_product_class_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM product_classes WHERE name = ?", (item_class,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO product_classes (name) VALUES (?)", (item_class,))
                     await db.commit()
-                    await message.answer(f"✅ Класс '{item_class}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Класс '{item_class}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Класс '{item_class}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Класс '{item_class}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
             # Fallback убран
@@ -588,37 +536,10 @@ async def back_to_product_class_list(callback: CallbackQuery, state: FSMContext)
 async def show_product_type_selection(message: Message, state: FSMContext):
     """Показать выбор типа товара"""
     await state.set_state(ProductCardStates.waiting_item_type)
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM product_types ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            type_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=type_name,
-                callback_data=f"prod_typ_select:{type_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="prod_typ_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="prod_typ_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_prod_cls"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **3. Тип товара**\n\n"
         "Выберите тип из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("prod_typ")
     )
 
 
@@ -626,7 +547,10 @@ async def show_product_type_selection(message: Message, state: FSMContext):
 async def select_product_type(callback: CallbackQuery, state: FSMContext):
     """Выбор типа товара"""
     try:
-        item_type = callback.data.split(":", 1)[1]
+        item_type = await get_facet_value("item_type_detail", callback.data.split(":", 1)[1])
+        if item_type is None:
+            await callback.answer("❌ Тип не найден", show_alert=True)
+            return
         print(f"✅ Выбран тип товара: {item_type}")
         await state.update_data(item_type=item_type)
         await show_product_view_selection(callback.message, state)
@@ -678,16 +602,18 @@ async def process_product_type_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM product_types WHERE name = ?", (item_type,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO product_types (name) VALUES (?)", (item_type,))
                     await db.commit()
-                    await message.answer(f"✅ Тип '{item_type}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Тип '{item_type}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Тип '{item_type}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Тип '{item_type}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
             # Fallback убран
@@ -751,37 +677,10 @@ async def back_to_product_type_list(callback: CallbackQuery, state: FSMContext):
 async def show_product_view_selection(message: Message, state: FSMContext):
     """Показать выбор вида товара"""
     await state.set_state(ProductCardStates.waiting_item_kind)
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM product_views ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            view_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=view_name,
-                callback_data=f"prod_vw_select:{view_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="prod_vw_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="prod_vw_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_prod_typ"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **4. Вид товара**\n\n"
         "Выберите вид из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("prod_vw")
     )
 
 
@@ -789,7 +688,10 @@ async def show_product_view_selection(message: Message, state: FSMContext):
 async def select_product_view(callback: CallbackQuery, state: FSMContext):
     """Выбор вида товара"""
     try:
-        item_kind = callback.data.split(":", 1)[1]
+        item_kind = await get_facet_value("item_kind", callback.data.split(":", 1)[1])
+        if item_kind is None:
+            await callback.answer("❌ Вид не найден", show_alert=True)
+            return
         print(f"✅ Выбран вид товара: {item_kind}")
         await state.update_data(item_kind=item_kind)
         await ask_product_catalog_id(callback.message, state)
@@ -837,16 +739,18 @@ async def process_product_view_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM product_views WHERE name = ?", (item_kind,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO product_views (name) VALUES (?)", (item_kind,))
                     await db.commit()
-                    await message.answer(f"✅ Вид '{item_kind}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Вид '{item_kind}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Вид '{item_kind}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Вид '{item_kind}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
             # Fallback убран
@@ -1574,7 +1478,7 @@ async def product_process_contact(message: Message, state: FSMContext):
 
     # Сохраняем заявку в базу данных
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             cursor = await db.execute("""
                 INSERT INTO order_requests 
                 (user_id, operation, item_type, category, item_class, item_type_detail, item_kind,
@@ -1638,32 +1542,29 @@ async def product_process_contact(message: Message, state: FSMContext):
             await db.commit()
             print(f"✅ Заявка {new_request_id} добавлена в корзину пользователя {message.from_user.id}")
 
-            # Синхронизация с Google Sheets
-            try:
-                from google_sheets import sync_order_requests_to_sheets
-                result = await sync_order_requests_to_sheets()
-                if result:
-                    print(f"✅ Заявка {new_request_id} синхронизирована с Google Sheets")
-                else:
-                    print(f"⚠️ Заявка {new_request_id} сохранена, но произошла ошибка синхронизации с Google Sheets")
-            except Exception as e:
-                print(f"❌ Ошибка импорта модуля Google Sheets: {e}")
-
-            await send_order_request_to_admin(message.chat.id, new_request_id, data)
-
-            builder = InlineKeyboardBuilder()
-            builder.add(types.InlineKeyboardButton(text="🏠 В личный кабинет", callback_data="personal_account"))
-            builder.add(types.InlineKeyboardButton(text="🛒 К корзине", callback_data="cart_order"))
-            builder.adjust(1)
-
-            await message.answer(
-                "✅ **Заявка успешно создана!**\n\n"
-                f"Заявка №{new_request_id} сохранена и добавлена в вашу корзину.",
-                reply_markup=builder.as_markup()
-            )
-
-            # Очищаем состояние
-            await state.clear()
+        # Синхронизация с Google Sheets в фоне, ответ пользователю её не ждёт
+        try:
+            from sheets_outbox import enqueue
+            await enqueue("order_requests")
+            print(f"✅ Заявка {new_request_id} поставлена в очередь выгрузки в Google Sheets")
+        except Exception as e:
+            print(f"❌ Ошибка импорта модуля Google Sheets: {e}")
+
+        await send_order_request_to_admin(message.chat.id, new_request_id, data)
+
+        builder = InlineKeyboardBuilder()
+        builder.add(types.InlineKeyboardButton(text="🏠 В личный кабинет", callback_data="personal_account"))
+        builder.add(types.InlineKeyboardButton(text="🛒 К корзине", callback_data="cart_order"))
+        builder.adjust(1)
+
+        await message.answer(
+            "✅ **Заявка успешно создана!**\n\n"
+            f"Заявка №{new_request_id} сохранена и добавлена в вашу корзину.",
+            reply_markup=builder.as_markup()
+        )
+
+        # Очищаем состояние
+        await state.clear()
 
     except Exception as e:
         print(f"❌ Ошибка при сохранении заявки: {e}")
@@ -1768,39 +1669,10 @@ async def service_select_order(callback: CallbackQuery, state: FSMContext):
 
 async def show_service_category_selection(message: Message, state: FSMContext):
     """Показать выбор категории услуги"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM service_purposes ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            category_name = i[0]
-            if category_name in HOUSING_CATEGORIES:
-                continue
-            builder.add(types.InlineKeyboardButton(
-                text=category_name,
-                callback_data=f"serv_cat_select:{category_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="serv_cat_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="serv_cat_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_serv_op"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **1. Категория услуги**\n\n"
         "Выберите категорию из списка или добавьте новую:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("serv_cat")
     )
     await state.set_state(ServiceCardStates.waiting_category)
 
@@ -1809,7 +1681,10 @@ async def show_service_category_selection(message: Message, state: FSMContext):
 async def select_service_category(callback: CallbackQuery, state: FSMContext):
     """Выбор категории услуги"""
     try:
-        category = callback.data.split(":", 1)[1]
+        category = await get_facet_value("category", callback.data.split(":", 1)[1])
+        if category is None:
+            await callback.answer("❌ Категория не найдена", show_alert=True)
+            return
         print(f"✅ Выбрана категория услуги: {category}")
         await state.update_data(category=category)
         await show_service_class_selection(callback.message, state)
@@ -1835,37 +1710,10 @@ async def back_to_service_operation(callback: CallbackQuery, state: FSMContext):
 
 async def show_service_class_selection(message: Message, state: FSMContext):
     """Показать выбор класса услуги"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM service_classes ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            class_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=class_name,
-                callback_data=f"serv_cls_select:{class_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="serv_cls_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="serv_cls_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_serv_cat"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **2. Класс услуги**\n\n"
         "Выберите класс из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("serv_cls")
     )
     await state.set_state(ServiceCardStates.waiting_class)
 
@@ -1917,16 +1765,18 @@ async def process_service_category_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM service_purposes WHERE name = ?", (category,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO service_purposes (name) VALUES (?)", (category,))
                     await db.commit()
-                    await message.answer(f"✅ Категория '{category}' автоматически добавлена (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Категория '{category}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Категория '{category}' автоматически добавлена (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Категория '{category}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
             # Fallback убран
@@ -1969,7 +1819,10 @@ async def continue_after_service_category(callback: CallbackQuery, state: FSMCon
 async def select_service_class(callback: CallbackQuery, state: FSMContext):
     """Выбор класса услуги"""
     try:
-        item_class = callback.data.split(":", 1)[1]
+        item_class = await get_facet_value("item_class", callback.data.split(":", 1)[1])
+        if item_class is None:
+            await callback.answer("❌ Класс не найден", show_alert=True)
+            return
         print(f"✅ Выбран класс услуги: {item_class}")
         await state.update_data(item_class=item_class)
         await show_service_type_selection(callback.message, state)
@@ -2024,16 +1877,18 @@ async def process_service_class_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM service_classes WHERE name = ?", (item_class,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO service_classes (name) VALUES (?)", (item_class,))
                     await db.commit()
-                    await message.answer(f"✅ Класс '{item_class}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Класс '{item_class}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Класс '{item_class}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Класс '{item_class}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
             # Fallback убран
@@ -2103,37 +1958,10 @@ async def back_to_service_class_list(callback: CallbackQuery, state: FSMContext)
 
 async def show_service_type_selection(message: Message, state: FSMContext):
     """Показать выбор типа услуги"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM service_types ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            type_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=type_name,
-                callback_data=f"serv_typ_select:{type_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="serv_typ_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="serv_typ_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_serv_cls"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **3. Тип услуги**\n\n"
         "Выберите тип из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("serv_typ")
     )
     await state.set_state(ServiceCardStates.waiting_item_type)
 
@@ -2142,7 +1970,10 @@ async def show_service_type_selection(message: Message, state: FSMContext):
 async def select_service_type(callback: CallbackQuery, state: FSMContext):
     """Выбор типа услуги"""
     try:
-        item_type = callback.data.split(":", 1)[1]
+        item_type = await get_facet_value("item_type_detail", callback.data.split(":", 1)[1])
+        if item_type is None:
+            await callback.answer("❌ Тип не найден", show_alert=True)
+            return
         print(f"✅ Выбран тип услуги: {item_type}")
         await state.update_data(item_type=item_type)
         await show_service_view_selection(callback.message, state)
@@ -2201,16 +2032,18 @@ async def process_service_type_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM service_types WHERE name = ?", (item_type,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO service_types (name) VALUES (?)", (item_type,))
                     await db.commit()
-                    await message.answer(f"✅ Тип '{item_type}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Тип '{item_type}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Тип '{item_type}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Тип '{item_type}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
     else:
@@ -2272,37 +2105,10 @@ async def back_to_service_type_list(callback: CallbackQuery, state: FSMContext):
 
 async def show_service_view_selection(message: Message, state: FSMContext):
     """Показать выбор вида услуги"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM service_views ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            view_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=view_name,
-                callback_data=f"serv_vw_select:{view_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="serv_vw_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="serv_vw_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_serv_typ"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **4. Вид услуги**\n\n"
         "Выберите вид из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("serv_vw")
     )
     await state.set_state(ServiceCardStates.waiting_item_kind)
 
@@ -2311,7 +2117,10 @@ async def show_service_view_selection(message: Message, state: FSMContext):
 async def select_service_view(callback: CallbackQuery, state: FSMContext):
     """Выбор вида услуги"""
     try:
-        item_kind = callback.data.split(":", 1)[1]
+        item_kind = await get_facet_value("item_kind", callback.data.split(":", 1)[1])
+        if item_kind is None:
+            await callback.answer("❌ Вид не найден", show_alert=True)
+            return
         print(f"✅ Выбран вид услуги: {item_kind}")
         await state.update_data(item_kind=item_kind)
         await ask_service_catalog_id(callback.message, state)
@@ -2370,16 +2179,18 @@ async def process_service_view_input(message: Message, state: FSMContext):
         is_admin = True
         # Автоматическое добавление для администратора
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 # Проверяем существование
                 cursor = await db.execute("SELECT 1 FROM service_views WHERE name = ?", (item_kind,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO service_views (name) VALUES (?)", (item_kind,))
                     await db.commit()
-                    await message.answer(f"✅ Вид '{item_kind}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Вид '{item_kind}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Вид '{item_kind}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Вид '{item_kind}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
     else:
@@ -3036,7 +2847,7 @@ async def service_process_contact(message: Message, state: FSMContext):
 
     # Сохраняем заявку в базу данных
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             cursor = await db.execute("""
             INSERT INTO order_requests 
                 (user_id, operation, category, item_class, item_type, item_kind,
@@ -3097,32 +2908,29 @@ async def service_process_contact(message: Message, state: FSMContext):
             await db.commit()
             print(f"✅ Заявка услуги {new_request_id} добавлена в корзину пользователя {message.from_user.id}")
 
-            # Синхронизация с Google Sheets
-            try:
-                from google_sheets import sync_order_requests_to_sheets
-                result = await sync_order_requests_to_sheets()
-                if result:
-                    print(f"✅ Заявка услуги {new_request_id} синхронизирована с Google Sheets")
-                else:
-                    print(f"⚠️ Заявка услуги {new_request_id} сохранена, но произошла ошибка синхронизации с Google Sheets")
-            except Exception as e:
-                print(f"❌ Ошибка импорта модуля Google Sheets: {e}")
-
-            await send_order_request_to_admin(message.chat.id, new_request_id, data)
-
-            builder = InlineKeyboardBuilder()
-            builder.add(types.InlineKeyboardButton(text="🏠 В личный кабинет", callback_data="personal_account"))
-            builder.add(types.InlineKeyboardButton(text="🛒 К корзине", callback_data="cart_order"))
-            builder.adjust(1)
-
-            await message.answer(
-                "✅ **Заявка услуги успешно создана!**\n\n"
-                f"Заявка №{new_request_id} сохранена и добавлена в вашу корзину.",
-                reply_markup=builder.as_markup()
-            )
-
-            # Очищаем состояние
-            await state.clear()
+        # Синхронизация с Google Sheets в фоне, ответ пользователю её не ждёт
+        try:
+            from sheets_outbox import enqueue
+            await enqueue("order_requests")
+            print(f"✅ Заявка услуги {new_request_id} поставлена в очередь выгрузки в Google Sheets")
+        except Exception as e:
+            print(f"❌ Ошибка импорта модуля Google Sheets: {e}")
+
+        await send_order_request_to_admin(message.chat.id, new_request_id, data)
+
+        builder = InlineKeyboardBuilder()
+        builder.add(types.InlineKeyboardButton(text="🏠 В личный кабинет", callback_data="personal_account"))
+        builder.add(types.InlineKeyboardButton(text="🛒 К корзине", callback_data="cart_order"))
+        builder.adjust(1)
+
+        await message.answer(
+            "✅ **Заявка услуги успешно создана!**\n\n"
+            f"Заявка №{new_request_id} сохранена и добавлена в вашу корзину.",
+            reply_markup=builder.as_markup()
+        )
+
+        # Очищаем состояние
+        await state.clear()
 
     except Exception as e:
         print(f"❌ Ошибка при сохранении заявки услуги: {e}")
@@ -3222,48 +3030,22 @@ async def offer_select_buy(callback: CallbackQuery, state: FSMContext):
 
 async def show_offer_category_selection(message: Message, state: FSMContext):
     """Показать выбор категории предложения"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM categories WHERE catalog_type = 'offer' ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            category_name = i[0]
-            # Truncate to ensure callback data < 64 bytes (ocs: + name)
-            safe_name = category_name[:50]
-            builder.add(types.InlineKeyboardButton(
-                text=category_name,
-                callback_data=f"ocs:{safe_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="off_cat_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="off_cat_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_off_op"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **1. Категория предложения**\n\n"
         "Выберите категорию из списка или добавьте новую:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("off_cat")
     )
     await state.set_state(OfferCardStates.waiting_category)
 
 
-@dp.callback_query(F.data.startswith("ocs:"))
+@dp.callback_query(F.data.startswith("off_cat_select:"))
 async def select_offer_category(callback: CallbackQuery, state: FSMContext):
     """Выбор категории предложения"""
     try:
-        category = callback.data.split(":", 1)[1]
+        category = await get_facet_value("category", callback.data.split(":", 1)[1])
+        if category is None:
+            await callback.answer("❌ Категория не найдена", show_alert=True)
+            return
         print(f"✅ Выбрана категория предложения: {category}")
         await state.update_data(category=category)
         await show_offer_class_selection(callback.message, state)
@@ -3303,37 +3085,10 @@ async def back_to_offer_operation(callback: CallbackQuery, state: FSMContext):
 
 async def show_offer_class_selection(message: Message, state: FSMContext):
     """Показать выбор класса предложения"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM offer_classes ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            class_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=class_name,
-                callback_data=f"off_cls_select:{class_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="off_cls_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="off_cls_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_off_cat"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **2. Класс предложения**\n\n"
         "Выберите класс из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("off_cls")
     )
     await state.set_state(OfferCardStates.waiting_class)
 
@@ -3373,15 +3128,17 @@ async def process_offer_category_input(message: Message, state: FSMContext):
     if user_id == ADMIN_ID:
         is_admin = True
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 cursor = await db.execute("SELECT 1 FROM categories WHERE name = ? AND catalog_type = 'offer'", (category,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO categories (catalog_type, name) VALUES ('offer', ?)", (category,))
                     await db.commit()
-                    await message.answer(f"✅ Категория '{category}' автоматически добавлена (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Категория '{category}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Категория '{category}' автоматически добавлена (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Категория '{category}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
     else:
@@ -3423,7 +3180,10 @@ async def continue_after_offer_category(callback: CallbackQuery, state: FSMConte
 async def select_offer_class(callback: CallbackQuery, state: FSMContext):
     """Выбор класса предложения"""
     try:
-        item_class = callback.data.split(":", 1)[1]
+        item_class = await get_facet_value("item_class", callback.data.split(":", 1)[1])
+        if item_class is None:
+            await callback.answer("❌ Класс не найден", show_alert=True)
+            return
         print(f"✅ Выбран класс предложения: {item_class}")
         await state.update_data(item_class=item_class)
         await show_offer_type_selection(callback.message, state)
@@ -3481,15 +3241,17 @@ async def process_offer_class_input(message: Message, state: FSMContext):
     if user_id == ADMIN_ID:
         is_admin = True
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 cursor = await db.execute("SELECT 1 FROM offer_classes WHERE name = ?", (item_class,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO offer_classes (name) VALUES (?)", (item_class,))
                     await db.commit()
-                    await message.answer(f"✅ Класс '{item_class}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Класс '{item_class}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Класс '{item_class}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Класс '{item_class}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
     else:
@@ -3558,37 +3320,10 @@ async def back_to_offer_class_list(callback: CallbackQuery, state: FSMContext):
 
 async def show_offer_type_selection(message: Message, state: FSMContext):
     """Показать выбор типа предложения"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM offer_types ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            type_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=type_name,
-                callback_data=f"off_typ_select:{type_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="off_typ_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="off_typ_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_off_cls"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **3. Тип предложения**\n\n"
         "Выберите тип из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("off_typ")
     )
     await state.set_state(OfferCardStates.waiting_item_type)
 
@@ -3597,7 +3332,10 @@ async def show_offer_type_selection(message: Message, state: FSMContext):
 async def select_offer_type(callback: CallbackQuery, state: FSMContext):
     """Выбор типа предложения"""
     try:
-        item_type = callback.data.split(":", 1)[1]
+        item_type = await get_facet_value("item_type_detail", callback.data.split(":", 1)[1])
+        if item_type is None:
+            await callback.answer("❌ Тип не найден", show_alert=True)
+            return
         print(f"✅ Выбран тип предложения: {item_type}")
         await state.update_data(item_type=item_type)
         await show_offer_view_selection(callback.message, state)
@@ -3655,15 +3393,17 @@ async def process_offer_type_input(message: Message, state: FSMContext):
     if user_id == ADMIN_ID:
         is_admin = True
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 cursor = await db.execute("SELECT 1 FROM offer_types WHERE name = ?", (item_type,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO offer_types (name) VALUES (?)", (item_type,))
                     await db.commit()
-                    await message.answer(f"✅ Тип '{item_type}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Тип '{item_type}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Тип '{item_type}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Тип '{item_type}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
     else:
@@ -3725,37 +3465,10 @@ async def back_to_offer_type_list(callback: CallbackQuery, state: FSMContext):
 
 async def show_offer_view_selection(message: Message, state: FSMContext):
     """Показать выбор вида предложения"""
-    builder = InlineKeyboardBuilder()
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM offer_views ORDER BY name")
-        items = await cursor.fetchall()
-
-        for i in items:
-            view_name = i[0]
-            builder.add(types.InlineKeyboardButton(
-                text=view_name,
-                callback_data=f"off_vw_select:{view_name}"
-            ))
-
-    builder.add(types.InlineKeyboardButton(
-        text="➕ Добавить",
-        callback_data="off_vw_add"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="⏭️ Пропустить",
-        callback_data="off_vw_skip"
-    ))
-    builder.add(types.InlineKeyboardButton(
-        text="◀️ Назад",
-        callback_data="back_off_typ"
-    ))
-    builder.adjust(2)
-
     await message.edit_text(
         "📋 **4. Вид предложения**\n\n"
         "Выберите вид из списка или добавьте новый:",
-        reply_markup=builder.as_markup()
+        reply_markup=await card_form_keyboard("off_vw")
     )
     await state.set_state(OfferCardStates.waiting_item_kind)
 
@@ -3764,7 +3477,10 @@ async def show_offer_view_selection(message: Message, state: FSMContext):
 async def select_offer_view(callback: CallbackQuery, state: FSMContext):
     """Выбор вида предложения"""
     try:
-        item_kind = callback.data.split(":", 1)[1]
+        item_kind = await get_facet_value("item_kind", callback.data.split(":", 1)[1])
+        if item_kind is None:
+            await callback.answer("❌ Вид не найден", show_alert=True)
+            return
         print(f"✅ Выбран вид предложения: {item_kind}")
         await state.update_data(item_kind=item_kind)
         await ask_offer_catalog_id(callback.message, state)
@@ -3822,15 +3538,17 @@ async def process_offer_view_input(message: Message, state: FSMContext):
     if user_id == ADMIN_ID:
         is_admin = True
         try:
-             async with aiosqlite.connect("bot_database.db", timeout=20.0) as db:
+             async with get_db(write=True) as db:
                 cursor = await db.execute("SELECT 1 FROM offer_views WHERE name = ?", (item_kind,))
                 exists = await cursor.fetchone()
                 if not exists:
                     await db.execute("INSERT INTO offer_views (name) VALUES (?)", (item_kind,))
                     await db.commit()
-                    await message.answer(f"✅ Вид '{item_kind}' автоматически добавлен (права администратора).")
-                else:
-                    await message.answer(f"⚠️ Вид '{item_kind}' уже существует.")
+                    invalidate_taxonomy()
+             if not exists:
+                 await message.answer(f"✅ Вид '{item_kind}' автоматически добавлен (права администратора).")
+             else:
+                 await message.answer(f"⚠️ Вид '{item_kind}' уже существует.")
         except Exception as e:
             await message.answer(f"❌ Ошибка автоматического добавления: {e}")
     else:
@@ -4024,7 +3742,7 @@ async def offer_process_contact(message: Message, state: FSMContext):
 
     # Сохраняем заявку в базу данных (аналогично товару)
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             cursor = await db.execute("""
                 INSERT INTO order_requests 
                 (user_id, operation, item_type, category, item_class, item_type_detail, item_kind,
@@ -4088,32 +3806,29 @@ async def offer_process_contact(message: Message, state: FSMContext):
             await db.commit()
             print(f"✅ Заявка предложения {new_request_id} добавлена в корзину пользователя {message.from_user.id}")
 
-            # Синхронизация с Google Sheets
-            try:
-                from google_sheets import sync_order_requests_to_sheets
-                result = await sync_order_requests_to_sheets()
-                if result:
-                    print(f"✅ Заявка предложения {new_request_id} синхронизирована с Google Sheets")
-                else:
-                    print(f"⚠️ Заявка предложения {new_request_id} сохранена, но произошла ошибка синхронизации с Google Sheets")
-            except Exception as e:
-                print(f"❌ Ошибка импорта модуля Google Sheets: {e}")
-
-            await send_order_request_to_admin(message.chat.id, new_request_id, data)
-
-            builder = InlineKeyboardBuilder()
-            builder.add(types.InlineKeyboardButton(text="🏠 В личный кабинет", callback_data="personal_account"))
-            builder.add(types.InlineKeyboardButton(text="🛒 К корзине", callback_data="cart_order"))
-            builder.adjust(1)
-
-            await message.answer(
-                "✅ **Заявка предложения успешно создана!**\n\n"
-                f"Заявка №{new_request_id} сохранена и добавлена в вашу корзину.",
-                reply_markup=builder.as_markup()
-            )
-
-            # Очищаем состояние
-            await state.clear()
+        # Синхронизация с Google Sheets в фоне, ответ пользователю её не ждёт
+        try:
+            from sheets_outbox import enqueue
+            await enqueue("order_requests")
+            print(f"✅ Заявка предложения {new_request_id} поставлена в очередь выгрузки в Google Sheets")
+        except Exception as e:
+            print(f"❌ Ошибка импорта модуля Google Sheets: {e}")
+
+        await send_order_request_to_admin(message.chat.id, new_request_id, data)
+
+        builder = InlineKeyboardBuilder()
+        builder.add(types.InlineKeyboardButton(text="🏠 В личный кабинет", callback_data="personal_account"))
+        builder.add(types.InlineKeyboardButton(text="🛒 К корзине", callback_data="cart_order"))
+        builder.adjust(1)
+
+        await message.answer(
+            "✅ **Заявка предложения успешно создана!**\n\n"
+            f"Заявка №{new_request_id} сохранена и добавлена в вашу корзину.",
+            reply_markup=builder.as_markup()
+        )
+
+        # Очищаем состояние
+        await state.clear()
 
     except Exception as e:
         print(f"❌ Ошибка при сохранении заявки предложения: {e}")
@@ -1,7 +1,7 @@
 from aiogram import F, types
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
 from datetime import datetime
 from dispatcher import dp
 from utils import check_blocked_user
@@ -27,7 +27,7 @@ async def my_orders(callback: CallbackQuery):
     
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         # Получаем заказы (товары)
         cursor = await db.execute("""
             SELECT o.id, o.order_type, o.item_id, o.status, o.order_date,
@@ -142,7 +142,7 @@ async def order_details(callback: CallbackQuery):
     order_id = int(callback.data.split("_")[2])
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT o.id, o.user_id, o.order_type, o.item_id, o.seller_id, o.status, o.order_date, o.notes,
                    CASE 
@@ -217,7 +217,7 @@ async def request_details(callback: CallbackQuery):
         request_id = int(callback.data.split("_")[2])
         user_id = callback.from_user.id
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT id, title, price, status, created_at, additional_info
                 FROM order_requests
@@ -268,7 +268,7 @@ async def seller_orders(callback: CallbackQuery):
     
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT o.id, o.order_type, o.item_id, o.status, o.order_date,
                    CASE 
@@ -335,7 +335,7 @@ async def seller_order_details(callback: CallbackQuery):
     order_id = int(callback.data.split("_")[2])
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT o.*, 
                    CASE 
@@ -418,20 +418,22 @@ async def cancel_order(callback: CallbackQuery):
         return
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         cursor = await db.execute("SELECT user_id, status FROM orders WHERE id = ?", (order_id,))
         order = await cursor.fetchone()
         
+        error = None
         if not order or order[0] != user_id:
-            await callback.answer("Заказ не найден", show_alert=True)
-            return
-        
-        if order[1] != 'new':
-            await callback.answer("Можно отменить только новые заказы", show_alert=True)
-            return
-        
-        await db.execute("UPDATE orders SET status = 'cancelled' WHERE id = ?", (order_id,))
-        await db.commit()
+            error = "Заказ не найден"
+        elif order[1] != 'new':
+            error = "Можно отменить только новые заказы"
+        else:
+            await db.execute("UPDATE orders SET status = 'cancelled' WHERE id = ?", (order_id,))
+            await db.commit()
+
+    if error:
+        await callback.answer(error, show_alert=True)
+        return
     
     await callback.answer("❌ Заказ отменен")
     await my_orders(callback)
@@ -447,18 +449,20 @@ async def change_order_status(callback: CallbackQuery):
     new_status = parts[2]
     user_id = callback.from_user.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Проверяем, что это заказ продавца
         cursor = await db.execute("SELECT seller_id FROM orders WHERE id = ?", (order_id,))
         order = await cursor.fetchone()
         
-        if not order or order[0] != user_id:
-            await callback.answer("Нет прав на изменение статуса", show_alert=True)
-            return
-        
-        # Обновляем статус
-        await db.execute("UPDATE orders SET status = ? WHERE id = ?", (new_status, order_id))
-        await db.commit()
+        allowed = order is not None and order[0] == user_id
+        if allowed:
+            # Обновляем статус
+            await db.execute("UPDATE orders SET status = ? WHERE id = ?", (new_status, order_id))
+            await db.commit()
+
+    if not allowed:
+        await callback.answer("Нет прав на изменение статуса", show_alert=True)
+        return
     
     status_text = ORDER_STATUSES.get(new_status, new_status)
     await callback.answer(f"✅ Статус изменен на: {status_text}")
@@ -476,7 +480,7 @@ async def contact_user(callback: CallbackQuery):
     
     contact_user_id = int(callback.data.split("_")[1])
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT username, phone FROM users WHERE user_id = ?", (contact_user_id,))
         user = await cursor.fetchone()
     
@@ -1,3 +1,6 @@
+from aiogram import types
+
+
 class Paginator:
     def __init__(self, items_per_page=3):
         self.items_per_page = items_per_page
@@ -17,6 +20,37 @@ class Paginator:
         """Получить смещение для SQL запроса"""
         return (page - 1) * self.items_per_page
 
+    def page_items(self, items, page):
+        """Элементы страницы из готового списка (например, ID из кэша поиска)"""
+        total_pages, page = self.calculate_pages(len(items), page)
+        offset = self.get_offset(page)
+        return items[offset:offset + self.items_per_page], total_pages, page
+
+    async def fetch_keyset_page(self, db, columns, table, where="1", params=(), after=None,
+                                key_columns=("created_at", "id")):
+        """
+        Страница по keyset-курсору: WHERE (created_at, id) < (?, ?) ORDER BY ... DESC.
+
+        В отличие от OFFSET читает только строки одной страницы. after — курсор,
+        возвращённый для предыдущей страницы (None — первая страница).
+        Столбцы key_columns должны быть NOT NULL.
+        Возвращает (строки, курсор следующей страницы или None).
+        """
+        keys = ", ".join(key_columns)
+        sql = f"SELECT {columns}, {keys} FROM {table} WHERE ({where})"
+        if after is not None:
+            sql += f" AND ({keys}) < ({', '.join('?' * len(key_columns))})"
+            params = (*params, *after)
+        sql += f" ORDER BY {', '.join(f'{key} DESC' for key in key_columns)} LIMIT ?"
+        cursor = await db.execute(sql, (*params, self.items_per_page + 1))
+        rows = await cursor.fetchall()
+
+        page_rows = [row[:-len(key_columns)] for row in rows[:self.items_per_page]]
+        next_after = None
+        if len(rows) > self.items_per_page:
+            next_after = tuple(rows[self.items_per_page - 1][-len(key_columns):])
+        return page_rows, next_after
+
     def create_navigation_buttons(self, current_page, total_pages, prefix="cart_page"):
         """Создать кнопки навигации"""
         buttons = []
@@ -1,23 +1,20 @@
-import gspread
-import aiosqlite
+from db import get_db
+from user_cache import invalidate_user
 from datetime import datetime
-from config import CREDENTIALS_FILE, MAIN_SURVEY_SHEET_URL
+from config import MAIN_SURVEY_SHEET_URL
+from sheets_gateway import sheets
+from sheets_export import stream_to_sheet
 import asyncio
 import logging
 
-def get_google_sheets_client():
-    return gspread.service_account(filename=CREDENTIALS_FILE)
-
 async def sync_partners_tech_to_sheet():
     """Синхронизация партнеров по автотехнике с Google Sheets"""
     try:
-        gc = get_google_sheets_client()
-        
         if not MAIN_SURVEY_SHEET_URL:
             print("Ошибка: MAIN_SURVEY_SHEET_URL не указан в config.py")
             return False
             
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры")
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры")
         
         headers = [
             "Дата опроса", "Telegram ID", "Username партнера", "Компания-партнер",
@@ -33,23 +30,8 @@ async def sync_partners_tech_to_sheet():
             "Текущая активность", "Состояние аккаунта"
         ]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT u.user_id, u.username, u.full_name, u.email, u.phone,
-                       u.business, u.products_services, u.account_status, u.created_at,
-                       u.location, u.financial_problem, u.social_problem, u.ecological_problem,
-                       u.business_proposal, COALESCE(ub.bonus_total, 0), COALESCE(ub.current_balance, 0)
-                FROM users u
-                LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
-                WHERE u.active_partner = 'Да' OR u.account_status = 'ПАРТНЕР'
-                   OR EXISTS (SELECT 1 FROM auto_products ap WHERE ap.user_id = u.user_id)
-                ORDER BY u.created_at DESC
-            """)
-            partners = await cursor.fetchall()
-        
-        data = [headers]
-        for partner in partners:
-            row = [
+        def make_row(partner):
+            return [
                 datetime.now().strftime("%d/%m/%Y"),  # Дата опроса
                 partner[0],  # Telegram ID
                 partner[1] or "",  # Username партнера
@@ -85,13 +67,20 @@ async def sync_partners_tech_to_sheet():
                 "",  # Текущая активность
                 partner[7] or "Р"  # Состояние аккаунта
             ]
-            data.append(row)
-        
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
         
-        print(f"Синхронизировано {len(partners)} партнеров по автотехнике")
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT u.user_id, u.username, u.full_name, u.email, u.phone,
+                   u.business, u.products_services, u.account_status, u.created_at,
+                   u.location, u.financial_problem, u.social_problem, u.ecological_problem,
+                   u.business_proposal, COALESCE(ub.bonus_total, 0), COALESCE(ub.current_balance, 0)
+            FROM users u
+            LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
+            WHERE u.active_partner = 'Да' OR u.account_status = 'ПАРТНЕР'
+               OR EXISTS (SELECT 1 FROM auto_products ap WHERE ap.user_id = u.user_id)
+            ORDER BY u.created_at DESC
+        """, make_row=make_row)
+        
+        print(f"Синхронизировано {count} партнеров по автотехнике")
         return True
         
     except Exception as e:
@@ -101,17 +90,11 @@ async def sync_partners_tech_to_sheet():
 async def sync_partners_services_to_sheet():
     """Синхронизация партнеров по автоуслугам с Google Sheets"""
     try:
-        gc = get_google_sheets_client()
-        
         if not MAIN_SURVEY_SHEET_URL:
             print("Ошибка: MAIN_SURVEY_SHEET_URL не указан в config.py")
             return False
             
-        try:
-            sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры (Услуги)")
-        except gspread.WorksheetNotFound:
-            print("Лист 'Партнеры (Услуги)' не найден, создаем новый")
-            sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).add_worksheet(title="Партнеры (Услуги)", rows=1000, cols=34)
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры (Услуги)", create_rows=1000, create_cols=34)
         
         headers = [
             "Дата опроса", "Telegram ID", "Username партнера", "Компания-партнер",
@@ -126,23 +109,8 @@ async def sync_partners_services_to_sheet():
             "ID в магазине", "Контакты", "Активность", "Состояние"
         ]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT DISTINCT u.user_id, u.username, u.full_name, u.email, u.phone,
-                       u.business, u.products_services, u.account_status,
-                       u.created_at, ub.bonus_total, ub.current_balance
-                FROM users u
-                LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
-                LEFT JOIN auto_services as_ ON u.user_id = as_.user_id
-                WHERE (u.active_partner = 'Да' OR u.account_status = 'ПАРТНЕР') 
-                   AND as_.id IS NOT NULL
-                ORDER BY u.created_at DESC
-            """)
-            partners = await cursor.fetchall()
-        
-        data = [headers]
-        for partner in partners:
-            row = [
+        def make_row(partner):
+            return [
                 datetime.now().strftime("%d/%m/%Y"),
                 partner[0], partner[1] or "", partner[5] or "", "", "",
                 partner[3] or "", partner[4] or "", partner[6] or "",
@@ -151,13 +119,20 @@ async def sync_partners_services_to_sheet():
                 "", "", "", "", "", "", "", "", partner[0],
                 f"@{partner[1]}" if partner[1] else "", "", partner[7] or "Р"
             ]
-            data.append(row)
-        
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
         
-        print(f"Синхронизировано {len(partners)} партнеров по автоуслугам")
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT DISTINCT u.user_id, u.username, u.full_name, u.email, u.phone,
+                   u.business, u.products_services, u.account_status,
+                   u.created_at, ub.bonus_total, ub.current_balance
+            FROM users u
+            LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
+            LEFT JOIN auto_services as_ ON u.user_id = as_.user_id
+            WHERE (u.active_partner = 'Да' OR u.account_status = 'ПАРТНЕР') 
+               AND as_.id IS NOT NULL
+            ORDER BY u.created_at DESC
+        """, make_row=make_row)
+        
+        print(f"Синхронизировано {count} партнеров по автоуслугам")
         return True
         
     except Exception as e:
@@ -167,17 +142,11 @@ async def sync_partners_services_to_sheet():
 async def sync_investors_to_sheet():
     """Синхронизация инвесторов с Google Sheets"""
     try:
-        gc = get_google_sheets_client()
-        
         if not MAIN_SURVEY_SHEET_URL:
             print("Ошибка: MAIN_SURVEY_SHEET_URL не указан в config.py")
             return False
             
-        try:
-            sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Инвесторы")
-        except gspread.WorksheetNotFound:
-             print("Лист 'Инвесторы' не найден, создаем новый")
-             sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).add_worksheet(title="Инвесторы", rows=1000, cols=34)
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Инвесторы", create_rows=1000, create_cols=34)
         
         headers = [
             "Дата опроса", "Telegram ID инвестора", "Username инвестора",
@@ -193,21 +162,8 @@ async def sync_investors_to_sheet():
             "Контакты", "Состояние аккаунта"
         ]
         
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("""
-                SELECT u.user_id, u.username, u.full_name, u.email, u.phone,
-                       u.business, u.products_services, u.account_status,
-                       u.created_at, ub.bonus_total, ub.current_balance
-                FROM users u
-                LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
-                WHERE u.investor_trader = 'Да' OR u.account_status = 'ИНВЕСТОР'
-                ORDER BY u.created_at DESC
-            """)
-            investors = await cursor.fetchall()
-        
-        data = [headers]
-        for investor in investors:
-            row = [
+        def make_row(investor):
+            return [
                 datetime.now().strftime("%d/%m/%Y"),
                 investor[0], investor[1] or "", investor[5] or "",
                 "", "", investor[3] or "", investor[4] or "",
@@ -217,13 +173,18 @@ async def sync_investors_to_sheet():
                 "", "", "", investor[0], f"@{investor[1]}" if investor[1] else "",
                 investor[7] or "Р"
             ]
-            data.append(row)
         
-        sheet.clear()
-        if data:
-            sheet.update('A1', data)
-        
-        print(f"Синхронизировано {len(investors)} инвесторов")
+        count = await stream_to_sheet(sheet, headers, """
+            SELECT u.user_id, u.username, u.full_name, u.email, u.phone,
+                   u.business, u.products_services, u.account_status,
+                   u.created_at, ub.bonus_total, ub.current_balance
+            FROM users u
+            LEFT JOIN user_bonuses ub ON u.user_id = ub.user_id
+            WHERE u.investor_trader = 'Да' OR u.account_status = 'ИНВЕСТОР'
+            ORDER BY u.created_at DESC
+        """, make_row=make_row)
+        
+        print(f"Синхронизировано {count} инвесторов")
         return True
         
     except Exception as e:
@@ -233,11 +194,10 @@ async def sync_investors_to_sheet():
 async def sync_users_from_sheets():
     """Синхронизация данных пользователей из Google Sheets"""
     try:
-        gc = get_google_sheets_client()
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).sheet1
-        data = sheet.get_all_records()
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL)
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 user_id = row.get('Telegram ID')
                 if not user_id:
@@ -258,6 +218,7 @@ async def sync_users_from_sheets():
                     user_id
                 ))
             await db.commit()
+        invalidate_user()
         
         print("Данные пользователей обновлены из Google Sheets")
         return True
@@ -284,13 +245,12 @@ async def sync_partners_from_sheets():
 async def sync_partners_tech_from_sheet():
     """Синхронизация партнеров по автотехнике из Google Sheets"""
     try:
-        gc = get_google_sheets_client()
         if not MAIN_SURVEY_SHEET_URL:
             return False
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры")
-        data = sheet.get_all_records()
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры")
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 user_id = row.get('Telegram ID')
                 if not user_id:
@@ -308,6 +268,7 @@ async def sync_partners_tech_from_sheet():
                     user_id
                 ))
             await db.commit()
+        invalidate_user()
         return True
     except Exception as e:
         print(f"Ошибка синхронизации партнеров по автотехнике: {e}")
@@ -316,13 +277,12 @@ async def sync_partners_tech_from_sheet():
 async def sync_partners_services_from_sheet():
     """Синхронизация партнеров по автоуслугам из Google Sheets"""
     try:
-        gc = get_google_sheets_client()
         if not MAIN_SURVEY_SHEET_URL:
             return False
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры")
-        data = sheet.get_all_records()
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры")
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 user_id = row.get('Telegram ID')
                 if not user_id:
@@ -340,6 +300,7 @@ async def sync_partners_services_from_sheet():
                     user_id
                 ))
             await db.commit()
+        invalidate_user()
         return True
     except Exception as e:
         print(f"Ошибка синхронизации партнеров по автоуслугам: {e}")
@@ -348,13 +309,12 @@ async def sync_partners_services_from_sheet():
 async def sync_investors_from_sheet():
     """Синхронизация инвесторов из Google Sheets"""
     try:
-        gc = get_google_sheets_client()
         if not MAIN_SURVEY_SHEET_URL:
             return False
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры")
-        data = sheet.get_all_records()
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры")
+        data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for row in data:
                 user_id = row.get('Telegram ID инвестора')
                 if not user_id:
@@ -372,6 +332,7 @@ async def sync_investors_from_sheet():
                     user_id
                 ))
             await db.commit()
+        invalidate_user()
         return True
     except Exception as e:
         print(f"Ошибка синхронизации инвесторов: {e}")
@@ -429,14 +390,13 @@ async def sync_partner_data_to_cards():
 async def sync_tech_partners_to_product_cards():
     """Выгрузка данных партнеров по автотехнике в карточки товаров"""
     try:
-        gc = get_google_sheets_client()
         if not MAIN_SURVEY_SHEET_URL:
             return False
             
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры")
-        partner_data = sheet.get_all_records()
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры")
+        partner_data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for partner in partner_data:
                 user_id = partner.get('Telegram ID')
                 if not user_id:
@@ -464,14 +424,13 @@ async def sync_tech_partners_to_product_cards():
 async def sync_service_partners_to_service_cards():
     """Выгрузка данных партнеров по автоуслугам в карточки услуг"""
     try:
-        gc = get_google_sheets_client()
         if not MAIN_SURVEY_SHEET_URL:
             return False
             
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры")
-        partner_data = sheet.get_all_records()
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры")
+        partner_data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for partner in partner_data:
                 user_id = partner.get('Telegram ID')
                 if not user_id:
@@ -499,14 +458,13 @@ async def sync_service_partners_to_service_cards():
 async def sync_investor_data_to_profiles():
     """Выгрузка данных инвесторов в профили согласно ТЗ п.5"""
     try:
-        gc = get_google_sheets_client()
         if not MAIN_SURVEY_SHEET_URL:
             return False
             
-        sheet = gc.open_by_url(MAIN_SURVEY_SHEET_URL).worksheet("Партнеры")
-        investor_data = sheet.get_all_records()
+        sheet = await sheets.worksheet(MAIN_SURVEY_SHEET_URL, "Партнеры")
+        investor_data = await sheets.get_all_records(sheet)
         
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             for investor in investor_data:
                 user_id = investor.get('Telegram ID инвестора')
                 if not user_id:
@@ -531,26 +489,7 @@ async def sync_investor_data_to_profiles():
         print(f"Ошибка выгрузки данных инвесторов: {e}")
         return False
 
-# Функция для периодической синхронизации (каждый день в 17:00)
+# Ежедневная задача планировщика (scheduler.py)
 async def scheduled_partner_sync():
-    """Запланированная выгрузка партнерских данных в 17:00 МСК согласно ТЗ"""
-    while True:
-        try:
-            # Ждем до 17:00 МСК
-            now = datetime.now()
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            
-            if now > target_time:
-                target_time = target_time.replace(day=target_time.day + 1)
-            
-            wait_seconds = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            
-            # Выгружаем партнерские данные в карточки (ТЗ п.3-5)
-            await sync_partner_data_to_cards()
-            
-        except asyncio.CancelledError:
-            raise
-        except Exception as e:
-            logging.error(f"Ошибка в scheduled_partner_sync: {e}")
-            await asyncio.sleep(3600)  # Ждем час при ошибке
\ No newline at end of file
+    """Выгрузка партнерских данных в карточки в 17:00 МСК согласно ТЗ (п.3-5)"""
+    return await sync_partner_data_to_cards()
\ No newline at end of file
@@ -1,3 +1,4 @@
+from db import get_db
 from aiogram import F, types
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -31,8 +32,7 @@ async def my_balance(callback: CallbackQuery):
     
     user_id = callback.from_user.id
     
-    import aiosqlite
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT bonus_total, current_balance, bonus_adjustment
             FROM users 
@@ -88,8 +88,7 @@ async def payment_history(callback: CallbackQuery):
     
     user_id = callback.from_user.id
     
-    import aiosqlite
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         # Получаем историю из user_bonuses
         cursor = await db.execute("""
             SELECT bonus_total, bonus_adjustment, current_balance, adjustment_reason, updated_at
@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from dispatcher import dp
 from utils import check_blocked_user
-import aiosqlite
+from db import get_db
 
 # Информация об оплате
 @dp.callback_query(F.data == "payment")
@@ -75,8 +75,7 @@ async def inbox(callback: CallbackQuery):
     
     user_id = callback.from_user.id
     
-    import aiosqlite
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, sender_id, subject, message_text, sent_at, is_read
             FROM messages 
@@ -120,8 +119,7 @@ async def outbox(callback: CallbackQuery):
     
     user_id = callback.from_user.id
     
-    import aiosqlite
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, recipient_id, subject, message_text, sent_at
             FROM messages 
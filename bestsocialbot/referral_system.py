@@ -1,8 +1,6 @@
-import aiosqlite
-import gspread
-from datetime import datetime, timedelta
-from config import CREDENTIALS_FILE, REFERRALS_SHEET_URL
-import asyncio
+from db import get_db
+from config import REFERRALS_SHEET_URL
+from sheets_gateway import sheets
 import logging
 from bot_instance import bot
 from aiogram import F, types
@@ -14,32 +12,6 @@ from utils import check_blocked_user
 # Бонус за реферала согласно ТЗ
 REFERRAL_BONUS = 0.1
 
-async def init_referral_system():
-    """Инициализация реферальной системы"""
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Таблица рефералов
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS referrals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                referrer_id INTEGER NOT NULL,
-                referred_id INTEGER NOT NULL,
-                created_at TEXT,
-                bonus_paid BOOLEAN DEFAULT FALSE,
-                FOREIGN KEY (referrer_id) REFERENCES users (user_id),
-                FOREIGN KEY (referred_id) REFERENCES users (user_id)
-            )
-        """)
-        
-        # Добавляем поля в users
-        try:
-            await db.execute("ALTER TABLE users ADD COLUMN referral_link TEXT")
-            await db.execute("ALTER TABLE users ADD COLUMN referral_earnings REAL DEFAULT 0")
-            await db.execute("ALTER TABLE users ADD COLUMN total_referrals INTEGER DEFAULT 0")
-        except:
-            pass
-        
-        await db.commit()
-
 async def generate_referral_link(user_id: int) -> str:
     """Генерация реферальной ссылки"""
     from bot_instance import bot
@@ -48,7 +20,7 @@ async def generate_referral_link(user_id: int) -> str:
     link = f"https://t.me/{bot_username}?start=ref_{user_id}"
     
     # Сохраняем ссылку в БД
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute(
             "UPDATE users SET referral_link = ? WHERE user_id = ?",
             (link, user_id)
@@ -60,7 +32,7 @@ async def generate_referral_link(user_id: int) -> str:
 async def process_referral(referred_id: int, referrer_id: int):
     """Обработка реферала"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # Проверяем, не является ли пользователь уже рефералом
             cursor = await db.execute(
                 "SELECT 1 FROM referrals WHERE referred_id = ?", (referred_id,)
@@ -82,16 +54,16 @@ async def process_referral(referred_id: int, referrer_id: int):
             
             await db.commit()
             
-            # Уведомляем реферера
-            try:
-                await bot.send_message(
-                    referrer_id,
-                    f"🎉 У вас новый реферал! Вы получите бонус {REFERRAL_BONUS} монеты."
-                )
-            except:
-                pass
-            
-            return True
+        # Уведомляем реферера
+        try:
+            await bot.send_message(
+                referrer_id,
+                f"🎉 У вас новый реферал! Вы получите бонус {REFERRAL_BONUS} монеты."
+            )
+        except:
+            pass
+        
+        return True
             
     except Exception as e:
         logging.error(f"Error processing referral: {e}")
@@ -100,7 +72,7 @@ async def process_referral(referred_id: int, referrer_id: int):
 async def calculate_monthly_referral_bonuses():
     """Расчет ежемесячных бонусов за рефералов"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db(write=True) as db:
             # Получаем активных рефералов за месяц
             cursor = await db.execute("""
                 SELECT r.referrer_id, COUNT(*) as active_referrals
@@ -131,17 +103,18 @@ async def calculate_monthly_referral_bonuses():
                     WHERE referrer_id = ? AND bonus_paid = FALSE
                 """, (referrer_id,))
                 
-                # Уведомляем пользователя
-                try:
-                    await bot.send_message(
-                        referrer_id,
-                        f"💰 Начислен реферальный бонус: {bonus} монет за {active_count} активных рефералов!"
-                    )
-                except:
-                    pass
-            
             await db.commit()
-            return True
+
+        for referrer_id, active_count in referral_data:
+            # Уведомляем пользователя
+            try:
+                await bot.send_message(
+                    referrer_id,
+                    f"💰 Начислен реферальный бонус: {active_count * REFERRAL_BONUS} монет за {active_count} активных рефералов!"
+                )
+            except:
+                pass
+        return True
             
     except Exception as e:
         logging.error(f"Error calculating referral bonuses: {e}")
@@ -150,7 +123,7 @@ async def calculate_monthly_referral_bonuses():
 async def export_referral_data():
     """Выгрузка данных реферальной системы"""
     try:
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             cursor = await db.execute("""
                 SELECT u.user_id, u.username, u.full_name, u.total_referrals,
                        u.referral_earnings, u.referral_link, u.created_at
@@ -163,8 +136,7 @@ async def export_referral_data():
         if not referrers:
             return True
         
-        gc = gspread.service_account(filename=CREDENTIALS_FILE)
-        sheet = gc.open_by_url(REFERRALS_SHEET_URL).sheet1
+        sheet = await sheets.worksheet(REFERRALS_SHEET_URL)
         
         # Заголовки
         headers = [
@@ -180,8 +152,7 @@ async def export_referral_data():
                 referrer[3], referrer[4], referrer[5] or "", referrer[6]
             ])
         
-        sheet.clear()
-        sheet.update('A1', data)
+        await sheets.replace(sheet, data)
         
         logging.info("Referral data exported successfully")
         return True
@@ -192,50 +163,25 @@ async def export_referral_data():
 
 async def get_referral_stats(user_id: int):
     """Получение статистики рефералов пользователя"""
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT total_referrals, referral_earnings, referral_link
             FROM users WHERE user_id = ?
         """, (user_id,))
         return await cursor.fetchone()
 
-async def start_referral_system():
-    """Запуск реферальной системы"""
-    await init_referral_system()
-    asyncio.create_task(scheduled_referral_sync())
-
 async def scheduled_referral_sync():
-    """Планировщик реферальной системы"""
-    import pytz
+    """Реферальные бонусы и выгрузка рефералов в 17:00 МСК (задача планировщика, scheduler.py)"""
+    logging.info("Starting scheduled referral sync at 17:00 MSK")
     
-    while True:
-        try:
-            moscow_tz = pytz.timezone('Europe/Moscow')
-            now = datetime.now(moscow_tz)
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            
-            if now >= target_time:
-                target_time += timedelta(days=1)
-            
-            wait_seconds = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            
-            logging.info("Starting scheduled referral sync at 17:00 MSK")
-            
-            # Рассчитываем бонусы
-            await calculate_monthly_referral_bonuses()
-            
-            # Выгружаем данные
-            await export_referral_data()
-            
-            logging.info("✅ Referral sync completed successfully")
-                
-        except asyncio.CancelledError:
-            raise
-        except Exception as e:
-            logging.error(f"Error in scheduled referral sync: {e}")
-        
-        await asyncio.sleep(3600)
+    # Рассчитываем бонусы
+    calculated = await calculate_monthly_referral_bonuses()
+    
+    # Выгружаем данные
+    exported = await export_referral_data()
+    
+    logging.info("✅ Referral sync completed")
+    return calculated is not False and exported is not False
 
 # Обработчик кнопки "Рефералы"
 @dp.callback_query(F.data == "referral_system")
@@ -259,7 +205,7 @@ async def referral_system_handler(callback: CallbackQuery):
             referral_link = await generate_referral_link(user_id)
     
     # Получаем список рефералов
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT u.username, u.full_name, r.created_at
             FROM referrals r
@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-import aiosqlite
+from db import get_db
 from datetime import datetime
 from dispatcher import dp
 from utils import check_blocked_user
@@ -71,7 +71,7 @@ async def finish_review(message, state: FSMContext):
     data = await state.get_data()
     user_id = message.from_user.id if hasattr(message, 'from_user') else message.chat.id
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Проверяем, не оставлял ли пользователь уже отзыв
         cursor = await db.execute(
             "SELECT id FROM reviews WHERE item_type = ? AND item_id = ? AND user_id = ?",
@@ -79,31 +79,32 @@ async def finish_review(message, state: FSMContext):
         )
         existing = await cursor.fetchone()
         
-        if existing:
-            await message.answer("❌ Вы уже оставляли отзыв на этот товар/услугу.")
-            await state.clear()
-            return
+        if not existing:
+            # Добавляем отзыв
+            await db.execute(
+                "INSERT INTO reviews (item_type, item_id, user_id, rating, review_text, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (data['item_type'], data['item_id'], user_id, data['rating'], data.get('review_text', ''), datetime.now().isoformat())
+            )
         
-        # Добавляем отзыв
-        await db.execute(
-            "INSERT INTO reviews (item_type, item_id, user_id, rating, review_text, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (data['item_type'], data['item_id'], user_id, data['rating'], data.get('review_text', ''), datetime.now().isoformat())
-        )
+            # Обновляем средний рейтинг товара/услуги
+            cursor = await db.execute(
+                "SELECT AVG(rating), COUNT(*) FROM reviews WHERE item_type = ? AND item_id = ?",
+                (data['item_type'], data['item_id'])
+            )
+            avg_rating, count = await cursor.fetchone()
         
-        # Обновляем средний рейтинг товара/услуги
-        cursor = await db.execute(
-            "SELECT AVG(rating), COUNT(*) FROM reviews WHERE item_type = ? AND item_id = ?",
-            (data['item_type'], data['item_id'])
-        )
-        avg_rating, count = await cursor.fetchone()
+            table_name = "auto_products" if data['item_type'] == 'tech' else "auto_services"
+            await db.execute(
+                f"UPDATE {table_name} SET rating = ?, reviews_count = ? WHERE id = ?",
+                (round(avg_rating, 1), count, data['item_id'])
+            )
         
-        table_name = "auto_products" if data['item_type'] == 'tech' else "auto_services"
-        await db.execute(
-            f"UPDATE {table_name} SET rating = ?, reviews_count = ? WHERE id = ?",
-            (round(avg_rating, 1), count, data['item_id'])
-        )
-        
-        await db.commit()
+            await db.commit()
+
+    if existing:
+        await message.answer("❌ Вы уже оставляли отзыв на этот товар/услугу.")
+        await state.clear()
+        return
     
     builder = InlineKeyboardBuilder()
     builder.add(types.InlineKeyboardButton(text="◀️ К товару", callback_data=f"item_{data['item_type']}_{data['item_id']}"))
@@ -126,7 +127,7 @@ async def view_reviews(callback: CallbackQuery):
     item_type = parts[2]
     item_id = int(parts[3])
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT r.rating, r.review_text, r.created_at, u.username
             FROM reviews r
@@ -0,0 +1,340 @@
+"""
+Планировщик фоновых задач по расписанию.
+
+Раньше каждая ежедневная синхронизация крутила свой цикл «спать до 17:00»,
+и в 17:00 МСК все они одновременно шли в Google Sheets. Теперь задачи
+описаны в одном списке JOBS, а один фоновый цикл run_scheduler() запускает
+их по расписанию в формате cron («минута час день месяц день_недели», время
+московское):
+  - ежедневные задачи разнесены по минутам (17:00, 17:05, ...), к каждому
+    запуску добавляется случайная задержка до SCHEDULER_JITTER секунд;
+  - задачи, работающие с Google Sheets, выполняются не больше
+    SCHEDULER_SHEETS_CONCURRENCY одновременно (на весь процесс, если в нём
+    работают несколько ботов);
+  - если бот был остановлен во время запуска по расписанию, пропущенный
+    запуск выполняется один раз после старта (SCHEDULER_CATCH_UP=1);
+  - каждый запуск записывается в таблицу job_runs (миграция 12): время по
+    расписанию, начало, конец, длительность и результат.
+
+Статистика запусков и ближайшее расписание:
+
+    python scheduler.py [дней]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from config import SCHEDULER_SHEETS_CONCURRENCY, SCHEDULER_JITTER, SCHEDULER_CATCH_UP
+from db import get_db
+from tenants import shared
+
+SCHEDULER_TZ = pytz.timezone("Europe/Moscow")
+
+# Дальше этого интервала следующее срабатывание не ищется (расписание вида 31 февраля)
+_CRON_HORIZON = timedelta(days=5 * 366)
+
+# Сколько максимум спать между проверками расписания, сек (на случай перевода часов)
+_MAX_SLEEP = 60
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> frozenset:
+    """Поле cron: *, число, диапазон a-b, список через запятую, шаг /n"""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = map(int, part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Неверное поле расписания: {field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSpec:
+    """Расписание в формате cron: «минута час день месяц день_недели» (0 — воскресенье)"""
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Расписание должно состоять из 5 полей: {expr}")
+        self.expr = expr
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        self.weekdays = frozenset(day % 7 for day in _parse_cron_field(fields[4], 0, 7))
+        # Как в cron: если заданы и день месяца, и день недели, подходит любой из них
+        self.any_day = fields[2] == "*" or fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        return in_days and in_weekdays if self.any_day else in_days or in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайшее срабатывание строго после moment (время с часовым поясом)"""
+        local = moment.astimezone(SCHEDULER_TZ).replace(tzinfo=None, second=0, microsecond=0)
+        local += timedelta(minutes=1)
+        limit = local + _CRON_HORIZON
+        while local < limit:
+            if local.month not in self.months:
+                local = (local.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(local):
+                local = local.replace(hour=0, minute=0) + timedelta(days=1)
+            elif local.hour not in self.hours:
+                local = local.replace(minute=0) + timedelta(hours=1)
+            elif local.minute not in self.minutes:
+                local += timedelta(minutes=1)
+            else:
+                return SCHEDULER_TZ.localize(local)
+        raise ValueError(f"Расписание никогда не срабатывает: {self.expr}")
+
+    def last_before(self, after: datetime, moment: datetime):
+        """Последнее срабатывание в интервале (after, moment] или None"""
+        last = None
+        fire = self.next_after(after)
+        while fire <= moment:
+            last = fire
+            fire = self.next_after(fire)
+        return last
+
+
+class Job:
+    """Задача планировщика: имя (ключ в job_runs), расписание, функция запуска"""
+
+    def __init__(self, name: str, cron: str, func, description: str = "",
+                 sheets: bool = True, catch_up: bool = True):
+        self.name = name
+        self.cron = CronSpec(cron)
+        self.func = func                # async () -> результат; False — задача не выполнена
+        self.description = description
+        self.sheets = sheets            # работает с Google Sheets (общий лимит одновременных задач)
+        self.catch_up = catch_up        # выполнять пропущенный запуск после старта бота
+
+
+async def _daily_sync():
+    from daily_scheduler import daily_sync_task
+    return await daily_sync_task()
+
+
+async def _automarket_import():
+    from automarket_sheets import scheduled_automarket_sync
+    return await scheduled_automarket_sync()
+
+
+async def _partner_sync():
+    from partner_sheets import scheduled_partner_sync
+    return await scheduled_partner_sync()
+
+
+async def _admin_tables_sync():
+    from admin_sheets_manager import scheduled_admin_tables_sync
+    return await scheduled_admin_tables_sync()
+
+
+async def _initiatives_sync():
+    from initiatives_system import scheduled_initiatives_sync
+    return await scheduled_initiatives_sync()
+
+
+async def _activity_sync():
+    from activity_system import scheduled_activity_sync
+    return await scheduled_activity_sync()
+
+
+async def _referral_sync():
+    from referral_system import scheduled_referral_sync
+    return await scheduled_referral_sync()
+
+
+# Имя задачи -> задача. Ежедневные задачи по ТЗ выполняются в 17:00 МСК;
+# чтобы не обращаться к Google Sheets всем сразу, они разнесены по 5 минут.
+JOBS = {}
+
+
+def register_job(job: Job):
+    JOBS[job.name] = job
+
+
+for _job in (
+    Job("daily_sync", "0 17 * * *", _daily_sync, "Ежедневная выгрузка основных таблиц"),
+    Job("automarket_import", "5 17 * * *", _automarket_import, "Загрузка товаров и услуг из Google Sheets"),
+    Job("partner_sync", "10 17 * * *", _partner_sync, "Партнерские данные в карточки"),
+    Job("admin_tables_sync", "15 17 * * *", _admin_tables_sync, "Загрузка административных таблиц"),
+    Job("initiatives_sync", "20 17 * * *", _initiatives_sync, "Инициативы: выгрузка, уведомления, статусы"),
+    Job("activity_sync", "25 17 * * *", _activity_sync, "Расчёт и выгрузка активности"),
+    Job("referral_sync", "30 17 * * *", _referral_sync, "Реферальные бонусы и выгрузка рефералов"),
+):
+    register_job(_job)
+
+# Общий для всех ботов процесса (tenants.py)
+_sheets_jobs = shared("scheduler_sheets_jobs", lambda: asyncio.Semaphore(SCHEDULER_SHEETS_CONCURRENCY))
+
+
+def _now() -> datetime:
+    return datetime.now(SCHEDULER_TZ)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec="seconds")
+
+
+async def _mark_interrupted():
+    """Запуски, оставшиеся в статусе running после остановки бота"""
+    async with get_db(write=True) as db:
+        await db.execute("UPDATE job_runs SET status = 'interrupted' WHERE status = 'running'")
+        await db.commit()
+
+
+async def _last_scheduled(job_name: str):
+    """Время по расписанию последнего завершённого запуска задачи или None"""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT MAX(scheduled_at) FROM job_runs WHERE job = ? AND status IN ('ok', 'failed', 'error')",
+            (job_name,)
+        )
+        row = await cursor.fetchone()
+    return datetime.fromisoformat(row[0]) if row[0] else None
+
+
+async def run_job(job: Job, scheduled_at: datetime, jitter: float = 0):
+    """Один запуск задачи с записью в job_runs. Возвращает статус запуска"""
+    if jitter:
+        await asyncio.sleep(random.uniform(0, jitter))
+    semaphore = _sheets_jobs if job.sheets else None
+    if semaphore is not None:
+        await semaphore.acquire()
+    try:
+        async with get_db(write=True) as db:
+            cursor = await db.execute(
+                "INSERT INTO job_runs (job, scheduled_at, started_at) VALUES (?, ?, ?)",
+                (job.name, _timestamp(scheduled_at), _timestamp(_now()))
+            )
+            run_id = cursor.lastrowid
+            await db.commit()
+
+        print(f"[SCHEDULER] Запуск {job.name} (по расписанию {scheduled_at.strftime('%d.%m.%Y %H:%M')} МСК)")
+        started = time.monotonic()
+        status, error = "ok", None
+        try:
+            if await job.func() is False:
+                status = "failed"
+        except asyncio.CancelledError:
+            status, error = "interrupted", "остановка бота"
+            raise
+        except Exception as e:
+            status, error = "error", str(e)[:500]
+        finally:
+            duration = time.monotonic() - started
+            async with get_db(write=True) as db:
+                await db.execute(
+                    "UPDATE job_runs SET finished_at = ?, duration = ?, status = ?, error = ? WHERE id = ?",
+                    (_timestamp(_now()), duration, status, error, run_id)
+                )
+                await db.commit()
+            print(f"[SCHEDULER] {job.name}: {status} за {duration:.1f} с" + (f" ({error})" if error else ""))
+        return status
+    finally:
+        if semaphore is not None:
+            semaphore.release()
+
+
+async def run_scheduler():
+    """Фоновый цикл планировщика (запускается в main.start_background_tasks)"""
+    await _mark_interrupted()
+    running = {}    # имя задачи -> asyncio.Task текущего запуска
+
+    def launch(job: Job, scheduled_at: datetime):
+        task = running.get(job.name)
+        if task is not None and not task.done():
+            print(f"[SCHEDULER] {job.name} ещё выполняется, запуск {scheduled_at.strftime('%H:%M')} пропущен")
+            return
+        running[job.name] = asyncio.create_task(run_job(job, scheduled_at, SCHEDULER_JITTER))
+
+    now = _now()
+    next_runs = {}
+    for job in JOBS.values():
+        if SCHEDULER_CATCH_UP and job.catch_up:
+            last = await _last_scheduled(job.name)
+            missed = job.cron.last_before(last, now) if last is not None else None
+            if missed is not None:
+                print(f"[SCHEDULER] {job.name}: пропущен запуск {missed.strftime('%d.%m.%Y %H:%M')} МСК, выполняем")
+                launch(job, missed)
+        next_runs[job.name] = job.cron.next_after(now)
+        print(f"[SCHEDULER] {job.name}: следующий запуск {next_runs[job.name].strftime('%d.%m.%Y %H:%M')} МСК")
+
+    try:
+        while True:
+            now = _now()
+            for job in JOBS.values():
+                if job.name not in next_runs:  # задача зарегистрирована после старта
+                    next_runs[job.name] = job.cron.next_after(now)
+                if next_runs[job.name] <= now:
+                    launch(job, next_runs[job.name])
+                    next_runs[job.name] = job.cron.next_after(now)
+            wait = (min(next_runs.values()) - _now()).total_seconds()
+            await asyncio.sleep(min(max(wait, 0), _MAX_SLEEP))
+    finally:
+        tasks = [task for task in running.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def job_stats(days: int = 7) -> list:
+    """
+    Статистика запусков за days дней по задачам: (задача, запусков, ошибок,
+    средняя и максимальная длительность, среднее ожидание от времени по
+    расписанию до начала, сек)
+    """
+    since = _timestamp(_now() - timedelta(days=days))
+    async with get_db() as db:
+        cursor = await db.execute("""
+            SELECT job, COUNT(*),
+                   SUM(status != 'ok'),
+                   AVG(duration), MAX(duration),
+                   AVG((julianday(started_at) - julianday(scheduled_at)) * 86400)
+            FROM job_runs
+            WHERE scheduled_at >= ?
+            GROUP BY job
+            ORDER BY MIN(scheduled_at)
+        """, (since,))
+        return await cursor.fetchall()
+
+
+async def _print_report(days: int):
+    from db import init_db, close_db
+    await init_db()
+    try:
+        now = _now()
+        print("Расписание (МСК):")
+        for job in JOBS.values():
+            fire = job.cron.next_after(now)
+            print(f"  {job.name:<20} {job.cron.expr:<14} следующий {fire.strftime('%d.%m.%Y %H:%M')}  {job.description}")
+        print(f"\nЗапуски за {days} дн.:")
+        rows = await job_stats(days)
+        if not rows:
+            print("  нет записей")
+        for job, runs, failures, avg_duration, max_duration, avg_wait in rows:
+            print(f"  {job:<20} запусков {runs}, ошибок {failures}, "
+                  f"длительность ср. {avg_duration or 0:.1f} с / макс. {max_duration or 0:.1f} с, "
+                  f"ожидание ср. {avg_wait or 0:.1f} с")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_print_report(int(sys.argv[1]) if len(sys.argv) > 1 else 7))
@@ -3,7 +3,8 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-import aiosqlite
+from db import get_db
+from search_index import BM25_RANK, build_match_query
 from dispatcher import dp
 from utils import check_blocked_user
 
@@ -34,23 +35,21 @@ async def search_products_start(callback: CallbackQuery, state: FSMContext):
 async def search_products_process(message: Message, state: FSMContext):
     search_query = message.text.lower()
     
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT ap.id, ap.title, ap.price, ap.description, ap.specifications, 
-                   u.username, ac.name as category_name
-            FROM auto_products ap
-            JOIN users u ON ap.user_id = u.user_id
-            JOIN auto_categories ac ON ap.category_id = ac.id
-            WHERE ap.status = 'active' AND (
-                LOWER(ap.title) LIKE ? OR 
-                LOWER(ap.description) LIKE ? OR 
-                LOWER(ap.specifications) LIKE ?
-            )
-            ORDER BY ap.created_at DESC
-            LIMIT 20
-        """, (f"%{search_query}%", f"%{search_query}%", f"%{search_query}%"))
-        
-        results = await cursor.fetchall()
+    results = []
+    match = build_match_query(search_query)
+    if match:
+        async with get_db() as db:
+            cursor = await db.execute(f"""
+                SELECT ci.item_id, ci.title, ci.price, ci.description, ci.details,
+                       u.username, ci.category
+                FROM catalog_search
+                JOIN catalog_items ci ON ci.key = catalog_search.rowid
+                JOIN users u ON ci.user_id = u.user_id
+                WHERE catalog_search MATCH ? AND ci.source = 'auto_products'
+                ORDER BY {BM25_RANK}
+                LIMIT 20
+            """, (match,))
+            results = await cursor.fetchall()
     
     if not results:
         builder = InlineKeyboardBuilder()
@@ -107,23 +106,21 @@ async def search_services_start(callback: CallbackQuery, state: FSMContext):
 async def search_services_process(message: Message, state: FSMContext):
     search_query = message.text.lower()
     
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT as_.id, as_.title, as_.price, as_.description, as_.location,
-                   u.username, ac.name as category_name
-            FROM auto_services as_
-            JOIN users u ON as_.user_id = u.user_id
-            JOIN auto_categories ac ON as_.category_id = ac.id
-            WHERE as_.status = 'active' AND (
-                LOWER(as_.title) LIKE ? OR 
-                LOWER(as_.description) LIKE ? OR 
-                LOWER(as_.location) LIKE ?
-            )
-            ORDER BY as_.created_at DESC
-            LIMIT 20
-        """, (f"%{search_query}%", f"%{search_query}%", f"%{search_query}%"))
-        
-        results = await cursor.fetchall()
+    results = []
+    match = build_match_query(search_query)
+    if match:
+        async with get_db() as db:
+            cursor = await db.execute(f"""
+                SELECT ci.item_id, ci.title, ci.price, ci.description, ci.details,
+                       u.username, ci.category
+                FROM catalog_search
+                JOIN catalog_items ci ON ci.key = catalog_search.rowid
+                JOIN users u ON ci.user_id = u.user_id
+                WHERE catalog_search MATCH ? AND ci.source = 'auto_services'
+                ORDER BY {BM25_RANK}
+                LIMIT 20
+            """, (match,))
+            results = await cursor.fetchall()
     
     if not results:
         builder = InlineKeyboardBuilder()
@@ -203,7 +200,7 @@ async def filter_price_max(message: Message, state: FSMContext):
             return
         
         # Выполняем поиск по цене
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             if filter_type == 'products':
                 cursor = await db.execute("""
                     SELECT ap.id, ap.title, ap.price, u.username, ac.name as category_name
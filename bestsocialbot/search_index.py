@@ -0,0 +1,140 @@
+"""
+Полнотекстовый поиск по каталогу (SQLite FTS5).
+
+Виртуальная таблица catalog_search поддерживается триггерами на
+catalog_items (catalog_items.py): в индексе лежат только видимые в каталоге
+позиции, rowid строки индекса равен catalog_items.key.
+
+Токенизатор unicode61 приводит регистр, но не знает русской морфологии,
+поэтому слова запроса сводятся к основе (русский стеммер Snowball)
+и ищутся по префиксу: «шины», «шин», «шинами» находят одно и то же.
+Ранжирование — bm25() с весами столбцов: название > описание > категория >
+операция > характеристики.
+"""
+
+import re
+
+from catalog_items import get_items_by_ids
+from db import get_db
+
+# Веса столбцов catalog_search для bm25() в порядке объявления:
+# title, description, category, operation, details
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 1.0)
+BM25_RANK = f"bm25(catalog_search, {', '.join(str(w) for w in BM25_WEIGHTS)})"
+
+SEARCH_RESULTS_LIMIT = 50
+
+# --- стеммер (Snowball Russian) ---
+
+_VOWELS = "аеиоуыэюя"
+_PERFECTIVE_GERUND = re.compile(r"((?<=[ая])(в|вши|вшись)|(ив|ивши|ившись|ыв|ывши|ывшись))$")
+_REFLEXIVE = re.compile(r"(ся|сь)$")
+_ADJECTIVAL = re.compile(
+    r"((?<=[ая])(ем|нн|вш|ющ|щ)|(ивш|ывш|ующ))?"
+    r"(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|ую|юю|ая|яя|ою|ею)$"
+)
+_VERB = re.compile(
+    r"((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)"
+    r"|(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю))$"
+)
+_NOUN = re.compile(
+    r"(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$"
+)
+_DERIVATIONAL = re.compile(r"(ост|ость)$")
+_SUPERLATIVE = re.compile(r"(ейше|ейш)$")
+_QUERY_TOKEN = re.compile(r"\w+")
+
+
+def _region_after_vowel_consonant(word: str, start: int) -> int:
+    """Начало области после первой пары «гласная + согласная», начиная с start"""
+    for i in range(start + 1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word: str) -> str:
+    """Основа русского слова (слова на других языках возвращаются без изменений)"""
+    word = word.lower().replace("ё", "е")
+    rv_start = next((i + 1 for i, ch in enumerate(word) if ch in _VOWELS), len(word))
+    r2_start = _region_after_vowel_consonant(word, _region_after_vowel_consonant(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    # Шаг 1: окончания деепричастий, иначе возвратные + прилагательные/глаголы/существительные
+    rv, removed = _PERFECTIVE_GERUND.subn("", rv)
+    if not removed:
+        rv = _REFLEXIVE.sub("", rv)
+        for pattern in (_ADJECTIVAL, _VERB, _NOUN):
+            rv, removed = pattern.subn("", rv)
+            if removed:
+                break
+
+    # Шаг 2
+    if rv.endswith("и"):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательные суффиксы в R2
+    match = _DERIVATIONAL.search(rv)
+    if match and rv_start + match.start() >= r2_start:
+        rv = rv[:match.start()]
+
+    # Шаг 4
+    if rv.endswith("нн"):
+        rv = rv[:-1]
+    else:
+        rv, removed = _SUPERLATIVE.subn("", rv)
+        if removed and rv.endswith("нн"):
+            rv = rv[:-1]
+        elif not removed and rv.endswith("ь"):
+            rv = rv[:-1]
+
+    return prefix + rv
+
+
+def build_match_query(search_query: str) -> str:
+    """
+    Выражение FTS5 MATCH: основы слов запроса по префиксу, через OR
+    (достаточно совпадения хотя бы одного слова, как и при прежнем поиске).
+    Пустая строка — в запросе нет слов.
+    """
+    terms = []
+    for token in _QUERY_TOKEN.findall(search_query.lower().replace("ё", "е")):
+        base = stem(token)
+        if len(base) < 2:
+            base = token
+        term = f'"{base}"*'
+        if term not in terms:
+            terms.append(term)
+    return " OR ".join(terms)
+
+
+async def search_catalog(search_query: str, item_type: str, limit: int = SEARCH_RESULTS_LIMIT) -> list:
+    """
+    Поиск позиций каталога item_type ('product', 'service', 'offer').
+
+    Возвращает до limit строк (id, title, price, category, operation, description),
+    отсортированных по bm25. Числа в запросе дополнительно ищутся как ID позиций;
+    совпадения по ID идут после совпадений по тексту.
+    """
+    match = build_match_query(search_query)
+    if not match:
+        return []
+
+    async with get_db() as db:
+        cursor = await db.execute(f"""
+            SELECT ci.item_id, ci.title, ci.price, ci.category, ci.operation, ci.description, ci.key
+            FROM catalog_search
+            JOIN catalog_items ci ON ci.key = catalog_search.rowid
+            WHERE catalog_search MATCH ? AND catalog_search.item_type = ?
+            ORDER BY {BM25_RANK}
+            LIMIT ?
+        """, (match, item_type, limit))
+        results = list(await cursor.fetchall())
+
+    id_terms = [token for token in _QUERY_TOKEN.findall(search_query) if token.isdigit()]
+    if id_terms and len(results) < limit:
+        found = {row[-1] for row in results}
+        for row in await get_items_by_ids(item_type, id_terms, with_key=True):
+            if row[-1] not in found and len(results) < limit:
+                results.append(row)
+    return [row[:-1] for row in results]
@@ -0,0 +1,63 @@
+"""
+Кэш результатов поиска по пользователям (листание страниц).
+
+Поиск с ранжированием и фильтрами выполняется один раз: упорядоченный
+список ID результатов сохраняется в LRU-кэше с ограничением времени жизни
+под ключом (пользователь, токен), где токен — хэш вида поиска, запроса и
+фильтров. Кнопки страниц передают только токен и номер страницы, а
+обработчик читает из базы строки одной страницы по ID.
+
+Для списков без ранжирования (ORDER BY created_at) вместо ID хранятся
+keyset-курсоры начала уже открытых страниц (Paginator.fetch_keyset_page).
+"""
+
+import hashlib
+import json
+
+from config import SEARCH_SESSION_CACHE_SIZE, SEARCH_SESSION_TTL
+from user_cache import TTLCache
+
+# Префикс callback_data кнопок страниц: spg:<токен>_<страница>
+PAGE_CALLBACK_PREFIX = "spg:"
+
+
+class SearchSession:
+    """Результаты одного поиска пользователя"""
+
+    def __init__(self, kind: str, title: str, ids: list = None, total: int = None, buttons: list = None):
+        self.kind = kind          # вид результатов (выбор отрисовки страницы)
+        self.title = title        # заголовок сообщения с результатами
+        self.ids = ids            # упорядоченные ID (поиск с ранжированием)
+        self.total = len(ids) if ids is not None else total
+        self.cursors = [None]     # keyset-курсоры начала страниц 1, 2, ...
+        self.buttons = buttons or []  # дополнительные кнопки под результатами: [(текст, callback_data)]
+
+
+search_sessions = TTLCache(SEARCH_SESSION_CACHE_SIZE, SEARCH_SESSION_TTL)
+
+
+def session_token(kind: str, query: str = "", filters: dict = None) -> str:
+    raw = json.dumps([kind, query, filters], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()[:10]
+
+
+def open_session(user_id: int, session: SearchSession, query: str = "", filters: dict = None) -> str:
+    """Сохранение результатов нового поиска; возвращает токен для кнопок страниц"""
+    token = session_token(session.kind, query, filters)
+    search_sessions.set((user_id, token), session)
+    return token
+
+
+def get_session(user_id: int, token: str):
+    """Сохранённые результаты или None, если кэш устарел"""
+    return search_sessions.get((user_id, token))
+
+
+def page_callback_prefix(token: str) -> str:
+    return f"{PAGE_CALLBACK_PREFIX}{token}"
+
+
+def parse_page_callback(data: str):
+    """spg:<токен>_<страница> -> (токен, страница); для кнопки «n/m» страница None"""
+    token, _, page = data[len(PAGE_CALLBACK_PREFIX):].rpartition("_")
+    return token, int(page) if page.isdigit() else None
@@ -3,9 +3,14 @@ from aiogram.types import CallbackQuery, Message, InputMediaPhoto
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-import aiosqlite
+from catalog_facets import facet_button_text, get_facet_value, get_facet_values
+from catalog_items import get_items_by_ids, list_item_ids
+from db import get_db
+from pagination import Paginator
+from search_index import search_catalog
+from search_sessions import (PAGE_CALLBACK_PREFIX, SearchSession, get_session, open_session,
+                             page_callback_prefix, parse_page_callback)
 import json
-import hashlib
 from datetime import datetime
 from dispatcher import dp
 from utils import check_blocked_user
@@ -25,6 +30,200 @@ class SearchStates(StatesGroup):
     waiting_rating_filter = State()
 
 
+# ========== СТРАНИЦЫ РЕЗУЛЬТАТОВ ПОИСКА ==========
+
+OFFER_RESULTS_PAGINATOR = Paginator(items_per_page=5)
+CATALOG_RESULTS_PAGINATOR = Paginator(items_per_page=5)
+ALL_ORDERS_PAGINATOR = Paginator(items_per_page=10)
+
+
+async def _render_offer_results(token: str, session: SearchSession, page: int):
+    """Страница результатов поиска предложений: строки читаются только по ID этой страницы"""
+    page_ids, total_pages, page = OFFER_RESULTS_PAGINATOR.page_items(session.ids, page)
+    rows = {row[0]: row for row in await get_items_by_ids("offer", page_ids)}
+
+    response = session.title + f"📊 Найдено: {session.total} позиций\n\n"
+    builder = InlineKeyboardBuilder()
+    first = OFFER_RESULTS_PAGINATOR.get_offset(page) + 1
+    for i, item_id in enumerate(page_ids, first):
+        if item_id not in rows:
+            continue
+        _, title, price, category, operation, _ = rows[item_id]
+
+        response += f"{i}. 🤝 **{title}**\n"
+        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
+        if price and price != "0" and price is not None:
+            response += f"   💰 Цена: {price}\n"
+        if operation:
+            response += f"   🎯 Операция: {operation}\n"
+        response += "   ──────\n"
+
+        builder.add(types.InlineKeyboardButton(text="👁 Просмотр", callback_data=f"view_item_offer_{item_id}"))
+        builder.add(types.InlineKeyboardButton(text=f"➕ {title[:15]}", callback_data=f"add_to_cart_offer_{item_id}"))
+    builder.adjust(2)
+
+    navigation = OFFER_RESULTS_PAGINATOR.create_navigation_buttons(page, total_pages, page_callback_prefix(token))
+    if navigation:
+        builder.row(*navigation)
+    for text, callback_data in session.buttons:
+        builder.row(types.InlineKeyboardButton(text=text, callback_data=callback_data))
+    return response, builder.as_markup()
+
+
+async def _render_all_orders(token: str, session: SearchSession, page: int):
+    """Страница списка всех заявок (keyset по created_at, id)"""
+    page = max(1, min(page, len(session.cursors)))
+    async with get_db() as db:
+        rows, next_after = await ALL_ORDERS_PAGINATOR.fetch_keyset_page(
+            db, "id, title, price, category, operation, item_type", "order_requests",
+            after=session.cursors[page - 1]
+        )
+    if next_after is not None and len(session.cursors) == page:
+        session.cursors.append(next_after)
+    total_pages, page = ALL_ORDERS_PAGINATOR.calculate_pages(session.total, page)
+
+    response = session.title + f"📊 Найдено: {session.total} позиций\n\n"
+    builder = InlineKeyboardBuilder()
+    first = ALL_ORDERS_PAGINATOR.get_offset(page) + 1
+    for i, (item_id, title, price, category, operation, item_type) in enumerate(rows, first):
+        response += f"{i}. 🛠 **{title}**\n"
+        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
+        response += f"   📌 Тип: {item_type}\n"
+        if price and price != "0" and price is not None:
+            response += f"   💰 Цена: {price}\n"
+        if operation:
+            response += f"   🎯 Операция: {operation}\n"
+        response += "   ──────\n"
+
+        builder.add(types.InlineKeyboardButton(
+            text=f"{i}. {title[:15]}...",
+            callback_data=f"view_item_{item_type}_{item_id}"
+        ))
+    builder.adjust(1)
+
+    navigation = ALL_ORDERS_PAGINATOR.create_navigation_buttons(page, total_pages, page_callback_prefix(token))
+    if navigation:
+        builder.row(*navigation)
+    for text, callback_data in session.buttons:
+        builder.row(types.InlineKeyboardButton(text=text, callback_data=callback_data))
+    return response, builder.as_markup()
+
+
+def _render_catalog_results(item_type: str, icon: str):
+    """Страница результатов поиска товаров или услуг: строки читаются только по ID этой страницы"""
+    async def render(token: str, session: SearchSession, page: int):
+        page_ids, total_pages, page = CATALOG_RESULTS_PAGINATOR.page_items(session.ids, page)
+        rows = {row[0]: row for row in await get_items_by_ids(item_type, page_ids)}
+
+        response = session.title + f"📊 Найдено: {session.total} позиций\n\n"
+        builder = InlineKeyboardBuilder()
+        first = CATALOG_RESULTS_PAGINATOR.get_offset(page) + 1
+        for i, item_id in enumerate(page_ids, first):
+            if item_id not in rows:
+                continue
+            _, title, price, category, operation, description = rows[item_id]
+
+            response += f"{i}. {icon} **{title}**\n"
+            response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
+            if price and price != "0" and price is not None:
+                response += f"   💰 Цена: {price}\n"
+            if operation:
+                response += f"   🎯 Операция: {operation}\n"
+            if description:
+                short_desc = description[:80] + "..." if len(description) > 80 else description
+                response += f"   📝 {short_desc}\n"
+            response += "   ──────\n"
+
+            builder.add(types.InlineKeyboardButton(
+                text=f"{i}. {title[:15]}...",
+                callback_data=f"view_item_{item_type}_{item_id}"
+            ))
+        builder.adjust(1)
+
+        navigation = CATALOG_RESULTS_PAGINATOR.create_navigation_buttons(page, total_pages, page_callback_prefix(token))
+        if navigation:
+            builder.row(*navigation)
+        for text, callback_data in session.buttons:
+            builder.row(types.InlineKeyboardButton(text=text, callback_data=callback_data))
+        return response, builder.as_markup()
+    return render
+
+
+async def _render_orders(token: str, session: SearchSession, page: int):
+    """Страница списка заказов (keyset по order_date, id)"""
+    page = max(1, min(page, len(session.cursors)))
+    async with get_db() as db:
+        rows, next_after = await ALL_ORDERS_PAGINATOR.fetch_keyset_page(
+            db, "order_type, item_id, seller_id, status, order_date", "orders",
+            after=session.cursors[page - 1], key_columns=("COALESCE(order_date, '')", "id")
+        )
+    if next_after is not None and len(session.cursors) == page:
+        session.cursors.append(next_after)
+    total_pages, page = ALL_ORDERS_PAGINATOR.calculate_pages(session.total, page)
+
+    response = session.title + f"📊 Найдено: {session.total} позиций\n\n"
+    first = ALL_ORDERS_PAGINATOR.get_offset(page) + 1
+    for i, (order_type, item_id, seller_id, status, order_date) in enumerate(rows, first):
+        response += f"{i}.  **{order_type}**\n"
+        response += f"   🆔 ID: {item_id} | 🏷  ID предмета: {item_id or 'Не указана'}\n"
+        response += f"   💰 ID продавца: {seller_id}\n"
+        response += f"   🎯 статус: {status}\n"
+        response += f"   📝 Дата: {order_date}\n"
+        response += "   ──────\n"
+
+    builder = InlineKeyboardBuilder()
+    navigation = ALL_ORDERS_PAGINATOR.create_navigation_buttons(page, total_pages, page_callback_prefix(token))
+    if navigation:
+        builder.row(*navigation)
+    for text, callback_data in session.buttons:
+        builder.row(types.InlineKeyboardButton(text=text, callback_data=callback_data))
+    return response, builder.as_markup()
+
+
+# Вид результатов (SearchSession.kind) -> отрисовка страницы
+SEARCH_RESULT_PAGES = {
+    "offers": _render_offer_results,
+    "products": _render_catalog_results("product", "📦"),
+    "services": _render_catalog_results("service", "🛠"),
+    "all_orders": _render_all_orders,
+    "orders": _render_orders,
+}
+
+
+async def _open_results(user_id: int, kind: str, title: str, ids: list, buttons: list,
+                        query: str = "", filters: dict = None):
+    """Сохранить ID результатов нового поиска и отрисовать первую страницу: (текст, клавиатура)"""
+    session = SearchSession(kind, title, ids=ids, buttons=buttons)
+    token = open_session(user_id, session, query, filters)
+    return await SEARCH_RESULT_PAGES[kind](token, session, 1)
+
+
+async def _show_results(callback: CallbackQuery, text: str, markup):
+    if callback.message.content_type == types.ContentType.PHOTO:
+        await callback.message.delete()
+        await callback.message.answer(text, reply_markup=markup)
+    else:
+        await callback.message.edit_text(text, reply_markup=markup)
+
+
+@dp.callback_query(F.data.startswith(PAGE_CALLBACK_PREFIX))
+async def search_results_page(callback: CallbackQuery):
+    """Листание сохранённых результатов поиска без повторного поиска"""
+    token, page = parse_page_callback(callback.data)
+    if page is None:
+        await callback.answer()
+        return
+
+    session = get_session(callback.from_user.id, token)
+    if session is None:
+        await callback.answer("⌛ Результаты поиска устарели, выполните поиск заново", show_alert=True)
+        return
+
+    text, markup = await SEARCH_RESULT_PAGES[session.kind](token, session, page)
+    await _show_results(callback, text, markup)
+    await callback.answer()
+
+
 # ========== ПОИСК В КАТАЛОГЕ ТОВАРОВ ==========
 
 @dp.callback_query(F.data == "search_in_products")
@@ -150,30 +349,18 @@ async def search_offers_by_category_start(callback: CallbackQuery):
     """Поиск предложений по категории"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Получаем категории из order_requests для предложений
-        cursor = await db.execute("""
-            SELECT DISTINCT category FROM order_requests 
-            WHERE item_type = 'offer' AND category IS NOT NULL AND category != '' 
-            AND category != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY category
-        """)
-        categories = await cursor.fetchall()
-
-        if categories:
-            for category in categories:
-                if category[0]:
-                    # Create hash for category name to avoid 64 bytes limit
-                    cat_hash = hashlib.md5(category[0].encode()).hexdigest()
-                    builder.add(types.InlineKeyboardButton(
-                        text=category[0],
-                        callback_data=f"ocs:{cat_hash}"
-                    ))
-        else:
+    categories = await get_facet_values("offer", "category")
+    if categories:
+        for value_id, category, count in categories:
             builder.add(types.InlineKeyboardButton(
-                text="📭 Категории не найдены",
-                callback_data="no_action"
+                text=facet_button_text(category, count),
+                callback_data=f"ocs:{value_id}"
             ))
+    else:
+        builder.add(types.InlineKeyboardButton(
+            text="📭 Категории не найдены",
+            callback_data="no_action"
+        ))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_offers"))
     builder.adjust(1)
@@ -194,39 +381,17 @@ async def search_offers_by_category_start(callback: CallbackQuery):
 @dp.callback_query(F.data.startswith("ocs:"))
 async def search_offers_by_category_execute(callback: CallbackQuery):
     """Выполнение поиска предложений по категории"""
-    cat_hash = callback.data.split(":")[1]
+    category_id = callback.data.split(":")[1]
 
     user_id = callback.from_user.id
-    category = None
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Find category by hash
-        cursor = await db.execute("""
-            SELECT DISTINCT category FROM order_requests 
-            WHERE item_type = 'offer' AND category IS NOT NULL AND category != '' 
-            AND category != 'None' AND status IN ('active', 'approved', 'processing')
-        """)
-        categories = await cursor.fetchall()
-        
-        for cat in categories:
-            if cat[0] and hashlib.md5(cat[0].encode()).hexdigest() == cat_hash:
-                category = cat[0]
-                break
-        
-        if not category:
-            await callback.answer("❌ Категория не найдена", show_alert=True)
-            return
-
-        # Поиск в order_requests для предложений
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'offer' AND category = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (category,))
+    category = await get_facet_value("category", category_id)
+    if not category:
+        await callback.answer("❌ Категория не найдена", show_alert=True)
+        return
 
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("offer", category=category)
 
+    async with get_db(write=True) as db:
         # Сохраняем в историю поиска
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
@@ -234,7 +399,7 @@ async def search_offers_by_category_execute(callback: CallbackQuery):
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(
             types.InlineKeyboardButton(text="🏷 Выбрать другую категорию", callback_data="search_offers_by_category"))
@@ -259,53 +424,16 @@ async def search_offers_by_category_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Формируем результаты
-    response = f"🏷 **Результаты поиска предложений по категории: '{category}'**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description = item
-
-        response += f"{i}. 🤝 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text="👁 Просмотр",
-            callback_data=f"view_item_offer_{item_id}"
-        ))
-        builder.add(types.InlineKeyboardButton(
-            text=f"➕ {title[:15]}",
-            callback_data=f"add_to_cart_offer_{item_id}"
-        ))
-
-    builder.adjust(2)
-
-    # Дополнительные кнопки
-    builder.row(
-        types.InlineKeyboardButton(text="🏷 Выбрать другую категорию", callback_data="search_offers_by_category"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_offers"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="property_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-        await callback.message.delete()
-        await callback.message.answer(response, reply_markup=builder.as_markup())
-    else:
-        await callback.message.edit_text(response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "offers", f"🏷 **Результаты поиска предложений по категории: '{category}'**\n\n", result_ids,
+        [
+            ("🏷 Выбрать другую категорию", "search_offers_by_category"),
+            ("🔍 Другой тип поиска", "search_in_offers"),
+            ("◀️ В каталог", "property_catalog"),
+        ],
+        category, {"category": category}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -315,29 +443,18 @@ async def search_offers_by_class_start(callback: CallbackQuery):
     """Поиск предложений по классу"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Получаем классы из order_requests для предложений
-        cursor = await db.execute("""
-            SELECT DISTINCT item_class FROM order_requests 
-            WHERE item_type = 'offer' AND item_class IS NOT NULL AND item_class != '' 
-            AND item_class != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_class
-        """)
-        items = await cursor.fetchall()
-
-        if items:
-            for i in items:
-                class_name = i[0]
-                cls_hash = hashlib.md5(class_name.encode()).hexdigest()
-                builder.add(types.InlineKeyboardButton(
-                    text=class_name,
-                    callback_data=f"ocls:{cls_hash}"
-                ))
-        else:
+    items = await get_facet_values("offer", "item_class")
+    if items:
+        for value_id, class_name, count in items:
             builder.add(types.InlineKeyboardButton(
-                text="📭 Классы не найдены",
-                callback_data="no_action"
+                text=facet_button_text(class_name, count),
+                callback_data=f"ocls:{value_id}"
             ))
+    else:
+        builder.add(types.InlineKeyboardButton(
+            text="📭 Классы не найдены",
+            callback_data="no_action"
+        ))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_offers"))
     builder.adjust(1)
@@ -358,37 +475,23 @@ async def search_offers_by_class_start(callback: CallbackQuery):
 @dp.callback_query(F.data.startswith("ocls:"))
 async def search_offers_by_class_execute(callback: CallbackQuery):
     """Выполнение поиска предложений по классу"""
-    cls_hash = callback.data.split(":")[1]
+    class_id = callback.data.split(":")[1]
 
     user_id = callback.from_user.id
-    item_class = None
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Resolve hash
-        cursor = await db.execute("""
-            SELECT DISTINCT item_class FROM order_requests 
-            WHERE item_type = 'offer' AND item_class IS NOT NULL AND item_class != '' 
-            AND item_class != 'None' AND status IN ('active', 'approved', 'processing')
-        """)
-        items = await cursor.fetchall()
-        for i in items:
-            if i[0] and hashlib.md5(i[0].encode()).hexdigest() == cls_hash:
-                item_class = i[0]
-                break
-        
-        if not item_class:
-            await callback.answer("❌ Класс не найден", show_alert=True)
-            return
+    item_class = await get_facet_value("item_class", class_id)
+    if not item_class:
+        await callback.answer("❌ Класс не найден", show_alert=True)
+        return
 
-        # Поиск в order_requests для предложений
+    async with get_db(write=True) as db:
+        # Поиск в order_requests для предложений: только ID, строки читаются постранично
         cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
+            SELECT id FROM order_requests 
             WHERE item_type = 'offer' AND item_class = ? AND status IN ('active', 'approved', 'processing')
             ORDER BY created_at DESC
         """, (item_class,))
 
-        results = await cursor.fetchall()
+        result_ids = [row[0] for row in await cursor.fetchall()]
 
         # Сохраняем в историю поиска
         await db.execute(
@@ -397,7 +500,7 @@ async def search_offers_by_class_execute(callback: CallbackQuery):
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="📊 Выбрать другой класс", callback_data="search_offers_by_class"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_offers"))
@@ -421,52 +524,17 @@ async def search_offers_by_class_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Формируем результаты
-    response = f"📊 **Результаты поиска предложений по классу: '{item_class}'**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description = item
-
-        response += f"{i}. 🤝 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text="👁 Просмотр",
-            callback_data=f"view_item_offer_{item_id}"
-        ))
-        builder.add(types.InlineKeyboardButton(
-            text=f"➕ {title[:15]}",
-            callback_data=f"add_to_cart_offer_{item_id}"
-        ))
-
-    builder.adjust(2)
-
-    # Дополнительные кнопки
-    builder.row(types.InlineKeyboardButton(text="📊 Выбрать другой класс", callback_data="search_offers_by_class"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_offers"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="property_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-        await callback.message.delete()
-        await callback.message.answer(response, reply_markup=builder.as_markup())
-    else:
-        await callback.message.edit_text(response, reply_markup=builder.as_markup())
+    session = SearchSession(
+        "offers", f"📊 **Результаты поиска предложений по классу: '{item_class}'**\n\n", ids=result_ids,
+        buttons=[
+            ("📊 Выбрать другой класс", "search_offers_by_class"),
+            ("🔍 Другой тип поиска", "search_in_offers"),
+            ("◀️ В каталог", "property_catalog"),
+        ]
+    )
+    token = open_session(user_id, session, item_class, {"class": item_class})
+    text, markup = await _render_offer_results(token, session, 1)
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -476,29 +544,18 @@ async def search_offers_by_type_start(callback: CallbackQuery):
     """Поиск предложений по типу"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Получаем типы из order_requests для предложений
-        cursor = await db.execute("""
-            SELECT DISTINCT item_type_detail FROM order_requests 
-            WHERE item_type = 'offer' AND item_type_detail IS NOT NULL AND item_type_detail != '' 
-            AND item_type_detail != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_type_detail
-        """)
-        items = await cursor.fetchall()
-
-        if items:
-            for i in items:
-                type_name = i[0]
-                type_hash = hashlib.md5(type_name.encode()).hexdigest()
-                builder.add(types.InlineKeyboardButton(
-                    text=type_name,
-                    callback_data=f"ots:{type_hash}"
-                ))
-        else:
+    items = await get_facet_values("offer", "item_type_detail")
+    if items:
+        for value_id, type_name, count in items:
             builder.add(types.InlineKeyboardButton(
-                text="📭 Типы не найдены",
-                callback_data="no_action"
+                text=facet_button_text(type_name, count),
+                callback_data=f"ots:{value_id}"
             ))
+    else:
+        builder.add(types.InlineKeyboardButton(
+            text="📭 Типы не найдены",
+            callback_data="no_action"
+        ))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_offers"))
     builder.adjust(1)
@@ -519,38 +576,17 @@ async def search_offers_by_type_start(callback: CallbackQuery):
 @dp.callback_query(F.data.startswith("ots:"))
 async def search_offers_by_type_execute(callback: CallbackQuery):
     """Выполнение поиска предложений по типу"""
-    type_hash = callback.data.split(":")[1]
+    type_id = callback.data.split(":")[1]
 
     user_id = callback.from_user.id
-    item_type_detail = None
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Resolve hash
-        cursor = await db.execute("""
-            SELECT DISTINCT item_type_detail FROM order_requests 
-            WHERE item_type = 'offer' AND item_type_detail IS NOT NULL AND item_type_detail != '' 
-            AND item_type_detail != 'None' AND status IN ('active', 'approved', 'processing')
-        """)
-        items = await cursor.fetchall()
-        for i in items:
-            if i[0] and hashlib.md5(i[0].encode()).hexdigest() == type_hash:
-                item_type_detail = i[0]
-                break
-        
-        if not item_type_detail:
-            await callback.answer("❌ Тип не найден", show_alert=True)
-            return
-
-        # Поиск в order_requests для предложений
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'offer' AND item_type_detail = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_type_detail,))
+    item_type_detail = await get_facet_value("item_type_detail", type_id)
+    if not item_type_detail:
+        await callback.answer("❌ Тип не найден", show_alert=True)
+        return
 
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("offer", item_type_detail=item_type_detail)
 
+    async with get_db(write=True) as db:
         # Сохраняем в историю поиска
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
@@ -558,7 +594,7 @@ async def search_offers_by_type_execute(callback: CallbackQuery):
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="📋 Выбрать другой тип", callback_data="search_offers_by_type"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_offers"))
@@ -582,52 +618,16 @@ async def search_offers_by_type_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Формируем результаты
-    response = f"📋 **Результаты поиска предложений по типу: '{item_type_detail}'**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description = item
-
-        response += f"{i}. 🤝 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text="👁 Просмотр",
-            callback_data=f"view_item_offer_{item_id}"
-        ))
-        builder.add(types.InlineKeyboardButton(
-            text=f"➕ {title[:15]}",
-            callback_data=f"add_to_cart_offer_{item_id}"
-        ))
-
-    builder.adjust(2)
-
-    # Дополнительные кнопки
-    builder.row(types.InlineKeyboardButton(text="📋 Выбрать другой тип", callback_data="search_offers_by_type"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_offers"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="property_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-        await callback.message.delete()
-        await callback.message.answer(response, reply_markup=builder.as_markup())
-    else:
-        await callback.message.edit_text(response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "offers", f"📋 **Результаты поиска предложений по типу: '{item_type_detail}'**\n\n", result_ids,
+        [
+            ("📋 Выбрать другой тип", "search_offers_by_type"),
+            ("🔍 Другой тип поиска", "search_in_offers"),
+            ("◀️ В каталог", "property_catalog"),
+        ],
+        item_type_detail, {"item_type_detail": item_type_detail}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -637,29 +637,18 @@ async def search_offers_by_kind_start(callback: CallbackQuery):
     """Поиск предложений по виду"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Получаем виды из order_requests для предложений
-        cursor = await db.execute("""
-            SELECT DISTINCT item_kind FROM order_requests 
-            WHERE item_type = 'offer' AND item_kind IS NOT NULL AND item_kind != '' 
-            AND item_kind != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_kind
-        """)
-        items = await cursor.fetchall()
-
-        if items:
-            for i in items:
-                view_name = i[0]
-                view_hash = hashlib.md5(view_name.encode()).hexdigest()
-                builder.add(types.InlineKeyboardButton(
-                    text=view_name,
-                    callback_data=f"ovs:{view_hash}"
-                ))
-        else:
+    items = await get_facet_values("offer", "item_kind")
+    if items:
+        for value_id, view_name, count in items:
             builder.add(types.InlineKeyboardButton(
-                text="📭 Виды не найдены",
-                callback_data="no_action"
+                text=facet_button_text(view_name, count),
+                callback_data=f"ovs:{value_id}"
             ))
+    else:
+        builder.add(types.InlineKeyboardButton(
+            text="📭 Виды не найдены",
+            callback_data="no_action"
+        ))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_offers"))
     builder.adjust(1)
@@ -682,38 +671,17 @@ async def search_offers_by_kind_start(callback: CallbackQuery):
 @dp.callback_query(F.data.startswith("ovs:"))
 async def search_offers_by_kind_execute(callback: CallbackQuery):
     """Выполнение поиска предложений по виду"""
-    view_hash = callback.data.split(":")[1]
+    view_id = callback.data.split(":")[1]
 
     user_id = callback.from_user.id
-    item_kind = None
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Resolve hash
-        cursor = await db.execute("""
-            SELECT DISTINCT item_kind FROM order_requests 
-            WHERE item_type = 'offer' AND item_kind IS NOT NULL AND item_kind != '' 
-            AND item_kind != 'None' AND status IN ('active', 'approved', 'processing')
-        """)
-        items = await cursor.fetchall()
-        for i in items:
-            if i[0] and hashlib.md5(i[0].encode()).hexdigest() == view_hash:
-                item_kind = i[0]
-                break
-
-        if not item_kind:
-            await callback.answer("❌ Вид не найден", show_alert=True)
-            return
-
-        # Поиск в order_requests для предложений
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'offer' AND item_kind = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_kind,))
+    item_kind = await get_facet_value("item_kind", view_id)
+    if not item_kind:
+        await callback.answer("❌ Вид не найден", show_alert=True)
+        return
 
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("offer", item_kind=item_kind)
 
+    async with get_db(write=True) as db:
         # Сохраняем в историю поиска
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
@@ -721,7 +689,7 @@ async def search_offers_by_kind_execute(callback: CallbackQuery):
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="👁 Выбрать другой вид", callback_data="search_offers_by_kind"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_offers"))
@@ -745,52 +713,16 @@ async def search_offers_by_kind_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Формируем результаты
-    response = f"👁 **Результаты поиска предложений по виду: '{item_kind}'**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description = item
-
-        response += f"{i}. 🤝 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text="👁 Просмотр",
-            callback_data=f"view_item_offer_{item_id}"
-        ))
-        builder.add(types.InlineKeyboardButton(
-            text=f"➕ {title[:15]}",
-            callback_data=f"add_to_cart_offer_{item_id}"
-        ))
-
-    builder.adjust(2)
-
-    # Дополнительные кнопки
-    builder.row(types.InlineKeyboardButton(text="👁 Выбрать другой вид", callback_data="search_offers_by_kind"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_offers"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="property_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-        await callback.message.delete()
-        await callback.message.answer(response, reply_markup=builder.as_markup())
-    else:
-        await callback.message.edit_text(response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "offers", f"👁 **Результаты поиска предложений по виду: '{item_kind}'**\n\n", result_ids,
+        [
+            ("👁 Выбрать другой вид", "search_offers_by_kind"),
+            ("🔍 Другой тип поиска", "search_in_offers"),
+            ("◀️ В каталог", "property_catalog"),
+        ],
+        item_kind, {"item_kind": item_kind}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -831,7 +763,7 @@ async def process_search_in_offers(message: Message, state: FSMContext):
     search_by_id = state_data.get("search_by_id", False)
 
     # Сохраняем историю поиска
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (user_id, search_query, "quick", "offers", datetime.now().isoformat())
@@ -870,281 +802,27 @@ async def process_search_in_offers(message: Message, state: FSMContext):
 
     # Формируем результаты
     if search_by_id:
-        response = f"🆔 **Результаты поиска предложений по ID: '{search_query}'**\n\n"
+        title = f"🆔 **Результаты поиска предложений по ID: '{search_query}'**\n\n"
+        buttons = [
+            ("🆔 Новый поиск по ID", "search_offers_by_id"),
+            ("📋 Сохранить поиск", f"save_search_id_offers_{search_query.replace(' ', '_')}"),
+        ]
     else:
-        response = f"🔍 **Результаты поиска в предложениях: '{search_query}'**\n\n"
-
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description = item
-
-        response += f"{i}. 🤝 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text="👁 Просмотр",
-            callback_data=f"view_item_offer_{item_id}"
-        ))
-        builder.add(types.InlineKeyboardButton(
-            text=f"➕ {title[:15]}",
-            callback_data=f"add_to_cart_offer_{item_id}"
-        ))
-
-    builder.adjust(2)
-
-    # Дополнительные кнопки
-    if search_by_id:
-        builder.row(types.InlineKeyboardButton(text="🆔 Новый поиск по ID", callback_data="search_offers_by_id"))
-    else:
-        builder.row(types.InlineKeyboardButton(text="🔍 Новый поиск", callback_data="search_offers_by_name"))
-
-    # builder.row(types.InlineKeyboardButton(text="🎯 Расширенный поиск", callback_data="advanced_search_offers"))
-    if search_by_id:
-        builder.row(types.InlineKeyboardButton(text="📋 Сохранить поиск",
-                                               callback_data=f"save_search_id_offers_{search_query.replace(' ', '_')}"))
-    else:
-        builder.row(types.InlineKeyboardButton(text="📋 Сохранить поиск",
-                                               callback_data=f"save_search_offers_{search_query.replace(' ', '_')}"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="property_catalog"))
-
-    await message.answer(response, reply_markup=builder.as_markup())
+        title = f"🔍 **Результаты поиска в предложениях: '{search_query}'**\n\n"
+        buttons = [
+            ("🔍 Новый поиск", "search_offers_by_name"),
+            ("📋 Сохранить поиск", f"save_search_offers_{search_query.replace(' ', '_')}"),
+        ]
+    buttons.append(("◀️ В каталог", "property_catalog"))
+
+    result_ids = list(dict.fromkeys(item[0] for item in results))
+    session = SearchSession("offers", title, ids=result_ids, buttons=buttons)
+    token = open_session(user_id, session, search_query, {"by_id": search_by_id})
+    response, markup = await _render_offer_results(token, session, 1)
+    await message.answer(response, reply_markup=markup)
     await state.clear()
 
 
-# Остальной код остается без изменений...
-# ========== ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ==========
-
-async def perform_search_in_catalog(search_query: str, item_type: str, user_id: int) -> list:
-    """Выполнение поиска в конкретном каталоге по всем таблицам"""
-    if not search_query:
-        return []
-
-    search_terms = search_query.lower().split()
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        if item_type == "product":
-            # Поиск в auto_products
-            cursor = await db.execute("""
-                SELECT ap.id, ap.title, ap.price, ac.name as category, ap.operation_type, ap.description
-                FROM auto_products ap
-                LEFT JOIN auto_categories ac ON ap.category_id = ac.id
-                WHERE ap.status = 'active'
-                ORDER BY ap.created_at DESC
-            """)
-            auto_items = await cursor.fetchall()
-
-            # Поиск в order_requests
-            cursor = await db.execute("""
-                SELECT id, title, price, category, operation, NULL as description
-                FROM order_requests 
-                WHERE item_type = 'product' AND status IN ('active', 'approved', 'processing')
-                ORDER BY created_at DESC
-            """)
-            order_items = await cursor.fetchall()
-
-            # Объединяем все товары
-            all_items = list(auto_items) + list(order_items)
-
-        elif item_type == "service":
-            # Поиск в auto_services
-            cursor = await db.execute("""
-                SELECT asv.id, asv.title, asv.price, ac.name as category, asv.operation_type, asv.description
-                FROM auto_services asv
-                LEFT JOIN auto_categories ac ON asv.category_id = ac.id
-                WHERE asv.status = 'active'
-                ORDER BY asv.created_at DESC
-            """)
-            auto_items = await cursor.fetchall()
-
-            # Поиск в order_requests
-            cursor = await db.execute("""
-                SELECT id, title, price, category, operation, NULL as description
-                FROM order_requests 
-                WHERE item_type = 'service' AND status IN ('active', 'approved', 'processing')
-                ORDER BY created_at DESC
-            """)
-            order_items = await cursor.fetchall()
-
-            # Объединяем все услуги
-            all_items = list(auto_items) + list(order_items)
-
-        else:  # offer
-            # Для предложений только order_requests
-            cursor = await db.execute("""
-                SELECT id, title, price, category, operation, NULL as description
-                FROM order_requests 
-                WHERE item_type = 'offer' AND status IN ('active', 'approved', 'processing')
-                ORDER BY created_at DESC
-            """)
-            all_items = await cursor.fetchall()
-
-    # Фильтруем по поисковому запросу
-    for item in all_items:
-        item_id, title, price, category, operation, description = item
-
-        # Собираем текст для поиска
-        search_text = f"{title or ''} {description or ''} {category or ''} {operation or ''} {item_id}".lower()
-
-        # Проверяем совпадение с поисковыми терминами
-        match_score = 0
-        for term in search_terms:
-            if term in search_text:
-                match_score += 1
-
-        # Если есть хотя бы одно совпадение
-        if match_score > 0:
-            results.append(item)
-
-    # Сортируем по релевантности
-    def relevance_score(item):
-        item_id, title, price, category, operation, description = item
-        search_text = f"{title or ''} {description or ''} {category or ''} {operation or ''}".lower()
-        score = 0
-        for term in search_terms:
-            if term in (title or "").lower():
-                score += 3
-            if term in (description or "").lower():
-                score += 2
-            if term in (category or "").lower():
-                score += 1
-            if term in (operation or "").lower():
-                score += 1
-        return score
-
-    results.sort(key=relevance_score, reverse=True)
-
-    return results
-
-
-async def search_products_by_id(search_query: str, user_id: int) -> list:
-    """Поиск товаров по ID в обеих таблицах"""
-    id_list = [id_str.strip() for id_str in search_query.split(',') if id_str.strip()]
-
-    if not id_list:
-        return []
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        for item_id in id_list:
-            try:
-                item_id_int = int(item_id)
-
-                # Ищем в auto_products
-                cursor = await db.execute("""
-                    SELECT ap.id, ap.title, ap.price, ac.name as category, ap.operation_type, ap.description
-                    FROM auto_products ap
-                    LEFT JOIN auto_categories ac ON ap.category_id = ac.id
-                    WHERE ap.id = ? AND ap.status = 'active'
-                """, (item_id_int,))
-
-                item = await cursor.fetchone()
-                if item:
-                    results.append(item)
-                else:
-                    # Ищем в order_requests
-                    cursor = await db.execute("""
-                        SELECT id, title, price, category, operation, NULL as description
-                        FROM order_requests 
-                        WHERE item_type = 'product' AND id = ? AND status IN ('active', 'approved', 'processing')
-                    """, (item_id_int,))
-
-                    item = await cursor.fetchone()
-                    if item:
-                        results.append(item)
-
-            except ValueError:
-                continue  # Пропускаем нечисловые ID
-
-    return results
-
-
-async def search_services_by_id(search_query: str, user_id: int) -> list:
-    """Поиск услуг по ID в обеих таблицах"""
-    id_list = [id_str.strip() for id_str in search_query.split(',') if id_str.strip()]
-
-    if not id_list:
-        return []
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        for item_id in id_list:
-            try:
-                item_id_int = int(item_id)
-
-                # Ищем в auto_services
-                cursor = await db.execute("""
-                    SELECT asv.id, asv.title, asv.price, ac.name as category, asv.operation_type, asv.description
-                    FROM auto_services asv
-                    LEFT JOIN auto_categories ac ON asv.category_id = ac.id
-                    WHERE asv.id = ? AND asv.status = 'active'
-                """, (item_id_int,))
-
-                item = await cursor.fetchone()
-                if item:
-                    results.append(item)
-                else:
-                    # Ищем в order_requests
-                    cursor = await db.execute("""
-                        SELECT id, title, price, category, operation, NULL as description
-                        FROM order_requests 
-                        WHERE item_type = 'service' AND id = ? AND status IN ('active', 'approved', 'processing')
-                    """, (item_id_int,))
-
-                    item = await cursor.fetchone()
-                    if item:
-                        results.append(item)
-
-            except ValueError:
-                continue  # Пропускаем нечисловые ID
-
-    return results
-
-
-async def search_offers_by_id(search_query: str, user_id: int) -> list:
-    """Поиск предложений по ID"""
-    id_list = [id_str.strip() for id_str in search_query.split(',') if id_str.strip()]
-
-    if not id_list:
-        return []
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        for item_id in id_list:
-            try:
-                cursor = await db.execute("""
-                    SELECT id, title, price, category, operation, NULL as description
-                    FROM order_requests 
-                    WHERE item_type = 'offer' AND id = ? AND status IN ('active', 'approved', 'processing')
-                """, (int(item_id),))
-
-                item = await cursor.fetchone()
-                if item:
-                    results.append(item)
-            except ValueError:
-                continue  # Пропускаем нечисловые ID
-
-    return results
 # Поиск услуг по названию/тегам
 @dp.callback_query(F.data == "search_services_by_name")
 async def search_services_by_name_start(callback: CallbackQuery, state: FSMContext):
@@ -1175,39 +853,19 @@ async def search_services_by_category_start(callback: CallbackQuery):
     """Поиск услуг по категории"""
     builder = InlineKeyboardBuilder()
 
-    # Получаем категории из auto_services (через auto_categories)
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT ac.name 
-            FROM auto_services asv
-            JOIN auto_categories ac ON asv.category_id = ac.id
-            WHERE asv.status = 'active' AND ac.type = 'service'
-            ORDER BY ac.name
-        """)
-        categories = await cursor.fetchall()
-
-        if not categories:
-            # Если нет в auto_services, берем из order_requests
-            cursor = await db.execute("""
-                SELECT DISTINCT category FROM order_requests 
-                WHERE item_type = 'service' AND category IS NOT NULL AND category != '' 
-                AND category != 'None' AND status IN ('active', 'approved', 'processing')
-                ORDER BY category
-            """)
-            categories = await cursor.fetchall()
-
-        if categories:
-            for category in categories:
-                if category[0]:
-                    builder.add(types.InlineKeyboardButton(
-                        text=category[0],
-                        callback_data=f"serv_cat_search:{category[0]}"
-                    ))
-        else:
+    # Категории автокаталога и заявок вместе, с числом активных услуг
+    categories = await get_facet_values("service", "category")
+    if categories:
+        for value_id, category, count in categories:
             builder.add(types.InlineKeyboardButton(
-                text="📭 Категории не найдены",
-                callback_data="no_action"
+                text=facet_button_text(category, count),
+                callback_data=f"serv_cat_search:{value_id}"
             ))
+    else:
+        builder.add(types.InlineKeyboardButton(
+            text="📭 Категории не найдены",
+            callback_data="no_action"
+        ))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_services"))
     builder.adjust(1)
@@ -1228,38 +886,17 @@ async def search_services_by_category_start(callback: CallbackQuery):
 @dp.callback_query(F.data.startswith("serv_cat_search:"))
 async def search_services_by_category_execute(callback: CallbackQuery):
     """Выполнение поиска услуг по категории"""
-    category = callback.data.split(":")[1]
+    category = await get_facet_value("category", callback.data.split(":")[1])
+    if category is None:
+        await callback.answer("❌ Категория не найдена", show_alert=True)
+        return
 
     user_id = callback.from_user.id
 
-    # Выполняем поиск по категории в обеих таблицах
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Поиск в auto_services
-        cursor = await db.execute("""
-            SELECT asv.id, asv.title, asv.price, ac.name as category, asv.operation_type, asv.description
-            FROM auto_services asv
-            JOIN auto_categories ac ON asv.category_id = ac.id
-            WHERE ac.name = ? AND asv.status = 'active' AND ac.type = 'service'
-            ORDER BY asv.created_at DESC
-        """, (category,))
-
-        auto_services_results = await cursor.fetchall()
-
-        # Поиск в order_requests
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'service' AND category = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (category,))
-
-        order_requests_results = await cursor.fetchall()
-
-        # Объединяем результаты
-        results = list(auto_services_results) + list(order_requests_results)
+    # Поиск по категории в автокаталоге и заявках (catalog_items)
+    result_ids = await list_item_ids("service", category=category)
 
+    async with get_db(write=True) as db:
         # Сохраняем в историю поиска
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
@@ -1267,7 +904,7 @@ async def search_services_by_category_execute(callback: CallbackQuery):
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(
             types.InlineKeyboardButton(text="🏷 Выбрать другую категорию", callback_data="search_services_by_category"))
@@ -1283,50 +920,16 @@ async def search_services_by_category_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Формируем результаты
-    response = f"🏷 **Результаты поиска по категории: '{category}'**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description = item
-
-        response += f"{i}. 🛠 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        # Короткое описание
-        if description and len(description) > 0:
-            short_desc = description[:80] + "..." if len(description) > 80 else description
-            response += f"   📝 {short_desc}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text=f"{i}. {title[:15]}...",
-            callback_data=f"view_item_service_{item_id}"
-        ))
-
-    builder.adjust(1)
-
-    # Дополнительные кнопки
-    builder.row(
-        types.InlineKeyboardButton(text="🏷 Выбрать другую категорию", callback_data="search_services_by_category"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_services"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="service_catalog"))
-
-    await callback.message.edit_text(response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "services", f"🏷 **Результаты поиска по категории: '{category}'**\n\n", result_ids,
+        [
+            ("🏷 Выбрать другую категорию", "search_services_by_category"),
+            ("🔍 Другой тип поиска", "search_in_services"),
+            ("◀️ В каталог", "service_catalog"),
+        ],
+        category, {"category": category}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -1336,43 +939,19 @@ async def search_services_by_class_start(callback: CallbackQuery):
     """Поиск услуг по классу"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("SELECT name FROM service_classes ORDER BY name")
-        items = await cursor.fetchall()
-
-        if not items:
-            # Получаем классы из auto_services (через service_classes)
-            cursor = await db.execute("""
-                SELECT DISTINCT sc.name 
-                FROM auto_services asv
-                JOIN service_classes sc ON asv.class_id = sc.id
-                WHERE asv.status = 'active' AND asv.class_id IS NOT NULL
-                ORDER BY sc.name
-            """)
-            items = await cursor.fetchall()
-
-            if not items:
-                # Если нет в auto_services, берем из order_requests
-                cursor = await db.execute("""
-                    SELECT DISTINCT item_class FROM order_requests 
-                    WHERE item_type = 'service' AND item_class IS NOT NULL AND item_class != '' 
-                    AND item_class != 'None' AND status IN ('active', 'approved', 'processing')
-                    ORDER BY item_class
-                """)
-                items = await cursor.fetchall()
-
-        if items:
-            for i in items:
-                class_name = i[0]
-                builder.add(types.InlineKeyboardButton(
-                    text=class_name,
-                    callback_data=f"serv_cls_search:{class_name}"
-                ))
-        else:
+    # Классы автокаталога и заявок вместе, с числом активных услуг
+    items = await get_facet_values("service", "item_class")
+    if items:
+        for value_id, class_name, count in items:
             builder.add(types.InlineKeyboardButton(
-                text="📭 Классы не найдены",
-                callback_data="no_action"
+                text=facet_button_text(class_name, count),
+                callback_data=f"serv_cls_search:{value_id}"
             ))
+    else:
+        builder.add(types.InlineKeyboardButton(
+            text="📭 Классы не найдены",
+            callback_data="no_action"
+        ))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_services"))
     builder.adjust(1)
@@ -1396,39 +975,17 @@ async def search_services_by_class_start(callback: CallbackQuery):
 @dp.callback_query(F.data.startswith("serv_cls_search:"))
 async def search_services_by_class_execute(callback: CallbackQuery):
     """Выполнение поиска услуг по классу"""
-    item_class = callback.data.split(":")[1]
+    item_class = await get_facet_value("item_class", callback.data.split(":")[1])
+    if item_class is None:
+        await callback.answer("❌ Класс не найден", show_alert=True)
+        return
 
     user_id = callback.from_user.id
 
-    # Выполняем поиск по классу в обеих таблицах
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Поиск в auto_services (через service_classes)
-        cursor = await db.execute("""
-            SELECT asv.id, asv.title, asv.price, ac.name as category, asv.operation_type, asv.description
-            FROM auto_services asv
-            JOIN service_classes sc ON asv.class_id = sc.id
-            LEFT JOIN auto_categories ac ON asv.category_id = ac.id
-            WHERE sc.name = ? AND asv.status = 'active'
-            ORDER BY asv.created_at DESC
-        """, (item_class,))
-
-        auto_services_results = await cursor.fetchall()
-
-        # Поиск в order_requests
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'service' AND item_class = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_class,))
-
-        order_requests_results = await cursor.fetchall()
-
-        # Объединяем результаты
-        results = list(auto_services_results) + list(order_requests_results)
+    # Поиск по классу в автокаталоге и заявках (catalog_items)
+    result_ids = await list_item_ids("service", item_class=item_class)
 
+    async with get_db(write=True) as db:
         # Сохраняем в историю поиска
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
@@ -1436,7 +993,7 @@ async def search_services_by_class_execute(callback: CallbackQuery):
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="📊 Выбрать другой класс", callback_data="search_services_by_class"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_services"))
@@ -1451,162 +1008,67 @@ async def search_services_by_class_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Формируем результаты
-    response = f"📊 **Результаты поиска по классу: '{item_class}'**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description = item
-
-        response += f"{i}. 🛠 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        # Короткое описание
-        if description and len(description) > 0:
-            short_desc = description[:80] + "..." if len(description) > 80 else description
-            response += f"   📝 {short_desc}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text=f"{i}. {title[:15]}...",
-            callback_data=f"view_item_service_{item_id}"
-        ))
-
-    builder.adjust(1)
-
-    # Дополнительные кнопки
-    builder.row(types.InlineKeyboardButton(text="📊 Выбрать другой класс", callback_data="search_services_by_class"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_services"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="service_catalog"))
-
-    await callback.message.edit_text(response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "services", f"📊 **Результаты поиска по классу: '{item_class}'**\n\n", result_ids,
+        [
+            ("📊 Выбрать другой класс", "search_services_by_class"),
+            ("🔍 Другой тип поиска", "search_in_services"),
+            ("◀️ В каталог", "service_catalog"),
+        ],
+        item_class, {"item_class": item_class}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 @dp.callback_query(F.data.startswith("all_orders_request_search"))
 async def all_orders_request_search(callback: CallbackQuery):
-    """Выполнение поиска услуг по классу"""
-
-
+    """Список всех заявок с постраничным просмотром"""
     user_id = callback.from_user.id
 
-    # Выполняем поиск по классу в обеих таблицах
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM order_requests")
+        total = (await cursor.fetchone())[0]
 
-        # Поиск в order_requests
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description, item_type
-            FROM order_requests 
-            ORDER BY created_at DESC
-        """)
-
-        order_requests_results = await cursor.fetchall()
-
-        # Объединяем результаты
-        results = list(order_requests_results)
-
-    if not results:
+    if not total:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_admin"))
         builder.adjust(1)
 
-        if callback.message.content_type == types.ContentType.PHOTO:
-            await callback.message.edit_caption(
-                caption=f"📊 **Результаты поиска:**\n\n❌ Заявок не найдено.\n\nПопробуйте позже.",
-                reply_markup=builder.as_markup()
-            )
-        else:
-            await callback.message.edit_text(
-                text=f"📊 **Результаты поиска:**\n\n❌ Заявок не найдено.\n\nПопробуйте позже.",
-                reply_markup=builder.as_markup()
-            )
-        await callback.answer()
-        return
-
-    # Формируем результаты
-    response = f"📊 **Результаты поиска:**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation, description, item_type = item
-
-        response += f"{i}. 🛠 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        response += f"   📌 Тип: {item_type}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-
-        # Короткое описание
-        if description and len(description) > 0:
-            short_desc = description[:80] + "..." if len(description) > 80 else description
-            response += f"   📝 {short_desc}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
+        if callback.message.content_type == types.ContentType.PHOTO:
+            await callback.message.edit_caption(
+                caption=f"📊 **Результаты поиска:**\n\n❌ Заявок не найдено.\n\nПопробуйте позже.",
+                reply_markup=builder.as_markup()
+            )
+        else:
+            await callback.message.edit_text(
+                text=f"📊 **Результаты поиска:**\n\n❌ Заявок не найдено.\n\nПопробуйте позже.",
+                reply_markup=builder.as_markup()
+            )
+        await callback.answer()
+        return
 
-    # Кнопки для каждого результата (первые 5)
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _, item_type = item
-        builder.add(types.InlineKeyboardButton(
-            text=f"{i}. {title[:15]}...",
-            callback_data=f"view_item_{item_type}_{item_id}"
-        ))
-    builder.row(types.InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_admin"))
+    session = SearchSession("all_orders", "📊 **Результаты поиска:**\n\n", total=total,
+                            buttons=[("◀️ Назад", "back_to_admin")])
+    token = open_session(user_id, session)
+    text, markup = await _render_all_orders(token, session, 1)
 
     if callback.message.content_type == types.ContentType.PHOTO:
-        await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
+        await callback.message.edit_caption(caption=text, reply_markup=markup)
     else:
-        await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+        await callback.message.edit_text(text=text, reply_markup=markup)
     await callback.answer()
 
 
 @dp.callback_query(F.data.startswith("all_orders_search"))
 async def all_orders_search(callback: CallbackQuery):
-    """Выполнение поиска услуг по классу"""
-
-
+    """Список всех заказов с постраничным просмотром"""
     user_id = callback.from_user.id
 
-    # Выполняем поиск по классу в обеих таблицах
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-
-        # Поиск в order_requests
-        cursor = await db.execute("""
-            SELECT id, order_type, item_id, seller_id, status, order_date
-            FROM order 
-            ORDER BY order_date DESC
-        """)
-
-        order_requests_results = await cursor.fetchall()
+    async with get_db() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM orders")
+        total = (await cursor.fetchone())[0]
 
-        # Объединяем результаты
-        results = list(order_requests_results)
-
-    if not results:
+    if not total:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_admin"))
         builder.adjust(1)
@@ -1624,253 +1086,49 @@ async def all_orders_search(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Формируем результаты
-    response = f"📊 **Результаты поиска:**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        order_id, order_type, item_id, seller_id, status, order_date = item
-
-        response += f"{i}.  **{order_type}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷  ID предмета: {item_id or 'Не указана'}\n"
-
-        response += f"   💰 ID продавца: {seller_id}\n"
-
-        response += f"   🎯 статус: {status}\n"
-
-        response += f"   📝 Дата: {order_date}\n"
-
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    # Создаем клавиатуру с результатами
-    builder = InlineKeyboardBuilder()
-    builder.row(types.InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_admin"))
+    session = SearchSession("orders", "📊 **Результаты поиска:**\n\n", total=total,
+                            buttons=[("◀️ Назад", "back_to_admin")])
+    token = open_session(user_id, session)
+    text, markup = await _render_orders(token, session, 1)
 
     if callback.message.content_type == types.ContentType.PHOTO:
-        await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
+        await callback.message.edit_caption(caption=text, reply_markup=markup)
     else:
-        await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+        await callback.message.edit_text(text=text, reply_markup=markup)
     await callback.answer()
 # ========== ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ==========
 
 async def perform_search_in_catalog(search_query: str, item_type: str, user_id: int) -> list:
-    """Выполнение поиска в конкретном каталоге по всем таблицам"""
+    """Поиск в каталоге по полнотекстовому индексу (search_index.catalog_search)"""
     if not search_query:
         return []
+    return await search_catalog(search_query, item_type)
 
-    search_terms = search_query.lower().split()
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        if item_type == "product":
-            # Поиск в auto_products
-            cursor = await db.execute("""
-                SELECT ap.id, ap.title, ap.price, ac.name as category, ap.operation_type, ap.description
-                FROM auto_products ap
-                LEFT JOIN auto_categories ac ON ap.category_id = ac.id
-                WHERE ap.status = 'active'
-                ORDER BY ap.created_at DESC
-            """)
-            auto_items = await cursor.fetchall()
-
-            # Поиск в order_requests
-            cursor = await db.execute("""
-                SELECT id, title, price, category, operation, NULL as description
-                FROM order_requests 
-                WHERE item_type = 'product' AND status IN ('active', 'approved', 'processing')
-                ORDER BY created_at DESC
-            """)
-            order_items = await cursor.fetchall()
-
-            # Объединяем все товары
-            all_items = list(auto_items) + list(order_items)
-
-        elif item_type == "service":
-            # Поиск в auto_services
-            cursor = await db.execute("""
-                SELECT asv.id, asv.title, asv.price, ac.name as category, asv.operation_type, asv.description
-                FROM auto_services asv
-                LEFT JOIN auto_categories ac ON asv.category_id = ac.id
-                WHERE asv.status = 'active'
-                ORDER BY asv.created_at DESC
-            """)
-            auto_items = await cursor.fetchall()
-
-            # Поиск в order_requests
-            cursor = await db.execute("""
-                SELECT id, title, price, category, operation, NULL as description
-                FROM order_requests 
-                WHERE item_type = 'service' AND status IN ('active', 'approved', 'processing')
-                ORDER BY created_at DESC
-            """)
-            order_items = await cursor.fetchall()
-
-            # Объединяем все услуги
-            all_items = list(auto_items) + list(order_items)
-
-        else:  # offer
-            # Для предложений только order_requests
-            cursor = await db.execute("""
-                SELECT id, title, price, category, operation, NULL as description
-                FROM order_requests 
-                WHERE item_type = 'offer' AND status IN ('active', 'approved', 'processing')
-                ORDER BY created_at DESC
-            """)
-            all_items = await cursor.fetchall()
-
-    # Фильтруем по поисковому запросу
-    for item in all_items:
-        item_id, title, price, category, operation, description = item
-
-        # Собираем текст для поиска
-        search_text = f"{title or ''} {description or ''} {category or ''} {operation or ''} {item_id}".lower()
-
-        # Проверяем совпадение с поисковыми терминами
-        match_score = 0
-        for term in search_terms:
-            if term in search_text:
-                match_score += 1
-
-        # Если есть хотя бы одно совпадение
-        if match_score > 0:
-            results.append(item)
-
-    # Сортируем по релевантности
-    def relevance_score(item):
-        item_id, title, price, category, operation, description = item
-        search_text = f"{title or ''} {description or ''} {category or ''} {operation or ''}".lower()
-        score = 0
-        for term in search_terms:
-            if term in (title or "").lower():
-                score += 3
-            if term in (description or "").lower():
-                score += 2
-            if term in (category or "").lower():
-                score += 1
-            if term in (operation or "").lower():
-                score += 1
-        return score
-
-    results.sort(key=relevance_score, reverse=True)
 
-    return results
+def _parse_id_list(search_query: str) -> list:
+    """ID через запятую; нечисловые значения пропускаются"""
+    ids = []
+    for id_str in search_query.split(','):
+        try:
+            ids.append(int(id_str.strip()))
+        except ValueError:
+            continue
+    return ids
 
 
 async def search_products_by_id(search_query: str, user_id: int) -> list:
-    """Поиск товаров по ID в обеих таблицах"""
-    id_list = [id_str.strip() for id_str in search_query.split(',') if id_str.strip()]
-
-    if not id_list:
-        return []
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        for item_id in id_list:
-            try:
-                item_id_int = int(item_id)
-
-                # Ищем в auto_products
-                cursor = await db.execute("""
-                    SELECT ap.id, ap.title, ap.price, ac.name as category, ap.operation_type, ap.description
-                    FROM auto_products ap
-                    LEFT JOIN auto_categories ac ON ap.category_id = ac.id
-                    WHERE ap.id = ? AND ap.status = 'active'
-                """, (item_id_int,))
-
-                item = await cursor.fetchone()
-                if item:
-                    results.append(item)
-                else:
-                    # Ищем в order_requests
-                    cursor = await db.execute("""
-                        SELECT id, title, price, category, operation, NULL as description
-                        FROM order_requests 
-                        WHERE item_type = 'product' AND id = ? AND status IN ('active', 'approved', 'processing')
-                    """, (item_id_int,))
-
-                    item = await cursor.fetchone()
-                    if item:
-                        results.append(item)
-
-            except ValueError:
-                continue  # Пропускаем нечисловые ID
-
-    return results
+    """Поиск товаров по ID (автокаталог и заявки) одним запросом"""
+    return await get_items_by_ids("product", _parse_id_list(search_query))
 
 
 async def search_services_by_id(search_query: str, user_id: int) -> list:
-    """Поиск услуг по ID в обеих таблицах"""
-    id_list = [id_str.strip() for id_str in search_query.split(',') if id_str.strip()]
-
-    if not id_list:
-        return []
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        for item_id in id_list:
-            try:
-                item_id_int = int(item_id)
-
-                # Ищем в auto_services
-                cursor = await db.execute("""
-                    SELECT asv.id, asv.title, asv.price, ac.name as category, asv.operation_type, asv.description
-                    FROM auto_services asv
-                    LEFT JOIN auto_categories ac ON asv.category_id = ac.id
-                    WHERE asv.id = ? AND asv.status = 'active'
-                """, (item_id_int,))
-
-                item = await cursor.fetchone()
-                if item:
-                    results.append(item)
-                else:
-                    # Ищем в order_requests
-                    cursor = await db.execute("""
-                        SELECT id, title, price, category, operation, NULL as description
-                        FROM order_requests 
-                        WHERE item_type = 'service' AND id = ? AND status IN ('active', 'approved', 'processing')
-                    """, (item_id_int,))
-
-                    item = await cursor.fetchone()
-                    if item:
-                        results.append(item)
-
-            except ValueError:
-                continue  # Пропускаем нечисловые ID
-
-    return results
+    """Поиск услуг по ID (автокаталог и заявки) одним запросом"""
+    return await get_items_by_ids("service", _parse_id_list(search_query))
 
 
 async def search_offers_by_id(search_query: str, user_id: int) -> list:
     """Поиск предложений по ID"""
-    id_list = [id_str.strip() for id_str in search_query.split(',') if id_str.strip()]
-
-    if not id_list:
-        return []
-
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        for item_id in id_list:
-            try:
-                cursor = await db.execute("""
-                    SELECT id, title, price, category, operation, NULL as description
-                    FROM order_requests 
-                    WHERE item_type = 'offer' AND id = ? AND status IN ('active', 'approved', 'processing')
-                """, (int(item_id),))
-
-                item = await cursor.fetchone()
-                if item:
-                    results.append(item)
-            except ValueError:
-                continue  # Пропускаем нечисловые ID
-
-    return results
+    return await get_items_by_ids("offer", _parse_id_list(search_query))
 
 
 async def perform_advanced_search_in_catalog(filters: dict, user_id: int) -> list:
@@ -1893,18 +1151,19 @@ async def perform_advanced_search_in_catalog(filters: dict, user_id: int) -> lis
         where_conditions.append("item_class = ?")
         params.append(filters["item_class"])
 
+    # price_num и rating_num — числа из текста цены и рейтинга (триггеры миграции 10)
     if filters.get("price_min") is not None:
         try:
-            where_conditions.append("(price IS NOT NULL AND price != '' AND CAST(price AS REAL) >= ?)")
             params.append(float(filters["price_min"]))
-        except:
+            where_conditions.append("price_num >= ?")
+        except (TypeError, ValueError):
             pass
 
     if filters.get("price_max") is not None:
         try:
-            where_conditions.append("(price IS NOT NULL AND price != '' AND CAST(price AS REAL) <= ?)")
             params.append(float(filters["price_max"]))
-        except:
+            where_conditions.append("price_num <= ?")
+        except (TypeError, ValueError):
             pass
 
     if filters.get("condition"):
@@ -1917,15 +1176,15 @@ async def perform_advanced_search_in_catalog(filters: dict, user_id: int) -> lis
 
     if filters.get("rating_min"):
         try:
-            where_conditions.append("(rating IS NOT NULL AND rating != '' AND CAST(rating AS REAL) >= ?)")
             params.append(float(filters["rating_min"]))
-        except:
+            where_conditions.append("rating_num >= ?")
+        except (TypeError, ValueError):
             pass
 
     # Формируем SQL запрос
     where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute(f"""
             SELECT id, title, price, category, operation
             FROM order_requests 
@@ -2025,7 +1284,7 @@ async def view_search_result_item(callback: CallbackQuery):
         return
 
     # Получаем информацию о товаре
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT 
                 id, user_id, operation, item_type, category, item_class, item_kind,
@@ -2254,7 +1513,7 @@ async def view_item_gallery(callback: CallbackQuery):
     item_type = data_parts[2]
     item_id = data_parts[3]
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT images FROM order_requests WHERE id = ? AND item_type = ?", (item_id, item_type))
         row = await cursor.fetchone()
 
@@ -2298,7 +1557,7 @@ async def add_search_result_to_cart(callback: CallbackQuery):
     user_id = callback.from_user.id
 
     # Проверяем, существует ли товар
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT id, title, price FROM order_requests 
             WHERE id = ? AND item_type = ? AND status IN ('new', 'active', 'approved', 'processing')
@@ -2306,10 +1565,11 @@ async def add_search_result_to_cart(callback: CallbackQuery):
 
         item = await cursor.fetchone()
 
-        if not item:
-            await callback.answer("❌ Товар не найден или недоступен", show_alert=True)
-            return
+    if not item:
+        await callback.answer("❌ Товар не найден или недоступен", show_alert=True)
+        return
 
+    async with get_db(write=True) as db:
         # Проверяем, не добавлен ли уже в корзину
         cursor = await db.execute("""
             SELECT id FROM cart_order 
@@ -2318,26 +1578,27 @@ async def add_search_result_to_cart(callback: CallbackQuery):
 
         existing = await cursor.fetchone()
 
-        if existing:
-            await callback.answer("✅ Уже в корзине", show_alert=True)
-            return
+        if not existing:
+            # Добавляем в корзину
+            await db.execute("""
+                INSERT INTO cart_order (
+                    user_id, item_type, item_id, quantity, selected_options, price, added_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                user_id,
+                "order_request",
+                item_id,
+                1,
+                "",
+                item[2] or "0",
+                datetime.now().isoformat()
+            ))
 
-        # Добавляем в корзину
-        await db.execute("""
-            INSERT INTO cart_order (
-                user_id, item_type, item_id, quantity, selected_options, price, added_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_id,
-            "order_request",
-            item_id,
-            1,
-            "",
-            item[2] or "0",
-            datetime.now().isoformat()
-        ))
+            await db.commit()
 
-        await db.commit()
+    if existing:
+        await callback.answer("✅ Уже в корзине", show_alert=True)
+        return
 
     await callback.answer("✅ Добавлено в корзину", show_alert=True)
 
@@ -2398,27 +1659,18 @@ async def search_products_by_category_start(callback: CallbackQuery):
     """Поиск товаров по категории"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT category FROM order_requests 
-            WHERE item_type = 'product' AND category IS NOT NULL AND category != '' 
-            AND category != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY category
-        """)
-        categories = await cursor.fetchall()
-        
-        if categories:
-            for category in categories:
-                if category[0]:
-                    builder.add(types.InlineKeyboardButton(
-                        text=category[0],
-                        callback_data=f"prod_cat_search:{category[0]}"
-                    ))
-        else:
+    categories = await get_facet_values("product", "category")
+    if categories:
+        for value_id, category, count in categories:
             builder.add(types.InlineKeyboardButton(
-                text="📭 Категории не найдены",
-                callback_data="no_action"
+                text=facet_button_text(category, count),
+                callback_data=f"prod_cat_search:{value_id}"
             ))
+    else:
+        builder.add(types.InlineKeyboardButton(
+            text="📭 Категории не найдены",
+            callback_data="no_action"
+        ))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_products"))
     builder.adjust(1)
@@ -2438,26 +1690,21 @@ async def search_products_by_category_start(callback: CallbackQuery):
 @dp.callback_query(F.data.startswith("prod_cat_search:"))
 async def search_products_by_category_execute(callback: CallbackQuery):
     """Выполнение поиска товаров по категории"""
-    category = callback.data.split(":")[1]
+    category = await get_facet_value("category", callback.data.split(":")[1])
+    if category is None:
+        await callback.answer("❌ Категория не найдена", show_alert=True)
+        return
     user_id = callback.from_user.id
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, category, NULL as operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'product' AND category = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (category,))
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("product", category=category)
 
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (user_id, f"Категория: {category}", "category", "products", datetime.now().isoformat())
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="🏷 Выбрать другую категорию", callback_data="search_products_by_category"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
@@ -2472,37 +1719,16 @@ async def search_products_by_category_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    response = f"🏷 **Результаты поиска товаров по категории: '{category}'**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, cat_name, op, desc = item
-        response += f"{i}. 📦 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {cat_name or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-             response += f"   💰 Цена: {price}\n"
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text=f"{i}. {title[:15]}...",
-            callback_data=f"view_item_product_{item_id}"
-        ))
-
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="🏷 Выбрать другую категорию", callback_data="search_products_by_category"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="product_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-         await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
-    else:
-         await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "products", f"🏷 **Результаты поиска товаров по категории: '{category}'**\n\n", result_ids,
+        [
+            ("🏷 Выбрать другую категорию", "search_products_by_category"),
+            ("🔍 Другой тип поиска", "search_in_products"),
+            ("◀️ В каталог", "product_catalog"),
+        ],
+        category, {"category": category}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -2512,20 +1738,12 @@ async def search_products_by_class_start(callback: CallbackQuery):
     """Поиск товаров по классу"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT item_class FROM order_requests 
-            WHERE item_type = 'product' AND item_class IS NOT NULL AND item_class != '' 
-            AND item_class != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_class
-        """)
-        items = await cursor.fetchall()
-        
-        if items:
-            for i in items:
-                builder.add(types.InlineKeyboardButton(text=i[0], callback_data=f"prod_cls_search:{i[0]}"))
-        else:
-            builder.add(types.InlineKeyboardButton(text="📭 Классы не найдены", callback_data="no_action"))
+    items = await get_facet_values("product", "item_class")
+    if items:
+        for value_id, value, count in items:
+            builder.add(types.InlineKeyboardButton(text=facet_button_text(value, count), callback_data=f"prod_cls_search:{value_id}"))
+    else:
+        builder.add(types.InlineKeyboardButton(text="📭 Классы не найдены", callback_data="no_action"))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_products"))
     builder.adjust(1)
@@ -2538,26 +1756,21 @@ async def search_products_by_class_start(callback: CallbackQuery):
 
 @dp.callback_query(F.data.startswith("prod_cls_search:"))
 async def search_products_by_class_execute(callback: CallbackQuery):
-    item_class = callback.data.split(":")[1]
+    item_class = await get_facet_value("item_class", callback.data.split(":")[1])
+    if item_class is None:
+        await callback.answer("❌ Класс не найден", show_alert=True)
+        return
     user_id = callback.from_user.id
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, category, NULL as operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'product' AND item_class = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_class,))
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("product", item_class=item_class)
 
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (user_id, f"Класс: {item_class}", "class", "products", datetime.now().isoformat())
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="📊 Выбрать другой класс", callback_data="search_products_by_class"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
@@ -2570,26 +1783,17 @@ async def search_products_by_class_execute(callback: CallbackQuery):
              await callback.message.edit_text(text=text, reply_markup=builder.as_markup())
         await callback.answer()
         return
-        
-    response = f"📊 **Результаты поиска товаров по классу: '{item_class}'**\n\n📊 Найдено: {len(results)} позиций\n\n"
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, cat_name, _, _ = item
-        response += f"{i}. 📦 **{title}**\n   🆔 ID: {item_id}\n"
-        if price: response += f"   💰 Цена: {price}\n"
-        response += "   ──────\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-        builder.add(types.InlineKeyboardButton(text=f"{i}. {item[1][:15]}...", callback_data=f"view_item_product_{item[0]}"))
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="📊 Выбрать другой класс", callback_data="search_products_by_class"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="product_catalog"))
 
-    if callback.message.content_type == types.ContentType.PHOTO:
-         await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
-    else:
-         await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "products", f"📊 **Результаты поиска товаров по классу: '{item_class}'**\n\n", result_ids,
+        [
+            ("📊 Выбрать другой класс", "search_products_by_class"),
+            ("🔍 Другой тип поиска", "search_in_products"),
+            ("◀️ В каталог", "product_catalog"),
+        ],
+        item_class, {"item_class": item_class}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -2599,20 +1803,12 @@ async def search_products_by_type_start(callback: CallbackQuery):
     """Поиск товаров по типу"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT item_type_detail FROM order_requests 
-            WHERE item_type = 'product' AND item_type_detail IS NOT NULL AND item_type_detail != '' 
-            AND item_type_detail != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_type_detail
-        """)
-        items = await cursor.fetchall()
-        
-        if items:
-            for i in items:
-                builder.add(types.InlineKeyboardButton(text=i[0], callback_data=f"prod_type_search:{i[0]}"))
-        else:
-            builder.add(types.InlineKeyboardButton(text="📭 Типы не найдены", callback_data="no_action"))
+    items = await get_facet_values("product", "item_type_detail")
+    if items:
+        for value_id, value, count in items:
+            builder.add(types.InlineKeyboardButton(text=facet_button_text(value, count), callback_data=f"prod_type_search:{value_id}"))
+    else:
+        builder.add(types.InlineKeyboardButton(text="📭 Типы не найдены", callback_data="no_action"))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_products"))
     builder.adjust(1)
@@ -2625,26 +1821,21 @@ async def search_products_by_type_start(callback: CallbackQuery):
 
 @dp.callback_query(F.data.startswith("prod_type_search:"))
 async def search_products_by_type_execute(callback: CallbackQuery):
-    item_type = callback.data.split(":")[1]
+    item_type = await get_facet_value("item_type_detail", callback.data.split(":")[1])
+    if item_type is None:
+        await callback.answer("❌ Тип не найден", show_alert=True)
+        return
     user_id = callback.from_user.id
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, category, NULL as operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'product' AND item_type_detail = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_type,))
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("product", item_type_detail=item_type)
 
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (user_id, f"Тип: {item_type}", "type", "products", datetime.now().isoformat())
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="📋 Выбрать другой тип", callback_data="search_products_by_type"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
@@ -2658,22 +1849,16 @@ async def search_products_by_type_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    response = f"📋 **Результаты поиска товаров по типу: '{item_type}'**\n\n📊 Найдено: {len(results)} позиций\n\n"
-    for i, item in enumerate(results[:10], 1):
-        response += f"{i}. 📦 **{item[1]}**\n   🆔 ID: {item[0]}\n   ──────\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-        builder.add(types.InlineKeyboardButton(text=f"{i}. {item[1][:15]}...", callback_data=f"view_item_product_{item[0]}"))
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="📋 Выбрать другой тип", callback_data="search_products_by_type"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="product_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-         await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
-    else:
-         await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "products", f"📋 **Результаты поиска товаров по типу: '{item_type}'**\n\n", result_ids,
+        [
+            ("📋 Выбрать другой тип", "search_products_by_type"),
+            ("🔍 Другой тип поиска", "search_in_products"),
+            ("◀️ В каталог", "product_catalog"),
+        ],
+        item_type, {"item_type_detail": item_type}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -2683,20 +1868,12 @@ async def search_products_by_kind_start(callback: CallbackQuery):
     """Поиск товаров по виду"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT item_kind FROM order_requests 
-            WHERE item_type = 'product' AND item_kind IS NOT NULL AND item_kind != '' 
-            AND item_kind != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_kind
-        """)
-        items = await cursor.fetchall()
-        
-        if items:
-            for i in items:
-                builder.add(types.InlineKeyboardButton(text=i[0], callback_data=f"prod_kind_search:{i[0]}"))
-        else:
-            builder.add(types.InlineKeyboardButton(text="📭 Виды не найдены", callback_data="no_action"))
+    items = await get_facet_values("product", "item_kind")
+    if items:
+        for value_id, value, count in items:
+            builder.add(types.InlineKeyboardButton(text=facet_button_text(value, count), callback_data=f"prod_kind_search:{value_id}"))
+    else:
+        builder.add(types.InlineKeyboardButton(text="📭 Виды не найдены", callback_data="no_action"))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_products"))
     builder.adjust(1)
@@ -2709,26 +1886,21 @@ async def search_products_by_kind_start(callback: CallbackQuery):
 
 @dp.callback_query(F.data.startswith("prod_kind_search:"))
 async def search_products_by_kind_execute(callback: CallbackQuery):
-    item_kind = callback.data.split(":")[1]
+    item_kind = await get_facet_value("item_kind", callback.data.split(":")[1])
+    if item_kind is None:
+        await callback.answer("❌ Вид не найден", show_alert=True)
+        return
     user_id = callback.from_user.id
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, category, NULL as operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'product' AND item_kind = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_kind,))
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("product", item_kind=item_kind)
 
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (user_id, f"Вид: {item_kind}", "kind", "products", datetime.now().isoformat())
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="👁 Выбрать другой вид", callback_data="search_products_by_kind"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
@@ -2742,22 +1914,16 @@ async def search_products_by_kind_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    response = f"👁 **Результаты поиска товаров по виду: '{item_kind}'**\n\n📊 Найдено: {len(results)} позиций\n\n"
-    for i, item in enumerate(results[:10], 1):
-        response += f"{i}. 📦 **{item[1]}**\n   🆔 ID: {item[0]}\n   ──────\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-        builder.add(types.InlineKeyboardButton(text=f"{i}. {item[1][:15]}...", callback_data=f"view_item_product_{item[0]}"))
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="👁 Выбрать другой вид", callback_data="search_products_by_kind"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_products"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="product_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-         await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
-    else:
-         await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "products", f"👁 **Результаты поиска товаров по виду: '{item_kind}'**\n\n", result_ids,
+        [
+            ("👁 Выбрать другой вид", "search_products_by_kind"),
+            ("🔍 Другой тип поиска", "search_in_products"),
+            ("◀️ В каталог", "product_catalog"),
+        ],
+        item_kind, {"item_kind": item_kind}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -2771,20 +1937,12 @@ async def search_services_by_type_start(callback: CallbackQuery):
     """Поиск услуг по типу"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT item_type_detail FROM order_requests 
-            WHERE item_type = 'service' AND item_type_detail IS NOT NULL AND item_type_detail != '' 
-            AND item_type_detail != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_type_detail
-        """)
-        items = await cursor.fetchall()
-        
-        if items:
-            for i in items:
-                builder.add(types.InlineKeyboardButton(text=i[0], callback_data=f"serv_type_search:{i[0]}"))
-        else:
-            builder.add(types.InlineKeyboardButton(text="📭 Типы не найдены", callback_data="no_action"))
+    items = await get_facet_values("service", "item_type_detail")
+    if items:
+        for value_id, value, count in items:
+            builder.add(types.InlineKeyboardButton(text=facet_button_text(value, count), callback_data=f"serv_type_search:{value_id}"))
+    else:
+        builder.add(types.InlineKeyboardButton(text="📭 Типы не найдены", callback_data="no_action"))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_services"))
     builder.adjust(1)
@@ -2797,26 +1955,21 @@ async def search_services_by_type_start(callback: CallbackQuery):
 
 @dp.callback_query(F.data.startswith("serv_type_search:"))
 async def search_services_by_type_execute(callback: CallbackQuery):
-    item_type = callback.data.split(":")[1]
+    item_type = await get_facet_value("item_type_detail", callback.data.split(":")[1])
+    if item_type is None:
+        await callback.answer("❌ Тип не найден", show_alert=True)
+        return
     user_id = callback.from_user.id
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'service' AND item_type_detail = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_type,))
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("service", item_type_detail=item_type)
 
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (user_id, f"Тип: {item_type}", "type", "services", datetime.now().isoformat())
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="📋 Выбрать другой тип", callback_data="search_services_by_type"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_services"))
@@ -2830,22 +1983,16 @@ async def search_services_by_type_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    response = f"📋 **Результаты поиска услуг по типу: '{item_type}'**\n\n📊 Найдено: {len(results)} позиций\n\n"
-    for i, item in enumerate(results[:10], 1):
-        response += f"{i}. 📦 **{item[1]}**\n   🆔 ID: {item[0]}\n   ──────\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-        builder.add(types.InlineKeyboardButton(text=f"{i}. {item[1][:15]}...", callback_data=f"view_item_service_{item[0]}"))
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="📋 Выбрать другой тип", callback_data="search_services_by_type"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_services"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="service_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-         await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
-    else:
-         await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "services", f"📋 **Результаты поиска услуг по типу: '{item_type}'**\n\n", result_ids,
+        [
+            ("📋 Выбрать другой тип", "search_services_by_type"),
+            ("🔍 Другой тип поиска", "search_in_services"),
+            ("◀️ В каталог", "service_catalog"),
+        ],
+        item_type, {"item_type_detail": item_type}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -2855,20 +2002,12 @@ async def search_services_by_kind_start(callback: CallbackQuery):
     """Поиск услуг по виду"""
     builder = InlineKeyboardBuilder()
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT item_kind FROM order_requests 
-            WHERE item_type = 'service' AND item_kind IS NOT NULL AND item_kind != '' 
-            AND item_kind != 'None' AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_kind
-        """)
-        items = await cursor.fetchall()
-        
-        if items:
-            for i in items:
-                builder.add(types.InlineKeyboardButton(text=i[0], callback_data=f"serv_kind_search:{i[0]}"))
-        else:
-            builder.add(types.InlineKeyboardButton(text="📭 Виды не найдены", callback_data="no_action"))
+    items = await get_facet_values("service", "item_kind")
+    if items:
+        for value_id, value, count in items:
+            builder.add(types.InlineKeyboardButton(text=facet_button_text(value, count), callback_data=f"serv_kind_search:{value_id}"))
+    else:
+        builder.add(types.InlineKeyboardButton(text="📭 Виды не найдены", callback_data="no_action"))
 
     builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="search_in_services"))
     builder.adjust(1)
@@ -2881,26 +2020,21 @@ async def search_services_by_kind_start(callback: CallbackQuery):
 
 @dp.callback_query(F.data.startswith("serv_kind_search:"))
 async def search_services_by_kind_execute(callback: CallbackQuery):
-    item_kind = callback.data.split(":")[1]
+    item_kind = await get_facet_value("item_kind", callback.data.split(":")[1])
+    if item_kind is None:
+        await callback.answer("❌ Вид не найден", show_alert=True)
+        return
     user_id = callback.from_user.id
-    results = []
-
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, category, operation, NULL as description
-            FROM order_requests 
-            WHERE item_type = 'service' AND item_kind = ? AND status IN ('active', 'approved', 'processing')
-            ORDER BY created_at DESC
-        """, (item_kind,))
-        results = await cursor.fetchall()
+    result_ids = await list_item_ids("service", item_kind=item_kind)
 
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (user_id, f"Вид: {item_kind}", "kind", "services", datetime.now().isoformat())
         )
         await db.commit()
 
-    if not results:
+    if not result_ids:
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="👁 Выбрать другой вид", callback_data="search_services_by_kind"))
         builder.add(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_services"))
@@ -2914,22 +2048,16 @@ async def search_services_by_kind_execute(callback: CallbackQuery):
         await callback.answer()
         return
 
-    response = f"👁 **Результаты поиска услуг по виду: '{item_kind}'**\n\n📊 Найдено: {len(results)} позиций\n\n"
-    for i, item in enumerate(results[:10], 1):
-        response += f"{i}. 📦 **{item[1]}**\n   🆔 ID: {item[0]}\n   ──────\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-        builder.add(types.InlineKeyboardButton(text=f"{i}. {item[1][:15]}...", callback_data=f"view_item_service_{item[0]}"))
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="👁 Выбрать другой вид", callback_data="search_services_by_kind"))
-    builder.row(types.InlineKeyboardButton(text="🔍 Другой тип поиска", callback_data="search_in_services"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="service_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-         await callback.message.edit_caption(caption=response, reply_markup=builder.as_markup())
-    else:
-         await callback.message.edit_text(text=response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "services", f"👁 **Результаты поиска услуг по виду: '{item_kind}'**\n\n", result_ids,
+        [
+            ("👁 Выбрать другой вид", "search_services_by_kind"),
+            ("🔍 Другой тип поиска", "search_in_services"),
+            ("◀️ В каталог", "service_catalog"),
+        ],
+        item_kind, {"item_kind": item_kind}
+    )
+    await _show_results(callback, text, markup)
     await callback.answer()
 
 
@@ -2985,7 +2113,7 @@ async def process_search_in_products(message: Message, state: FSMContext):
     results = await perform_search_in_catalog(search_query, "product", message.from_user.id)
     
     # Сохраняем в историю
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (message.from_user.id, search_query, "text", "products", datetime.now().isoformat())
@@ -3000,24 +2128,16 @@ async def process_search_in_products(message: Message, state: FSMContext):
         await message.answer(f"📦 **Результаты поиска:** '{search_query}'\n\n❌ Ничего не найдено.", reply_markup=builder.as_markup())
         return
 
-    response = f"📦 **Результаты поиска:** '{search_query}'\n\n📊 Найдено: {len(results)} позиций\n\n"
-    for i, item in enumerate(results[:10], 1):
-        # perform_search_in_catalog returns tuples: id, title, price, category, op, desc
-        item_id, title, price, category, op, desc = item
-        response += f"{i}. 📦 **{title}**\n   🆔 ID: {item_id}\n"
-        if price: response += f"   💰 Цена: {price}\n"
-        if category: response += f"   🏷 Кат: {category}\n"
-        response += "   ──────\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-         builder.add(types.InlineKeyboardButton(text=f"{i}. {item[1][:15]}...", callback_data=f"view_item_product_{item[0]}"))
-    
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="🔍 Новый поиск", callback_data="search_in_products"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="product_catalog"))
-    
-    await message.answer(response, reply_markup=builder.as_markup())
+    result_ids = list(dict.fromkeys(item[0] for item in results))
+    response, markup = await _open_results(
+        message.from_user.id, "products", f"📦 **Результаты поиска:** '{search_query}'\n\n", result_ids,
+        [
+            ("🔍 Новый поиск", "search_in_products"),
+            ("◀️ В каталог", "product_catalog"),
+        ],
+        search_query
+    )
+    await message.answer(response, reply_markup=markup)
     # await state.clear() # Не очищаем, чтобы можно было искать дальше? Обычно очищают или нет?
     # Если не очистить, следующее сообщение тоже будет поиском.
     # User might want to search again immediately.
@@ -3038,7 +2158,7 @@ async def process_search_in_services(message: Message, state: FSMContext):
 
     results = await perform_search_in_catalog(search_query, "service", message.from_user.id)
     
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         await db.execute(
             "INSERT INTO search_history (user_id, search_query, search_type, catalog_type, created_at) VALUES (?, ?, ?, ?, ?)",
             (message.from_user.id, search_query, "text", "services", datetime.now().isoformat())
@@ -3053,44 +2173,18 @@ async def process_search_in_services(message: Message, state: FSMContext):
         await message.answer(f"🛠 **Результаты поиска:** '{search_query}'\n\n❌ Ничего не найдено.", reply_markup=builder.as_markup())
         return
 
-    response = f"🛠 **Результаты поиска:** '{search_query}'\n\n📊 Найдено: {len(results)} позиций\n\n"
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, op, desc = item
-        response += f"{i}. 🛠 **{title}**\n   🆔 ID: {item_id}\n"
-        if price: response += f"   💰 Цена: {price}\n"
-        if category: response += f"   🏷 Кат: {category}\n"
-        response += "   ──────\n"
-
-    builder = InlineKeyboardBuilder()
-    for i, item in enumerate(results[:5], 1):
-         builder.add(types.InlineKeyboardButton(text=f"{i}. {item[1][:15]}...", callback_data=f"view_item_service_{item[0]}"))
-    
-    builder.adjust(1)
-    builder.row(types.InlineKeyboardButton(text="🔍 Новый поиск", callback_data="search_in_services"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="service_catalog"))
-    
-    await message.answer(response, reply_markup=builder.as_markup())
+    result_ids = list(dict.fromkeys(item[0] for item in results))
+    response, markup = await _open_results(
+        message.from_user.id, "services", f"🛠 **Результаты поиска:** '{search_query}'\n\n", result_ids,
+        [
+            ("🔍 Новый поиск", "search_in_services"),
+            ("◀️ В каталог", "service_catalog"),
+        ],
+        search_query
+    )
+    await message.answer(response, reply_markup=markup)
     await state.clear()
 
-# Инициализация таблицы истории поиска
-async def init_search_history_table():
-    """Инициализация таблицы истории поиска"""
-    async with aiosqlite.connect("bot_database.db") as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS search_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                search_query TEXT NOT NULL,
-                search_type TEXT NOT NULL,
-                catalog_type TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        """)
-        await db.commit()
-
-
-
 # ==========================================
 # РАСШИРЕННЫЙ ПОИСК ПРЕДЛОЖЕНИЙ
 # ==========================================
@@ -3202,49 +2296,16 @@ async def execute_advanced_search_offers(callback: CallbackQuery, state: FSMCont
             )
         return
 
-    # Form results
-    response = "🔍 **Результаты расширенного поиска в предложениях:**\n\n"
-    response += f"📊 Найдено: {len(results)} позиций\n\n"
-
-    for i, item in enumerate(results[:10], 1):
-        item_id, title, price, category, operation = item
-        
-        response += f"{i}. 🤝 **{title}**\n"
-        response += f"   🆔 ID: {item_id} | 🏷 Категория: {category or 'Не указана'}\n"
-        if price and price != "0" and price is not None:
-            response += f"   💰 Цена: {price}\n"
-        if operation:
-            response += f"   🎯 Операция: {operation}\n"
-        
-        response += "   ──────\n"
-
-    if len(results) > 10:
-        response += f"\n📄 Показано 10 из {len(results)} результатов\n"
-
-    builder = InlineKeyboardBuilder()
-    
-    # Results buttons
-    for i, item in enumerate(results[:5], 1):
-        item_id, title, _, _, _ = item
-        builder.add(types.InlineKeyboardButton(
-            text="👁 Просмотр",
-            callback_data=f"view_item_offer_{item_id}"
-        ))
-        builder.add(types.InlineKeyboardButton(
-            text=f"➕ {title[:15]}",
-            callback_data=f"add_to_cart_offer_{item_id}"
-        ))
-        
-    builder.adjust(2)
-    
-    builder.row(types.InlineKeyboardButton(text="🔙 К фильтрам", callback_data="advanced_search_offers"))
-    builder.row(types.InlineKeyboardButton(text="◀️ В каталог", callback_data="property_catalog"))
-
-    if callback.message.content_type == types.ContentType.PHOTO:
-        await callback.message.delete()
-        await callback.message.answer(response, reply_markup=builder.as_markup())
-    else:
-        await callback.message.edit_text(response, reply_markup=builder.as_markup())
+    text, markup = await _open_results(
+        user_id, "offers", "🔍 **Результаты расширенного поиска в предложениях:**\n\n",
+        list(dict.fromkeys(item[0] for item in results)),
+        [
+            ("🔙 К фильтрам", "advanced_search_offers"),
+            ("◀️ В каталог", "property_catalog"),
+        ],
+        filters=filters
+    )
+    await _show_results(callback, text, markup)
         
 # ==========================================
 # ОБРАБОТЧИКИ ФИЛЬТРОВ ДЛЯ ПРЕДЛОЖЕНИЙ
@@ -3253,21 +2314,13 @@ async def execute_advanced_search_offers(callback: CallbackQuery, state: FSMCont
 @dp.callback_query(F.data == "filter_category_offers")
 async def filter_category_offers(callback: CallbackQuery, state: FSMContext):
     """Filter by category for offers"""
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT category FROM order_requests 
-            WHERE item_type = 'offer' AND category IS NOT NULL AND category != '' 
-            AND status IN ('active', 'approved', 'processing')
-            ORDER BY category
-        """)
-        items = await cursor.fetchall()
+    items = await get_facet_values("offer", "category")
 
     builder = InlineKeyboardBuilder()
     if items:
-        for item in items:
-            cat_name = item[0]
-            cat_hash = hashlib.md5(cat_name.encode()).hexdigest()
-            builder.add(types.InlineKeyboardButton(text=cat_name, callback_data=f"fco:{cat_hash}"))
+        for value_id, cat_name, count in items:
+            builder.add(types.InlineKeyboardButton(text=facet_button_text(cat_name, count),
+                                                   callback_data=f"fco:{value_id}"))
     else:
         builder.add(types.InlineKeyboardButton(text="📭 Категории не найдены", callback_data="no_action"))
 
@@ -3285,21 +2338,9 @@ async def filter_category_offers(callback: CallbackQuery, state: FSMContext):
 @dp.callback_query(F.data.startswith("fco:"))
 async def set_filter_category_offers(callback: CallbackQuery, state: FSMContext):
     """Set category filter for offers"""
-    cat_hash = callback.data.split(":")[1]
-    category = None
-    
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT category FROM order_requests 
-            WHERE item_type = 'offer' AND category IS NOT NULL AND category != '' 
-            AND status IN ('active', 'approved', 'processing')
-        """)
-        items = await cursor.fetchall()
-        for item in items:
-            if hashlib.md5(item[0].encode()).hexdigest() == cat_hash:
-                category = item[0]
-                break
-    
+    category_id = callback.data.split(":")[1]
+    category = await get_facet_value("category", category_id)
+
     if category:
         data = await state.get_data()
         filters = data.get("search_filters", {})
@@ -3313,21 +2354,13 @@ async def set_filter_category_offers(callback: CallbackQuery, state: FSMContext)
 @dp.callback_query(F.data == "filter_class_offers")
 async def filter_class_offers(callback: CallbackQuery, state: FSMContext):
     """Filter by class for offers"""
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT item_class FROM order_requests 
-            WHERE item_type = 'offer' AND item_class IS NOT NULL AND item_class != '' 
-            AND status IN ('active', 'approved', 'processing')
-            ORDER BY item_class
-        """)
-        items = await cursor.fetchall()
+    items = await get_facet_values("offer", "item_class")
 
     builder = InlineKeyboardBuilder()
     if items:
-        for item in items:
-            class_name = item[0]
-            cls_hash = hashlib.md5(class_name.encode()).hexdigest()
-            builder.add(types.InlineKeyboardButton(text=class_name, callback_data=f"fclo:{cls_hash}"))
+        for value_id, class_name, count in items:
+            builder.add(types.InlineKeyboardButton(text=facet_button_text(class_name, count),
+                                                   callback_data=f"fclo:{value_id}"))
     else:
         builder.add(types.InlineKeyboardButton(text="📭 Классы не найдены", callback_data="no_action"))
 
@@ -3345,21 +2378,9 @@ async def filter_class_offers(callback: CallbackQuery, state: FSMContext):
 @dp.callback_query(F.data.startswith("fclo:"))
 async def set_filter_class_offers(callback: CallbackQuery, state: FSMContext):
     """Set class filter for offers"""
-    cls_hash = callback.data.split(":")[1]
-    item_class = None
-    
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT DISTINCT item_class FROM order_requests 
-            WHERE item_type = 'offer' AND item_class IS NOT NULL AND item_class != '' 
-            AND status IN ('active', 'approved', 'processing')
-        """)
-        items = await cursor.fetchall()
-        for item in items:
-            if hashlib.md5(item[0].encode()).hexdigest() == cls_hash:
-                item_class = item[0]
-                break
-    
+    class_id = callback.data.split(":")[1]
+    item_class = await get_facet_value("item_class", class_id)
+
     if item_class:
         data = await state.get_data()
         filters = data.get("search_filters", {})
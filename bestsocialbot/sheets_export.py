@@ -0,0 +1,162 @@
+"""
+Потоковая выгрузка больших листов Google Sheets.
+
+stream_to_sheet() читает результат запроса порциями по SHEETS_CHUNK_ROWS
+строк и записывает каждую порцию отдельным диапазоном поверх старых строк
+листа (с повторами при 429/5xx, см. SheetsGateway.run_with_retry). В памяти
+одновременно только одна порция; лист заранее не очищается, поэтому при
+сбое в нём остаются старые или уже обновлённые строки, а не пустой лист.
+
+Результат запроса сначала одним оператором копируется во временную таблицу
+(в файле, не в памяти), и порции читаются из неё по rowid. Так выгрузка
+видит согласованный снимок базы, но транзакция чтения основной базы длится
+только время копирования: пока идут запросы к Google API с повторами,
+снимок WAL не удерживается, и checkpoint не блокируется.
+После последней порции размер листа один раз подгоняется под число строк,
+а старые значения правее заголовков очищаются.
+
+Хэши записанных порций хранятся в sheet_export_progress. Если выгрузка
+оборвалась, следующий запуск не пишет порции, которые уже лежат в листе
+без изменений. После успешной выгрузки запись о прогрессе удаляется.
+
+    rows = await stream_to_sheet(sheet, headers, "SELECT ... FROM ...", make_row=lambda row: [...])
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+
+from gspread.utils import rowcol_to_a1
+
+from config import SHEETS_CHUNK_ROWS
+from db import get_db
+from sheets_gateway import sheets
+
+_locks = {}  # ключ выгрузки -> asyncio.Lock: один лист пишет одна выгрузка
+
+# Копия результата запроса; у каждой выгрузки своё соединение, поэтому имя общее
+_SNAPSHOT_TABLE = "temp.sheet_export_snapshot"
+
+
+def _chunk_hash(values: list) -> str:
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def _cell(value):
+    # None в values.update означает «не менять ячейку», а старое значение надо затереть
+    return "" if value is None else value
+
+
+async def _load_progress(export_key: str, chunk_rows: int) -> list:
+    """Хэши порций, записанных оборвавшейся выгрузкой (пусто, если её не было)"""
+    async with get_db() as db:
+        cursor = await db.execute(
+            "SELECT chunk_rows, chunk_hashes FROM sheet_export_progress WHERE export_key = ?", (export_key,)
+        )
+        row = await cursor.fetchone()
+    if row is None or row[0] != chunk_rows:
+        return []
+    return json.loads(row[1])
+
+
+async def _save_progress(export_key: str, chunk_rows: int, hashes: list):
+    async with get_db(write=True) as db:
+        await db.execute("""
+            INSERT INTO sheet_export_progress (export_key, chunk_rows, chunk_hashes, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(export_key) DO UPDATE SET
+                chunk_rows = excluded.chunk_rows, chunk_hashes = excluded.chunk_hashes, updated_at = excluded.updated_at
+        """, (export_key, chunk_rows, json.dumps(hashes), datetime.now().isoformat()))
+        await db.commit()
+
+
+async def _clear_progress(export_key: str):
+    async with get_db(write=True) as db:
+        await db.execute("DELETE FROM sheet_export_progress WHERE export_key = ?", (export_key,))
+        await db.commit()
+
+
+async def stream_to_sheet(worksheet, headers: list, query: str, params=(), make_row=list,
+                          chunk_rows: int = SHEETS_CHUNK_ROWS) -> int:
+    """
+    Полная перезапись листа: headers в первой строке, со второй —
+    make_row(строка курсора) для каждой строки результата query.
+    Возвращает число выгруженных строк (без заголовков).
+    """
+    export_key = f"{worksheet.spreadsheet_id}:{worksheet.id}"
+    lock = _locks.setdefault(export_key, asyncio.Lock())
+    async with lock:
+        return await _stream_to_sheet(export_key, worksheet, headers, query, params, make_row, chunk_rows)
+
+
+async def _stream_to_sheet(export_key, worksheet, headers, query, params, make_row, chunk_rows) -> int:
+    width = len(headers)
+    saved = await _load_progress(export_key, chunk_rows)
+    hashes = []
+    total = 0
+    skipped = 0
+    if worksheet.col_count < width:
+        await sheets.resize(worksheet, cols=width)
+
+    async with get_db() as db:
+        # Копия большого листа — во временном файле, а не в памяти
+        await db.execute("PRAGMA temp_store=FILE")
+        await db.execute(f"DROP TABLE IF EXISTS {_SNAPSHOT_TABLE}")
+        await db.execute(f"CREATE TABLE {_SNAPSHOT_TABLE} AS {query}", params)
+        try:
+            # Порция 0 — заголовки и первые chunk_rows строк с A1, порция k — строки с k * chunk_rows + 2
+            values = [list(headers)]
+            last_rowid = 0
+            while True:
+                cursor = await db.execute(
+                    f"SELECT rowid, * FROM {_SNAPSHOT_TABLE} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, chunk_rows)
+                )
+                rows = await cursor.fetchall()
+                await cursor.close()
+                if rows:
+                    last_rowid = rows[-1][0]
+                for row in rows:
+                    cells = [_cell(value) for value in make_row(row[1:])]
+                    values.append(cells + [""] * (width - len(cells)))
+                if not values:
+                    break
+
+                index = len(hashes)
+                hashes.append(_chunk_hash(values))
+                if index < len(saved) and saved[index] == hashes[index]:
+                    skipped += 1
+                else:
+                    start = 1 if index == 0 else index * chunk_rows + 2
+                    end = start + len(values) - 1
+                    if end > worksheet.row_count:
+                        # Запас, чтобы не менять размер перед каждой порцией; точный размер — в конце
+                        await sheets.resize(worksheet, rows=max(end, 2 * worksheet.row_count))
+                    await sheets.run_with_retry(worksheet.update, values, f"A{start}")
+                    await _save_progress(export_key, chunk_rows, hashes + saved[len(hashes):])
+
+                total += len(rows)
+                values = []
+                if len(rows) < chunk_rows:
+                    break
+        finally:
+            await db.execute(f"DROP TABLE IF EXISTS {_SNAPSHOT_TABLE}")
+            await db.execute("PRAGMA temp_store=MEMORY")
+
+    used_rows = total + 1
+    # Строк листа не может быть меньше, чем закреплённых плюс одна
+    final_rows = max(used_rows, worksheet.frozen_row_count + 1)
+    col_count = max(worksheet.col_count, width)
+    stale = []
+    if final_rows > used_rows:
+        stale.append(f"A{used_rows + 1}:{rowcol_to_a1(final_rows, col_count)}")
+    if col_count > width:
+        stale.append(f"{rowcol_to_a1(1, width + 1)}:{rowcol_to_a1(used_rows, col_count)}")
+    await sheets.resize(worksheet, rows=final_rows)
+    if stale:
+        await sheets.batch_clear(worksheet, stale)
+    await _clear_progress(export_key)
+
+    if skipped:
+        print(f"[SHEETS] {worksheet.title}: продолжена прерванная выгрузка, пропущено неизменных порций {skipped}")
+    return total
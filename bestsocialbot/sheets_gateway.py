@@ -0,0 +1,188 @@
+"""
+Неблокирующий доступ к Google Sheets.
+
+gspread синхронный, поэтому все запросы к API выполняются в отдельном пуле
+потоков ограниченного размера (SHEETS_MAX_WORKERS), а не в цикле событий
+бота. Клиент авторизуется один раз; объекты Spreadsheet и Worksheet
+кэшируются по URL и названию листа.
+
+    from sheets_gateway import sheets
+
+    ws = await sheets.worksheet(UNIFIED_SHEET_URL, SHEET_MAIN)
+    records = await sheets.run(ws.get_all_records)
+    await sheets.replace(ws, [headers] + rows)
+
+Запросы, которые безопасно повторить (запись диапазона, изменение размера
+листа), выполняются через run_with_retry(): при ответах 429/5xx и сетевых
+ошибках запрос повторяется с экспоненциальной задержкой.
+"""
+
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import gspread
+import requests
+
+from config import CREDENTIALS_FILE, SHEETS_MAX_WORKERS, SHEETS_RETRIES, SHEETS_RETRY_DELAY
+
+# Коды ответа Google API, после которых запрос повторяется
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Ошибка, после которой запрос имеет смысл повторить: квота, сбой сервера, сеть"""
+    if isinstance(error, gspread.exceptions.APIError):
+        return error.code in RETRY_STATUS_CODES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class SheetsGateway:
+    """Кэшированный клиент gspread с вызовами через пул потоков"""
+
+    def __init__(self, credentials_file: str = CREDENTIALS_FILE, max_workers: int = SHEETS_MAX_WORKERS,
+                 retries: int = SHEETS_RETRIES, retry_delay: float = SHEETS_RETRY_DELAY):
+        self.credentials_file = credentials_file
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._executor = None
+        self._client = None
+        self._spreadsheets = {}
+        self._worksheets = {}
+        self._lock = threading.Lock()
+
+    # --- синхронная часть (выполняется в потоках пула) ---
+
+    def _get_client(self) -> gspread.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = gspread.service_account(filename=self.credentials_file)
+            return self._client
+
+    def _open_spreadsheet(self, url: str) -> gspread.Spreadsheet:
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(url)
+        if spreadsheet is None:
+            spreadsheet = self._get_client().open_by_url(url)
+            with self._lock:
+                spreadsheet = self._spreadsheets.setdefault(url, spreadsheet)
+        return spreadsheet
+
+    def _open_worksheet(self, url: str, title: str = None, rows: int = None, cols: int = None) -> gspread.Worksheet:
+        key = (url, title)
+        with self._lock:
+            worksheet = self._worksheets.get(key)
+        if worksheet is None:
+            spreadsheet = self._open_spreadsheet(url)
+            if title is None:
+                worksheet = spreadsheet.sheet1
+            else:
+                try:
+                    worksheet = spreadsheet.worksheet(title)
+                except gspread.WorksheetNotFound:
+                    if rows is None:
+                        raise
+                    worksheet = spreadsheet.add_worksheet(title=title, rows=rows, cols=cols or 26)
+            with self._lock:
+                worksheet = self._worksheets.setdefault(key, worksheet)
+        return worksheet
+
+    # --- асинхронный интерфейс ---
+
+    async def run(self, func, *args, **kwargs):
+        """Выполнение синхронного вызова gspread в пуле потоков"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sheets")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def run_with_retry(self, func, *args, **kwargs):
+        """run() с повторами при 429/5xx и сетевых ошибках (только для идемпотентных запросов)"""
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.run(func, *args, **kwargs)
+            except Exception as e:
+                if attempt == self.retries or not is_transient_error(e):
+                    raise
+                delay = self.retry_delay * 2 ** attempt * random.uniform(1, 1.5)
+                print(f"[SHEETS] {e}; повтор {attempt + 1}/{self.retries} через {delay:.1f} с")
+                await asyncio.sleep(delay)
+
+    async def client(self) -> gspread.Client:
+        return await self.run(self._get_client)
+
+    async def spreadsheet(self, url: str) -> gspread.Spreadsheet:
+        return await self.run(self._open_spreadsheet, url)
+
+    async def worksheet(self, url: str, title: str = None, create_rows: int = None,
+                        create_cols: int = None) -> gspread.Worksheet:
+        """
+        Лист таблицы по URL и названию (без названия — первый лист).
+        Если заданы create_rows/create_cols, отсутствующий лист создаётся,
+        иначе выбрасывается gspread.WorksheetNotFound.
+        """
+        return await self.run(self._open_worksheet, url, title, create_rows, create_cols)
+
+    async def get_all_records(self, worksheet: gspread.Worksheet, **kwargs) -> list:
+        return await self.run(worksheet.get_all_records, **kwargs)
+
+    async def get_all_values(self, worksheet: gspread.Worksheet) -> list:
+        return await self.run(worksheet.get_all_values)
+
+    async def row_values(self, worksheet: gspread.Worksheet, row: int) -> list:
+        return await self.run(worksheet.row_values, row)
+
+    async def update(self, worksheet: gspread.Worksheet, range_name: str, values: list):
+        return await self.run(worksheet.update, values, range_name)
+
+    async def batch_update(self, worksheet: gspread.Worksheet, data: list):
+        """Запись нескольких диапазонов одним запросом: [{"range": "A2:L2", "values": [[...]]}, ...]"""
+        return await self.run(worksheet.batch_update, data)
+
+    async def resize(self, worksheet: gspread.Worksheet, rows: int = None, cols: int = None):
+        return await self.run_with_retry(worksheet.resize, rows, cols)
+
+    async def batch_clear(self, worksheet: gspread.Worksheet, ranges: list):
+        return await self.run_with_retry(worksheet.batch_clear, ranges)
+
+    async def add_rows(self, worksheet: gspread.Worksheet, rows: int):
+        return await self.run(worksheet.add_rows, rows)
+
+    async def append_row(self, worksheet: gspread.Worksheet, values: list):
+        return await self.run(worksheet.append_row, values)
+
+    async def append_rows(self, worksheet: gspread.Worksheet, rows: list):
+        return await self.run(worksheet.append_rows, rows)
+
+    async def clear(self, worksheet: gspread.Worksheet):
+        return await self.run(worksheet.clear)
+
+    async def replace(self, worksheet: gspread.Worksheet, rows: list):
+        """Полная перезапись листа: очистка и запись rows с A1 за один заход в пул"""
+        def _replace():
+            worksheet.clear()
+            if rows:
+                worksheet.update(rows, 'A1')
+        return await self.run(_replace)
+
+    def invalidate(self, url: str = None):
+        """Сброс кэша листов (после удаления/переименования листов вручную)"""
+        with self._lock:
+            if url is None:
+                self._spreadsheets.clear()
+                self._worksheets.clear()
+            else:
+                self._spreadsheets.pop(url, None)
+                for key in [key for key in self._worksheets if key[0] == url]:
+                    del self._worksheets[key]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+sheets = SheetsGateway()
@@ -0,0 +1,137 @@
+"""
+Очередь выгрузок в Google Sheets (outbox).
+
+Обработчики пользователей не обращаются к Google API сами, а только кладут
+событие в таблицу sheets_outbox через enqueue(). Один фоновый воркер раз в
+SHEETS_OUTBOX_INTERVAL секунд забирает накопившиеся события и выполняет по
+одной выгрузке на каждый вид задачи: сотня заявок за интервал превращается
+в один запуск выгрузки листа. За итерацию берётся не больше
+SHEETS_OUTBOX_BATCH событий каждого вида, остальные ждут следующей. При
+ошибке события остаются в таблице и повторяются с экспоненциальной
+задержкой; после перезапуска бота незавершённые выгрузки выполняются.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from config import SHEETS_OUTBOX_BATCH, SHEETS_OUTBOX_INTERVAL, SHEETS_OUTBOX_MAX_BACKOFF
+from db import get_db
+
+
+async def _export_main_survey(payloads: list):
+    from google_sheets import sync_db_to_google_sheets
+    # Статистику пересчитываем только для пользователей из событий;
+    # события без user_id — полный пересчёт
+    user_ids = [payload.get("user_id") for payload in payloads]
+    if None in user_ids:
+        user_ids = None
+    return await sync_db_to_google_sheets(user_ids)
+
+
+async def _export_order_requests(payloads: list):
+    from google_sheets import sync_order_requests_to_sheets
+    return await sync_order_requests_to_sheets()
+
+
+async def _export_approved_requests(payloads: list):
+    from automarket_sheets import export_requests_to_sheet
+    return await export_requests_to_sheet(payloads)
+
+
+async def _export_invite_bot_joins(payloads: list):
+    from invite_tracking import mark_channel_subscriptions
+    # Как и раньше при входе в бота: отмечается первая строка приглашённого без отметки
+    await mark_channel_subscriptions(
+        (payload["user_id"] for payload in payloads if payload.get("user_id")), first_only=True
+    )
+
+
+# Вид задачи -> выгрузка. Выгрузка получает список payload всех накопившихся
+# событий этого вида и возвращает False (или выбрасывает исключение) при ошибке.
+JOBS = {
+    "main_survey": _export_main_survey,
+    "order_requests": _export_order_requests,
+    "approved_requests": _export_approved_requests,
+    "invite_bot_joins": _export_invite_bot_joins,
+}
+
+
+async def enqueue(job: str, payload: dict = None):
+    """Постановка выгрузки в очередь (вызывается из обработчиков)"""
+    if job not in JOBS:
+        raise ValueError(f"Неизвестная задача выгрузки: {job}")
+    async with get_db(write=True) as db:
+        await db.execute(
+            "INSERT INTO sheets_outbox (job, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+            (job, json.dumps(payload, ensure_ascii=False) if payload is not None else None,
+             datetime.now().isoformat(), time.time())
+        )
+        await db.commit()
+
+
+def _backoff(attempts: int) -> float:
+    return min(SHEETS_OUTBOX_INTERVAL * 2 ** attempts, SHEETS_OUTBOX_MAX_BACKOFF)
+
+
+async def process_outbox() -> int:
+    """Одна итерация воркера. Возвращает количество обработанных событий."""
+    async with get_db() as db:
+        cursor = await db.execute("""
+            SELECT id, job, payload, attempts FROM (
+                SELECT id, job, payload, attempts,
+                       ROW_NUMBER() OVER (PARTITION BY job ORDER BY id) AS position
+                FROM sheets_outbox WHERE next_attempt_at <= ?
+            )
+            WHERE position <= ? ORDER BY id
+        """, (time.time(), SHEETS_OUTBOX_BATCH))
+        rows = await cursor.fetchall()
+
+    pending = {}
+    for event_id, job, payload, attempts in rows:
+        ids, payloads, max_attempts = pending.get(job, ([], [], 0))
+        ids.append(event_id)
+        payloads.append(json.loads(payload) if payload is not None else {})
+        pending[job] = (ids, payloads, max(max_attempts, attempts))
+
+    done = 0
+    for job, (ids, payloads, attempts) in pending.items():
+        ids_json = json.dumps(ids)
+        handler = JOBS.get(job)
+        try:
+            if handler is None:
+                raise ValueError(f"Неизвестная задача выгрузки: {job}")
+            if await handler(payloads) is False:
+                raise RuntimeError("выгрузка вернула ошибку")
+        except Exception as e:
+            delay = _backoff(attempts)
+            print(f"[OUTBOX] Ошибка выгрузки {job} ({len(ids)} событий, попытка {attempts + 1}): {e}. "
+                  f"Повтор через {delay:.0f} с")
+            async with get_db(write=True) as db:
+                await db.execute(
+                    "UPDATE sheets_outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                    "WHERE id IN (SELECT value FROM json_each(?))",
+                    (time.time() + delay, str(e)[:500], ids_json)
+                )
+                await db.commit()
+            continue
+
+        async with get_db(write=True) as db:
+            await db.execute("DELETE FROM sheets_outbox WHERE id IN (SELECT value FROM json_each(?))", (ids_json,))
+            await db.commit()
+        print(f"[OUTBOX] Выгрузка {job}: обработано событий {len(ids)}")
+        done += len(ids)
+    return done
+
+
+async def run_outbox_worker():
+    """Фоновый воркер очереди выгрузок (запускается в main.start_background_tasks)"""
+    while True:
+        try:
+            await process_outbox()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[OUTBOX] Ошибка воркера: {e}")
+        await asyncio.sleep(SHEETS_OUTBOX_INTERVAL)
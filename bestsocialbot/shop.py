@@ -1,7 +1,7 @@
 from aiogram import F, types
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
 from config import ADMIN_ID, HOUSING_CATEGORIES
 from db import check_channel_subscription
 from dispatcher import dp
@@ -12,13 +12,14 @@ from captcha import send_captcha, CaptchaStates, process_captcha_selection
 from aiogram.fsm.context import FSMContext
 from cart import cart_order_start
 from google_sheets import sync_from_sheets_to_db
+from listings import ListingKind, ListingView, fixed_view, open_listing, register_listing
 
 SHOWCASE_TEXT = "ДОБРО ПОЖАЛОВАТЬ В ЧАТ-БОТ СООБЩЕСТВА!"
 
 
 async def check_survey_completed(user_id: int) -> bool:
     """Проверка, прошел ли пользователь опрос"""
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute(
             "SELECT has_completed_survey FROM users WHERE user_id = ?",
             (user_id,)
@@ -299,7 +300,7 @@ async def my_profile(callback: CallbackQuery):
 
     user_id = callback.from_user.id
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute(
             "SELECT username, first_name, last_name, created_at, full_name FROM users WHERE user_id = ?",
             (user_id,)
@@ -426,7 +427,7 @@ async def product_catalog(callback: CallbackQuery):
     builder = InlineKeyboardBuilder()
 
     # Получаем категории товаров из БД из таблицы product_purposes
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT name FROM product_purposes
         """)
@@ -481,7 +482,7 @@ async def service_catalog(callback: CallbackQuery):
     builder = InlineKeyboardBuilder()
 
     # Получаем категории услуг из таблицы service_purposes
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT name FROM service_purposes
         """)
@@ -537,7 +538,7 @@ async def property_catalog(callback: CallbackQuery):
     builder = InlineKeyboardBuilder()
 
     # Получаем категории предложений из БД
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         # Для предложений (item_type = 'offer')
         cursor = await db.execute("""
             SELECT DISTINCT category FROM order_requests 
@@ -587,221 +588,178 @@ async def property_catalog(callback: CallbackQuery):
     await callback.answer()
 
 
+# Списки позиций в категориях и новинках (listings.py)
+
+def _request_item_text(item_id, title, price, additional_info) -> str:
+    """Позиция заявки в списке категории: ID, название, цена, начало описания (additional_info)"""
+    short_desc = additional_info[:100] + "..." if additional_info and len(additional_info) > 100 else additional_info or ""
+    text = f"🆔 {item_id}: {title}\n"
+    if price:
+        text += f"💰 Цена: {price}\n"
+    if short_desc:
+        text += f"📝 {short_desc}\n"
+    return text + "────\n"
+
+
+def _render_category_request(item_type: str):
+    """Товар/услуга в категории: кнопки «Просмотр» и «В корзину»"""
+    def render(row, number):
+        item_id, title, price, additional_info = row
+        return _request_item_text(item_id, title, price, additional_info), [
+            types.InlineKeyboardButton(text=f"👁 {title[:15]}", callback_data=f"item_req_{item_type}_{item_id}"),
+            types.InlineKeyboardButton(text="➕ В корзину", callback_data=f"add_to_cart_{item_type}_{item_id}"),
+        ]
+    return render
+
+
+def _render_category_offer(row, number):
+    """Предложение в категории: кнопки «Просмотр» и «➕ <название>»"""
+    item_id, title, price, additional_info = row
+    return _request_item_text(item_id, title, price, additional_info), [
+        types.InlineKeyboardButton(text="👁 Просмотр", callback_data=f"view_item_offer_{item_id}"),
+        types.InlineKeyboardButton(text=f"➕ {title[:15]}", callback_data=f"add_to_cart_offer_{item_id}"),
+    ]
+
+
+def _render_new_item(callback_data: str, no_price: str):
+    """Новинка: одна кнопка «<название>.. - <цена>»; callback_data — шаблон с {item_id}"""
+    def render(row, number):
+        item_id, title, price = row
+        price_text = f"{price}₽" if price else no_price
+        return "", [types.InlineKeyboardButton(
+            text=f"{title[:20]}.. - {price_text}",
+            callback_data=callback_data.format(item_id=item_id)
+        )]
+    return render
+
+
+def _category_view(title: str, empty_text: str, back: str, create_text: str, create_form: str):
+    """Оформление списка категории; params — (тип позиции, категория)"""
+    def view(params):
+        category_name = params[1]
+        return ListingView(
+            title=title.format(category=category_name),
+            empty_text=empty_text,
+            buttons=[("◀️ Назад к каталогу", back)],
+            empty_buttons=[(create_text, f"{create_form}|{category_name}")]
+        )
+    return view
+
+
+def _new_items_view(title: str, empty_text: str):
+    """Оформление списка новинок"""
+    return fixed_view(ListingView(title, empty_text, buttons=[("◀️ Назад", "new_items")],
+                                  empty_buttons=[("Пока пусто", "empty")]))
+
+
+_CATEGORY_REQUESTS_WHERE = "item_type = ? AND category = ? AND status IN ('active', 'approved')"
+_NEW_REQUESTS_WHERE = "item_type = ? AND status IN ('active', 'approved')"
+
+register_listing("shop_category_product", ListingKind(
+    "order_requests", "id, title, price, additional_info", _CATEGORY_REQUESTS_WHERE,
+    _render_category_request("product"),
+    _category_view("📦 **Товары в категории: {category}**\n\n", "В этой категории пока нет товаров.\n",
+                   "product_catalog", "📋 Создать заявку на товар", "product_card_form"),
+    row_width=2
+))
+register_listing("shop_category_service", ListingKind(
+    "order_requests", "id, title, price, additional_info", _CATEGORY_REQUESTS_WHERE,
+    _render_category_request("service"),
+    _category_view("🛠 **Услуги в категории: {category}**\n\n", "В этой категории пока нет услуг.\n",
+                   "service_catalog", "📋 Создать заявку на услугу", "service_card_form"),
+    row_width=2
+))
+register_listing("shop_category_offer", ListingKind(
+    "order_requests", "id, title, price, additional_info", _CATEGORY_REQUESTS_WHERE,
+    _render_category_offer,
+    _category_view("🤝 **Предложения в категории: {category}**\n\n", "В этой категории пока нет предложений.\n",
+                   "property_catalog", "📋 Создать карточку предложения", "offer_card_form"),
+    row_width=2
+))
+register_listing("new_product", ListingKind(
+    "order_requests", "id, title, price", _NEW_REQUESTS_WHERE,
+    _render_new_item("item_req_product_{item_id}_new", "Цена не указана"),
+    _new_items_view("🆕 **Новые товары**\n\n", "Товаров пока нет."),
+    summary="Последние поступления:\n\n"
+))
+register_listing("new_service", ListingKind(
+    "order_requests", "id, title, price", _NEW_REQUESTS_WHERE,
+    _render_new_item("item_req_service_{item_id}_new", "Цена не указана"),
+    _new_items_view("🆕 **Новые услуги**\n\n", "Услуг пока нет."),
+    summary="Последние добавленные услуги:\n\n"
+))
+register_listing("new_offer", ListingKind(
+    "order_requests", "id, title, price", _NEW_REQUESTS_WHERE,
+    _render_new_item("item_offer_{item_id}", "?"),
+    _new_items_view("🆕 **Новые предложения**\n\n", "Предложений пока нет."),
+    summary="Последние добавленные предложения:\n\n"
+))
+
+
 # Обработчики для просмотра товаров в категории
 @dp.callback_query(F.data.startswith("product_cat_"))
 async def show_product_category_items(callback: CallbackQuery):
-    """Показать товары в выбранной категории"""
+    """Показать товары в выбранной категории (постранично)"""
     if await check_blocked_user(callback):
         return
 
     category_name = callback.data.replace("product_cat_", "")
 
-    # Получаем товары из этой категории из таблицы order_requests
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, additional_info 
-            FROM order_requests 
-            WHERE item_type = 'product' AND category = ?
-            AND status IN ('active', 'approved')
-            ORDER BY created_at DESC
-        """, (category_name,))
-        items = await cursor.fetchall()
-
-    builder = InlineKeyboardBuilder()
-
-    if items:
-        response = f"📦 **Товары в категории: {category_name}**\n\n"
-        for item_id, title, price, additional_info in items:
-            # Используем additional_info как описание (вместо description)
-            description = additional_info
-            short_desc = description[:100] + "..." if description and len(description) > 100 else description or ""
-            response += f"🆔 {item_id}: {title}\n"
-            if price:
-                response += f"💰 Цена: {price}\n"
-            if short_desc:
-                response += f"📝 {short_desc}\n"
-            response += "────\n"
-
-            # Добавляем кнопки: Просмотр и В корзину
-            builder.add(types.InlineKeyboardButton(
-                text=f"👁 {title[:15]}",
-                callback_data=f"item_req_product_{item_id}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text="➕ В корзину",
-                callback_data=f"add_to_cart_product_{item_id}"
-            ))
-    else:
-        response = f"📦 **Товары в категории: {category_name}**\n\n"
-        response += "В этой категории пока нет товаров.\n"
-        builder.add(types.InlineKeyboardButton(
-            text="📋 Создать заявку на товар",
-            callback_data=f"product_card_form|{category_name}"
-        ))
-
-    builder.add(types.InlineKeyboardButton(text="◀️ Назад к каталогу", callback_data="product_catalog"))
-
-    # Оптимальное расположение: (Просмотр, В корзину) - по 2 в строке, затем назад
-    if items:
-        # Создаем массив размеров строк: [2, 2, 2...] для каждой пары кнопок
-        row_sizes = [2] * len(items)
-        row_sizes.append(1) # Кнопка назад
-        builder.adjust(*row_sizes)
-    else:
-        builder.adjust(1, 1)  # Обе кнопки по одной
+    response, markup = await open_listing("shop_category_product", ("product", category_name))
 
     if callback.message.content_type == types.ContentType.TEXT:
         await callback.message.edit_text(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     else:
         await callback.message.edit_caption(
             caption=response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     await callback.answer()
 
 
 @dp.callback_query(F.data.startswith("service_cat_"))
 async def show_service_category_items(callback: CallbackQuery):
-    """Показать услуги в выбранной категории"""
+    """Показать услуги в выбранной категории (постранично)"""
     if await check_blocked_user(callback):
         return
 
     category_name = callback.data.replace("service_cat_", "")
 
-    # Получаем услуги из этой категории из таблицы order_requests
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, additional_info 
-            FROM order_requests 
-            WHERE item_type = 'service' AND category = ?
-            AND status IN ('active', 'approved')
-            ORDER BY created_at DESC
-        """, (category_name,))
-        items = await cursor.fetchall()
-
-    builder = InlineKeyboardBuilder()
-
-    if items:
-        response = f"🛠 **Услуги в категории: {category_name}**\n\n"
-        for item_id, title, price, additional_info in items:
-            # Используем additional_info как описание
-            description = additional_info
-            short_desc = description[:100] + "..." if description and len(description) > 100 else description or ""
-            response += f"🆔 {item_id}: {title}\n"
-            if price:
-                response += f"💰 Цена: {price}\n"
-            if short_desc:
-                response += f"📝 {short_desc}\n"
-            response += "────\n"
-
-            # Добавляем кнопки: Просмотр и В корзину
-            builder.add(types.InlineKeyboardButton(
-                text=f"👁 {title[:15]}",
-                callback_data=f"item_req_service_{item_id}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text="➕ В корзину",
-                callback_data=f"add_to_cart_service_{item_id}"
-            ))
-    else:
-        response = f"🛠 **Услуги в категории: {category_name}**\n\n"
-        response += "В этой категории пока нет услуг.\n"
-        builder.add(types.InlineKeyboardButton(
-            text="📋 Создать заявку на услугу",
-            callback_data=f"service_card_form|{category_name}"
-        ))
-
-    builder.add(types.InlineKeyboardButton(text="◀️ Назад к каталогу", callback_data="service_catalog"))
-
-    # Оптимальное расположение: (Просмотр, В корзину)
-    if items:
-        row_sizes = [2] * len(items)
-        row_sizes.append(1)
-        builder.adjust(*row_sizes)
-    else:
-        builder.adjust(1, 1)  # Обе кнопки по одной
+    response, markup = await open_listing("shop_category_service", ("service", category_name))
 
     if callback.message.content_type == types.ContentType.TEXT:
         await callback.message.edit_text(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     else:
         await callback.message.edit_caption(
             caption=response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     await callback.answer()
 
 
 @dp.callback_query(F.data.startswith("pc_"))
 async def show_property_category_items(callback: CallbackQuery):
-    """Показать предложения в выбранной категории"""
+    """Показать предложения в выбранной категории (постранично)"""
     if await check_blocked_user(callback):
         return
 
     category_name = callback.data.replace("pc_", "")
 
-    # Получаем предложения из этой категории из таблицы order_requests
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price, additional_info 
-            FROM order_requests 
-            WHERE item_type = 'offer' AND category = ?
-            AND status IN ('active', 'approved')
-            ORDER BY created_at DESC
-        """, (category_name,))
-        items = await cursor.fetchall()
-
-    builder = InlineKeyboardBuilder()
-
-    if items:
-        response = f"🤝 **Предложения в категории: {category_name}**\n\n"
-        for item_id, title, price, additional_info in items:
-            # Используем additional_info как описание
-            description = additional_info
-            short_desc = description[:100] + "..." if description and len(description) > 100 else description or ""
-            response += f"🆔 {item_id}: {title}\n"
-            if price:
-                response += f"💰 Цена: {price}\n"
-            if short_desc:
-                response += f"📝 {short_desc}\n"
-            response += "────\n"
-
-            builder.add(types.InlineKeyboardButton(
-                text="👁 Просмотр",
-                callback_data=f"view_item_offer_{item_id}"
-            ))
-            builder.add(types.InlineKeyboardButton(
-                text=f"➕ {title[:15]}",
-                callback_data=f"add_to_cart_offer_{item_id}"
-            ))
-    else:
-        response = f"🤝 **Предложения в категории: {category_name}**\n\n"
-        response += "В этой категории пока нет предложений.\n"
-        builder.add(types.InlineKeyboardButton(
-            text="📋 Создать карточку предложения",
-            callback_data=f"offer_card_form|{category_name}"
-        ))
-
-    builder.add(types.InlineKeyboardButton(text="◀️ Назад к каталогу", callback_data="property_catalog"))
-
-    # Оптимальное расположение
-    if items:
-        builder.adjust(2)  # По 2 кнопки в ряд (Просмотр + Добавить)
-    else:
-        builder.adjust(1, 1)  # Обе кнопки по одной
+    response, markup = await open_listing("shop_category_offer", ("offer", category_name))
 
     if callback.message.content_type == types.ContentType.PHOTO:
         await callback.message.delete()
-        await callback.message.answer(response, reply_markup=builder.as_markup())
+        await callback.message.answer(response, reply_markup=markup)
     else:
         await callback.message.edit_text(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     await callback.answer()
 
@@ -855,141 +813,64 @@ async def new_items_menu(callback: CallbackQuery):
 
 @dp.callback_query(F.data == "new_products")
 async def show_new_products(callback: CallbackQuery):
-    """Показать 10 последних добавленных товаров"""
+    """Показать последние добавленные товары (постранично, новые выше)"""
     if await check_blocked_user(callback):
         return
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Берем из order_requests
-        cursor = await db.execute("""
-            SELECT id, title, price 
-            FROM order_requests 
-            WHERE item_type = 'product' AND status IN ('active', 'approved')
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """)
-        items = await cursor.fetchall()
-
-    builder = InlineKeyboardBuilder()
-
-    if items:
-        response = "🆕 **Новые товары**\n\nПоследние поступления:\n\n"
-        for item_id, title, price in items:
-            price_text = f"{price}₽" if price else "Цена не указана"
-            builder.add(types.InlineKeyboardButton(
-                text=f"{title[:20]}.. - {price_text}",
-                callback_data=f"item_req_product_{item_id}_new"
-            ))
-    else:
-        response = "🆕 **Новые товары**\n\nТоваров пока нет."
-        builder.add(types.InlineKeyboardButton(text="Пока пусто", callback_data="empty"))
-
-    builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="new_items"))
-    builder.adjust(1)
+    response, markup = await open_listing("new_product", ("product",))
 
     try:
         await callback.message.edit_text(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     except Exception:
         await callback.message.delete()
         await callback.message.answer(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     await callback.answer()
 
 @dp.callback_query(F.data == "new_services")
 async def show_new_services(callback: CallbackQuery):
-    """Показать 10 последних добавленных услуг"""
+    """Показать последние добавленные услуги (постранично, новые выше)"""
     if await check_blocked_user(callback):
         return
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        cursor = await db.execute("""
-            SELECT id, title, price 
-            FROM order_requests 
-            WHERE item_type = 'service' AND status IN ('active', 'approved')
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """)
-        items = await cursor.fetchall()
-
-    builder = InlineKeyboardBuilder()
-
-    if items:
-        response = "🆕 **Новые услуги**\n\nПоследние добавленные услуги:\n\n"
-        for item_id, title, price in items:
-            price_text = f"{price}₽" if price else "Цена не указана"
-            builder.add(types.InlineKeyboardButton(
-                text=f"{title[:20]}.. - {price_text}",
-                callback_data=f"item_req_service_{item_id}_new"
-            ))
-    else:
-        response = "🆕 **Новые услуги**\n\nУслуг пока нет."
-        builder.add(types.InlineKeyboardButton(text="Пока пусто", callback_data="empty"))
-
-    builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="new_items"))
-    builder.adjust(1)
+    response, markup = await open_listing("new_service", ("service",))
 
     try:
         await callback.message.edit_text(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     except Exception:
         await callback.message.delete()
         await callback.message.answer(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     await callback.answer()
 
 @dp.callback_query(F.data == "new_offers")
 async def show_new_offers(callback: CallbackQuery):
-    """Показать 10 последних предложений"""
+    """Показать последние добавленные предложения (постранично, новые выше)"""
     if await check_blocked_user(callback):
         return
 
-    async with aiosqlite.connect("bot_database.db") as db:
-        # Для предложений используем order_requests
-        cursor = await db.execute("""
-            SELECT id, title, price 
-            FROM order_requests 
-            WHERE item_type = 'offer' AND status IN ('active', 'approved')
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """)
-        items = await cursor.fetchall()
-
-    builder = InlineKeyboardBuilder()
-
-    if items:
-        response = "🆕 **Новые предложения**\n\nПоследние добавленные предложения:\n\n"
-        for item_id, title, price in items:
-            price_text = f"{price}₽" if price else "?"
-            builder.add(types.InlineKeyboardButton(
-                text=f"{title[:20]}.. - {price_text}",
-                callback_data=f"item_offer_{item_id}"
-            ))
-    else:
-        response = "🆕 **Новые предложения**\n\nПредложений пока нет."
-        builder.add(types.InlineKeyboardButton(text="Пока пусто", callback_data="empty"))
-
-    builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data="new_items"))
-    builder.adjust(1)
+    response, markup = await open_listing("new_offer", ("offer",))
 
     try:
         await callback.message.edit_text(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     except Exception:
         await callback.message.delete()
         await callback.message.answer(
             response,
-            reply_markup=builder.as_markup()
+            reply_markup=markup
         )
     await callback.answer()
 
@@ -1009,7 +890,7 @@ async def show_req_product_details(callback: CallbackQuery):
 
     is_new = "new" in parts
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT title, additional_info, price, category, contact, user_id, images
             FROM order_requests 
@@ -1024,7 +905,7 @@ async def show_req_product_details(callback: CallbackQuery):
     title, description, price, category, contact, user_id, images_json = item
     
     username = None
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT username FROM users WHERE user_id = ?", (user_id,))
         user_row = await cursor.fetchone()
         if user_row:
@@ -1097,7 +978,7 @@ async def show_req_service_details(callback: CallbackQuery):
 
     is_new = "new" in parts
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT title, additional_info, price, category, contact, user_id, images
             FROM order_requests 
@@ -1112,7 +993,7 @@ async def show_req_service_details(callback: CallbackQuery):
     title, description, price, category, contact, user_id, images_json = item
     
     username = None
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT username FROM users WHERE user_id = ?", (user_id,))
         user_row = await cursor.fetchone()
         if user_row:
@@ -1178,7 +1059,7 @@ async def show_offer_details(callback: CallbackQuery):
 
     item_id = int(callback.data.split("_")[-1])
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT title, additional_info, price, category, contact, user_id, images
             FROM order_requests 
@@ -1194,7 +1075,7 @@ async def show_offer_details(callback: CallbackQuery):
     
     # Пытаемся получить username
     username = None
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT username FROM users WHERE user_id = ?", (user_id,))
         user_row = await cursor.fetchone()
         if user_row:
@@ -4,8 +4,8 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-import aiosqlite
-import asyncio
+from db import get_db
+from user_cache import invalidate_user
 from integration import *
 from datetime import datetime
 from db import check_channel_subscription
@@ -110,7 +110,7 @@ async def survey_start(callback: CallbackQuery, state: FSMContext):
     #    await callback.answer()
     #    return
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("SELECT has_completed_survey FROM users WHERE user_id = ?", (user_id,))
         user = await cursor.fetchone()
 
@@ -138,12 +138,10 @@ async def start_survey(callback: CallbackQuery, state: FSMContext):
 
 from filters import IsBadWord
 
-from filters import IsBadWord
+from filters import IsBadWord, contains_bad_words
 
 async def check_bad_words(message: Message, state: FSMContext) -> bool:
-    filter_instance = IsBadWord()
-    is_bad = await filter_instance(message)
-    if is_bad:
+    if contains_bad_words(message.text or message.caption or ""):
         await message.delete()
         await message.answer("❌ Использование нецензурной лексики запрещено в нашем сообществе!")
         return True
@@ -389,7 +387,7 @@ async def process_q16(message: Message, state: FSMContext):
     except Exception:
         pass
 
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db(write=True) as db:
         # Обновляем информацию о прохождении опроса
         await db.execute(
             """
@@ -425,11 +423,20 @@ async def process_q16(message: Message, state: FSMContext):
         )
 
         # Сохраняем ответы на вопросы
-        for q_num in range(1, 17):
-            await db.execute(
-                "INSERT INTO survey_answers (user_id, question_id, answer_text, answered_at) VALUES (?, ?, ?, ?)",
-                (user_id, q_num, data.get(f"q{q_num}", ""), datetime.now().isoformat())
-            )
+        answered_at = datetime.now().isoformat()
+        answers = [data.get(f"q{q_num}", "") for q_num in range(1, 17)]
+        await db.executemany(
+            "INSERT INTO survey_answers (user_id, question_id, answer_text, answered_at) VALUES (?, ?, ?, ?)",
+            [(user_id, q_num, answer, answered_at) for q_num, answer in enumerate(answers, 1)]
+        )
+        # и одной строкой для выгрузки основного листа
+        await db.execute(
+            f"""
+            INSERT OR REPLACE INTO survey_responses (user_id, {", ".join(f"q{q_num}" for q_num in range(1, 17))}, answered_at)
+            VALUES ({", ".join("?" * 18)})
+            """,
+            (user_id, *answers, answered_at)
+        )
     
         # Сохраняем бонусы
         await db.execute(
@@ -437,9 +444,10 @@ async def process_q16(message: Message, state: FSMContext):
             (user_id, bonus_total, bonus_total, datetime.now().isoformat())
         )
         await db.commit()
+    invalidate_user(user_id)
 
-    from google_sheets import sync_db_to_google_sheets
-    asyncio.create_task(sync_db_to_google_sheets())
+    from sheets_outbox import enqueue
+    await enqueue("main_survey", {"user_id": user_id})
 
     await message.answer(
         """Уважаемый подписчик! 
@@ -0,0 +1,231 @@
+"""
+Справочники категорий каталога в памяти (назначения, типы, классы, виды,
+иные характеристики товаров и услуг, категории/классы/типы/виды предложений).
+
+Справочники меняет только администратор, а читаются они на каждом шаге
+формы карточки и каталога, в том числе по кнопке «Назад». Поэтому при
+запуске бота все справочники читаются одним подключением в снимок, и по
+снимку сразу строятся клавиатуры меню формы карточки; клавиатуры каталога
+(callback_data зависит от пути по меню) строятся при первом показе и
+запоминаются. Шаги меню отрисовываются без обращения к SQLite.
+
+Версия справочников хранится в SQLite (taxonomy_version): триггеры
+увеличивают её в той же транзакции, что и любое изменение справочника, в
+каком бы воркере оно ни было сделано. Кэш сверяет свою версию с базой не
+чаще раза в TAXONOMY_VERSION_CHECK_INTERVAL секунд (чтение одной строки по
+ключу) и, если она изменилась, перечитывает снимок и сбрасывает клавиатуры.
+Код, который меняет справочники (category_manager, admin_categories,
+admin_catalog_manager, sync_categories_from_sheet, добавление значения
+администратором из формы карточки), вызывает invalidate_taxonomy(), чтобы
+в своём воркере сверить версию сразу, не дожидаясь интервала.
+"""
+
+import time
+
+from aiogram import types
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from catalog_facets import facet_value_ids
+from config import HOUSING_CATEGORIES, TAXONOMY_VERSION_CHECK_INTERVAL
+from db import get_db
+from user_cache import TTLCache
+
+# Справочник -> запрос (id, name)
+TAXONOMY_QUERIES = {
+    "product_purposes": "SELECT id, name FROM product_purposes ORDER BY id",
+    "product_types": "SELECT id, name FROM product_types ORDER BY id",
+    "product_classes": "SELECT id, name FROM product_classes ORDER BY id",
+    "product_views": "SELECT id, name FROM product_views ORDER BY id",
+    "product_other_chars": "SELECT id, name FROM product_other_chars ORDER BY id",
+    "service_purposes": "SELECT id, name FROM service_purposes ORDER BY id",
+    "service_types": "SELECT id, name FROM service_types ORDER BY id",
+    "service_classes": "SELECT id, name FROM service_classes ORDER BY id",
+    "service_views": "SELECT id, name FROM service_views ORDER BY id",
+    "service_other_chars": "SELECT id, name FROM service_other_chars ORDER BY id",
+    "offer_categories": "SELECT id, name FROM categories WHERE catalog_type = 'offer' ORDER BY id",
+    "offer_classes": "SELECT id, name FROM offer_classes ORDER BY id",
+    "offer_types": "SELECT id, name FROM offer_types ORDER BY id",
+    "offer_views": "SELECT id, name FROM offer_views ORDER BY id",
+}
+
+# Меню формы карточки: префикс callback_data -> (справочник, вид значения facet_values, «Назад»)
+CARD_FORM_MENUS = {
+    "prod_cat": ("product_purposes", "category", "back_prod_op"),
+    "prod_cls": ("product_classes", "item_class", "back_prod_cat"),
+    "prod_typ": ("product_types", "item_type_detail", "back_prod_cls"),
+    "prod_vw": ("product_views", "item_kind", "back_prod_typ"),
+    "serv_cat": ("service_purposes", "category", "back_serv_op"),
+    "serv_cls": ("service_classes", "item_class", "back_serv_cat"),
+    "serv_typ": ("service_types", "item_type_detail", "back_serv_cls"),
+    "serv_vw": ("service_views", "item_kind", "back_serv_typ"),
+    "off_cat": ("offer_categories", "category", "back_off_op"),
+    "off_cls": ("offer_classes", "item_class", "back_off_cat"),
+    "off_typ": ("offer_types", "item_type_detail", "back_off_cls"),
+    "off_vw": ("offer_views", "item_kind", "back_off_typ"),
+}
+
+# Категории жилья выбираются в своём разделе, в формах товаров и услуг их нет
+_HOUSING_FILTERED = {"product_purposes", "service_purposes"}
+
+# Каталог по уровням: «Назад» с первого уровня, кнопка «Показать все»
+# и уровни (справочник, префикс callback_data, текст при пустом справочнике)
+CATALOG_MENUS = {
+    "tech": {
+        "back": "personal_account",
+        "show": ("show_tech", "🔍 Показать все товары"),
+        "levels": (
+            ("product_purposes", "purpose_tech", "Пока нет категорий"),
+            ("product_types", "type_tech", "Пока нет подкатегорий"),
+            ("product_classes", "class_tech", "Пока нет классов"),
+            ("product_views", "view_tech", "Пока нет видов"),
+            ("product_other_chars", "other_tech", None),
+        ),
+    },
+    "services": {
+        "back": "personal_account",
+        "show": ("show_service", "🔍 Показать все услуги"),
+        "levels": (
+            ("service_purposes", "purpose_service", "Пока нет категорий"),
+            ("service_types", "type_service", "Пока нет подкатегорий"),
+            ("service_classes", "class_service", "Пока нет классов"),
+            ("service_views", "view_service", "Пока нет видов"),
+            ("service_other_chars", "other_service", None),
+        ),
+    },
+}
+
+# Сколько клавиатур уровней каталога (разных путей по меню) держать в памяти
+CATALOG_KEYBOARDS_CACHE_SIZE = 2048
+
+_version = None         # версия taxonomy_version, по которой построен снимок
+_checked_at = 0.0       # когда (monotonic) версия последний раз сверялась с базой
+_taxonomy = None        # справочник -> [(id, name)] по id
+_names = None           # справочник -> {id: name}
+_card_form_keyboards = {}  # префикс меню формы карточки -> InlineKeyboardMarkup
+_catalog_keyboards = TTLCache(CATALOG_KEYBOARDS_CACHE_SIZE, float("inf"))  # (каталог, *путь) -> InlineKeyboardMarkup
+
+
+def invalidate_taxonomy():
+    """Справочники изменены в этом воркере: сверить версию с базой при следующем обращении"""
+    global _checked_at
+    _checked_at = 0.0
+
+
+async def _read_version(db) -> int:
+    cursor = await db.execute("SELECT version FROM taxonomy_version WHERE id = 1")
+    row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+async def load_taxonomy():
+    """Прочитать все справочники и построить клавиатуры формы карточки"""
+    global _version, _checked_at, _taxonomy, _names
+    while True:
+        taxonomy = {}
+        async with get_db() as db:
+            version = await _read_version(db)
+            for table, query in TAXONOMY_QUERIES.items():
+                cursor = await db.execute(query)
+                taxonomy[table] = [(row_id, name) for row_id, name in await cursor.fetchall() if name]
+            # Справочники поменялись во время чтения — перечитываем
+            if await _read_version(db) != version:
+                continue
+        keyboards = {}
+        for menu, (table, kind, back) in CARD_FORM_MENUS.items():
+            keyboards[menu] = await _build_card_form_keyboard(menu, taxonomy[table], kind, back, table in _HOUSING_FILTERED)
+        break
+    _version = version
+    _checked_at = time.monotonic()
+    _taxonomy = taxonomy
+    _names = {table: dict(rows) for table, rows in taxonomy.items()}
+    _card_form_keyboards.clear()
+    _card_form_keyboards.update(keyboards)
+    _catalog_keyboards.clear()
+
+
+async def _ensure_fresh():
+    """Перечитать снимок, если его нет или версия справочников в базе изменилась"""
+    global _checked_at
+    if _taxonomy is not None and time.monotonic() - _checked_at < TAXONOMY_VERSION_CHECK_INTERVAL:
+        return
+    async with get_db() as db:
+        version = await _read_version(db)
+    if _taxonomy is None or version != _version:
+        await load_taxonomy()
+    else:
+        _checked_at = time.monotonic()
+
+
+async def get_taxonomy(table: str) -> list:
+    """[(id, name)] справочника table по id"""
+    await _ensure_fresh()
+    return _taxonomy[table]
+
+
+async def get_taxonomy_name(table: str, item_id: int):
+    """Название значения справочника по id или None"""
+    await _ensure_fresh()
+    return _names[table].get(item_id)
+
+
+async def _build_card_form_keyboard(menu: str, rows: list, kind: str, back: str, skip_housing: bool):
+    names = sorted(name for _, name in rows)
+    value_ids = await facet_value_ids(kind, names)
+    builder = InlineKeyboardBuilder()
+    for name in names:
+        if skip_housing and name in HOUSING_CATEGORIES:
+            continue
+        builder.add(types.InlineKeyboardButton(text=name, callback_data=f"{menu}_select:{value_ids[name]}"))
+    builder.add(types.InlineKeyboardButton(text="➕ Добавить", callback_data=f"{menu}_add"))
+    builder.add(types.InlineKeyboardButton(text="⏭️ Пропустить", callback_data=f"{menu}_skip"))
+    builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data=back))
+    builder.adjust(2)
+    return builder.as_markup()
+
+
+async def card_form_keyboard(menu: str) -> types.InlineKeyboardMarkup:
+    """Клавиатура шага формы карточки: значения справочника по алфавиту, «Добавить», «Пропустить», «Назад»"""
+    await _ensure_fresh()
+    return _card_form_keyboards[menu]
+
+
+async def catalog_keyboard(catalog: str, path: tuple = ()) -> types.InlineKeyboardMarkup:
+    """
+    Клавиатура уровня каталога catalog ('tech', 'services') после выбора
+    значений path (ID назначения, типа, класса, вида)
+    """
+    await _ensure_fresh()
+    key = (catalog, *path)
+    markup = _catalog_keyboards.get(key)
+    if markup is not None:
+        return markup
+    version = _version
+
+    menu = CATALOG_MENUS[catalog]
+    levels = menu["levels"]
+    table, prefix, empty_text = levels[len(path)]
+    rows = await get_taxonomy(table)
+    path_data = "".join(f"_{item_id}" for item_id in path)
+
+    builder = InlineKeyboardBuilder()
+    if rows:
+        for item_id, name in rows:
+            builder.add(types.InlineKeyboardButton(text=name, callback_data=f"{prefix}{path_data}_{item_id}"))
+        builder.adjust(1)
+    elif empty_text:
+        builder.add(types.InlineKeyboardButton(text=empty_text, callback_data="empty"))
+    if len(path) == len(levels) - 1:
+        show_prefix, show_text = menu["show"]
+        builder.add(types.InlineKeyboardButton(text=show_text, callback_data=f"{show_prefix}{path_data}"))
+    if not path:
+        back = menu["back"]
+    elif len(path) == 1:
+        back = f"catalog_{catalog}"
+    else:
+        back = levels[len(path) - 2][1] + "".join(f"_{item_id}" for item_id in path[:-1])
+    builder.add(types.InlineKeyboardButton(text="◀️ Назад", callback_data=back))
+
+    markup = builder.as_markup()
+    if version == _version:
+        _catalog_keyboards.set(key, markup)
+    return markup
@@ -0,0 +1,209 @@
+"""
+Несколько ботов в одном процессе.
+
+Код бота написан для одного бота: токен, файл базы и URL таблиц — константы
+модуля config, bot и dp — объекты модулей bot_instance и dispatcher, многие
+функции импортируют модули проекта прямо при вызове. Поэтому каждый бот
+(tenant) получает собственный набор модулей проекта: они импортируются
+заново с переменными окружения этого бота (свой config, своя база DB_FILE,
+свои Bot и Dispatcher). После загрузки ботов в sys.modules вместо модулей
+проекта стоят заглушки, которые отдают атрибуты модуля того бота, в
+контексте которого идёт выполнение (contextvars; задачи asyncio наследуют
+контекст, в котором созданы, в том числе задачи обработки апдейтов).
+
+Общими для всех ботов процесса остаются:
+  - интерпретатор и сторонние библиотеки (aiogram, aiohttp, gspread, ...);
+  - клиент Google Sheets (sheets_gateway: один пул потоков, одна авторизация
+    сервисного аккаунта, кэш открытых таблиц);
+  - объекты, созданные через shared(): HTTP-сессия запросов к Telegram Bot
+    API и лимит одновременных задач планировщика с Google Sheets.
+
+Каждый бот описывается env-файлом с теми же переменными, что и .env одного
+бота (WOND_BOT_TOKEN, DB_FILE, WOND_SURVEY_SHEET_URL, ...); имя бота — имя
+файла. У ботов должны различаться DB_FILE, TELETHON_SESSION и (для webhook)
+WEBAPP_PORT или WEBHOOK_PATH.
+
+    python tenants.py tenants/bestsocialbot.env tenants/investmentsbot.env
+"""
+
+import asyncio
+import contextvars
+import importlib
+import importlib.util
+import os
+import resource
+import signal
+import sys
+import types
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# Модули проекта, которые импортируются один раз на процесс
+SHARED_MODULES = ("tenants", "sheets_gateway")
+
+current_tenant = contextvars.ContextVar("current_tenant", default=None)
+
+_tenants = []   # загруженные боты
+_shared = {}    # ключ -> объект, общий для всех ботов процесса
+
+
+class Tenant:
+    """Бот процесса: имя, переменные окружения, собственные модули проекта"""
+
+    def __init__(self, name: str, env: dict):
+        self.name = name
+        self.env = env
+        self.modules = {}   # имя модуля проекта -> модуль этого бота
+
+    @classmethod
+    def from_env_file(cls, path: str) -> "Tenant":
+        values = dotenv_values(path)
+        return cls(Path(path).stem, {key: value for key, value in values.items() if value is not None})
+
+    def import_module(self, name: str) -> types.ModuleType:
+        """Модуль проекта, который бот импортирует впервые уже во время работы"""
+        spec = importlib.util.spec_from_file_location(name, PROJECT_DIR / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        self.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del self.modules[name]
+            raise
+        return module
+
+
+class _TenantModule(types.ModuleType):
+    """Заглушка модуля проекта в sys.modules: атрибуты модуля текущего бота"""
+
+    def __getattr__(self, attr):
+        tenant = current_tenant.get()
+        if tenant is None or attr.startswith("__"):
+            raise AttributeError(f"Модуль {self.__name__} используется вне контекста бота (атрибут {attr})")
+        module = tenant.modules.get(self.__name__)
+        if module is None:
+            module = tenant.import_module(self.__name__)
+        return getattr(module, attr)
+
+
+def is_multi_tenant() -> bool:
+    """Работают ли в процессе несколько ботов (запуск через tenants.py)"""
+    return bool(_tenants)
+
+
+def shared(key: str, factory):
+    """Объект, общий для всех ботов процесса; создаётся factory() при первом обращении"""
+    if key not in _shared:
+        _shared[key] = factory()
+    return _shared[key]
+
+
+def shared_bot_session():
+    """HTTP-сессия Bot API: общая, если ботов несколько, иначе None (своя у Bot)"""
+    if not is_multi_tenant():
+        return None
+    from aiogram.client.session.aiohttp import AiohttpSession
+    return shared("bot_session", AiohttpSession)
+
+
+def project_module_names() -> set:
+    """Модули проекта, которые у каждого бота свои"""
+    return {path.stem for path in PROJECT_DIR.glob("*.py")} - set(SHARED_MODULES)
+
+
+def _memory_mb() -> float:
+    # ru_maxrss в Linux — в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_tenant(tenant: Tenant):
+    """Импорт модулей проекта (начиная с main) с переменными окружения бота"""
+    names = project_module_names()
+    saved_env = dict(os.environ)
+    for name in names:
+        sys.modules.pop(name, None)
+    os.environ.update(tenant.env)
+    _tenants.append(tenant)
+    token = current_tenant.set(tenant)
+    try:
+        importlib.import_module("main")
+    except Exception:
+        _tenants.remove(tenant)
+        raise
+    finally:
+        current_tenant.reset(token)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        for name in names:
+            module = sys.modules.pop(name, None)
+            if module is not None and not isinstance(module, _TenantModule):
+                tenant.modules[name] = module
+    print(f"[TENANT] {tenant.name}: загружено модулей {len(tenant.modules)}, "
+          f"память процесса {_memory_mb():.0f} МБ")
+
+
+def install_module_proxies():
+    """Заглушки модулей проекта в sys.modules для импортов во время работы"""
+    for name in project_module_names():
+        sys.modules[name] = _TenantModule(name)
+
+
+async def run_tenants(tenants: list) -> int:
+    """Запуск main.main() всех ботов в одном цикле событий"""
+    from sheets_gateway import sheets
+
+    tasks = []
+    for tenant in tenants:
+        context = contextvars.copy_context()
+        context.run(current_tenant.set, tenant)
+        tasks.append(asyncio.create_task(tenant.modules["main"].main(), name=tenant.name, context=context))
+
+    def stop():
+        for task in tasks:
+            task.cancel()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+
+    try:
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        session = _shared.get("bot_session")
+        if session is not None:
+            await session.close()
+        sheets.close()
+
+    failed = 0
+    for tenant, result in zip(tenants, results):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"[TENANT] {tenant.name}: остановлен с ошибкой {result!r}")
+        else:
+            print(f"[TENANT] {tenant.name}: остановлен")
+    return 1 if failed else 0
+
+
+def main(paths: list) -> int:
+    if not paths:
+        print("Использование: python tenants.py <env-файл бота> [<env-файл бота> ...]")
+        return 2
+    sys.path.insert(0, str(PROJECT_DIR))
+    # Клиент Google Sheets общий: импортируется до ботов, с окружением процесса
+    importlib.import_module("sheets_gateway")
+
+    tenants = [Tenant.from_env_file(path) for path in paths]
+    for tenant in tenants:
+        load_tenant(tenant)
+    install_module_proxies()
+    return asyncio.run(run_tenants(tenants))
+
+
+if __name__ == "__main__":
+    # Запуск как скрипта: модуль должен быть тем же объектом, что и при
+    # «from tenants import ...» из модулей ботов
+    sys.modules["tenants"] = sys.modules["__main__"]
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+"""
+Кэш статусов аккаунтов пользователей.
+
+Статус аккаунта проверяется на каждом сообщении и callback (IsBlockedUser,
+check_blocked_user), поэтому хранится в памяти: LRU с ограничением времени
+жизни записей. Код, который меняет account_status (синхронизация с Google
+Sheets, опрос, регистрация после капчи), сбрасывает запись через
+invalidate_user().
+"""
+
+import time
+from collections import OrderedDict
+from config import ACCOUNT_STATUS_CACHE_SIZE, ACCOUNT_STATUS_CACHE_TTL
+from db import get_db
+
+BLOCKED_STATUS = 'О'
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU-кэш с ограничением времени жизни записей"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+account_status_cache = TTLCache(ACCOUNT_STATUS_CACHE_SIZE, ACCOUNT_STATUS_CACHE_TTL)
+
+
+async def get_account_status(user_id: int):
+    """Статус аккаунта пользователя (None, если пользователя нет в базе)"""
+    status = account_status_cache.get(user_id, _MISSING)
+    if status is not _MISSING:
+        return status
+
+    async with get_db() as db:
+        cursor = await db.execute("SELECT account_status FROM users WHERE user_id = ?", (user_id,))
+        row = await cursor.fetchone()
+    status = row[0] if row else None
+    account_status_cache.set(user_id, status)
+    return status
+
+
+async def is_user_blocked(user_id: int) -> bool:
+    return await get_account_status(user_id) == BLOCKED_STATUS
+
+
+def invalidate_user(user_id: int = None):
+    """Сброс кэша для пользователя; без аргумента — для всех"""
+    if user_id is None:
+        account_status_cache.clear()
+    else:
+        account_status_cache.pop(user_id)
@@ -2,7 +2,7 @@ from aiogram import F, types
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from dispatcher import dp
-import aiosqlite
+from db import get_db
 from referral_system import generate_referral_link, get_referral_stats
 from activity_system import save_user_activity_report, calculate_activity_score, ACTIVITY_TYPES
 
@@ -49,7 +49,7 @@ async def my_activity(callback: CallbackQuery):
     user_id = callback.from_user.id
     
     # Получаем текущую активность
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         cursor = await db.execute("""
             SELECT daily_activity_points, monthly_activity_points, current_activity
             FROM users WHERE user_id = ?
@@ -1,6 +1,6 @@
 from aiogram import F, types, Router
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import aiosqlite
+from db import get_db
 from dispatcher import dp
 
 
@@ -18,7 +18,8 @@ SUB_CATEGORIES = [
     "pop_humor", "pop_reactions", "pop_reviews", "pop_lessons", "pop_stories"
 ]
 
-@dp.callback_query(lambda c: c.data in SUB_CATEGORIES or c.data.startswith("view_section_"))
+@dp.callback_query(F.data.in_(SUB_CATEGORIES))
+@dp.callback_query(F.data.startswith("view_section_"))
 async def user_view_section_posts(callback: types.CallbackQuery):
     """Просмотр постов в категории (для пользователей)"""
     
@@ -33,7 +34,7 @@ async def user_view_section_posts(callback: types.CallbackQuery):
         sub_category = callback.data
         page = 1
         
-    async with aiosqlite.connect("bot_database.db") as db:
+    async with get_db() as db:
         # Count total posts
         cursor = await db.execute("SELECT COUNT(*) FROM shop_sections WHERE sub_category = ? AND is_active = 1", (sub_category,))
         total_count = (await cursor.fetchone())[0]
@@ -2,21 +2,16 @@
 Утилиты для бота
 """
 
-import aiosqlite
+from db import get_db
+from user_cache import is_user_blocked
 from aiogram import types
 
 async def check_blocked_user(callback: types.CallbackQuery) -> bool:
     """Проверка заблокирован ли пользователь"""
     try:
-        user_id = callback.from_user.id
-        async with aiosqlite.connect("bot_database.db") as db:
-            cursor = await db.execute("SELECT account_status FROM users WHERE user_id = ?", (user_id,))
-            row = await cursor.fetchone()
-            
-            if row and row[0] == 'О':
-                await callback.answer("Ваш аккаунт заблокирован администратором.", show_alert=True)
-                return True
-        return False
+        if await is_user_blocked(callback.from_user.id):
+            await callback.answer("Ваш аккаунт заблокирован администратором.", show_alert=True)
+            return True
         return False
     except Exception as e:
         print(f"Ошибка при проверке блокировки пользователя: {e}")
@@ -33,7 +28,7 @@ async def has_active_process(user_id: int) -> bool:
         if user_id == ADMIN_ID:
             return False
 
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             # Проверка заявок
             cursor = await db.execute("""
                 SELECT 1 FROM order_requests 
@@ -66,7 +61,7 @@ async def get_active_process_details(user_id: int) -> str:
         if user_id == ADMIN_ID:
             return "Администратор (тест)"
 
-        async with aiosqlite.connect("bot_database.db") as db:
+        async with get_db() as db:
             # Проверка заявок
             cursor = await db.execute("""
                 SELECT id, title, status, item_type FROM order_requests 